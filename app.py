@@ -1,5 +1,6 @@
 import os
 import logging
+import click
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase
@@ -22,6 +23,7 @@ app.secret_key = os.environ.get("SESSION_SECRET", Config.SECRET_KEY)
 
 # Load configuration from Config class
 app.config.from_object(Config)
+Config.ensure_directories()
 
 # Configure database engine options
 app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
@@ -42,23 +44,27 @@ from controllers.auth_controller import auth_bp
 from controllers.form_controller import form_bp
 from controllers.policy_controller import policy_bp
 from controllers.admin_controller import admin_bp
+from controllers.job_controller import job_bp
 
 app.register_blueprint(auth_bp)
 app.register_blueprint(form_bp)
 app.register_blueprint(policy_bp)
 app.register_blueprint(admin_bp)
+app.register_blueprint(job_bp)
 
-# Initialize database
-with app.app_context():
-    # Import models to ensure they're registered with SQLAlchemy
-    import models
-    
-    # Create all tables
-    db.create_all()
+# Import models to ensure they're registered with SQLAlchemy
+import models
 
 # Set up login manager loader
 from models import User
 
+@app.before_request
+def tag_ai_route():
+    """Attribute model calls made while handling this request to its endpoint."""
+    from flask import request
+    from services.ai.metrics import set_ai_route
+    set_ai_route(request.endpoint)
+
 @login_manager.user_loader
 def load_user(user_id):
     return User.query.get(int(user_id))
@@ -69,5 +75,84 @@ def index():
     from flask import render_template
     return render_template('index.html')
 
+def init_db():
+    """Create all tables. Run once per deployment, not on every worker import."""
+    with app.app_context():
+        db.create_all()
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Create database tables."""
+    init_db()
+    print("Database tables created.")
+
+@app.cli.command('llm-cache')
+@click.argument('action', type=click.Choice(['stats', 'clear']))
+def llm_cache_command(action):
+    """Show statistics for, or clear, the LLM response cache."""
+    from services.ai.llm_cache import get_llm_cache
+    cache = get_llm_cache()
+    if action == 'clear':
+        cache.clear()
+        print("LLM response cache cleared.")
+    else:
+        print(cache.stats())
+
+@app.cli.command('ingest-forms')
+@click.argument('directory', type=click.Path(exists=True, file_okay=False))
+@click.option('--ext', 'extensions', multiple=True, help="File extension to include (repeatable; default docx, doc, pdf).")
+@click.option('--recursive', is_flag=True, help="Include subdirectories.")
+@click.option('--workers', default=4, show_default=True, help="Files processed in parallel.")
+@click.option('--checkpoint', 'checkpoint_path', type=click.Path(dir_okay=False),
+              help="Checkpoint file; rerun with the same one to resume (default: one per directory under uploads/).")
+@click.option('--user', 'username', help="Username of the admin recorded as the uploader.")
+def ingest_forms_command(directory, extensions, recursive, workers, checkpoint_path, username):
+    """Detect or extract every form document in DIRECTORY and add it to the forms list."""
+    import hashlib
+    from services.form.bulk_ingest import DEFAULT_EXTENSIONS, ingest_directory
+
+    directory = os.path.abspath(directory)
+    if not checkpoint_path:
+        name = f"{os.path.basename(directory)}_{hashlib.sha256(directory.encode()).hexdigest()[:8]}.jsonl"
+        checkpoint_path = os.path.join(app.config['UPLOAD_FOLDER'], 'ingest_checkpoints', name)
+    with app.app_context():
+        user_id = None
+        if username:
+            user = User.query.filter_by(username=username).first()
+            if user is None:
+                raise click.BadParameter(f"No user named {username}", param_hint='--user')
+            user_id = user.id
+        report = ingest_directory(directory, checkpoint_path, extensions or DEFAULT_EXTENSIONS,
+                                  recursive=recursive, workers=workers, user_id=user_id)
+    print('\n'.join(report.lines()))
+    print(f"Checkpoint: {checkpoint_path}")
+
+@app.cli.command('backfill-answers')
+@click.option('--batch-size', default=200, show_default=True, help="Responses converted per transaction.")
+@click.option('--rebuild', is_flag=True, help="Rewrite the answer rows of every response, not only those without any.")
+def backfill_answers_command(batch_size, rebuild):
+    """Create per-question answer rows for responses saved before they existed."""
+    from services.form.answer_store import backfill_answers
+    with app.app_context():
+        db.create_all()
+        converted = backfill_answers(batch_size=batch_size, rebuild=rebuild)
+    print(f"Answer rows written for {converted} form responses.")
+
+def warm_up():
+    """Import heavy dependencies and load the vector index and form templates ahead of the first request."""
+    import openai
+    import PyPDF2
+    import fpdf
+    from services.document.markdown_converter import get_markdown_converter
+    from services.document.vector_service import _ensure_index
+    from services.form.template_library import get_template_library
+
+    with app.app_context():
+        get_markdown_converter()
+        _ensure_index()
+    get_template_library()
+    app.logger.info("Worker warm-up complete")
+
 if __name__ == "__main__":
+    init_db()
     app.run(host="0.0.0.0", port=5000, debug=True)
@@ -0,0 +1,83 @@
+"""
+Benchmark the streaming DOCX engine against the python-docx table walk it replaced.
+
+Usage:
+    python benchmarks/docx_engine_benchmark.py [--dir attached_assets] [--repeat 5]
+
+Both readers are run over every .docx file in the directory; the engine is
+called without its per-file memo so each run is a full parse.
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.document.docx_engine import iter_docx_blocks
+
+
+def python_docx_walk(file_path):
+    """The previous extract_docx_content implementation."""
+    import docx
+
+    doc = docx.Document(file_path)
+    paragraphs = [para.text.strip() for para in doc.paragraphs if para.text.strip()]
+    tables = []
+    for table in doc.tables:
+        table_data = []
+        for row in table.rows:
+            row_data = []
+            for cell in row.cells:
+                cell_text = ""
+                for paragraph in cell.paragraphs:
+                    cell_text += paragraph.text + "\n"
+                row_data.append(cell_text.strip())
+            table_data.append(row_data)
+        tables.append(table_data)
+    return paragraphs, tables
+
+
+def streaming_engine(file_path):
+    return list(iter_docx_blocks(file_path))
+
+
+def time_reader(reader, file_path, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        reader(file_path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--dir', default='attached_assets', help='Directory containing .docx files')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per file (best time is reported)')
+    args = parser.parse_args()
+
+    files = sorted(glob.glob(os.path.join(args.dir, '*.docx')))
+    if not files:
+        print(f"No .docx files found in {args.dir}")
+        return 1
+
+    print(f"{'File':<50} {'python-docx':>12} {'engine':>10} {'speedup':>8}")
+    total_old = total_new = 0.0
+    for file_path in files:
+        old = time_reader(python_docx_walk, file_path, args.repeat)
+        new = time_reader(streaming_engine, file_path, args.repeat)
+        total_old += old
+        total_new += new
+        name = os.path.basename(file_path)[:50]
+        print(f"{name:<50} {old * 1000:>10.1f}ms {new * 1000:>8.1f}ms {old / new:>7.1f}x")
+
+    print(f"{'TOTAL':<50} {total_old * 1000:>10.1f}ms {total_new * 1000:>8.1f}ms {total_old / total_new:>7.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
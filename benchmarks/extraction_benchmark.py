@@ -0,0 +1,346 @@
+"""
+Golden-file regression and timing benchmark for every form extraction path.
+
+Usage:
+    python benchmarks/extraction_benchmark.py                      # compare against goldens and baseline
+    python benchmarks/extraction_benchmark.py --paths docx,template --file hazard
+    python benchmarks/extraction_benchmark.py --update-golden      # write draft goldens for files without one
+    python benchmarks/extraction_benchmark.py --update-baseline    # accept the current accuracy and timings
+    python benchmarks/extraction_benchmark.py --record             # call the model and record its responses
+
+Every sample form in the directory is run through each extraction path:
+
+- ``template``: predefined-template detection, as on upload
+- ``docx``: the layout parser (DOCX engine plus deterministic extractor), no model
+- ``markitdown``: MarkItDown conversion plus the markdown extraction call
+- ``model``: the full upload pipeline (``extract_form_structure``)
+
+The goldens in ``benchmarks/golden/`` are written by hand from each document,
+not from any extraction path: one entry per fillable field, in document order,
+labelled with the document's own text (see "Goldens" below). Headings and
+instructions are not fields, so extracted questions of those types are dropped
+before comparing. An extracted label counts as the golden one when it equals
+it or starts with it, so a label that keeps the document's colon, parenthetical
+or a row suffix such as "(Attendee 1)" still matches. The lists are compared in
+order (precision, recall and their F1 as accuracy; field type agreement for
+matched questions). Wall time, model calls and tokens are recorded per file
+and path. The run exits 1 when a path's accuracy drops, or its time grows,
+beyond the tolerances against ``benchmarks/golden/baseline.json``.
+
+Model calls are served from a recorded response store (the LLM cache in replay
+mode, ``benchmarks/fixtures/llm_responses.sqlite3`` by default), opened
+read-only. No store is committed yet: record one with ``--record`` and an
+``OPENAI_API_KEY`` and review it before committing it. Without it a request
+that reaches the model reports ``no-fixture``. A model path run that made no
+model call at all (the pipeline stopped at the template or the layout parser)
+reports ``no-model`` and is not scored, since it measures those paths rather
+than the model.
+
+Goldens:
+    Fields are labelled as written, without a trailing colon or an
+    instruction in parentheses. Each checklist row is a radio of its answer
+    columns, followed by a textarea when the row has a comment cell; lettered
+    items lose their letter. Each repeated blank row counts once per column.
+    Judgment calls are recorded in a golden's ``notes``. Only goldens marked
+    ``"reviewed": true`` are scored; ``--update-golden`` writes a draft from
+    the template or model path with ``"reviewed": false`` to start from.
+"""
+
+import argparse
+import difflib
+import json
+import logging
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+GOLDEN_DIR = os.path.join(ROOT, 'benchmarks', 'golden')
+BASELINE_PATH = os.path.join(GOLDEN_DIR, 'baseline.json')
+FIXTURE_PATH = os.path.join(ROOT, 'benchmarks', 'fixtures', 'llm_responses.sqlite3')
+
+PATHS = ('template', 'docx', 'markitdown', 'model')
+MODEL_PATHS = ('markitdown', 'model')
+
+# Time regressions smaller than this are treated as noise
+TIME_SLACK_SECONDS = 0.05
+
+
+def configure_environment(record, fixture_path):
+    """Point the LLM cache at the fixture store; must run before the app is imported."""
+    os.environ['LLM_CACHE_MODE'] = 'record' if record else 'replay'
+    os.environ['LLM_CACHE_PATH'] = fixture_path
+    os.environ['LLM_CACHE_TTL_SECONDS'] = '0'
+    os.environ['AI_METRICS_PERSIST'] = 'False'
+    if not record:
+        # Replayed calls never reach the API, but the client is only created with a key
+        os.environ.setdefault('OPENAI_API_KEY', 'replay-only')
+
+
+def slug(file_path):
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    return re.sub(r'[^a-z0-9]+', '_', stem.lower()).strip('_')
+
+
+# Extracted question types that are not fields
+NON_FIELD_TYPES = {'heading', 'header', 'section', 'information', 'instruction', 'instructions', 'label',
+                   'readonly', 'static', 'paragraph'}
+
+_LIST_MARKER = re.compile(r'^(?:[☐☑☒□■]\s*|\(?[a-z0-9]{1,2}[.)]\s+)')
+
+
+def normalise_text(text):
+    text = ' '.join(str(text or '').lower().replace('’', "'").split())
+    return _LIST_MARKER.sub('', text).rstrip(' :?.')
+
+
+def canonical_text(text, golden_texts):
+    """The golden label an extracted label stands for: an equal one, else the longest it starts with."""
+    if text in golden_texts:
+        return text
+    prefixes = [g for g in golden_texts if g and text.startswith(g) and not text[len(g)].isalnum()]
+    return max(prefixes, key=len) if prefixes else text
+
+
+def question_key(question):
+    """Comparable view of a question: (normalised text, field type, options)."""
+    text = question.get('question_text') or question.get('question') or question.get('label') or question.get('text')
+    field_type = question.get('field_type') or question.get('question_type') or question.get('type') or 'text'
+    return {
+        "question_text": ' '.join(str(text or '').split()),
+        "field_type": field_type,
+        "options": [str(option.get('label', option) if isinstance(option, dict) else option)
+                    for option in question.get('options') or []],
+    }
+
+
+def compare(extracted, golden):
+    """Order-aware agreement between extracted and golden question lists."""
+    extracted = [q for q in extracted if q['field_type'] not in NON_FIELD_TYPES]
+    golden_texts = [normalise_text(q['question_text']) for q in golden]
+    known = set(golden_texts)
+    extracted_texts = [canonical_text(normalise_text(q['question_text']), known) for q in extracted]
+    matcher = difflib.SequenceMatcher(None, extracted_texts, golden_texts, autojunk=False)
+    matched = 0
+    same_type = 0
+    for block in matcher.get_matching_blocks():
+        matched += block.size
+        for offset in range(block.size):
+            same_type += extracted[block.a + offset]['field_type'] == golden[block.b + offset]['field_type']
+    precision = matched / len(extracted) if extracted else 0.0
+    recall = matched / len(golden) if golden else 0.0
+    accuracy = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {
+        "precision": round(precision, 3),
+        "recall": round(recall, 3),
+        "accuracy": round(accuracy, 3),
+        "type_accuracy": round(same_type / matched, 3) if matched else 0.0,
+    }
+
+
+def run_path(path, file_path):
+    """Questions extracted by ``path``, or None when the path does not apply to the file."""
+    filename = os.path.basename(file_path)
+    if path == 'template':
+        from services.form.template_detection import detect_upload_template
+        structure = detect_upload_template(file_path, filename)
+        return None if structure is None else list(structure['questions'])
+    if path == 'docx':
+        if not file_path.lower().endswith('.docx'):
+            return None
+        from services.form.deterministic_extractor import extract_docx_fields
+        return extract_docx_fields(file_path).questions
+    if path == 'markitdown':
+        from services.document.markdown_converter import get_markdown_converter
+        from services.ai.openai_service import extract_form_fields_from_markdown
+        converted = get_markdown_converter().convert_to_markdown(file_path)
+        if not converted['success']:
+            raise RuntimeError(converted['error'])
+        return extract_form_fields_from_markdown(converted['markdown'], file_path).get('questions', [])
+    if path == 'model':
+        from services.form.form_service import extract_form_structure
+        return extract_form_structure(file_path).get('questions', [])
+    raise ValueError(f"Unknown extraction path: {path}")
+
+
+def measure(path, file_path, repeat):
+    """Run one path on one file; returns its questions, best wall time, and model calls and tokens."""
+    from services.ai.llm_cache import LLMCacheMiss
+    from services.ai.metrics import ai_route, get_ai_metrics
+
+    route = f"benchmark:{path}:{os.path.basename(file_path)}"
+    best = None
+    questions = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with ai_route(route):
+            questions = run_path(path, file_path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    usage = get_ai_metrics().snapshot()['routes'].get(route, {})
+    if usage.get('errors'):
+        # The pipelines degrade rather than fail when a call fails; a partial result is not a measurement
+        if os.environ.get('LLM_CACHE_MODE') == 'replay':
+            raise LLMCacheMiss(f"{usage['errors']} model call(s) had no recorded response")
+        raise RuntimeError(f"{usage['errors']} model call(s) failed")
+    calls = usage.get('calls', 0) // repeat
+    tokens = (usage.get('prompt_tokens', 0) + usage.get('completion_tokens', 0)) // repeat
+    return questions, best, calls, tokens
+
+
+def load_json(path, default):
+    if not os.path.exists(path):
+        return default
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=1, ensure_ascii=False)
+        f.write('\n')
+
+
+def regressions(name, path, result, baseline, accuracy_tolerance, time_tolerance):
+    expected = baseline.get(name, {}).get(path)
+    if not expected or result.get('accuracy') is None:
+        return []
+    problems = []
+    if result['accuracy'] < expected['accuracy'] - accuracy_tolerance:
+        problems.append(f"{name} [{path}]: accuracy {result['accuracy']:.3f} < baseline {expected['accuracy']:.3f}")
+    limit = expected['seconds'] * (1 + time_tolerance)
+    if result['seconds'] > limit and result['seconds'] - expected['seconds'] > TIME_SLACK_SECONDS:
+        problems.append(f"{name} [{path}]: {result['seconds']:.3f}s > baseline {expected['seconds']:.3f}s "
+                        f"+{time_tolerance:.0%}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dir', default=os.path.join(ROOT, 'attached_assets'), help='Directory of sample forms')
+    parser.add_argument('--paths', default=','.join(PATHS), help='Comma-separated extraction paths to run')
+    parser.add_argument('--file', help='Only run samples whose file name contains this text')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per file and path (best time is reported)')
+    parser.add_argument('--fixtures', default=FIXTURE_PATH, help='Recorded model response store')
+    parser.add_argument('--record', action='store_true', help='Call the model and record its responses')
+    parser.add_argument('--update-golden', action='store_true', help='Write draft goldens for samples without one')
+    parser.add_argument('--force', action='store_true', help='With --update-golden, overwrite existing goldens')
+    parser.add_argument('--update-baseline', action='store_true', help='Store this run as the baseline')
+    parser.add_argument('--accuracy-tolerance', type=float, default=0.02)
+    parser.add_argument('--time-tolerance', type=float, default=0.5, help='Allowed relative slowdown')
+    parser.add_argument('--json', help='Also write the full results to this file')
+    args = parser.parse_args()
+
+    paths = [path.strip() for path in args.paths.split(',') if path.strip()]
+    unknown = set(paths) - set(PATHS)
+    if unknown:
+        parser.error(f"unknown paths: {', '.join(sorted(unknown))}")
+
+    configure_environment(args.record, args.fixtures)
+    from app import app
+    from services.ai.llm_cache import LLMCacheMiss
+    from services.form.bulk_ingest import DEFAULT_EXTENSIONS, find_form_files
+
+    # Failures are reported in the table; the pipelines' own logging would bury it
+    logging.disable(logging.CRITICAL)
+
+    files = [f for f in find_form_files(args.dir, DEFAULT_EXTENSIONS)
+             if not args.file or args.file.lower() in os.path.basename(f).lower()]
+    if not files:
+        print(f"No sample forms found in {args.dir}")
+        return 1
+    if not args.record and not os.path.exists(args.fixtures) and set(paths) & set(MODEL_PATHS):
+        print(f"No recorded model responses at {args.fixtures}; model paths will report no-fixture")
+
+    baseline = load_json(BASELINE_PATH, {})
+    results = {}
+    problems = []
+    width = min(max(len(os.path.basename(f)) for f in files), 50)
+    print(f"{'File':<{width}} {'Path':<10} {'Status':<10} {'Qs':>4} {'Acc':>6} {'Type':>6} {'Secs':>8} "
+          f"{'Calls':>5} {'Tokens':>7}")
+
+    with app.app_context():
+        for file_path in files:
+            name = slug(file_path)
+            golden_path = os.path.join(GOLDEN_DIR, f"{name}.json")
+            golden = load_json(golden_path, None)
+            results[name] = {}
+            for path in paths:
+                result = {"status": 'ok', "questions": 0, "accuracy": None, "seconds": 0.0, "calls": 0, "tokens": 0}
+                try:
+                    questions, seconds, calls, tokens = measure(path, file_path, args.repeat)
+                    result.update(seconds=round(seconds, 4), calls=calls, tokens=tokens)
+                    if questions is None:
+                        result['status'] = 'n/a'
+                    else:
+                        extracted = [question_key(q) for q in questions]
+                        result['questions'] = len(extracted)
+                        result['extracted'] = extracted
+                        if path in MODEL_PATHS and not calls:
+                            result['status'] = 'no-model'
+                        elif golden is None:
+                            result['status'] = 'no-golden'
+                        elif not golden.get('reviewed'):
+                            result['status'] = 'unreviewed'
+                        else:
+                            result.update(compare(extracted, golden['questions']))
+                except Exception as e:
+                    missing_fixture = isinstance(e, LLMCacheMiss) or 'no recorded response' in str(e).lower()
+                    result.update(status='no-fixture' if missing_fixture else 'error', error=str(e)[:200])
+                results[name][path] = result
+                problems.extend(regressions(name, path, result, baseline,
+                                            args.accuracy_tolerance, args.time_tolerance))
+                accuracy = f"{result['accuracy']:.3f}" if result['accuracy'] is not None else '-'
+                type_accuracy = f"{result['type_accuracy']:.3f}" if result.get('type_accuracy') is not None else '-'
+                print(f"{os.path.basename(file_path)[:width]:<{width}} {path:<10} {result['status']:<10} "
+                      f"{result['questions']:>4} {accuracy:>6} {type_accuracy:>6} {result['seconds']:>8.3f} "
+                      f"{result['calls']:>5} {result['tokens']:>7}")
+                if result['status'] == 'error':
+                    print(f"    {result['error']}")
+
+            if args.update_golden and (golden is None or args.force):
+                source = next((path for path in ('template', 'model')
+                               if results[name].get(path, {}).get('extracted')), None)
+                if source:
+                    write_json(golden_path, {"source": os.path.basename(file_path), "from": source,
+                                             "reviewed": False,
+                                             "questions": results[name][source]['extracted']})
+                    print(f"    wrote draft golden {os.path.relpath(golden_path, ROOT)} from the {source} path; "
+                          f"check it against the document and mark it reviewed")
+
+    print()
+    for path in paths:
+        scored = [r[path] for r in results.values() if r.get(path, {}).get('accuracy') is not None]
+        ran = [r[path] for r in results.values() if r.get(path, {}).get('status') not in ('n/a', 'no-fixture')]
+        mean = sum(r['accuracy'] for r in scored) / len(scored) if scored else 0.0
+        print(f"{path:<10} {len(ran):>3} files  mean accuracy {mean:.3f} over {len(scored)} goldens  "
+              f"{sum(r['seconds'] for r in ran):.2f}s  {sum(r['calls'] for r in ran)} model calls  "
+              f"{sum(r['tokens'] for r in ran)} tokens")
+
+    if args.json:
+        write_json(args.json, results)
+
+    if args.update_baseline:
+        for name, by_path in results.items():
+            for path, result in by_path.items():
+                if result.get('accuracy') is not None:
+                    baseline.setdefault(name, {})[path] = {"accuracy": result['accuracy'], "seconds": result['seconds']}
+        write_json(BASELINE_PATH, baseline)
+        print(f"Baseline written to {os.path.relpath(BASELINE_PATH, ROOT)}")
+        return 0
+
+    if problems:
+        print("\nRegressions:")
+        for problem in problems:
+            print(f"  {problem}")
+        return 1
+    print("\nNo regressions against the baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""
+Measure worker cold-start cost: the time to import the WSGI app in a fresh interpreter.
+
+Usage:
+    python benchmarks/startup_benchmark.py [--repeat 5] [--warm-up]
+
+Each run spawns a new Python process that imports ``main`` (what gunicorn does
+per worker) and reports which heavy dependencies were loaded as a side effect.
+With ``--warm-up`` the explicit warm-up hook is timed as well.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ['faiss', 'numpy', 'markitdown', 'openai', 'PyPDF2', 'fpdf']
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+import_seconds = time.perf_counter() - start
+loaded = [name for name in {heavy!r} if name in sys.modules]
+warm_up_seconds = None
+if {warm_up!r}:
+    start = time.perf_counter()
+    main.app.logger.disabled = True
+    from app import warm_up
+    warm_up()
+    warm_up_seconds = time.perf_counter() - start
+print(json.dumps({{"import": import_seconds, "warm_up": warm_up_seconds, "loaded": loaded}}))
+"""
+
+
+def run_once(warm_up):
+    code = PROBE.format(heavy=HEAVY_MODULES, warm_up=warm_up)
+    result = subprocess.run(
+        [sys.executable, '-c', code],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help='Number of fresh processes to start')
+    parser.add_argument('--warm-up', action='store_true', help='Also time the warm_up() hook')
+    args = parser.parse_args()
+
+    runs = [run_once(args.warm_up) for _ in range(args.repeat)]
+    imports = [run['import'] * 1000 for run in runs]
+
+    print(f"import main   min {min(imports):8.1f}ms   median {statistics.median(imports):8.1f}ms")
+    if args.warm_up:
+        warm_ups = [run['warm_up'] * 1000 for run in runs]
+        print(f"warm_up()     min {min(warm_ups):8.1f}ms   median {statistics.median(warm_ups):8.1f}ms")
+    loaded = runs[-1]['loaded']
+    print(f"Heavy modules loaded by import: {', '.join(loaded) if loaded else 'none'}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -28,15 +28,82 @@ class Config:
     # Vector DB settings
     VECTOR_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'vector_db')
     
-    # Make sure the upload and vector DB directories exist
-    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-    os.makedirs(VECTOR_DB_PATH, exist_ok=True)
-    
     # Create subdirectories for different file types
     FORM_UPLOAD_FOLDER = os.path.join(UPLOAD_FOLDER, 'forms')
     DOCUMENT_UPLOAD_FOLDER = os.path.join(UPLOAD_FOLDER, 'documents')
     PDF_OUTPUT_FOLDER = os.path.join(UPLOAD_FOLDER, 'pdf_outputs')
-    
-    os.makedirs(FORM_UPLOAD_FOLDER, exist_ok=True)
-    os.makedirs(DOCUMENT_UPLOAD_FOLDER, exist_ok=True)
-    os.makedirs(PDF_OUTPUT_FOLDER, exist_ok=True)
+
+
+    # Scanned PDF OCR settings
+    OCR_CACHE_FOLDER = os.path.join(UPLOAD_FOLDER, 'ocr_cache')
+    OCR_MAX_CONCURRENCY = int(os.environ.get('OCR_MAX_CONCURRENCY', 4))
+    OCR_RENDER_DPI = int(os.environ.get('OCR_RENDER_DPI', 150))
+    OCR_MAX_IMAGE_DIMENSION = int(os.environ.get('OCR_MAX_IMAGE_DIMENSION', 2048))
+    OCR_TEXT_PAGE_MIN_CHARS = int(os.environ.get('OCR_TEXT_PAGE_MIN_CHARS', 50))
+
+    # Form extraction pipeline: concurrent passes and a per-upload wall-clock budget
+    FORM_PIPELINE_MAX_WORKERS = int(os.environ.get('FORM_PIPELINE_MAX_WORKERS', 4))
+    FORM_PIPELINE_BUDGET_SECONDS = float(os.environ.get('FORM_PIPELINE_BUDGET_SECONDS', 120))
+
+    # Long forms are split into sections of at most this many tokens and extracted concurrently
+    FORM_SECTION_MAX_TOKENS = int(os.environ.get('FORM_SECTION_MAX_TOKENS', 2500))
+    FORM_SECTION_MAX_CONCURRENCY = int(os.environ.get('FORM_SECTION_MAX_CONCURRENCY', 4))
+
+    # Fields read off the document layout are used without a model call at or above this confidence
+    FORM_DETERMINISTIC_MIN_CONFIDENCE = float(os.environ.get('FORM_DETERMINISTIC_MIN_CONFIDENCE', 0.8))
+
+    # Verification passes are skipped when the extracted questions cover at least this share of the
+    # field-like lines in the source (set above 1 to always verify)
+    COMPLETENESS_GATE_THRESHOLD = float(os.environ.get('COMPLETENESS_GATE_THRESHOLD', 0.9))
+
+    # Uploads whose structure is at least this similar to an existing form reuse its extraction
+    FORM_FINGERPRINT_MIN_SIMILARITY = float(os.environ.get('FORM_FINGERPRINT_MIN_SIMILARITY', 0.8))
+
+    # Compiled form structures kept per worker process for the fill, save and submit endpoints
+    FORM_STRUCTURE_CACHE_SIZE = int(os.environ.get('FORM_STRUCTURE_CACHE_SIZE', 256))
+
+    # Background job pool (per worker process); failed attempts are retried with exponential backoff.
+    # Running jobs send a heartbeat every JOB_HEARTBEAT_SECONDS, and jobs without one for
+    # JOB_STALE_SECONDS (their worker died) are requeued by a periodic sweep
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+    JOB_RETRY_BACKOFF_SECONDS = float(os.environ.get('JOB_RETRY_BACKOFF_SECONDS', 30))
+    JOB_HEARTBEAT_SECONDS = float(os.environ.get('JOB_HEARTBEAT_SECONDS', 15))
+    JOB_STALE_SECONDS = int(os.environ.get('JOB_STALE_SECONDS', 120))
+    # Attempts at rendering and emailing a submitted form before its job is marked failed
+    SUBMISSION_JOB_MAX_ATTEMPTS = int(os.environ.get('SUBMISSION_JOB_MAX_ATTEMPTS', 3))
+
+    # LLM response cache (modes: readwrite, off, record, replay)
+    LLM_CACHE_MODE = os.environ.get('LLM_CACHE_MODE', 'readwrite')
+    LLM_CACHE_PATH = os.environ.get('LLM_CACHE_PATH', os.path.join(UPLOAD_FOLDER, 'llm_cache', 'responses.sqlite3'))
+    LLM_CACHE_TTL_SECONDS = int(os.environ.get('LLM_CACHE_TTL_SECONDS', 7 * 24 * 3600))
+    LLM_CACHE_MAX_BYTES = int(os.environ.get('LLM_CACHE_MAX_BYTES', 200 * 1024 * 1024))
+
+    # OpenAI rate limits (shared by all workers on the host), retries and circuit breaker
+    AI_RATE_LIMIT_PATH = os.environ.get('AI_RATE_LIMIT_PATH', os.path.join(UPLOAD_FOLDER, 'llm_cache', 'rate_limits.sqlite3'))
+    AI_REQUESTS_PER_MINUTE = int(os.environ.get('AI_REQUESTS_PER_MINUTE', 500))
+    AI_TOKENS_PER_MINUTE = int(os.environ.get('AI_TOKENS_PER_MINUTE', 300000))
+    AI_MAX_RETRIES = int(os.environ.get('AI_MAX_RETRIES', 4))
+    AI_BACKOFF_BASE_SECONDS = float(os.environ.get('AI_BACKOFF_BASE_SECONDS', 1.0))
+    AI_BACKOFF_MAX_SECONDS = float(os.environ.get('AI_BACKOFF_MAX_SECONDS', 30.0))
+    AI_CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get('AI_CIRCUIT_FAILURE_THRESHOLD', 5))
+    AI_CIRCUIT_RESET_SECONDS = int(os.environ.get('AI_CIRCUIT_RESET_SECONDS', 30))
+
+    # AI call scheduling: shared concurrency limit and per-priority-class limits
+    AI_MAX_CONCURRENT_CALLS = int(os.environ.get('AI_MAX_CONCURRENT_CALLS', 8))
+    AI_INTERACTIVE_CONCURRENCY = int(os.environ.get('AI_INTERACTIVE_CONCURRENCY', 8))
+    AI_UPLOAD_CONCURRENCY = int(os.environ.get('AI_UPLOAD_CONCURRENCY', 6))
+    AI_BATCH_CONCURRENCY = int(os.environ.get('AI_BATCH_CONCURRENCY', 3))
+
+    # AI call accounting: rolling window for /admin/ai/metrics, and whether to store raw records
+    AI_METRICS_WINDOW_SECONDS = int(os.environ.get('AI_METRICS_WINDOW_SECONDS', 3600))
+    AI_METRICS_PERSIST = os.environ.get('AI_METRICS_PERSIST', 'True') == 'True'
+
+    # Import heavy dependencies (AI SDK, document converters, vector index) when a worker starts
+    WARM_UP_ON_START = os.environ.get('WARM_UP_ON_START', 'False') == 'True'
+
+    @classmethod
+    def ensure_directories(cls):
+        """Create the upload, output and vector DB directories if they do not exist."""
+        for folder in (cls.UPLOAD_FOLDER, cls.VECTOR_DB_PATH, cls.FORM_UPLOAD_FOLDER,
+                       cls.DOCUMENT_UPLOAD_FOLDER, cls.PDF_OUTPUT_FOLDER, cls.OCR_CACHE_FOLDER):
+            os.makedirs(folder, exist_ok=True)
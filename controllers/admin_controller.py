@@ -1,9 +1,14 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, send_file
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, send_file, Response
 from flask_login import login_required, current_user
+from sqlalchemy.orm import joinedload
 from datetime import datetime
+import csv
+import io
 import os
 from app import db
 from models import User, Form, FormResponse
+from services.form.answer_store import ANSWER_MATCHES, answer_filter, answers_by_response, stored_question_id
+from services.form.structure_cache import get_compiled_form, question_text
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
@@ -46,20 +51,23 @@ def toggle_admin(user_id):
         db.session.rollback()
         return jsonify({'success': False, 'message': f'Error: {str(e)}'}), 500
 
-@admin_bp.route('/submissions', methods=['GET'])
-@login_required
-def form_submissions():
-    """View all form submissions across the system"""
-    if not current_user.is_admin:
-        flash('You do not have permission to access the admin panel', 'danger')
-        return redirect(url_for('index'))
-    
+def _csv_cell(value):
+    """Prefix text a spreadsheet would read as a formula, so an exported answer cannot run as one"""
+    if isinstance(value, str) and value.startswith(('=', '+', '-', '@', '\t', '\r')):
+        return "'" + value
+    return value
+
+def _filtered_submissions():
+    """Submissions query for the filters in the request's query string, and the filters as applied"""
     # Filter parameters
     form_id = request.args.get('form_id', type=int)
     user_id = request.args.get('user_id', type=int)
     status = request.args.get('status')
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
+    question_id = request.args.get('question_id') if form_id else None
+    answer = request.args.get('answer', '').strip()
+    answer_match = request.args.get('answer_match') if request.args.get('answer_match') in ANSWER_MATCHES else 'equals'
     
     # Base query
     query = FormResponse.query
@@ -74,6 +82,10 @@ def form_submissions():
     elif status == 'incomplete':
         query = query.filter(FormResponse.is_complete == False)
     
+    # Answer filter, run in SQL against the per-question answer rows
+    if question_id and answer:
+        query = query.filter(answer_filter(form_id, question_id, answer, answer_match))
+    
     # Add option to filter by deleted forms
     deleted_status = request.args.get('deleted_status')
     if deleted_status == 'only_active':
@@ -95,26 +107,99 @@ def form_submissions():
         except ValueError:
             pass
     
+    query = query.order_by(FormResponse.submitted_at.desc().nulls_last(), FormResponse.updated_at.desc())
+    return query, {
+        'form_id': form_id,
+        'user_id': user_id,
+        'status': status,
+        'start_date': start_date,
+        'end_date': end_date,
+        'deleted_status': deleted_status,
+        'question_id': question_id,
+        'answer': answer,
+        'answer_match': answer_match
+    }
+
+@admin_bp.route('/submissions', methods=['GET'])
+@login_required
+def form_submissions():
+    """View all form submissions across the system"""
+    if not current_user.is_admin:
+        flash('You do not have permission to access the admin panel', 'danger')
+        return redirect(url_for('index'))
+    
     # Get all form submissions with related form and user data
-    submissions = query.order_by(FormResponse.submitted_at.desc().nulls_last(), 
-                               FormResponse.updated_at.desc()).all()
+    query, selected_filters = _filtered_submissions()
+    submissions = query.all()
     
     # Get lists for filter dropdowns
     forms = Form.query.order_by(Form.title).all()
     users = User.query.order_by(User.username).all()
     
+    # Questions of the selected form, for the answer filter
+    questions = []
+    if selected_filters['form_id']:
+        form = Form.query.get(selected_filters['form_id'])
+        if form and form.structure:
+            questions = [q for q in get_compiled_form(form).questions if q.get('id')]
+    
     return render_template('admin/form_submissions.html', 
                           submissions=submissions, 
                           forms=forms,
                           users=users,
-                          selected_filters={
-                              'form_id': form_id,
-                              'user_id': user_id,
-                              'status': status,
-                              'start_date': start_date,
-                              'end_date': end_date,
-                              'deleted_status': deleted_status
-                          })
+                          questions=questions,
+                          selected_filters=selected_filters)
+
+@admin_bp.route('/submissions/export.csv', methods=['GET'])
+@login_required
+def export_submissions():
+    """
+    Export the filtered submissions as CSV. With a form selected, each question is a column;
+    otherwise each answer is a row. Answers are read from the per-question answer rows.
+    """
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'message': 'Permission denied'}), 403
+    
+    query, selected_filters = _filtered_submissions()
+    submissions = query.options(joinedload(FormResponse.form), joinedload(FormResponse.user)).all()
+    answers = answers_by_response([s.id for s in submissions])
+    
+    questions = []
+    if selected_filters['form_id']:
+        form = Form.query.get(selected_filters['form_id'])
+        if form and form.structure:
+            questions = [(q['id'], question_text(q)) for q in get_compiled_form(form).questions if q.get('id')]
+    
+    def rows():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        base = ['Submission ID', 'Form', 'User', 'Status', 'Created', 'Submitted']
+        header = base + [text for _, text in questions] if questions else base + ['Question ID', 'Answer']
+        writer.writerow([_csv_cell(cell) for cell in header])
+        for submission in submissions:
+            details = [
+                submission.id,
+                submission.form.title,
+                submission.user.username,
+                {'complete': 'Completed', 'processing': 'Processing'}.get(submission.status, 'In Progress'),
+                submission.created_at.isoformat() if submission.created_at else '',
+                submission.submitted_at.isoformat() if submission.submitted_at else ''
+            ]
+            submission_answers = answers.get(submission.id, {})
+            if questions:
+                cells = details + ['; '.join(submission_answers.get(stored_question_id(qid), [])) for qid, _ in questions]
+                writer.writerow([_csv_cell(cell) for cell in cells])
+            else:
+                for qid, values in submission_answers.items():
+                    writer.writerow([_csv_cell(cell) for cell in details + [qid, '; '.join(values)]])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+        yield buffer.getvalue()
+    
+    filename = f"submissions_{datetime.utcnow().strftime('%Y%m%d%H%M%S')}.csv"
+    return Response(rows(), mimetype='text/csv',
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
 
 @admin_bp.route('/submissions/<int:response_id>/download-pdf', methods=['GET'])
 @login_required
@@ -141,4 +226,31 @@ def download_submission_pdf(response_id):
         response.pdf_path,
         as_attachment=True,
         download_name=f"{safe_form_title}_{username}_{response.id}.pdf"
-    )
\ No newline at end of file
+    )
+
+@admin_bp.route('/ai/scheduler', methods=['GET'])
+@login_required
+def ai_scheduler_stats():
+    """Queue depth, concurrency and wait times for AI calls per priority class"""
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'message': 'Permission denied'}), 403
+    
+    from services.ai.scheduler import get_scheduler
+    return jsonify({'success': True, 'scheduler': get_scheduler().stats()})
+
+@admin_bp.route('/ai/metrics', methods=['GET'])
+@login_required
+def ai_metrics():
+    """Token, latency and cost summaries for recent AI calls, per route and per stage"""
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'message': 'Permission denied'}), 403
+    
+    from services.ai.metrics import get_ai_metrics
+    from services.form.completeness import get_completeness_stats
+    from services.ai.prompt_compaction import get_compaction_stats
+    return jsonify({
+        'success': True,
+        'metrics': get_ai_metrics().snapshot(),
+        'completeness_gate': get_completeness_stats().snapshot(),
+        'prompt_compaction': get_compaction_stats().snapshot()
+    })
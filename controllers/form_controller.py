@@ -6,9 +6,14 @@ from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
 from app import db
 from models import Form, FormResponse
-from services.form.form_service import extract_form_structure, validate_form_submission
-from services.form.pdf_service import generate_pdf_from_form
-from services.email_service import send_form_email
+from services.form.form_service import (fingerprint_form_file, extract_form_structure_reusing_matches,
+                                       describe_form_match, answers_etag, apply_merge_patch)
+from services.form.fingerprint import save_form_fingerprint
+from services.form.structure_cache import get_compiled_form
+from services.form.answer_store import sync_response_answers
+from services.form.template_detection import detect_upload_template
+from services.jobs.job_queue import get_job_queue, job_to_dict
+from services.ai.scheduler import ai_priority
 
 form_bp = Blueprint('form', __name__, url_prefix='/forms')
 
@@ -40,6 +45,7 @@ def form_list():
 
 @form_bp.route('/upload', methods=['GET', 'POST'])
 @login_required
+@ai_priority('upload')
 def upload_form():
     if not current_user.is_admin:
         flash('Only administrators can upload forms', 'danger')
@@ -95,454 +101,30 @@ def upload_form():
         current_app.logger.info(f"Uploaded By: {current_user.username} (ID: {current_user.id})")
         current_app.logger.info("=" * 50)
         
-        # Variable to hold form structure
-        form_structure = None
-        questions_count = 0
-        
-        try:
-            # Flag to track if we should use OpenAI extraction
-            use_openai_extraction = True
-            current_app.logger.info("Starting form type detection to determine extraction method...")
-            
-            # Special case for the Incident Form
-            if "incident" in filename.lower() or (file_extension.lower() in ["docx"] and filename.lower().find("incident") != -1):
-                current_app.logger.info("Detected an incident form upload, checking if we should use specialized template")
-                # Import directly here to avoid circular imports
-                from services.form.incident_form_template import get_incident_form_template, is_incident_form
-                
-                # For docx files, we immediately use the template
-                if filename.lower().endswith(".docx"):
-                    current_app.logger.info("Using incident form template for .docx file")
-                    form_structure = {
-                        "questions": get_incident_form_template()
-                    }
-                    questions_count = len(form_structure.get('questions', []))
-                    current_app.logger.info(f"Using incident form template with {questions_count} fields")
-                    use_openai_extraction = False
-                # For other file types, we try to extract content and check if it looks like an incident form
-                else:
-                    try:
-                        # Try to extract text content if applicable
-                        from services.document.document_service import extract_text_from_file
-                        content = extract_text_from_file(file_path)
-                        if content and is_incident_form(content):
-                            current_app.logger.info("Detected incident form content, using specialized template")
-                            form_structure = {
-                                "questions": get_incident_form_template()
-                            }
-                            questions_count = len(form_structure.get('questions', []))
-                            current_app.logger.info(f"Using incident form template with {questions_count} fields")
-                            use_openai_extraction = False
-                        else:
-                            # Not an incident form or couldn't extract content, proceed to normal extraction
-                            current_app.logger.info("Content doesn't appear to be an incident form, proceeding with normal extraction")
-                    except Exception as e:
-                        current_app.logger.info(f"Error checking if file is an incident form: {str(e)}")
-            
-            # Special case for the Act as an Advocate Form
-            elif "advocate" in filename.lower() or "act as an advocate" in filename.lower():
-                current_app.logger.info("Detected an Act as an Advocate form upload, using specialized template")
-                # Import directly here to avoid circular imports
-                from services.form.advocate_form_template import get_advocate_form_template, is_advocate_form
-                
-                # For docx files, we immediately use the template
-                if filename.lower().endswith(".docx"):
-                    current_app.logger.info("Using advocate form template for .docx file")
-                    form_structure = {
-                        "questions": get_advocate_form_template()
-                    }
-                    questions_count = len(form_structure.get('questions', []))
-                    current_app.logger.info(f"Using advocate form template with {questions_count} fields")
-                    use_openai_extraction = False
-                # For other file types, we try to extract content and check if it looks like an advocate form
-                else:
-                    try:
-                        # Try to extract text content if applicable
-                        from services.document.document_service import extract_text_from_file
-                        content = extract_text_from_file(file_path)
-                        if content and is_advocate_form(content):
-                            current_app.logger.info("Detected advocate form content, using specialized template")
-                            form_structure = {
-                                "questions": get_advocate_form_template()
-                            }
-                            questions_count = len(form_structure.get('questions', []))
-                            current_app.logger.info(f"Using advocate form template with {questions_count} fields")
-                            use_openai_extraction = False
-                        else:
-                            # Not an advocate form or couldn't extract content, proceed to normal extraction
-                            current_app.logger.info("Content doesn't appear to be an advocate form, proceeding with normal extraction")
-                    except Exception as e:
-                        current_app.logger.info(f"Error checking if file is an advocate form: {str(e)}")
-                        
-            # Special case for the Complaints Form
-            elif "complaint" in filename.lower() or "complaints form" in filename.lower():
-                current_app.logger.info("Detected a Complaints Form upload, using specialized template")
-                # Import directly here to avoid circular imports
-                from services.form.complaints_form_template import get_complaints_form_template, is_complaints_form
-                
-                # For docx files, we immediately use the template
-                if filename.lower().endswith(".docx"):
-                    current_app.logger.info("Using complaints form template for .docx file")
-                    form_structure = {
-                        "questions": get_complaints_form_template()
-                    }
-                    questions_count = len(form_structure.get('questions', []))
-                    current_app.logger.info(f"Using complaints form template with {questions_count} fields")
-                    use_openai_extraction = False
-                # For other file types, we try to extract content and check if it looks like a complaints form
-                else:
-                    try:
-                        # Try to extract text content if applicable
-                        from services.document.document_service import extract_text_from_file
-                        content = extract_text_from_file(file_path)
-                        if content and is_complaints_form(content):
-                            current_app.logger.info("Detected complaints form content, using specialized template")
-                            form_structure = {
-                                "questions": get_complaints_form_template()
-                            }
-                            questions_count = len(form_structure.get('questions', []))
-                            current_app.logger.info(f"Using complaints form template with {questions_count} fields")
-                            use_openai_extraction = False
-                        else:
-                            # Not a complaints form or couldn't extract content, proceed to normal extraction
-                            current_app.logger.info("Content doesn't appear to be a complaints form, proceeding with normal extraction")
-                    except Exception as e:
-                        current_app.logger.info(f"Error checking if file is a complaints form: {str(e)}")
-                        
-            # Special case for the Conflict of Interest Form
-            elif "conflict" in filename.lower() or "conflict of interest" in filename.lower():
-                current_app.logger.info("Detected a Conflict of Interest Form upload, using specialized template")
-                # Import directly here to avoid circular imports
-                from services.form.conflict_form_template import get_conflict_form_template, is_conflict_form
-                
-                # For docx files, we immediately use the template
-                if filename.lower().endswith(".docx"):
-                    current_app.logger.info("Using conflict form template for .docx file")
-                    form_structure = {
-                        "questions": get_conflict_form_template()
-                    }
-                    questions_count = len(form_structure.get('questions', []))
-                    current_app.logger.info(f"Using conflict form template with {questions_count} fields")
-                    use_openai_extraction = False
-                # For other file types, we try to extract content and check if it looks like a conflict form
-                else:
-                    try:
-                        # Try to extract text content if applicable
-                        from services.document.document_service import extract_text_from_file
-                        content = extract_text_from_file(file_path)
-                        if content and is_conflict_form(content):
-                            current_app.logger.info("Detected conflict form content, using specialized template")
-                            form_structure = {
-                                "questions": get_conflict_form_template()
-                            }
-                            questions_count = len(form_structure.get('questions', []))
-                            current_app.logger.info(f"Using conflict form template with {questions_count} fields")
-                            use_openai_extraction = False
-                        else:
-                            # Not a conflict form or couldn't extract content, proceed to normal extraction
-                            current_app.logger.info("Content doesn't appear to be a conflict form, proceeding with normal extraction")
-                    except Exception as e:
-                        current_app.logger.info(f"Error checking if file is a conflict form: {str(e)}")
-                        
-            # Special case for the Feedback Form
-            elif "feedback" in filename.lower() or "feedback form" in filename.lower():
-                current_app.logger.info("Detected a Feedback Form upload, using specialized template")
-                # Import directly here to avoid circular imports
-                from services.form.feedback_form_template import get_feedback_form_template, is_feedback_form
-                
-                # For docx files, we immediately use the template
-                if filename.lower().endswith(".docx"):
-                    current_app.logger.info("Using feedback form template for .docx file")
-                    form_structure = {
-                        "questions": get_feedback_form_template()
-                    }
-                    questions_count = len(form_structure.get('questions', []))
-                    current_app.logger.info(f"Using feedback form template with {questions_count} fields")
-                    use_openai_extraction = False
-                # For other file types, we try to extract content and check if it looks like a feedback form
-                else:
-                    try:
-                        # Try to extract text content if applicable
-                        from services.document.document_service import extract_text_from_file
-                        content = extract_text_from_file(file_path)
-                        if content and is_feedback_form(content):
-                            current_app.logger.info("Detected feedback form content, using specialized template")
-                            form_structure = {
-                                "questions": get_feedback_form_template()
-                            }
-                            questions_count = len(form_structure.get('questions', []))
-                            current_app.logger.info(f"Using feedback form template with {questions_count} fields")
-                            use_openai_extraction = False
-                        else:
-                            # Not a feedback form or couldn't extract content, proceed to normal extraction
-                            current_app.logger.info("Content doesn't appear to be a feedback form, proceeding with normal extraction")
-                    except Exception as e:
-                        current_app.logger.info(f"Error checking if file is a feedback form: {str(e)}")
-                        
-            # Check for Meeting Minutes
-            elif "meeting minutes" in filename.lower() or "meeting_minutes" in filename.lower():
-                current_app.logger.info("Detected a Meeting Minutes upload, using specialized template")
-                # Import directly here to avoid circular imports
-                from services.form.meeting_minutes_template import get_meeting_minutes_template, is_meeting_minutes
-                
-                # For docx files, we immediately use the template
-                if filename.lower().endswith(".docx"):
-                    current_app.logger.info("Using meeting minutes template for .docx file")
-                    form_structure = {
-                        "questions": get_meeting_minutes_template()
-                    }
-                    questions_count = len(form_structure.get('questions', []))
-                    current_app.logger.info(f"Using meeting minutes template with {questions_count} fields")
-                    use_openai_extraction = False
-                # For other file types, we try to extract content and check if it looks like meeting minutes
-                else:
-                    try:
-                        # Try to extract text content if applicable
-                        from services.document.document_service import extract_text_from_file
-                        content = extract_text_from_file(file_path)
-                        if content and is_meeting_minutes(content):
-                            current_app.logger.info("Detected meeting minutes content, using specialized template")
-                            form_structure = {
-                                "questions": get_meeting_minutes_template()
-                            }
-                            questions_count = len(form_structure.get('questions', []))
-                            current_app.logger.info(f"Using meeting minutes template with {questions_count} fields")
-                            use_openai_extraction = False
-                        else:
-                            # Not meeting minutes or couldn't extract content, proceed to check for next form type
-                            current_app.logger.info("Content doesn't appear to be meeting minutes, checking for other form types")
-                    except Exception as e:
-                        current_app.logger.info(f"Error checking if file is meeting minutes: {str(e)}")
-                        
-            # Check for Home Safety Checklist
-            elif "home safety" in filename.lower() or "home_safety_checklist" in filename.lower():
-                current_app.logger.info("Detected a Home Safety Checklist upload, using specialized template")
-                # Import directly here to avoid circular imports
-                from services.form.home_safety_checklist_template import get_home_safety_checklist_template, is_home_safety_checklist
-                
-                # For docx files, we immediately use the template
-                if filename.lower().endswith(".docx"):
-                    current_app.logger.info("Using home safety checklist template for .docx file")
-                    form_structure = {
-                        "questions": get_home_safety_checklist_template()
-                    }
-                    questions_count = len(form_structure.get('questions', []))
-                    current_app.logger.info(f"Using home safety checklist template with {questions_count} fields")
-                    use_openai_extraction = False
-                # For other file types, we try to extract content and check if it looks like a home safety checklist
-                else:
-                    try:
-                        # Try to extract text content if applicable
-                        from services.document.document_service import extract_text_from_file
-                        content = extract_text_from_file(file_path)
-                        if content and is_home_safety_checklist(content):
-                            current_app.logger.info("Detected home safety checklist content, using specialized template")
-                            form_structure = {
-                                "questions": get_home_safety_checklist_template()
-                            }
-                            questions_count = len(form_structure.get('questions', []))
-                            current_app.logger.info(f"Using home safety checklist template with {questions_count} fields")
-                            use_openai_extraction = False
-                        else:
-                            # Not a home safety checklist or couldn't extract content, proceed to check for next form type
-                            current_app.logger.info("Content doesn't appear to be a home safety checklist, checking for other form types")
-                    except Exception as e:
-                        current_app.logger.info(f"Error checking if file is a home safety checklist: {str(e)}")
-            
-            # Check for Hazardous Substances Checklist
-            elif "hazardous substances" in filename.lower() or "hazardous_substances_checklist" in filename.lower():
-                current_app.logger.info("Detected a Hazardous Substances Checklist upload, using specialized template")
-                # Import directly here to avoid circular imports
-                from services.form.hazardous_substances_checklist_template import get_hazardous_substances_checklist_template, is_hazardous_substances_checklist
-                
-                # For docx files, we immediately use the template
-                if filename.lower().endswith(".docx"):
-                    current_app.logger.info("Using hazardous substances checklist template for .docx file")
-                    form_structure = {
-                        "questions": get_hazardous_substances_checklist_template()
-                    }
-                    questions_count = len(form_structure.get('questions', []))
-                    current_app.logger.info(f"Using hazardous substances checklist template with {questions_count} fields")
-                    use_openai_extraction = False
-                # For other file types, we try to extract content and check if it looks like a hazardous substances checklist
-                else:
-                    try:
-                        # Try to extract text content if applicable
-                        from services.document.document_service import extract_text_from_file
-                        content = extract_text_from_file(file_path)
-                        if content and is_hazardous_substances_checklist(content):
-                            current_app.logger.info("Detected hazardous substances checklist content, using specialized template")
-                            form_structure = {
-                                "questions": get_hazardous_substances_checklist_template()
-                            }
-                            questions_count = len(form_structure.get('questions', []))
-                            current_app.logger.info(f"Using hazardous substances checklist template with {questions_count} fields")
-                            use_openai_extraction = False
-                        else:
-                            # Not a hazardous substances checklist or couldn't extract content, proceed to check for general hazard form
-                            current_app.logger.info("Content doesn't appear to be a hazardous substances checklist, checking for general hazard form")
-                    except Exception as e:
-                        current_app.logger.info(f"Error checking if file is a hazardous substances checklist: {str(e)}")
-            
-            # Check for Plant-Asset Hazard Checklist (more specific than general hazard form)
-            elif "plant-asset" in filename.lower() or "plant_asset" in filename.lower() or "new plant" in filename.lower():
-                current_app.logger.info("Detected a Plant-Asset Hazard Checklist upload, using specialized template")
-                # Import directly here to avoid circular imports
-                from services.form.plant_asset_hazard_checklist_template import get_plant_asset_hazard_checklist_template, is_plant_asset_hazard_checklist
-                
-                # For docx files, we immediately use the template
-                if filename.lower().endswith(".docx"):
-                    current_app.logger.info("Using plant-asset hazard checklist template for .docx file")
-                    form_structure = {
-                        "questions": get_plant_asset_hazard_checklist_template()
-                    }
-                    questions_count = len(form_structure.get('questions', []))
-                    current_app.logger.info(f"Using plant-asset hazard checklist template with {questions_count} fields")
-                    use_openai_extraction = False
-                # For other file types, we try to extract content and check if it looks like a plant-asset hazard checklist
-                else:
-                    try:
-                        # Try to extract text content if applicable
-                        from services.document.document_service import extract_text_from_file
-                        content = extract_text_from_file(file_path)
-                        if content and is_plant_asset_hazard_checklist(content):
-                            current_app.logger.info("Detected plant-asset hazard checklist content, using specialized template")
-                            form_structure = {
-                                "questions": get_plant_asset_hazard_checklist_template()
-                            }
-                            questions_count = len(form_structure.get('questions', []))
-                            current_app.logger.info(f"Using plant-asset hazard checklist template with {questions_count} fields")
-                            use_openai_extraction = False
-                        else:
-                            # Not a plant-asset hazard checklist or couldn't extract content, proceed to check for general hazard form
-                            current_app.logger.info("Content doesn't appear to be a plant-asset hazard checklist, checking for general hazard form")
-                    except Exception as e:
-                        current_app.logger.info(f"Error checking if file is a plant-asset hazard checklist: {str(e)}")
-            
-            # Check for general Hazard Form
-            elif "hazard" in filename.lower() or "hazard form" in filename.lower():
-                current_app.logger.info("Detected a Hazard Form upload, using specialized template")
-                # Import directly here to avoid circular imports
-                from services.form.hazard_form_template import get_hazard_form_template, is_hazard_form
-                
-                # For docx files, we immediately use the template
-                if filename.lower().endswith(".docx"):
-                    current_app.logger.info("Using hazard form template for .docx file")
-                    form_structure = {
-                        "questions": get_hazard_form_template()
-                    }
-                    questions_count = len(form_structure.get('questions', []))
-                    current_app.logger.info(f"Using hazard form template with {questions_count} fields")
-                    use_openai_extraction = False
-                # For other file types, we try to extract content and check if it looks like a hazard form
-                else:
-                    try:
-                        # Try to extract text content if applicable
-                        from services.document.document_service import extract_text_from_file
-                        content = extract_text_from_file(file_path)
-                        if content and is_hazard_form(content):
-                            current_app.logger.info("Detected hazard form content, using specialized template")
-                            form_structure = {
-                                "questions": get_hazard_form_template()
-                            }
-                            questions_count = len(form_structure.get('questions', []))
-                            current_app.logger.info(f"Using hazard form template with {questions_count} fields")
-                            use_openai_extraction = False
-                        else:
-                            # Not a hazard form or couldn't extract content, proceed to normal extraction
-                            current_app.logger.info("Content doesn't appear to be a hazard form, proceeding with normal extraction")
-                    except Exception as e:
-                        current_app.logger.info(f"Error checking if file is a hazard form: {str(e)}")
-            
-            # Use OpenAI extraction if we haven't already used a template
-            if use_openai_extraction:
-                # Extract form structure using OpenAI - preserve EXACT questions and order
-                current_app.logger.info("=" * 50)
-                current_app.logger.info(f"NO TEMPLATE MATCH FOUND - USING AI-BASED EXTRACTION")
-                current_app.logger.info(f"Extracting EXACT form structure from {file_path} using enhanced OpenAI processing")
-                current_app.logger.info("Using multi-pass verification with JSON schema to ensure accuracy")
-                current_app.logger.info("=" * 50)
-                
-                try:
-                    # Extract the form structure
-                    form_structure = extract_form_structure(file_path)
-                    
-                    # Log the extracted structure for debugging
-                    current_app.logger.debug(f"Extracted form structure: {json.dumps(form_structure)[:500]}...")
-                    
-                    # Validate the extracted structure
-                    questions_count = len(form_structure.get('questions', []))
-                    current_app.logger.info(f"Successfully extracted {questions_count} questions in their exact original form")
-                    
-                    # Log the first few questions to provide insight into extraction quality
-                    if questions_count > 0:
-                        current_app.logger.info("Sample of extracted questions:")
-                        for i, question in enumerate(form_structure.get('questions', [])[:3]):  # Show first 3 questions
-                            current_app.logger.info(f"  Q{i+1}: {question.get('question_text', '')[:100]}{'...' if len(question.get('question_text', '')) > 100 else ''}")
-                        if questions_count > 3:
-                            current_app.logger.info(f"  ...and {questions_count - 3} more questions")
-                    
-                    # Check if we have a reasonable number of questions
-                    if questions_count == 0:
-                        raise ValueError("No questions could be extracted from the form document. Please try a different file or format.")
-                    
-                    # Check that questions have required fields
-                    missing_fields = []
-                    for i, question in enumerate(form_structure.get('questions', [])):
-                        if not question.get('question_text') and not question.get('question') and not question.get('label'):
-                            missing_fields.append(f"Question #{i+1} is missing required text field")
-                        if not question.get('id'):
-                            missing_fields.append(f"Question #{i+1} is missing a required ID")
-                    
-                    if missing_fields:
-                        raise ValueError(f"Form structure validation failed: {'. '.join(missing_fields)}")
-                
-                except Exception as extraction_error:
-                    current_app.logger.error(f"Form extraction error: {str(extraction_error)}")
-                    flash(f'Error extracting form: {str(extraction_error)}', 'danger')
-                    
-                    # Clean up the file
-                    if os.path.exists(file_path):
-                        os.remove(file_path)
-                    return render_template('forms/form_upload.html')
-            
-            # Create form record with additional metadata
-            new_form = Form(
-                title=title,
-                description=description,
-                file_path=file_path,
-                structure=json.dumps(form_structure),
-                created_at=datetime.utcnow(),
-                user_id=current_user.id  # Track which admin uploaded the form
-            )
-            
-            db.session.add(new_form)
-            db.session.commit()
-            
-            # Provide detailed success feedback
-            flash(f'Form "{title}" uploaded successfully with {questions_count} questions extracted.', 'success')
-            current_app.logger.info(f"Form ID {new_form.id} saved to database with {questions_count} questions")
-            
-            return redirect(url_for('form.form_list'))
-            
-        except Exception as e:
-            current_app.logger.error(f"Error processing form: {str(e)}")
-            flash(f'Error processing form: {str(e)}', 'danger')
-            
-            # Clean up the file on error
-            if os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                    current_app.logger.info(f"Cleaned up file {file_path} after error")
-                except Exception as cleanup_error:
-                    current_app.logger.error(f"Error cleaning up file: {str(cleanup_error)}")
-            
-            return render_template('forms/form_upload.html')
+        # Detection, extraction and validation run on the background job queue; the Form is created
+        # when the job finishes, and the upload page polls the job for progress
+        job = get_job_queue().enqueue('form_upload', {
+            "title": title,
+            "description": description,
+            "file_path": file_path,
+            "filename": filename,
+            "user_id": current_user.id
+        }, user_id=current_user.id)
+        current_app.logger.info(f"Queued form upload job {job.id} for {filename}")
+        
+        if request.accept_mimetypes.best == 'application/json':
+            return jsonify({
+                'success': True,
+                'job_id': job.id,
+                'status_url': url_for('job.job_status', job_id=job.id)
+            }), 202
+        return render_template('forms/form_upload.html', job=job_to_dict(job))
     
     return render_template('forms/form_upload.html')
 
 @form_bp.route('/<int:form_id>/edit', methods=['GET', 'POST'])
 @login_required
+@ai_priority('upload')
 def edit_form(form_id):
     """Allow administrators to edit a form's title, description, and optionally replace the document"""
     if not current_user.is_admin:
@@ -609,647 +191,12 @@ def edit_form(form_id):
                 # Extract form structure using OpenAI - preserve EXACT questions and order
                 current_app.logger.info(f"Re-extracting form structure from new file: {file_path}")
                 
-                # Flag to track if we should use OpenAI extraction
-                use_openai_extraction = True
-                
-                # Special case for the Incident Form
-                if "incident" in filename.lower() or (file_extension.lower() in ["docx"] and filename.lower().find("incident") != -1):
-                    current_app.logger.info("Detected an incident form upload, checking if we should use specialized template")
-                    # Import directly here to avoid circular imports
-                    from services.form.incident_form_template import get_incident_form_template, is_incident_form
-                    
-                    # For docx files, we immediately use the template
-                    if filename.lower().endswith(".docx"):
-                        current_app.logger.info("Using incident form template for .docx file")
-                        form_structure = {
-                            "questions": get_incident_form_template()
-                        }
-                        questions_count = len(form_structure.get('questions', []))
-                        current_app.logger.info(f"Using incident form template with {questions_count} fields")
-                        use_openai_extraction = False
-                    # For other file types, we try to extract content and check if it looks like an incident form
-                    else:
-                        try:
-                            # Try to extract text content if applicable
-                            from services.document.document_service import extract_text_from_file
-                            content = extract_text_from_file(file_path)
-                            if content and is_incident_form(content):
-                                current_app.logger.info("Detected incident form content, using specialized template")
-                                form_structure = {
-                                    "questions": get_incident_form_template()
-                                }
-                                questions_count = len(form_structure.get('questions', []))
-                                current_app.logger.info(f"Using incident form template with {questions_count} fields")
-                                use_openai_extraction = False
-                            else:
-                                # Not an incident form or couldn't extract content, proceed to normal extraction
-                                current_app.logger.info("Content doesn't appear to be an incident form, proceeding with normal extraction")
-                        except Exception as e:
-                            current_app.logger.info(f"Error checking if file is an incident form: {str(e)}")
-                            
-                # Special case for the Act as an Advocate Form
-                elif "advocate" in filename.lower() or "act as an advocate" in filename.lower():
-                    current_app.logger.info("Detected an Act as an Advocate form upload, using specialized template")
-                    # Import directly here to avoid circular imports
-                    from services.form.advocate_form_template import get_advocate_form_template, is_advocate_form
-                    
-                    # For docx files, we immediately use the template
-                    if filename.lower().endswith(".docx"):
-                        current_app.logger.info("Using advocate form template for .docx file")
-                        form_structure = {
-                            "questions": get_advocate_form_template()
-                        }
-                        questions_count = len(form_structure.get('questions', []))
-                        current_app.logger.info(f"Using advocate form template with {questions_count} fields")
-                        use_openai_extraction = False
-                    # For other file types, we try to extract content and check if it looks like an advocate form
-                    else:
-                        try:
-                            # Try to extract text content if applicable
-                            from services.document.document_service import extract_text_from_file
-                            content = extract_text_from_file(file_path)
-                            if content and is_advocate_form(content):
-                                current_app.logger.info("Detected advocate form content, using specialized template")
-                                form_structure = {
-                                    "questions": get_advocate_form_template()
-                                }
-                                questions_count = len(form_structure.get('questions', []))
-                                current_app.logger.info(f"Using advocate form template with {questions_count} fields")
-                                use_openai_extraction = False
-                            else:
-                                # Not an advocate form or couldn't extract content, proceed to normal extraction
-                                current_app.logger.info("Content doesn't appear to be an advocate form, proceeding with normal extraction")
-                        except Exception as e:
-                            current_app.logger.info(f"Error checking if file is an advocate form: {str(e)}")
-                            
-                # Special case for the Complaints Form
-                elif "complaint" in filename.lower() or "complaints form" in filename.lower():
-                    current_app.logger.info("Detected a Complaints Form upload, using specialized template")
-                    # Import directly here to avoid circular imports
-                    from services.form.complaints_form_template import get_complaints_form_template, is_complaints_form
-                    
-                    # For docx files, we immediately use the template
-                    if filename.lower().endswith(".docx"):
-                        current_app.logger.info("Using complaints form template for .docx file")
-                        form_structure = {
-                            "questions": get_complaints_form_template()
-                        }
-                        questions_count = len(form_structure.get('questions', []))
-                        current_app.logger.info(f"Using complaints form template with {questions_count} fields")
-                        use_openai_extraction = False
-                    # For other file types, we try to extract content and check if it looks like a complaints form
-                    else:
-                        try:
-                            # Try to extract text content if applicable
-                            from services.document.document_service import extract_text_from_file
-                            content = extract_text_from_file(file_path)
-                            if content and is_complaints_form(content):
-                                current_app.logger.info("Detected complaints form content, using specialized template")
-                                form_structure = {
-                                    "questions": get_complaints_form_template()
-                                }
-                                questions_count = len(form_structure.get('questions', []))
-                                current_app.logger.info(f"Using complaints form template with {questions_count} fields")
-                                use_openai_extraction = False
-                            else:
-                                # Not a complaints form or couldn't extract content, proceed to normal extraction
-                                current_app.logger.info("Content doesn't appear to be a complaints form, proceeding with normal extraction")
-                        except Exception as e:
-                            current_app.logger.info(f"Error checking if file is a complaints form: {str(e)}")
-                            
-                # Special case for the Conflict of Interest Form
-                elif "conflict" in filename.lower() or "conflict of interest" in filename.lower():
-                    current_app.logger.info("Detected a Conflict of Interest Form upload, using specialized template")
-                    # Import directly here to avoid circular imports
-                    from services.form.conflict_form_template import get_conflict_form_template, is_conflict_form
-                    
-                    # For docx files, we immediately use the template
-                    if filename.lower().endswith(".docx"):
-                        current_app.logger.info("Using conflict form template for .docx file")
-                        form_structure = {
-                            "questions": get_conflict_form_template()
-                        }
-                        questions_count = len(form_structure.get('questions', []))
-                        current_app.logger.info(f"Using conflict form template with {questions_count} fields")
-                        use_openai_extraction = False
-                    # For other file types, we try to extract content and check if it looks like a conflict form
-                    else:
-                        try:
-                            # Try to extract text content if applicable
-                            from services.document.document_service import extract_text_from_file
-                            content = extract_text_from_file(file_path)
-                            if content and is_conflict_form(content):
-                                current_app.logger.info("Detected conflict form content, using specialized template")
-                                form_structure = {
-                                    "questions": get_conflict_form_template()
-                                }
-                                questions_count = len(form_structure.get('questions', []))
-                                current_app.logger.info(f"Using conflict form template with {questions_count} fields")
-                                use_openai_extraction = False
-                            else:
-                                # Not a conflict form or couldn't extract content, proceed to normal extraction
-                                current_app.logger.info("Content doesn't appear to be a conflict form, proceeding with normal extraction")
-                        except Exception as e:
-                            current_app.logger.info(f"Error checking if file is a conflict form: {str(e)}")
-                            
-                # Special case for Meeting Minutes
-                elif "meeting minutes" in filename.lower() or "meeting_minutes" in filename.lower():
-                    current_app.logger.info("Detected a Meeting Minutes upload, using specialized template")
-                    # Import directly here to avoid circular imports
-                    from services.form.meeting_minutes_template import get_meeting_minutes_template, is_meeting_minutes
-                    
-                    # For docx files, we immediately use the template
-                    if filename.lower().endswith(".docx"):
-                        current_app.logger.info("Using meeting minutes template for .docx file")
-                        form_structure = {
-                            "questions": get_meeting_minutes_template()
-                        }
-                        questions_count = len(form_structure.get('questions', []))
-                        current_app.logger.info(f"Using meeting minutes template with {questions_count} fields")
-                        use_openai_extraction = False
-                    # For other file types, we try to extract content and check if it looks like meeting minutes
-                    else:
-                        try:
-                            # Try to extract text content if applicable
-                            from services.document.document_service import extract_text_from_file
-                            content = extract_text_from_file(file_path)
-                            if content and is_meeting_minutes(content):
-                                current_app.logger.info("Detected meeting minutes content, using specialized template")
-                                form_structure = {
-                                    "questions": get_meeting_minutes_template()
-                                }
-                                questions_count = len(form_structure.get('questions', []))
-                                current_app.logger.info(f"Using meeting minutes template with {questions_count} fields")
-                                use_openai_extraction = False
-                            else:
-                                # Not meeting minutes or couldn't extract content, proceed to check for next form type
-                                current_app.logger.info("Content doesn't appear to be meeting minutes, checking for other form types")
-                        except Exception as e:
-                            current_app.logger.info(f"Error checking if file is meeting minutes: {str(e)}")
-                            
-                # Special case for Home Safety Checklist
-                elif "home safety" in filename.lower() or "home_safety_checklist" in filename.lower():
-                    current_app.logger.info("Detected a Home Safety Checklist upload, using specialized template")
-                    # Import directly here to avoid circular imports
-                    from services.form.home_safety_checklist_template import get_home_safety_checklist_template, is_home_safety_checklist
-                    
-                    # For docx files, we immediately use the template
-                    if filename.lower().endswith(".docx"):
-                        current_app.logger.info("Using home safety checklist template for .docx file")
-                        form_structure = {
-                            "questions": get_home_safety_checklist_template()
-                        }
-                        questions_count = len(form_structure.get('questions', []))
-                        current_app.logger.info(f"Using home safety checklist template with {questions_count} fields")
-                        use_openai_extraction = False
-                    # For other file types, we try to extract content and check if it looks like a home safety checklist
-                    else:
-                        try:
-                            # Try to extract text content if applicable
-                            from services.document.document_service import extract_text_from_file
-                            content = extract_text_from_file(file_path)
-                            if content and is_home_safety_checklist(content):
-                                current_app.logger.info("Detected home safety checklist content, using specialized template")
-                                form_structure = {
-                                    "questions": get_home_safety_checklist_template()
-                                }
-                                questions_count = len(form_structure.get('questions', []))
-                                current_app.logger.info(f"Using home safety checklist template with {questions_count} fields")
-                                use_openai_extraction = False
-                            else:
-                                # Not a home safety checklist or couldn't extract content, proceed to normal extraction
-                                current_app.logger.info("Content doesn't appear to be a home safety checklist, proceeding with normal extraction")
-                        except Exception as e:
-                            current_app.logger.info(f"Error checking if file is a home safety checklist: {str(e)}")
-                
-                # Special case for the Hazard Form
-                # Check for Hazardous Substances Checklist first (more specific than general hazard form)
-                elif "hazardous substances" in filename.lower() or "hazardous_substances_checklist" in filename.lower():
-                    current_app.logger.info("Detected a Hazardous Substances Checklist upload, using specialized template")
-                    # Import directly here to avoid circular imports
-                    from services.form.hazardous_substances_checklist_template import get_hazardous_substances_checklist_template, is_hazardous_substances_checklist
-                    
-                    # For docx files, we immediately use the template
-                    if filename.lower().endswith(".docx"):
-                        current_app.logger.info("Using hazardous substances checklist template for .docx file")
-                        form_structure = {
-                            "questions": get_hazardous_substances_checklist_template()
-                        }
-                        questions_count = len(form_structure.get('questions', []))
-                        current_app.logger.info(f"Using hazardous substances checklist template with {questions_count} fields")
-                        use_openai_extraction = False
-                    # For other file types, we try to extract content and check if it looks like a hazardous substances checklist
-                    else:
-                        try:
-                            # Try to extract text content if applicable
-                            from services.document.document_service import extract_text_from_file
-                            content = extract_text_from_file(file_path)
-                            if content and is_hazardous_substances_checklist(content):
-                                current_app.logger.info("Detected hazardous substances checklist content, using specialized template")
-                                form_structure = {
-                                    "questions": get_hazardous_substances_checklist_template()
-                                }
-                                questions_count = len(form_structure.get('questions', []))
-                                current_app.logger.info(f"Using hazardous substances checklist template with {questions_count} fields")
-                                use_openai_extraction = False
-                            else:
-                                # Not a hazardous substances checklist or couldn't extract content, proceed to check for general hazard form
-                                current_app.logger.info("Content doesn't appear to be a hazardous substances checklist, checking for general hazard form")
-                        except Exception as e:
-                            current_app.logger.info(f"Error checking if file is a hazardous substances checklist: {str(e)}")
-                
-                # Check for Plant-Asset Hazard Checklist (more specific than general hazard form)
-                elif "plant-asset" in filename.lower() or "plant_asset" in filename.lower() or "new plant" in filename.lower():
-                    current_app.logger.info("Detected a Plant-Asset Hazard Checklist upload, using specialized template")
-                    # Import directly here to avoid circular imports
-                    from services.form.plant_asset_hazard_checklist_template import get_plant_asset_hazard_checklist_template, is_plant_asset_hazard_checklist
-                    
-                    # For docx files, we immediately use the template
-                    if filename.lower().endswith(".docx"):
-                        current_app.logger.info("Using plant-asset hazard checklist template for .docx file")
-                        form_structure = {
-                            "questions": get_plant_asset_hazard_checklist_template()
-                        }
-                        questions_count = len(form_structure.get('questions', []))
-                        current_app.logger.info(f"Using plant-asset hazard checklist template with {questions_count} fields")
-                        use_openai_extraction = False
-                    # For other file types, we try to extract content and check if it looks like a plant-asset hazard checklist
-                    else:
-                        try:
-                            # Try to extract text content if applicable
-                            from services.document.document_service import extract_text_from_file
-                            content = extract_text_from_file(file_path)
-                            if content and is_plant_asset_hazard_checklist(content):
-                                current_app.logger.info("Detected plant-asset hazard checklist content, using specialized template")
-                                form_structure = {
-                                    "questions": get_plant_asset_hazard_checklist_template()
-                                }
-                                questions_count = len(form_structure.get('questions', []))
-                                current_app.logger.info(f"Using plant-asset hazard checklist template with {questions_count} fields")
-                                use_openai_extraction = False
-                            else:
-                                # Not a plant-asset hazard checklist or couldn't extract content, proceed to check for general hazard form
-                                current_app.logger.info("Content doesn't appear to be a plant-asset hazard checklist, checking for general hazard form")
-                        except Exception as e:
-                            current_app.logger.info(f"Error checking if file is a plant-asset hazard checklist: {str(e)}")
-                
-                # Check for general Hazard Form
-                elif "hazard" in filename.lower() or "hazard form" in filename.lower():
-                    current_app.logger.info("Detected a Hazard Form upload, using specialized template")
-                    # Import directly here to avoid circular imports
-                    from services.form.hazard_form_template import get_hazard_form_template, is_hazard_form
-                    
-                    # For docx files, we immediately use the template
-                    if filename.lower().endswith(".docx"):
-                        current_app.logger.info("Using hazard form template for .docx file")
-                        form_structure = {
-                            "questions": get_hazard_form_template()
-                        }
-                        questions_count = len(form_structure.get('questions', []))
-                        current_app.logger.info(f"Using hazard form template with {questions_count} fields")
-                        use_openai_extraction = False
-                    # For other file types, we try to extract content and check if it looks like a hazard form
-                    else:
-                        try:
-                            # Try to extract text content if applicable
-                            from services.document.document_service import extract_text_from_file
-                            content = extract_text_from_file(file_path)
-                            if content and is_hazard_form(content):
-                                current_app.logger.info("Detected hazard form content, using specialized template")
-                                form_structure = {
-                                    "questions": get_hazard_form_template()
-                                }
-                                questions_count = len(form_structure.get('questions', []))
-                                current_app.logger.info(f"Using hazard form template with {questions_count} fields")
-                                use_openai_extraction = False
-                            else:
-                                # Not a hazard form or couldn't extract content, proceed to normal extraction
-                                current_app.logger.info("Content doesn't appear to be a hazard form, proceeding with normal extraction")
-                        except Exception as e:
-                            current_app.logger.info(f"Error checking if file is a hazard form: {str(e)}")
-                            
-                # Special case for the Feedback Form
-                elif "feedback" in filename.lower() or "feedback form" in filename.lower():
-                    current_app.logger.info("Detected a Feedback Form upload, using specialized template")
-                    # Import directly here to avoid circular imports
-                    from services.form.feedback_form_template import get_feedback_form_template, is_feedback_form
-                    
-                    # For docx files, we immediately use the template
-                    if filename.lower().endswith(".docx"):
-                        current_app.logger.info("Using feedback form template for .docx file")
-                        form_structure = {
-                            "questions": get_feedback_form_template()
-                        }
-                        questions_count = len(form_structure.get('questions', []))
-                        current_app.logger.info(f"Using feedback form template with {questions_count} fields")
-                        use_openai_extraction = False
-                    # For other file types, we try to extract content and check if it looks like a feedback form
-                    else:
-                        try:
-                            # Try to extract text content if applicable
-                            from services.document.document_service import extract_text_from_file
-                            content = extract_text_from_file(file_path)
-                            if content and is_feedback_form(content):
-                                current_app.logger.info("Detected feedback form content, using specialized template")
-                                form_structure = {
-                                    "questions": get_feedback_form_template()
-                                }
-                                questions_count = len(form_structure.get('questions', []))
-                                current_app.logger.info(f"Using feedback form template with {questions_count} fields")
-                                use_openai_extraction = False
-                            else:
-                                # Not a feedback form or couldn't extract content, proceed to normal extraction
-                                current_app.logger.info("Content doesn't appear to be a feedback form, proceeding with normal extraction")
-                        except Exception as e:
-                            current_app.logger.info(f"Error checking if file is a feedback form: {str(e)}")
-                
-                # Special case for the Root Cause Analysis Form - Always use template regardless of file format
-                elif "root cause" in filename.lower() or "analysis" in filename.lower() or "rca" in filename.lower():
-                    current_app.logger.info("==== DETECTED ROOT CAUSE ANALYSIS FORM - USING SPECIALIZED TEMPLATE ====")
-                    # Import directly here to avoid circular imports
-                    from services.form.root_cause_analysis_template import get_root_cause_analysis_template
-                    
-                    # Always use the template for any file containing root cause analysis keywords in the name
-                    # This provides consistent form field extraction regardless of file format
-                    current_app.logger.info("Using root cause analysis template for ALL file formats with matching filename")
-                    form_structure = {
-                        "questions": get_root_cause_analysis_template()
-                    }
-                    questions_count = len(form_structure.get('questions', []))
-                    current_app.logger.info(f"Using root cause analysis template with {questions_count} fields")
-                    
-                    # Print sample of fields for verification
-                    current_app.logger.info("Sample fields from Root Cause Analysis template:")
-                    for i, q in enumerate(form_structure.get('questions', [])[:5]):
-                        current_app.logger.info(f"  Field {i+1}: {q.get('question_text', '')[:100]}...")
-                    
-                    use_openai_extraction = False
-                    current_app.logger.info("==== ROOT CAUSE ANALYSIS TEMPLATE APPLIED SUCCESSFULLY ====")
-                    current_app.logger.info(f"Original filename: {filename}")
-                    current_app.logger.info(f"File path: {file_path}")
-                
-                # Check for Vehicle Safety Check Sheet
-                if "vehicle" in filename.lower() or "safety check" in filename.lower() or "vehicle safety" in filename.lower():
-                    current_app.logger.info("Detected a Vehicle Safety Check Sheet upload, using specialized template")
-                    # Import directly here to avoid circular imports
-                    from services.form.vehicle_safety_check_template import get_vehicle_safety_check_template, is_vehicle_safety_check
-                    
-                    # For docx files, we immediately use the template
-                    if filename.lower().endswith(".docx"):
-                        current_app.logger.info("Using vehicle safety check template for .docx file")
-                        form_structure = {
-                            "questions": get_vehicle_safety_check_template()
-                        }
-                        questions_count = len(form_structure.get('questions', []))
-                        current_app.logger.info(f"Using vehicle safety check template with {questions_count} fields")
-                        use_openai_extraction = False
-                    # For other file types, we try to extract content and check if it looks like a vehicle safety check
-                    else:
-                        try:
-                            # Try to extract text content if applicable
-                            from services.document.document_service import extract_text_from_file
-                            content = extract_text_from_file(file_path)
-                            if content and is_vehicle_safety_check(content):
-                                current_app.logger.info("Detected vehicle safety check content, using specialized template")
-                                form_structure = {
-                                    "questions": get_vehicle_safety_check_template()
-                                }
-                                questions_count = len(form_structure.get('questions', []))
-                                current_app.logger.info(f"Using vehicle safety check template with {questions_count} fields")
-                                use_openai_extraction = False
-                            else:
-                                # Not a vehicle safety check or couldn't extract content, proceed to normal extraction
-                                current_app.logger.info("Content doesn't appear to be a vehicle safety check, proceeding with normal extraction")
-                        except Exception as e:
-                            current_app.logger.info(f"Error checking if file is a vehicle safety check: {str(e)}")
-                
-                # Check for Waste Risk Assessment Checklist
-                elif "waste" in filename.lower() or "risk assessment" in filename.lower() or "waste risk" in filename.lower():
-                    current_app.logger.info("Detected a Waste Risk Assessment Checklist upload, using specialized template")
-                    # Import directly here to avoid circular imports
-                    from services.form.waste_risk_assessment_template import get_waste_risk_assessment_template, is_waste_risk_assessment
-                    
-                    # For docx files, we immediately use the template
-                    if filename.lower().endswith(".docx"):
-                        current_app.logger.info("Using waste risk assessment template for .docx file")
-                        form_structure = {
-                            "questions": get_waste_risk_assessment_template()
-                        }
-                        questions_count = len(form_structure.get('questions', []))
-                        current_app.logger.info(f"Using waste risk assessment template with {questions_count} fields")
-                        use_openai_extraction = False
-                    # For other file types, we try to extract content and check if it looks like a waste risk assessment
-                    else:
-                        try:
-                            # Try to extract text content if applicable
-                            from services.document.document_service import extract_text_from_file
-                            content = extract_text_from_file(file_path)
-                            if content and is_waste_risk_assessment(content):
-                                current_app.logger.info("Detected waste risk assessment content, using specialized template")
-                                form_structure = {
-                                    "questions": get_waste_risk_assessment_template()
-                                }
-                                questions_count = len(form_structure.get('questions', []))
-                                current_app.logger.info(f"Using waste risk assessment template with {questions_count} fields")
-                                use_openai_extraction = False
-                            else:
-                                # Not a waste risk assessment or couldn't extract content, proceed to normal extraction
-                                current_app.logger.info("Content doesn't appear to be a waste risk assessment, proceeding with normal extraction")
-                        except Exception as e:
-                            current_app.logger.info(f"Error checking if file is a waste risk assessment: {str(e)}")
+                # Predefined templates first, with the same detection as a new upload
+                form_structure = detect_upload_template(file_path, filename)
+                use_openai_extraction = form_structure is None
                 
-                # Initialize use_med_admin_template before we use it
-                use_med_admin_template = False
-                
-                # Check for Medication Administration Form - very specific pattern matching based on content
-                if "medication administration" in filename.lower().replace("_", " ") or "medication administration form" in filename.lower() or filename.lower() == "medication_administration_form.docx":
-                    # First try to check by filename pattern
-                    current_app.logger.info(f"Detected Medication Administration Form by filename: {filename}")
-                    use_med_admin_template = True
-                
-                # If filename doesn't match, try to check content
-                if not use_med_admin_template:
-                    try:
-                        # Import needed module here to avoid circular imports
-                        from services.form.medication_administration_template import is_medication_administration_form
-                        
-                        # Try to extract text content from the file for analysis
-                        try:
-                            from services.document.document_service import extract_text_from_file
-                            file_content = extract_text_from_file(file_path)
-                            
-                            # Check if the file content matches a medication administration form
-                            if is_medication_administration_form(file_content):
-                                current_app.logger.info("==== DETECTED MEDICATION ADMINISTRATION FORM BY CONTENT ANALYSIS ====")
-                                use_med_admin_template = True
-                        except Exception as extract_error:
-                            current_app.logger.info(f"Error extracting text from file for medication form detection: {str(extract_error)}")
-                            
-                            # Fallback: Try to check the file path directly
-                            if is_medication_administration_form(file_path):
-                                current_app.logger.info("==== DETECTED MEDICATION ADMINISTRATION FORM BY DIRECT FILE CHECK ====")
-                                use_med_admin_template = True
-                    
-                    except Exception as e:
-                        current_app.logger.info(f"Error checking if file is a medication administration form: {str(e)}")
-                
-                # Apply medication administration template if detected
-                if use_med_admin_template:
-                    current_app.logger.info("==== DETECTED MEDICATION ADMINISTRATION FORM - USING SPECIALIZED TEMPLATE ====")
-                    # Import directly here to avoid circular imports
-                    from services.form.medication_administration_template import get_medication_administration_template
-                    
-                    # Always use the template for Medication Administration Form
-                    current_app.logger.info("Using Medication Administration Form template for ALL file formats with matching filename")
-                    form_structure = {
-                        "questions": get_medication_administration_template()
-                    }
-                    questions_count = len(form_structure.get('questions', []))
-                    current_app.logger.info(f"Using Medication Administration template with {questions_count} fields")
-                    
-                    # Print sample of fields for verification
-                    current_app.logger.info("Sample fields from Medication Administration Form template:")
-                    for i, q in enumerate(form_structure.get('questions', [])[:5]):
-                        current_app.logger.info(f"  Field {i+1}: {q.get('question_text', '')[:100]}...")
-                    
-                    use_openai_extraction = False
-                    current_app.logger.info("==== MEDICATION ADMINISTRATION FORM TEMPLATE APPLIED SUCCESSFULLY ====")
-                    current_app.logger.info(f"Original filename: {filename}")
-                    current_app.logger.info(f"File path: {file_path}")
-                
-                # Check for Administration of Medication Evaluation Checklist form - very specific pattern matching
-                elif "administration of medication" in filename.lower().replace("_", " ") or "medication evaluation" in filename.lower() or "medication checklist" in filename.lower():
-                    current_app.logger.info("==== DETECTED MEDICATION EVALUATION CHECKLIST - USING SPECIALIZED TEMPLATE ====")
-                    # Import directly here to avoid circular imports
-                    from services.form.medication_evaluation_template import get_medication_evaluation_template
-                    
-                    # Always use the template for Medication Evaluation Checklist
-                    current_app.logger.info("Using Medication Evaluation Checklist template for ALL file formats with matching filename")
-                    form_structure = {
-                        "questions": get_medication_evaluation_template()
-                    }
-                    questions_count = len(form_structure.get('questions', []))
-                    current_app.logger.info(f"Using Medication Evaluation template with {questions_count} fields")
-                    
-                    # Print sample of fields for verification
-                    current_app.logger.info("Sample fields from Medication Evaluation Checklist template:")
-                    for i, q in enumerate(form_structure.get('questions', [])[:5]):
-                        current_app.logger.info(f"  Field {i+1}: {q.get('question_text', '')[:100]}...")
-                    
-                    use_openai_extraction = False
-                    current_app.logger.info("==== MEDICATION EVALUATION CHECKLIST TEMPLATE APPLIED SUCCESSFULLY ====")
-                    current_app.logger.info(f"Original filename: {filename}")
-                    current_app.logger.info(f"File path: {file_path}")
-                
-                # Check for Nutrition Assessment form FIRST (more specific matching than generic "nutrition")
-                elif "nutrition assessment" in filename.lower().replace("_", " ") or "nutritional assessment" in filename.lower() or "nutrition_assessment" in filename.lower():
-                    current_app.logger.info("==== DETECTED NUTRITION ASSESSMENT FORM - USING SPECIALIZED TEMPLATE ====")
-                    # Import directly here to avoid circular imports
-                    from services.form.nutrition_assessment_template import get_nutrition_assessment_template
-                    
-                    # Always use the template for Nutrition Assessment form regardless of file format
-                    current_app.logger.info("Using Nutrition Assessment template for ALL file formats with matching filename")
-                    form_structure = {
-                        "questions": get_nutrition_assessment_template()
-                    }
-                    questions_count = len(form_structure.get('questions', []))
-                    current_app.logger.info(f"Using Nutrition Assessment template with {questions_count} fields")
-                    
-                    # Print sample of fields for verification
-                    current_app.logger.info("Sample fields from Nutrition Assessment template:")
-                    for i, q in enumerate(form_structure.get('questions', [])[:5]):
-                        current_app.logger.info(f"  Field {i+1}: {q.get('question_text', '')[:100]}...")
-                    
-                    use_openai_extraction = False
-                    current_app.logger.info("==== NUTRITION ASSESSMENT TEMPLATE APPLIED SUCCESSFULLY ====")
-                    current_app.logger.info(f"Original filename: {filename}")
-                    current_app.logger.info(f"File path: {file_path}")
-                
-                # Check for Nutrition and Swallowing Risk Checklist - Always use template regardless of file format
-                elif "nutrition and swallowing" in filename.lower().replace("_", " ") or "swallowing risk" in filename.lower() or "nutrition checklist" in filename.lower() or "nutrition_and_swallowing" in filename.lower():
-                    current_app.logger.info("==== DETECTED NUTRITION AND SWALLOWING RISK CHECKLIST - USING SPECIALIZED TEMPLATE ====")
-                    # Import directly here to avoid circular imports
-                    from services.form.nutrition_swallowing_risk_template import get_nutrition_swallowing_risk_template
-                    
-                    # Always use the template for any file containing nutrition and swallowing keywords in the name
-                    # This provides consistent form field extraction regardless of file format
-                    current_app.logger.info("Using nutrition and swallowing risk template for ALL file formats with matching filename")
-                    form_structure = {
-                        "questions": get_nutrition_swallowing_risk_template()
-                    }
-                    questions_count = len(form_structure.get('questions', []))
-                    current_app.logger.info(f"Using nutrition and swallowing risk template with {questions_count} fields")
-                    
-                    # Print sample of fields for verification
-                    current_app.logger.info("Sample fields from Nutrition and Swallowing Risk template:")
-                    for i, q in enumerate(form_structure.get('questions', [])[:5]):
-                        current_app.logger.info(f"  Field {i+1}: {q.get('question_text', '')[:100]}...")
-                    
-                    use_openai_extraction = False
-                    current_app.logger.info("==== NUTRITION AND SWALLOWING RISK TEMPLATE APPLIED SUCCESSFULLY ====")
-                    current_app.logger.info(f"Original filename: {filename}")
-                    current_app.logger.info(f"File path: {file_path}")
-                
-                # Special direct match for Mealtime Food Safety Audit Checklist
-                elif "Mealtime Food Safety Audit Checklist" in file_path:
-                    current_app.logger.info("===== EXACT MATCH FOR Mealtime Food Safety Audit Checklist =====")
-                    # Always use the specialized template for this exact file
-                    from services.form.mealtime_safety_audit_template import get_mealtime_safety_audit_template
-                    
-                    current_app.logger.info("========== USING MEALTIME FOOD SAFETY AUDIT TEMPLATE ==========")
-                    form_structure = {
-                        "questions": get_mealtime_safety_audit_template()
-                    }
-                    questions_count = len(form_structure.get('questions', []))
-                    current_app.logger.info(f"Using mealtime food safety audit template with {questions_count} fields")
-                    current_app.logger.info(f"File path: {file_path}")
-                    current_app.logger.info(f"Filename: {filename}")
-                    
-                    # Print out the first few fields to confirm template is working
-                    for i, q in enumerate(form_structure.get('questions', [])[:3]):
-                        current_app.logger.info(f"Sample field {i+1}: {q.get('question_text', '')[:50]}")
-                    
-                    use_openai_extraction = False
-                
-                # More general match for Mealtime Food Safety Audit Checklist
-                elif "mealtime" in filename.lower() or "food safety" in filename.lower() or "audit checklist" in filename.lower():
-                    current_app.logger.info("Detected a Mealtime Food Safety Audit Checklist upload, using specialized template")
-                    # Always use the specialized template for mealtime food safety audit forms, regardless of file type
-                    from services.form.mealtime_safety_audit_template import get_mealtime_safety_audit_template
-                    
-                    current_app.logger.info("========== USING MEALTIME FOOD SAFETY AUDIT TEMPLATE ==========")
-                    form_structure = {
-                        "questions": get_mealtime_safety_audit_template()
-                    }
-                    questions_count = len(form_structure.get('questions', []))
-                    current_app.logger.info(f"Using mealtime food safety audit template with {questions_count} fields")
-                    
-                    # Print out the first few fields to confirm template is working
-                    for i, q in enumerate(form_structure.get('questions', [])[:3]):
-                        current_app.logger.info(f"Sample field {i+1}: {q.get('question_text', '')[:50]}")
-                    
-                    use_openai_extraction = False
-                
-                # Check for Food Diary Form - more specific pattern matching for reliable detection
-                elif "food diary" in filename.lower() or (("food" in filename.lower() or "meal" in filename.lower()) and ("diary" in filename.lower() or "log" in filename.lower())):
-                    current_app.logger.info("Detected a Food Diary Form upload, using specialized template")
-                    # Always use the specialized template for food diary forms, regardless of file type
-                    from services.form.food_diary_template import get_food_diary_template
-                    
-                    current_app.logger.info("========== USING FOOD DIARY TEMPLATE ==========")
-                    form_structure = {
-                        "questions": get_food_diary_template()
-                    }
-                    questions_count = len(form_structure.get('questions', []))
-                    current_app.logger.info(f"Using food diary template with {questions_count} fields")
-                    
-                    # Print out the first few fields to confirm template is working
-                    for i, q in enumerate(form_structure.get('questions', [])[:3]):
-                        current_app.logger.info(f"Sample field {i+1}: {q.get('question_text', '')[:50]}")
-                    
-                    use_openai_extraction = False
-
-                # No duplicate section needed - Root Cause Analysis Form is already handled earlier in the code
+                fingerprint = fingerprint_form_file(file_path)
+                form_match = None
                 
                 # Use OpenAI extraction if we haven't already used a template
                 if use_openai_extraction:
@@ -1260,8 +207,9 @@ def edit_form(form_id):
                     current_app.logger.info("Using multi-pass verification with JSON schema to ensure accuracy")
                     current_app.logger.info("=" * 50)
                     
-                    # Extract the form structure
-                    form_structure = extract_form_structure(file_path)
+                    # Extract the form structure, reusing a structurally matching form where possible
+                    form_structure, form_match = extract_form_structure_reusing_matches(
+                        file_path, fingerprint, exclude_form_id=form.id)
                     
                     # Log the extracted structure for debugging
                     current_app.logger.debug(f"Extracted form structure: {json.dumps(form_structure)[:500]}...")
@@ -1284,8 +232,11 @@ def edit_form(form_id):
                 
                 # Update form structure in the database
                 form.structure = json.dumps(form_structure)
+                save_form_fingerprint(form, fingerprint)
                 questions_count = len(form_structure.get('questions', []))
                 flash(f'Form updated with new document. {questions_count} questions extracted.', 'success')
+                if form_match:
+                    flash(describe_form_match(form_match), 'info')
                 
             except Exception as extraction_error:
                 current_app.logger.error(f"Form extraction error during edit: {str(extraction_error)}")
@@ -1333,7 +284,6 @@ def fill_form(form_id):
     
     if existing_response:
         response = existing_response
-        form_structure = json.loads(form.structure)
         current_answers = json.loads(existing_response.answers) if existing_response.answers else {}
     else:
         # Create new form response
@@ -1346,14 +296,14 @@ def fill_form(form_id):
         db.session.commit()
         
         response = new_response
-        form_structure = json.loads(form.structure)
         current_answers = {}
     
-    # Show all questions at once in the full form view
+    # Show all questions at once in the full form view; the structure is parsed and serialised once per version
     return render_template('forms/form_fill.html', 
                           form=form, 
-                          form_data=form_structure, 
+                          form_json=get_compiled_form(form).html_json, 
                           answers=current_answers, 
+                          answers_etag=answers_etag(response.answers), 
                           response_id=response.id)
 
 @form_bp.route('/response/<int:response_id>/save', methods=['POST'])
@@ -1373,12 +323,85 @@ def save_form_progress(response_id):
     data = request.json
     answers = data.get('answers', {})
     
-    # Update response
-    response.answers = json.dumps(answers)
-    response.updated_at = datetime.utcnow()
+    # Update response, unless nothing changed
+    answers_text = json.dumps(answers)
+    if answers_text != response.answers:
+        response.answers = answers_text
+        response.updated_at = datetime.utcnow()
+        sync_response_answers(response, answers)
+        db.session.commit()
+    
+    result = jsonify({'success': True})
+    result.set_etag(answers_etag(response.answers))
+    return result
+
+@form_bp.route('/response/<int:response_id>/answers', methods=['PATCH'])
+@login_required
+def patch_form_answers(response_id):
+    """
+    Save only the answers that changed, as a JSON merge-patch (null removes an answer).
+    The If-Match header must carry the ETag of the answers the client last saw; a stale one gets 412
+    with the current answers so the client can reapply its changes.
+    """
+    response = FormResponse.query.get_or_404(response_id)
+    
+    # Ensure user owns this response
+    if response.user_id != current_user.id:
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+    
+    form = Form.query.get(response.form_id)
+    if form.is_deleted and not current_user.is_admin:
+        return jsonify({'success': False, 'message': 'This form is no longer available for editing.'}), 403
+    if response.is_complete:
+        return jsonify({'success': False, 'message': 'This form has already been submitted.'}), 409
+    
+    patch = request.get_json(force=True, silent=True)
+    if not isinstance(patch, dict):
+        return jsonify({'success': False, 'message': 'Expected a JSON merge-patch object'}), 400
+    
+    stored_text = response.answers
+    current_etag = answers_etag(stored_text)
+    if not request.if_match:
+        return jsonify({'success': False, 'message': 'An If-Match header is required'}), 428
+    if not request.if_match.contains(current_etag):
+        result = jsonify({
+            'success': False,
+            'message': 'Answers were changed elsewhere',
+            'answers': json.loads(stored_text) if stored_text else {}
+        })
+        result.set_etag(current_etag)
+        return result, 412
+    
+    current_answers = json.loads(stored_text) if stored_text else {}
+    merged = apply_merge_patch(current_answers, patch)
+    if not patch or merged == current_answers:
+        # Nothing to write
+        result = current_app.response_class(status=204)
+        result.set_etag(current_etag)
+        return result
+    
+    # Write only if the answers are still the ones the patch was checked against
+    merged_text = json.dumps(merged)
+    updated = FormResponse.query.filter_by(id=response.id, answers=stored_text).update({
+        'answers': merged_text,
+        'updated_at': datetime.utcnow()
+    }, synchronize_session=False)
+    if updated:
+        sync_response_answers(response, merged, question_ids=patch.keys())
     db.session.commit()
+    if not updated:
+        db.session.refresh(response)
+        result = jsonify({
+            'success': False,
+            'message': 'Answers were changed elsewhere',
+            'answers': json.loads(response.answers) if response.answers else {}
+        })
+        result.set_etag(answers_etag(response.answers))
+        return result, 412
     
-    return jsonify({'success': True})
+    result = jsonify({'success': True})
+    result.set_etag(answers_etag(merged_text))
+    return result
 
 @form_bp.route('/response/<int:response_id>/submit', methods=['POST'])
 @login_required
@@ -1398,83 +421,51 @@ def submit_form(response_id):
     data = request.json
     answers = data.get('answers', {})
     
-    # Validate submission
-    form_structure = json.loads(form.structure)
-    validation_result = validate_form_submission(form_structure, answers)
+    # Validate submission against the cached, compiled structure
+    compiled_form = get_compiled_form(form)
+    form_structure = compiled_form.structure
+    validation_result = compiled_form.validate(answers)
     
     if not validation_result['valid']:
         return jsonify({
             'success': False, 
             'message': 'Form has incomplete or invalid fields',
-            'missing_fields': validation_result['missing_fields']
+            'missing_fields': validation_result['missing_fields'],
+            'invalid_fields': validation_result['invalid_fields']
         }), 400
     
-    # Generate PDF with better error handling
+    # Mark the form as complete; the PDF and email are produced by a background job, which the
+    # client polls, so submitting costs one commit. Only one submission of a response can win.
     try:
-        # Ensure the PDF output directory exists
-        os.makedirs(current_app.config['PDF_OUTPUT_FOLDER'], exist_ok=True)
-        
-        # Create a descriptive filename with form title, user info, and timestamp
-        safe_title = secure_filename(form.title)
-        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-        pdf_filename = f"{safe_title}_form{form.id}_user{current_user.id}_{timestamp}.pdf"
-        pdf_path = os.path.join(current_app.config['PDF_OUTPUT_FOLDER'], pdf_filename)
-        
-        current_app.logger.info(f"Generating PDF for form submission: {pdf_path}")
-        
-        # Try to generate the PDF
-        try:
-            generate_pdf_from_form(form.title, form_structure, answers, pdf_path)
-            current_app.logger.info(f"PDF successfully generated: {pdf_path}")
-        except Exception as pdf_error:
-            current_app.logger.error(f"PDF generation failed: {str(pdf_error)}")
-            raise ValueError(f"Could not generate PDF: {str(pdf_error)}")
-        
-        # Mark the form as complete
-        response.answers = json.dumps(answers)
-        response.is_complete = True
-        response.pdf_path = pdf_path
-        response.submitted_at = datetime.utcnow()
-        db.session.commit()
-        current_app.logger.info(f"Form response {response.id} marked as complete")
-        
-        # Prepare form data for context
-        form_data = {
-            'form_id': form.id,
-            'form_title': form.title,
-            'user_id': current_user.id,
-            'user_email': current_user.email,
-            'user_name': current_user.username,
-            'submitted_at': datetime.utcnow().isoformat(),
-            'question_count': len(form_structure.get('questions', [])),
-            'answered_count': len(answers)
-        }
+        submitted_at = datetime.utcnow()
+        marked = FormResponse.query.filter_by(id=response.id, is_complete=False).update({
+            "answers": json.dumps(answers),
+            "is_complete": True,
+            "pdf_path": None,
+            "submitted_at": submitted_at,
+            "updated_at": submitted_at
+        }, synchronize_session=False)
+        if not marked:
+            db.session.rollback()
+            return jsonify({'success': False, 'message': 'This form has already been submitted.'}), 409
+        sync_response_answers(response, answers)
         
-        # Send email with PDF to the user and Minto Disability Services
-        email_result = send_form_email(
-            recipient_email=current_user.email,
-            form_title=form.title,
-            pdf_path=pdf_path,
-            form_data=form_data
-        )
+        # The job row is committed together with the response, so a submitted form always has its job
+        job = get_job_queue().enqueue('form_submission', {"response_id": response.id},
+                                      user_id=current_user.id,
+                                      max_attempts=current_app.config.get('SUBMISSION_JOB_MAX_ATTEMPTS', 3))
+        current_app.logger.info(f"Form response {response.id} marked as complete; queued submission job {job.id}")
         
-        # Log the email sending result
-        if email_result.get('success'):
-            current_app.logger.info(f"Form '{form.title}' submitted successfully and email sent")
-            email_sent = True
-        else:
-            current_app.logger.warning(f"Form '{form.title}' submitted but email could not be sent: {email_result.get('message')}")
-            email_sent = False
-        
-        # Return success response
         return jsonify({
             'success': True,
-            'message': 'Form submitted successfully and sent to Minto Disability Services',
-            'email_sent': email_sent,
-            'email_details': email_result
-        })
+            'status': 'processing',
+            'message': 'Form submitted successfully. Your PDF is being prepared and sent to Minto Disability Services.',
+            'job_id': job.id,
+            'status_url': url_for('job.job_status', job_id=job.id)
+        }), 202
         
     except Exception as e:
+        db.session.rollback()
         current_app.logger.error(f"Form submission error: {str(e)}")
         return jsonify({'success': False, 'message': f'Error submitting form: {str(e)}'}), 500
 
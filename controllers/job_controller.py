@@ -0,0 +1,33 @@
+from flask import Blueprint, jsonify
+from flask_login import login_required, current_user
+from models import BackgroundJob
+from services.jobs.job_queue import get_job_queue, job_to_dict, FAILED
+
+job_bp = Blueprint('job', __name__, url_prefix='/jobs')
+
+def _visible_job(job_id):
+    """The job if the current user started it or is an admin, otherwise None"""
+    job = BackgroundJob.query.get(job_id)
+    if job is None or (job.user_id != current_user.id and not current_user.is_admin):
+        return None
+    return job
+
+@job_bp.route('/<int:job_id>', methods=['GET'])
+@login_required
+def job_status(job_id):
+    """Status, stage and progress of a background job, for clients that poll"""
+    job = _visible_job(job_id)
+    if job is None:
+        return jsonify({'success': False, 'message': 'Job not found'}), 404
+    return jsonify({'success': True, 'job': job_to_dict(job)})
+
+@job_bp.route('/<int:job_id>/retry', methods=['POST'])
+@login_required
+def retry_job(job_id):
+    """Requeue a failed job; its inputs (such as an uploaded file) are reused"""
+    job = _visible_job(job_id)
+    if job is None:
+        return jsonify({'success': False, 'message': 'Job not found'}), 404
+    if job.status != FAILED or not get_job_queue().retry(job.id):
+        return jsonify({'success': False, 'message': 'Only failed jobs can be retried'}), 409
+    return jsonify({'success': True, 'job': job_to_dict(BackgroundJob.query.get(job_id))})
@@ -8,6 +8,7 @@ from models import Document, DocumentChunk
 from services.document.document_service import process_document, extract_text_from_file
 from services.document.vector_service import search_documents
 from services.ai.openai_service import generate_answer_with_context
+from services.ai.scheduler import ai_priority
 
 policy_bp = Blueprint('policy', __name__, url_prefix='/policies')
 
@@ -19,6 +20,7 @@ def policy_list():
 
 @policy_bp.route('/upload', methods=['GET', 'POST'])
 @login_required
+@ai_priority('batch')
 def upload_policy():
     if not current_user.is_admin:
         flash('Only administrators can upload policy documents', 'danger')
@@ -90,6 +92,7 @@ def policy_assistant():
 
 @policy_bp.route('/assistant/rebuild-vector-db', methods=['POST'])
 @login_required
+@ai_priority('batch')
 def rebuild_vector_database():
     """Rebuild the vector database from scratch using existing document chunks"""
     # Only administrators can rebuild the vector database
@@ -115,6 +118,7 @@ def rebuild_vector_database():
 
 @policy_bp.route('/assistant/query', methods=['POST'])
 @login_required
+@ai_priority('interactive')
 def query_assistant():
     data = request.json
     query = data.get('query')
@@ -0,0 +1,28 @@
+"""
+Gunicorn server hooks.
+
+Gunicorn loads this file automatically from the working directory. Table
+creation runs once in the master before workers fork. Each worker starts its
+background job pool and can optionally import its heavy dependencies before
+it accepts requests (set WARM_UP_ON_START=True).
+"""
+
+
+def on_starting(server):
+    from app import app, db, init_db
+
+    init_db()
+    # Do not hand the master's database connections to forked workers
+    with app.app_context():
+        db.engine.dispose()
+
+
+def post_worker_init(worker):
+    from app import app, warm_up
+    from services.jobs.job_queue import get_job_queue
+
+    # Start the background job pool, which also resumes jobs left queued by a previous run
+    with app.app_context():
+        get_job_queue()
+    if app.config.get('WARM_UP_ON_START'):
+        warm_up()
@@ -41,6 +41,20 @@ class Form(db.Model):
     def __repr__(self):
         return f'<Form {self.title}>'
 
+class FormFingerprint(db.Model):
+    """Structural fingerprint of a form, used to reuse its extraction for re-uploaded or near-identical forms."""
+    id = db.Column(db.Integer, primary_key=True)
+    form_id = db.Column(db.Integer, db.ForeignKey('form.id'), nullable=False, unique=True)
+    exact_hash = db.Column(db.String(64), index=True)  # sha256 of the normalised structural units
+    signature = db.Column(db.Text)  # JSON list of MinHash values
+    units = db.Column(db.Text)  # JSON list of normalised paragraphs and table-cell labels
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    form = db.relationship('Form', backref=db.backref('fingerprint', uselist=False, cascade="all, delete-orphan"), lazy=True)
+    
+    def __repr__(self):
+        return f'<FormFingerprint for Form {self.form_id}>'
+
 class FormResponse(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     form_id = db.Column(db.Integer, db.ForeignKey('form.id'), nullable=False)
@@ -52,9 +66,40 @@ class FormResponse(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    @property
+    def status(self):
+        """
+        in_progress, processing (submitted, PDF not yet generated by its background job) or complete.
+        A response whose PDF cannot be generated is reopened by the job, so it is never stuck processing.
+        """
+        if not self.is_complete:
+            return 'in_progress'
+        return 'complete' if self.pdf_path else 'processing'
+    
     def __repr__(self):
         return f'<FormResponse {self.id} for Form {self.form_id}>'
 
+class FormAnswer(db.Model):
+    """
+    One answer of a form response, kept in sync with ``FormResponse.answers`` so answers can be
+    filtered and exported in SQL. A multiple-choice answer has one row per selected option.
+    """
+    __table_args__ = (
+        db.Index('ix_form_answer_form_question', 'form_id', 'question_id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    response_id = db.Column(db.Integer, db.ForeignKey('form_response.id'), nullable=False, index=True)
+    form_id = db.Column(db.Integer, db.ForeignKey('form.id'), nullable=False)
+    question_id = db.Column(db.String(100), nullable=False)
+    position = db.Column(db.Integer, default=0)  # order of the option within a multiple-choice answer
+    value = db.Column(db.Text, nullable=False)
+    
+    response = db.relationship('FormResponse', backref=db.backref('answer_rows', cascade="all, delete-orphan", lazy=True), lazy=True)
+    
+    def __repr__(self):
+        return f'<FormAnswer {self.question_id} for FormResponse {self.response_id}>'
+
 class Document(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
@@ -81,3 +126,48 @@ class DocumentChunk(db.Model):
     
     def __repr__(self):
         return f'<DocumentChunk {self.id} for Document {self.document_id}>'
+
+class AICallRecord(db.Model):
+    """One model call (chat, vision or embedding), kept for offline cost and latency analysis."""
+    id = db.Column(db.Integer, primary_key=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    kind = db.Column(db.String(20))  # chat, vision or embedding
+    model = db.Column(db.String(64))
+    route = db.Column(db.String(100), index=True)  # Flask endpoint or job name
+    stage = db.Column(db.String(100), index=True)  # e.g. extract_questions
+    priority = db.Column(db.String(20))
+    prompt_tokens = db.Column(db.Integer, default=0)
+    completion_tokens = db.Column(db.Integer, default=0)
+    bytes_sent = db.Column(db.Integer, default=0)
+    latency_ms = db.Column(db.Integer, default=0)
+    retries = db.Column(db.Integer, default=0)
+    cached = db.Column(db.Boolean, default=False)
+    success = db.Column(db.Boolean, default=True)
+    error = db.Column(db.String(255))
+    cost_usd = db.Column(db.Float, default=0.0)
+    
+    def __repr__(self):
+        return f'<AICallRecord {self.id} {self.stage} {self.model}>'
+
+class BackgroundJob(db.Model):
+    """A unit of work run by the local background worker pool (see services/jobs/job_queue.py)."""
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False, index=True)  # e.g. form_upload
+    status = db.Column(db.String(20), default='queued', index=True)  # queued, running, succeeded or failed
+    stage = db.Column(db.String(50))  # current stage, e.g. extract
+    progress = db.Column(db.Integer, default=0)  # 0-100
+    message = db.Column(db.String(255))
+    payload = db.Column(db.Text)  # JSON arguments for the handler
+    result = db.Column(db.Text)  # JSON result of a successful run
+    error = db.Column(db.Text)
+    attempts = db.Column(db.Integer, default=0)
+    max_attempts = db.Column(db.Integer, default=1)
+    run_after = db.Column(db.DateTime, nullable=True)  # not before this time (retry backoff)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f'<BackgroundJob {self.id} {self.kind} {self.status}>'
@@ -0,0 +1,146 @@
+"""
+Wrapper around the OpenAI client used by every AI call in the app.
+
+``AIClient`` exposes the same ``chat.completions.create`` and
+``embeddings.create`` methods as the SDK client, so call sites do not change,
+while giving us one place to add behaviour around model calls. Chat
+completions go through the persistent response cache (see ``llm_cache``),
+and every call that reaches the API waits for a slot for its priority class
+(see ``scheduler``) and is then rate limited, retried and guarded by a circuit
+breaker (see ``resilience``). Every call, including cache hits, is recorded
+for token, latency and cost accounting (see ``metrics``).
+"""
+
+import time
+import logging
+from services.ai.llm_cache import get_llm_cache, request_key, LLMCacheMiss
+from services.ai.resilience import get_resilient_caller
+from services.ai.scheduler import get_scheduler, current_priority
+from services.ai.metrics import record_ai_call
+
+logger = logging.getLogger(__name__)
+
+
+class _Completions:
+    def __init__(self, client):
+        self._client = client
+
+    def create(self, **kwargs):
+        return self._client.create_chat_completion(**kwargs)
+
+
+class _Chat:
+    def __init__(self, client):
+        self.completions = _Completions(client)
+
+
+class _Embeddings:
+    def __init__(self, client):
+        self._client = client
+
+    def create(self, **kwargs):
+        return self._client.create_embedding(**kwargs)
+
+
+class AIClient:
+    """Drop-in replacement for ``openai.OpenAI`` with caching, scheduling, rate limiting and retries."""
+
+    def __init__(self, openai_client):
+        self._openai = openai_client
+        self.chat = _Chat(self)
+        self.embeddings = _Embeddings(self)
+
+    def create_chat_completion(self, cache=True, **kwargs):
+        """
+        Create a chat completion, serving it from the response cache when possible.
+        Pass ``cache=False`` to always call the model.
+        """
+        kind = 'vision' if _has_image(kwargs) else 'chat'
+        model = kwargs.get('model')
+        llm_cache = get_llm_cache()
+        use_cache = cache and llm_cache.enabled and not kwargs.get('stream')
+        key = None
+
+        if use_cache:
+            start = time.perf_counter()
+            key = request_key(kwargs)
+            cached = llm_cache.get(key)
+            if cached is not None:
+                from openai.types.chat import ChatCompletion
+                logger.info(f"LLM cache hit for {model} ({key[:12]})")
+                response = ChatCompletion.model_validate_json(cached)
+                # Tokens of a cached call are what it would have cost; its cost is recorded as zero
+                record_ai_call(kind, model, time.perf_counter() - start, usage=response.usage, cached=True,
+                               priority=current_priority())
+                return response
+            if llm_cache.mode == 'replay':
+                miss = LLMCacheMiss(f"No recorded response for {model} request {key[:12]}")
+                record_ai_call(kind, model, time.perf_counter() - start, cached=True, error=miss,
+                               priority=current_priority())
+                raise miss
+
+        response = self._call(kind, self._openai.chat.completions.create, kwargs)
+
+        if use_cache:
+            try:
+                llm_cache.put(key, model, response.model_dump_json())
+            except Exception as e:
+                # A cache write failure must never fail the call itself
+                logger.warning(f"Could not store LLM response in cache: {str(e)}")
+        return response
+
+    def create_embedding(self, **kwargs):
+        """Create embeddings."""
+        return self._call('embedding', self._openai.embeddings.create, kwargs)
+
+    def _call(self, kind, fn, kwargs):
+        """Make an API call under the scheduler and resilience policy, and record its metrics."""
+        priority = current_priority()
+        bytes_sent = _payload_size(kwargs)
+        start = time.perf_counter()
+        try:
+            with get_scheduler().slot(priority):
+                response, retries = get_resilient_caller().call(fn, kwargs)
+        except Exception as e:
+            record_ai_call(kind, kwargs.get('model'), time.perf_counter() - start, bytes_sent=bytes_sent,
+                           retries=getattr(e, 'ai_retries', 0), error=e, priority=priority)
+            raise
+        record_ai_call(kind, kwargs.get('model'), time.perf_counter() - start, bytes_sent=bytes_sent,
+                       usage=getattr(response, 'usage', None), retries=retries, priority=priority)
+        return response
+
+
+def _has_image(params):
+    for message in params.get('messages', []):
+        content = message.get('content')
+        if isinstance(content, list) and any(part.get('type') == 'image_url' for part in content):
+            return True
+    return False
+
+
+def _payload_size(params):
+    """Size of the text and image data in a request, counted without serialising it again."""
+    size = 0
+    for message in params.get('messages', []):
+        content = message.get('content')
+        if isinstance(content, str):
+            size += len(content)
+        elif isinstance(content, list):
+            for part in content:
+                if part.get('type') == 'text':
+                    size += len(part.get('text') or '')
+                elif part.get('type') == 'image_url':
+                    image = part.get('image_url')
+                    size += len((image.get('url') if isinstance(image, dict) else image) or '')
+    inputs = params.get('input')
+    if isinstance(inputs, str):
+        size += len(inputs)
+    elif isinstance(inputs, list):
+        size += sum(len(item) for item in inputs if isinstance(item, str))
+    return size
+
+
+def create_ai_client(api_key):
+    """Build an ``AIClient``. The SDK's own retries are disabled; ``ResilientCaller`` retries instead."""
+    from openai import OpenAI
+    return AIClient(OpenAI(api_key=api_key, max_retries=0))
@@ -0,0 +1,65 @@
+"""
+Encode-once image payloads for vision model requests.
+
+An upload is pre-processed and base64-encoded a single time, and the resulting
+``ImagePayload`` is handed to every extraction, retry and verification pass.
+The object is immutable, so passes can share it freely (including across
+threads) without copying the multi-megabyte data URL.
+"""
+
+import os
+import base64
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict
+from services.ai.image_preprocessor import preprocess_image
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ImagePayload:
+    """An image ready to be attached to a chat completion request."""
+
+    source_path: str
+    mime_type: str
+    data_url: str
+    source_bytes: int
+    encoded_bytes: int
+
+    @classmethod
+    def from_path(cls, file_path: str) -> 'ImagePayload':
+        """Pre-process and encode a file once."""
+        image_bytes, mime_type = preprocess_image(file_path)
+        encoded = base64.b64encode(image_bytes).decode('utf-8')
+        payload = cls(
+            source_path=file_path,
+            mime_type=mime_type,
+            data_url=f"data:{mime_type};base64,{encoded}",
+            source_bytes=os.path.getsize(file_path),
+            encoded_bytes=len(image_bytes),
+        )
+        logger.info(f"Prepared image payload for {file_path}: {payload.metrics()}")
+        return payload
+
+    @property
+    def base64_bytes(self) -> int:
+        """Size of the base64 text that is sent with each request."""
+        return len(self.data_url) - self.data_url.index(',') - 1
+
+    def content_part(self) -> Dict[str, Any]:
+        """Return the ``image_url`` message content part for this image."""
+        return {
+            "type": "image_url",
+            "image_url": {"url": self.data_url}
+        }
+
+    def metrics(self) -> Dict[str, Any]:
+        """Byte-size metrics for logging and reporting."""
+        return {
+            "mime_type": self.mime_type,
+            "source_bytes": self.source_bytes,
+            "encoded_bytes": self.encoded_bytes,
+            "base64_bytes": self.base64_bytes,
+            "reduction": round(1 - self.encoded_bytes / self.source_bytes, 3) if self.source_bytes else 0.0,
+        }
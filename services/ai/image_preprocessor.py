@@ -0,0 +1,145 @@
+"""
+Image pre-processing for vision model requests.
+
+Photos of paper forms are often many megabytes, but the vision model scales
+every image down to fit within 2048x2048 and then to a 768px short side before
+reading it. This module applies the same reduction locally (after fixing EXIF
+orientation, converting to greyscale and trimming plain borders) and
+re-encodes the result as whichever of JPEG or PNG is smaller, so requests
+carry only the pixels the model will actually use.
+
+Results are memoised by file content hash, so repeated passes over the same
+upload reuse the processed bytes.
+"""
+
+import io
+import os
+import hashlib
+import logging
+import mimetypes
+import threading
+from collections import OrderedDict
+from typing import Tuple
+
+logger = logging.getLogger(__name__)
+
+# Effective input resolution of the vision model in "high" detail mode
+MAX_LONG_SIDE = 2048
+MAX_SHORT_SIDE = 768
+
+# Pixels within this distance of the border colour count as background when trimming
+TRIM_TOLERANCE = 24
+TRIM_MARGIN = 8
+
+JPEG_QUALITY = 85
+
+# Number of processed images kept in memory
+CACHE_SIZE = 32
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def file_sha256(file_path: str) -> str:
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _target_size(width: int, height: int) -> Tuple[int, int]:
+    """Compute the size the vision model would downscale an image to."""
+    scale = min(1.0, MAX_LONG_SIDE / max(width, height), MAX_SHORT_SIDE / min(width, height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _trim_borders(image):
+    """Crop away uniform borders (scanner bed, table surface) around the page."""
+    from PIL import Image, ImageChops
+
+    background = Image.new(image.mode, image.size, image.getpixel((0, 0)))
+    diff = ImageChops.difference(image, background)
+    # Ignore small variations such as JPEG noise on a white border
+    diff = ImageChops.add(diff, diff, 2.0, -TRIM_TOLERANCE)
+    bbox = diff.getbbox()
+    if not bbox:
+        return image
+
+    left, top, right, bottom = bbox
+    bbox = (
+        max(0, left - TRIM_MARGIN),
+        max(0, top - TRIM_MARGIN),
+        min(image.width, right + TRIM_MARGIN),
+        min(image.height, bottom + TRIM_MARGIN),
+    )
+    return image.crop(bbox)
+
+
+def _encode_smallest(image) -> Tuple[bytes, str]:
+    """Encode as JPEG and PNG and keep whichever is smaller."""
+    jpeg_buffer = io.BytesIO()
+    image.save(jpeg_buffer, format='JPEG', quality=JPEG_QUALITY, optimize=True)
+
+    png_buffer = io.BytesIO()
+    image.save(png_buffer, format='PNG', optimize=True)
+
+    if png_buffer.tell() < jpeg_buffer.tell():
+        return png_buffer.getvalue(), 'image/png'
+    return jpeg_buffer.getvalue(), 'image/jpeg'
+
+
+def _preprocess(file_path: str) -> Tuple[bytes, str]:
+    from PIL import Image, ImageOps
+
+    with Image.open(file_path) as original:
+        image = ImageOps.exif_transpose(original)
+        image = image.convert('L')
+
+    image = _trim_borders(image)
+
+    size = _target_size(image.width, image.height)
+    if size != image.size:
+        image = image.resize(size, Image.LANCZOS)
+
+    return _encode_smallest(image)
+
+
+def _read_raw(file_path: str) -> Tuple[bytes, str]:
+    mime_type, _ = mimetypes.guess_type(file_path)
+    with open(file_path, 'rb') as f:
+        return f.read(), mime_type or 'application/octet-stream'
+
+
+def preprocess_image(file_path: str) -> Tuple[bytes, str]:
+    """
+    Return ``(image_bytes, mime_type)`` ready to send to a vision model.
+
+    Files that Pillow cannot open (PDFs, DOCX, corrupt images) are returned
+    unchanged with their guessed MIME type.
+    """
+    file_hash = file_sha256(file_path)
+
+    with _cache_lock:
+        if file_hash in _cache:
+            _cache.move_to_end(file_hash)
+            return _cache[file_hash]
+
+    try:
+        result = _preprocess(file_path)
+        logger.info(
+            f"Pre-processed image {file_path}: {os.path.getsize(file_path)} -> {len(result[0])} bytes ({result[1]})"
+        )
+    except Exception as e:
+        # Not cached: raw files can be large and re-reading them is cheap
+        logger.warning(f"Could not pre-process {file_path}, sending original bytes: {str(e)}")
+        return _read_raw(file_path)
+
+    with _cache_lock:
+        _cache[file_hash] = result
+        _cache.move_to_end(file_hash)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+    return result
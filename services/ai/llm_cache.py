@@ -0,0 +1,218 @@
+"""
+Persistent cache for chat completion responses.
+
+Responses are stored in a local SQLite file keyed by a digest of the request
+(model, messages, temperature, response_format and any other parameters), so a
+repeated upload or a re-run script returns the stored completion instead of
+paying for the call again. Entries expire after a TTL and the least recently
+used entries are evicted once the file grows past its size limit.
+
+The cache mode is set with ``LLM_CACHE_MODE``:
+
+- ``readwrite`` (default): serve hits, store misses
+- ``off``: never read or write
+- ``record``: always call the model and overwrite the stored response
+- ``replay``: serve hits only; a miss raises ``LLMCacheMiss``. The store is
+  opened read-only and never created, so together with a separate
+  ``LLM_CACHE_PATH`` the cache becomes a deterministic fixture store for
+  benchmarks.
+
+Individual calls can skip the cache with ``cache=False`` and a block of code
+can skip it with ``bypass_llm_cache()``.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import pathlib
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from services.ai.settings import ai_setting
+
+logger = logging.getLogger(__name__)
+
+CACHE_MODES = ('readwrite', 'off', 'record', 'replay')
+
+# Request parameters that do not change the response
+_UNKEYED_PARAMS = {'timeout', 'extra_headers', 'user'}
+
+_bypass = contextvars.ContextVar('llm_cache_bypass', default=False)
+
+
+class LLMCacheMiss(Exception):
+    """Raised in replay mode when a request has no stored response."""
+    pass
+
+
+@contextmanager
+def bypass_llm_cache():
+    """Skip the cache for every call made inside the block (including pipeline threads it starts)."""
+    token = _bypass.set(True)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def request_key(params):
+    """Digest of the request parameters that determine the response."""
+    keyed = {name: value for name, value in params.items() if name not in _UNKEYED_PARAMS}
+    canonical = json.dumps(keyed, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class LLMCache:
+    """SQLite-backed response store with TTL and size-based LRU eviction."""
+
+    def __init__(self, path, mode='readwrite', ttl_seconds=7 * 24 * 3600, max_bytes=200 * 1024 * 1024):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown LLM cache mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._initialized = False
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.mode != 'off' and not _bypass.get()
+
+    def _connect(self):
+        # A short-lived connection per operation works across threads and worker processes
+        conn = sqlite3.connect(self.path, timeout=30)
+        if not self._initialized:
+            with self._lock:
+                if not self._initialized:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS responses ("
+                        " key TEXT PRIMARY KEY,"
+                        " model TEXT,"
+                        " response TEXT NOT NULL,"
+                        " size INTEGER NOT NULL,"
+                        " created_at REAL NOT NULL,"
+                        " accessed_at REAL NOT NULL,"
+                        " hits INTEGER NOT NULL DEFAULT 0)"
+                    )
+                    conn.execute("CREATE INDEX IF NOT EXISTS ix_responses_accessed_at ON responses (accessed_at)")
+                    conn.commit()
+                    self._initialized = True
+        return conn
+
+    def _connect_read_only(self):
+        # Replaying never changes the fixture store, and a missing store is an empty one
+        if not os.path.exists(self.path):
+            return None
+        return sqlite3.connect(f"{pathlib.Path(self.path).resolve().as_uri()}?mode=ro", uri=True, timeout=30)
+
+    def get(self, key):
+        """Return the stored response JSON for a key, or None."""
+        if self.mode in ('off', 'record'):
+            return None
+        if self.mode == 'replay':
+            conn = self._connect_read_only()
+            if conn is None:
+                return None
+            try:
+                row = conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+                return row[0] if row else None
+            finally:
+                conn.close()
+        now = time.time()
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            response, created_at = row
+            if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                conn.commit()
+                return None
+            conn.execute("UPDATE responses SET accessed_at = ?, hits = hits + 1 WHERE key = ?", (now, key))
+            conn.commit()
+            return response
+        finally:
+            conn.close()
+
+    def put(self, key, model, response_json):
+        """Store a response and evict expired and least recently used entries if needed."""
+        if self.mode in ('off', 'replay'):
+            return
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, size, created_at, accessed_at, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                (key, model, response_json, len(response_json), now, now)
+            )
+            if self.ttl_seconds:
+                conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+            self._evict(conn)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Trim to 90% of the limit so eviction does not run on every write
+        target = int(self.max_bytes * 0.9)
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall():
+            if total <= target:
+                break
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+        logger.info(f"Evicted LLM cache entries; cache is now {total} bytes")
+
+    def stats(self):
+        """Entry count, stored bytes and total hits."""
+        conn = self._connect_read_only() if self.mode == 'replay' else self._connect()
+        if conn is None:
+            return {"mode": self.mode, "entries": 0, "bytes": 0, "hits": 0}
+        try:
+            entries, size, hits = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(hits), 0) FROM responses"
+            ).fetchone()
+            return {"mode": self.mode, "entries": entries, "bytes": size, "hits": hits}
+        finally:
+            conn.close()
+
+    def clear(self):
+        """Remove every stored response."""
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+        finally:
+            conn.close()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """Return the process-wide response cache."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                path = ai_setting('LLM_CACHE_PATH')
+                mode = ai_setting('LLM_CACHE_MODE', 'readwrite')
+                if mode != 'replay':
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                _cache = LLMCache(
+                    path,
+                    mode=mode,
+                    ttl_seconds=ai_setting('LLM_CACHE_TTL_SECONDS'),
+                    max_bytes=ai_setting('LLM_CACHE_MAX_BYTES')
+                )
+    return _cache
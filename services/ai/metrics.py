@@ -0,0 +1,204 @@
+"""
+Token, latency and cost accounting for model calls.
+
+``AIClient`` reports every chat, vision and embedding call (including cache
+hits) to ``record_ai_call``. Each record carries the calling route and stage,
+which come from context variables:
+
+- the route is set per request from the Flask endpoint (see ``app.py``) and by
+  background jobs with ``ai_route``
+- the stage is set with ``ai_stage``, used as a decorator on the service
+  functions that call the model (``extract_questions``,
+  ``validate_questions``, ...)
+
+Both are carried into pipeline threads with the rest of the context.
+
+Records are aggregated in memory over a rolling window into per-route and
+per-stage summaries with latency histograms (served at ``/admin/ai/metrics``)
+and written to the ``ai_call_record`` table for offline analysis.
+"""
+
+import time
+import logging
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from flask import has_app_context
+from services.ai.settings import ai_setting
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60)
+
+# Approximate list prices in USD per million tokens: (prompt, completion)
+MODEL_PRICES = {
+    'gpt-4o': (2.50, 10.00),
+    'gpt-4o-mini': (0.15, 0.60),
+    'gpt-4-turbo-preview': (10.00, 30.00),
+    'text-embedding-ada-002': (0.10, 0.0),
+}
+
+_route = contextvars.ContextVar('ai_route', default=None)
+_stage = contextvars.ContextVar('ai_stage', default=None)
+
+
+def set_ai_route(route):
+    """Set the route for calls made from the current context (for example in ``before_request``)."""
+    _route.set(route)
+
+
+@contextmanager
+def ai_route(route):
+    """Attribute model calls made inside the block to ``route``."""
+    token = _route.set(route)
+    try:
+        yield
+    finally:
+        _route.reset(token)
+
+
+@contextmanager
+def ai_stage(name):
+    """Attribute model calls made inside the block (or the decorated function) to a pipeline stage."""
+    token = _stage.set(name)
+    try:
+        yield
+    finally:
+        _stage.reset(token)
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    """Approximate cost of a call in USD."""
+    prompt_price, completion_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class AIMetrics:
+    """Rolling in-memory window of call records with per-route and per-stage summaries."""
+
+    def __init__(self, window_seconds=3600, max_records=10000):
+        self.window_seconds = window_seconds
+        self._records = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+
+    def add(self, record):
+        with self._lock:
+            self._records.append(record)
+
+    def _recent(self):
+        cutoff = time.time() - self.window_seconds
+        with self._lock:
+            while self._records and self._records[0]['timestamp'] < cutoff:
+                self._records.popleft()
+            return list(self._records)
+
+    @staticmethod
+    def _summarise(records):
+        latencies = sorted(record['latency_ms'] / 1000 for record in records if not record['cached'])
+        histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+        for latency in latencies:
+            index = next((i for i, bound in enumerate(LATENCY_BUCKETS) if latency <= bound), len(LATENCY_BUCKETS))
+            histogram[index] += 1
+        labels = [f"<={bound}s" for bound in LATENCY_BUCKETS] + [f">{LATENCY_BUCKETS[-1]}s"]
+        return {
+            "calls": len(records),
+            "cached": sum(1 for record in records if record['cached']),
+            "errors": sum(1 for record in records if not record['success']),
+            "retries": sum(record['retries'] for record in records),
+            "prompt_tokens": sum(record['prompt_tokens'] for record in records),
+            "completion_tokens": sum(record['completion_tokens'] for record in records),
+            "bytes_sent": sum(record['bytes_sent'] for record in records),
+            "cost_usd": round(sum(record['cost_usd'] for record in records), 4),
+            "latency_seconds": {
+                "p50": round(_percentile(latencies, 0.5), 3),
+                "p95": round(_percentile(latencies, 0.95), 3),
+                "max": round(latencies[-1], 3) if latencies else 0.0,
+                "histogram": dict(zip(labels, histogram)),
+            },
+        }
+
+    def snapshot(self):
+        """Totals plus per-route and per-stage summaries for the rolling window."""
+        records = self._recent()
+        by_route = {}
+        by_stage = {}
+        for record in records:
+            by_route.setdefault(record['route'] or 'unknown', []).append(record)
+            by_stage.setdefault(record['stage'] or 'unknown', []).append(record)
+        return {
+            "window_seconds": self.window_seconds,
+            "total": self._summarise(records),
+            "routes": {name: self._summarise(items) for name, items in sorted(by_route.items())},
+            "stages": {name: self._summarise(items) for name, items in sorted(by_stage.items())},
+        }
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_ai_metrics():
+    """Return the process-wide metrics window."""
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = AIMetrics(window_seconds=ai_setting('AI_METRICS_WINDOW_SECONDS', 3600))
+    return _metrics
+
+
+def _persist(record):
+    """Write a record to the ai_call_record table without touching the request's session."""
+    from app import db
+    from models import AICallRecord
+
+    values = {name: record[name] for name in (
+        'kind', 'model', 'route', 'stage', 'priority', 'prompt_tokens', 'completion_tokens',
+        'bytes_sent', 'latency_ms', 'retries', 'cached', 'success', 'error', 'cost_usd'
+    )}
+    values['created_at'] = datetime.utcfromtimestamp(record['timestamp'])
+    with db.engine.begin() as connection:
+        connection.execute(AICallRecord.__table__.insert().values(**values))
+
+
+def record_ai_call(kind, model, latency, bytes_sent=0, usage=None, retries=0,
+                   cached=False, error=None, priority=None):
+    """Record one model call in the rolling window and the ai_call_record table."""
+    prompt_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+    completion_tokens = getattr(usage, 'completion_tokens', 0) or 0
+    record = {
+        "timestamp": time.time(),
+        "kind": kind,
+        "model": model,
+        "route": _route.get(),
+        "stage": _stage.get(),
+        "priority": priority,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "bytes_sent": bytes_sent,
+        "latency_ms": int(latency * 1000),
+        "retries": retries,
+        "cached": cached,
+        "success": error is None,
+        "error": str(error)[:255] if error is not None else None,
+        "cost_usd": 0.0 if cached else estimate_cost(model, prompt_tokens, completion_tokens),
+    }
+    get_ai_metrics().add(record)
+
+    if ai_setting('AI_METRICS_PERSIST', True) and has_app_context():
+        try:
+            _persist(record)
+        except Exception as e:
+            # Accounting must never fail the call it describes
+            logger.warning(f"Could not persist AI call record: {str(e)}")
+    return record
@@ -1,11 +1,17 @@
 import os
 import json
 import logging
-import base64
 import mimetypes
 from pathlib import Path
-from openai import OpenAI
 from flask import current_app
+from services.ai.image_payload import ImagePayload
+from services.ai.metrics import ai_stage
+from services.ai.prompts import MARKDOWN_EXTRACTION_SYSTEM_PROMPT
+from services.ai.prompt_compaction import compact_for_prompt
+from services.ai.structured_output import json_schema_response_format, parse_structured_response, StructuredOutputError
+from services.form.form_schemas import FORM_FIELDS_SCHEMA, MARKDOWN_FIELDS_SCHEMA, MARKDOWN_VERIFICATION_SCHEMA, VALIDATION_SCHEMA
+from services.form.completeness import completeness_gate
+from services.form.deterministic_extractor import extract_docx_fields
 
 # Initialize OpenAI client - will be set with the actual API key in the functions
 openai = None
@@ -19,7 +25,9 @@ def get_openai_client():
         api_key = current_app.config.get('OPENAI_API_KEY')
         if not api_key:
             raise ValueError("OpenAI API key is not configured. Please set the OPENAI_API_KEY environment variable.")
-        openai = OpenAI(api_key=api_key)
+        # Imported on first use; the SDK is slow to import and most requests never need it
+        from services.ai.client import create_ai_client
+        openai = create_ai_client(api_key)
     return openai
 
 def is_image_file(file_path):
@@ -35,12 +43,8 @@ def is_image_file(file_path):
     mime_type, _ = mimetypes.guess_type(file_path)
     return mime_type and mime_type.startswith('image/')
 
-def encode_image_to_base64(image_path):
-    """Encode an image file to base64 for the OpenAI API"""
-    with open(image_path, "rb") as image_file:
-        return base64.b64encode(image_file.read()).decode('utf-8')
-
-def verify_field_extraction_completeness(image_path, base64_image, extracted_fields):
+@ai_stage('verify_field_extraction_completeness')
+def verify_field_extraction_completeness(image_payload, extracted_fields):
     """
     Verify that all potential form fields in the image have been extracted.
     Returns potential missed fields and a completeness assessment.
@@ -50,18 +54,6 @@ def verify_field_extraction_completeness(image_path, base64_image, extracted_fie
     """
     client = get_openai_client()
     
-    # Define verification result schema for consistent output
-    verification_schema = {
-        "type": "object",
-        "properties": {
-            "complete": {"type": "boolean"},
-            "issues": {"type": "array", "items": {"type": "string"}},
-            "suggestions": {"type": "array", "items": {"type": "string"}},
-            "missed_questions": {"type": "array", "items": {"type": "string"}}
-        },
-        "required": ["complete", "issues", "missed_questions"]
-    }
-    
     try:
         # Format the extracted fields for the verification prompt
         field_list = []
@@ -141,17 +133,17 @@ def verify_field_extraction_completeness(image_path, base64_image, extracted_fie
                         {
                             "type": "image_url",
                             "image_url": {
-                                "url": f"data:image/jpeg;base64,{base64_image}"
+                                "url": image_payload.data_url
                             }
                         }
                     ]
                 }
             ],
-            response_format={"type": "json_object"},
+            response_format=json_schema_response_format("field_verification", VALIDATION_SCHEMA),
             temperature=0.2  # Lower temperature for more precise verification
         )
         
-        verification_result = json.loads(verification_response.choices[0].message.content)
+        verification_result = parse_structured_response(verification_response, VALIDATION_SCHEMA)
         
         # Log verification results
         is_complete = verification_result.get('complete', False)
@@ -177,6 +169,7 @@ def verify_field_extraction_completeness(image_path, base64_image, extracted_fie
             "missed_questions": []
         }
 
+@ai_stage('extract_form_fields_from_markdown')
 def extract_form_fields_from_markdown(markdown_content, file_path=None):
     """
     Extract form fields from markdown content generated from a document.
@@ -197,6 +190,9 @@ def extract_form_fields_from_markdown(markdown_content, file_path=None):
         # Get the OpenAI client
         client = get_openai_client()
         
+        # Strip padding, empty cells and repeated table headers; the verification pass reuses the result
+        markdown_content = compact_for_prompt('markdown_extraction', markdown_content)
+        
         # Extract form fields from markdown content
         current_app.logger.info("Performing form field extraction from markdown structure")
         # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
@@ -204,95 +200,68 @@ def extract_form_fields_from_markdown(markdown_content, file_path=None):
         response = client.chat.completions.create(
             model="gpt-4o",
             messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are a form field extraction specialist for markdown documents. "
-                        "Your task is to extract ALL form fields from markdown content with high accuracy. "
-                        "Markdown structure preserves the document's original formatting, making it easier to identify fields. "
-                        "\n\nGUIDELINES:\n"
-                        "1. Preserve the EXACT question text as shown in the markdown\n"
-                        "2. Pay special attention to markdown-specific formats:\n"
-                        "   - Headers (marked with #, ##, etc.) are often section titles\n"
-                        "   - Bullet points (marked with *, -, or +) may be separate questions\n"
-                        "   - Tables (defined with | symbols) often contain form fields in each row\n"
-                        "   - Code blocks (marked with ```) may contain structured content\n"
-                        "3. Capture ALL form fields, including checkboxes, radio buttons, and input fields\n"
-                        "4. For tables, extract each row as a separate question\n"
-                        "5. Maintain the SAME ORDER of questions as they appear in the document\n"
-                        "6. Include ALL section headings (# headers) as 'header' field type\n"
-                        "7. DO NOT INVENT FIELDS that aren't in the markdown\n"
-                        "8. DO NOT MAKE UP QUESTIONS or modify the text\n"
-                        "9. If you find checkbox syntax like '- [ ]' or '- [x]', identify these as checkbox fields\n"
-                        "10. Tables often represent form fields with multiple columns, analyze them carefully\n"
-                        "11. When extracting tables, the first column is usually the question_text\n"
-                        "12. For rows with cells containing YES/NO/NA options, interpret as radio button fields"
-                    )
-                },
-                {
-                    "role": "user",
-                    "content": (
-                        "Extract ALL form fields from this markdown content. The markdown preserves "
-                        "the structure of the original document. Extract each field as a separate question item.\n\n"
-                        "Provide your response as valid JSON with a `questions` array. Each question should include:\n"
-                        "- `id`: A unique identifier\n"
-                        "- `question_text`: The EXACT text of the question/field label\n"
-                        "- `field_type`: One of 'text', 'textarea', 'checkbox', 'radio', 'select', 'date', 'header'\n"
-                        "- `options`: Array of options if applicable (for checkbox, radio, select)\n"
-                        "- `required`: Boolean indicating if the field appears to be required\n\n"
-                        "For tables, each row should be a separate question. For headings (#, ##, etc.), "
-                        "use field_type 'header'. Maintain the EXACT question order.\n\n"
-                        f"Here is the markdown content:\n\n{markdown_content}"
-                    )
-                }
+                {"role": "system", "content": MARKDOWN_EXTRACTION_SYSTEM_PROMPT},
+                {"role": "user", "content": f"Markdown content:\n{markdown_content}"}
             ],
-            response_format={"type": "json_object"},
+            response_format=json_schema_response_format("markdown_fields", MARKDOWN_FIELDS_SCHEMA),
             temperature=0.1  # Lower temperature for more deterministic extraction
         )
         
-        initial_extraction = json.loads(response.choices[0].message.content)
+        initial_extraction = parse_structured_response(response, MARKDOWN_FIELDS_SCHEMA)
         current_app.logger.info(f"Extracted {len(initial_extraction.get('questions', []))} questions from markdown")
         
-        # Verify completeness with a second pass for quality assurance
-        current_app.logger.info("Performing verification pass to ensure all fields are captured")
-        verification_response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are a quality assurance specialist for form field extraction from markdown. "
-                        "Your task is to verify that ALL form fields have been correctly identified and "
-                        "that NOTHING was missed from the markdown content."
-                        "\n\nFocus on identifying any missing fields or items that should have been extracted "
-                        "but weren't. Analyze the markdown carefully and compare with the extracted list."
-                    )
-                },
-                {
-                    "role": "user",
-                    "content": (
-                        "Here is a list of form fields that were extracted from markdown content. "
-                        "Please examine the markdown carefully and verify if ANY fields or questions are missing from this list. "
-                        "Pay special attention to:\n"
-                        "- Markdown headers (#, ##, etc.) that should be section titles\n"
-                        "- List items (*, -, +) that might be form fields\n"
-                        "- Table rows that should be questions\n"
-                        "- Checkbox syntax (- [ ], - [x])\n"
-                        "- Form-like structure such as questions ending with a colon\n\n"
-                        f"Extracted fields (verify against the markdown):\n{json.dumps(initial_extraction, indent=2)}\n\n"
-                        "Respond with a JSON object that includes:\n"
-                        "1. `missed_fields`: Array of any fields that were completely missed\n"
-                        "2. `completeness_assessment`: Your assessment of whether any questions found in the markdown were not in the extracted list.\n\n"
-                        f"Here is the markdown content to verify against:\n\n{markdown_content[:10000]}" +
-                        (f"\n\n[Content truncated due to length. This is only the first portion of the markdown.]" if len(markdown_content) > 10000 else "")
-                    )
-                }
-            ],
-            response_format={"type": "json_object"},
-            temperature=0.1
+        # Verify completeness with a second pass only when the local coverage estimate is low,
+        # and then only against the parts of the markdown no extracted field matched
+        verify, coverage = completeness_gate(
+            'markdown_verification', initial_extraction.get('questions', []), markdown_content,
+            current_app.config.get('COMPLETENESS_GATE_THRESHOLD', 0.9)
         )
+        if verify:
+            verify_content = coverage.unmatched_regions(markdown_content) if coverage.unmatched_lines else markdown_content
+            current_app.logger.info("Performing verification pass to ensure all fields are captured")
+            verification_response = client.chat.completions.create(
+                model="gpt-4o",
+                messages=[
+                    {
+                        "role": "system",
+                        "content": (
+                            "You are a quality assurance specialist for form field extraction from markdown. "
+                            "Your task is to verify that ALL form fields have been correctly identified and "
+                            "that NOTHING was missed from the markdown content."
+                            "\n\nFocus on identifying any missing fields or items that should have been extracted "
+                            "but weren't. Analyze the markdown carefully and compare with the extracted list."
+                        )
+                    },
+                    {
+                        "role": "user",
+                        "content": (
+                            "Here is a list of form fields that were extracted from markdown content. "
+                            "Please examine the markdown carefully and verify if ANY fields or questions are missing from this list. "
+                            "Pay special attention to:\n"
+                            "- Markdown headers (#, ##, etc.) that should be section titles\n"
+                            "- List items (*, -, +) that might be form fields\n"
+                            "- Table rows that should be questions\n"
+                            "- Checkbox syntax (- [ ], - [x])\n"
+                            "- Form-like structure such as questions ending with a colon\n\n"
+                            f"Extracted fields (verify against the markdown):\n{json.dumps(initial_extraction, indent=2)}\n\n"
+                            "Respond with a JSON object that includes:\n"
+                            "1. `missed_fields`: Array of any fields that were completely missed\n"
+                            "2. `completeness_assessment`: Your assessment of whether any questions found in the markdown were not in the extracted list.\n\n"
+                            f"Here is the markdown content to verify against:\n\n{verify_content[:10000]}" +
+                            (f"\n\n[Content truncated due to length. This is only the first portion of the markdown.]" if len(verify_content) > 10000 else "")
+                        )
+                    }
+                ],
+                response_format=json_schema_response_format("markdown_verification", MARKDOWN_VERIFICATION_SCHEMA),
+                temperature=0.1
+            )
         
-        verification_results = json.loads(verification_response.choices[0].message.content)
+            verification_results = parse_structured_response(verification_response, MARKDOWN_VERIFICATION_SCHEMA)
+        else:
+            verification_results = {
+                'missed_fields': [],
+                'completeness_assessment': f"Verification skipped: extraction covers {coverage.score:.0%} of field lines"
+            }
         missed_fields = verification_results.get('missed_fields', [])
         completeness_assessment = verification_results.get('completeness_assessment', '')
         
@@ -325,41 +294,20 @@ def extract_form_fields_from_markdown(markdown_content, file_path=None):
         current_app.logger.error(f"Error extracting fields from markdown: {str(e)}")
         raise Exception(f"Failed to extract form fields from markdown: {str(e)}")
 
-def extract_form_fields_from_image(image_path):
-    """Extract form fields from an image using GPT-4o multimodal capabilities with enhanced handling for challenging images"""
+@ai_stage('extract_form_fields_from_image')
+def extract_form_fields_from_image(image_path, image_payload=None):
+    """
+    Extract form fields from an image using GPT-4o multimodal capabilities with enhanced handling for challenging images.
+    The image is encoded once and the same payload is reused by the verification, focused and fallback passes;
+    callers that already hold an ImagePayload for the file can pass it in.
+    """
     client = get_openai_client()
     
-    # Define our JSON schema for form extraction to ensure consistent output
-    json_schema = {
-        "type": "object",
-        "properties": {
-            "questions": {
-                "type": "array",
-                "items": {
-                    "type": "object",
-                    "properties": {
-                        "id": { "type": "string" },
-                        "question_text": { "type": "string" },
-                        "field_type": { 
-                            "type": "string", 
-                            "enum": ["text", "textarea", "radio", "checkbox", "select", "date", "email", "number", "signature"] 
-                        },
-                        "options": { 
-                            "type": "array", 
-                            "items": { "type": "string" } 
-                        },
-                        "required": { "type": "boolean" }
-                    },
-                    "required": ["id", "question_text", "field_type"]
-                }
-            }
-        },
-        "required": ["questions"]
-    }
-    
     try:
-        base64_image = encode_image_to_base64(image_path)
-        current_app.logger.info(f"Attempting form extraction from image: {image_path}")
+        if image_payload is None:
+            image_payload = ImagePayload.from_path(image_path)
+        image_data_url = image_payload.data_url
+        current_app.logger.info(f"Attempting form extraction from image: {image_path} ({image_payload.metrics()})")
         
         # First try with GPT-4o
         try:
@@ -456,24 +404,24 @@ def extract_form_fields_from_image(image_path):
                             {
                                 "type": "image_url",
                                 "image_url": {
-                                    "url": f"data:image/jpeg;base64,{base64_image}"
+                                    "url": image_data_url
                                 }
                             }
                         ]
                     }
                 ],
-                response_format={"type": "json_object"},
+                response_format=json_schema_response_format("form_fields", FORM_FIELDS_SCHEMA),
                 temperature=0.1  # Lower temperature for more precise extraction
             )
             
-            result = json.loads(response.choices[0].message.content)
+            result = parse_structured_response(response, FORM_FIELDS_SCHEMA)
             question_count = len(result.get('questions', []))
             current_app.logger.info(f"Successfully extracted {question_count} form fields from image using GPT-4o")
             
             # Run verification if we have less than the expected number of fields
             # Or if the question count is suspiciously low
             if question_count < 10:
-                verification_result = verify_field_extraction_completeness(image_path, base64_image, result.get('questions', []))
+                verification_result = verify_field_extraction_completeness(image_payload, result.get('questions', []))
                 
                 # If verification found missed questions, do a second extraction pass focused on those areas
                 if not verification_result.get('complete', True) and verification_result.get('missed_questions'):
@@ -557,19 +505,19 @@ def extract_form_fields_from_image(image_path):
                                         {
                                             "type": "image_url",
                                             "image_url": {
-                                                "url": f"data:image/jpeg;base64,{base64_image}"
+                                                "url": image_data_url
                                             }
                                         }
                                     ]
                                 }
                             ],
-                            response_format={"type": "json_object"},
+                            response_format=json_schema_response_format("form_fields", FORM_FIELDS_SCHEMA),
                             temperature=0.1  # Lower temperature for more precise extraction
                         )
                         
                         # Extract and combine the results
                         try:
-                            supplementary_result = json.loads(focused_response.choices[0].message.content)
+                            supplementary_result = parse_structured_response(focused_response, FORM_FIELDS_SCHEMA)
                             supplementary_questions = supplementary_result.get('questions', [])
                             
                             current_app.logger.info(f"Successfully extracted {len(supplementary_questions)} additional fields")
@@ -583,7 +531,7 @@ def extract_form_fields_from_image(image_path):
                                 # Add to the original result
                                 result['questions'].extend(supplementary_questions)
                                 current_app.logger.info(f"Combined extraction now has {len(result['questions'])} fields")
-                        except json.JSONDecodeError as e:
+                        except StructuredOutputError as e:
                             current_app.logger.error(f"Failed to parse supplementary extraction: {str(e)}")
                             # Continue with the original extraction
                     except Exception as focused_error:
@@ -694,12 +642,13 @@ def extract_form_fields_from_image(image_path):
                             {
                                 "type": "image_url",
                                 "image_url": {
-                                    "url": f"data:image/jpeg;base64,{base64_image}"
+                                    "url": image_data_url
                                 }
                             }
                         ]
                     }
                 ],
+                # This model does not support strict json_schema output
                 response_format={"type": "json_object"},
                 temperature=0.1  # Lower temperature for more precise extraction
             )
@@ -717,6 +666,7 @@ def extract_form_fields_from_image(image_path):
         current_app.logger.error(f"Error extracting fields from image: {str(e)}")
         raise Exception(f"Failed to extract form fields from image: {str(e)}")
 
+@ai_stage('parse_form_document')
 def parse_form_document(file_path):
     """
     Parse a form document and extract a structured representation of questions.
@@ -735,7 +685,8 @@ def parse_form_document(file_path):
         # First try to convert to markdown using MarkItDown
         # This preserves document structure better than traditional extraction
         try:
-            from services.document.markdown_converter import markdown_converter
+            from services.document.markdown_converter import get_markdown_converter
+            markdown_converter = get_markdown_converter()
             
             current_app.logger.info(f"Attempting to convert {file_path_str} to markdown for enhanced structure preservation")
             markdown_result = markdown_converter.convert_to_markdown(file_path_str)
@@ -794,143 +745,45 @@ def parse_form_document(file_path):
             
             file_content = text
         elif file_path_str.endswith('.docx'):
-            # Use python-docx library to extract docx content
+            # Read the document body in a single streaming pass
             try:
-                import docx
-                import io
-                import tempfile
-                from PIL import Image
+                from services.document.docx_engine import read_docx_blocks
                 
                 current_app.logger.info(f"Extracting content from DOCX file: {file_path_str}")
-                doc = docx.Document(file_path_str)
-                
-                # IMPORTANT: When dealing with forms, specifically look for checklist patterns
-                # which are common in audit forms
-                
-                # Extract questions directly from the document structure
-                form_questions = []
-                question_id = 1
-                
-                # Process tables - often used for checklists and structured forms
-                for table_index, table in enumerate(doc.tables):
-                    header_row = None
-                    header_cells = []
-                    
-                    # Check if this table has a header row
-                    if len(table.rows) > 0:
-                        header_row = table.rows[0]
-                        header_cells = [cell.text.strip() for cell in header_row.cells if cell.text.strip()]
-                    
-                    # Process each row after the header
-                    for row_index, row in enumerate(table.rows):
-                        if row_index == 0 and header_cells:
-                            # Skip the header row
-                            continue
-                            
-                        row_cells = [cell.text.strip() for cell in row.cells if cell.text.strip()]
-                        
-                        if not row_cells:
-                            continue
-                            
-                        # Determine the question text and field type based on the row content
-                        question_text = row_cells[0] if row_cells else ""
-                        
-                        # Skip empty or meaningless rows
-                        if not question_text or question_text.lower() in ('yes', 'no', 'y', 'n', 'n/a'):
-                            continue
-                            
-                        # Check if this looks like a YES/NO question
-                        options = []
-                        field_type = "text"  # Default
-                        
-                        # Look for YES/NO pattern in other cells
-                        yes_no_cells = [cell for cell in row_cells[1:] if cell.lower() in ('yes', 'no', 'y', 'n', 'n/a')]
-                        
-                        if yes_no_cells or (header_cells and any(h.lower() in ('yes', 'no', 'y/n', 'yes/no') for h in header_cells)):
-                            field_type = "radio"
-                            options = ["Yes", "No"]
-                            
-                            # If there's a N/A option detected, add it
-                            if any(cell.lower() == 'n/a' for cell in row_cells):
-                                options.append("N/A")
-                        
-                        # Add this question to our list
-                        form_questions.append({
-                            "id": f"question_{question_id}",
-                            "question_text": question_text,
-                            "field_type": field_type,
-                            "options": options,
-                            "required": True  # Default to required for form items
-                        })
-                        question_id += 1
-                
-                # Process paragraphs - some forms have one question per paragraph
-                in_section = False
-                current_section = ""
-                
-                for para in doc.paragraphs:
-                    text = para.text.strip()
-                    if not text:
-                        continue
-                        
-                    # Check if this is a section header (often appears as bold, larger text)
-                    is_section_header = False
-                    for run in para.runs:
-                        if run.bold or run.font.size and run.font.size > 12:
-                            is_section_header = True
-                            break
-                    
-                    if is_section_header:
-                        current_section = text
-                        in_section = True
-                        continue
-                    
-                    # Check if this paragraph looks like a form question
-                    # Form questions often end with a colon or have whitespace for answers
-                    if ":" in text or text.endswith("?") or "_____" in text or "□" in text or "☐" in text:
-                        # This looks like a question
-                        question_text = text
-                        
-                        # If we're in a section, include the section name
-                        if in_section and current_section:
-                            question_text = f"{current_section} - {question_text}"
-                            
-                        # Determine field type based on content
-                        field_type = "text"  # Default
-                        options = []
-                        
-                        # Check for multiple choice indicators
-                        if "□" in text or "☐" in text or "checkbox" in text.lower() or "check box" in text.lower():
-                            field_type = "checkbox"
-                            # Try to extract options
-                            option_parts = text.split("□")
-                            if len(option_parts) > 1:
-                                options = [part.strip() for part in option_parts[1:] if part.strip()]
-                                
-                        # Add this question
-                        form_questions.append({
-                            "id": f"question_{question_id}",
-                            "question_text": question_text,
-                            "field_type": field_type,
-                            "options": options,
-                            "required": text.endswith("*") or "*required" in text.lower()
-                        })
-                        question_id += 1
+                blocks = read_docx_blocks(file_path_str)
+                doc_tables = [block["rows"] for block in blocks if block["type"] == "table"]
+                doc_paragraphs = [block for block in blocks if block["type"] == "paragraph"]
                 
-                # If we found direct questions, use them
-                if form_questions:
-                    current_app.logger.info(f"Successfully extracted {len(form_questions)} questions directly from DOCX structure")
-                    return {"questions": form_questions}
+                # Read fields straight off the layout (tables, checkbox glyphs, "Label: ____" lines,
+                # Yes/No/N/A grids) before falling back to the model
+                extraction = extract_docx_fields(file_path_str)
+                if extraction.questions and extraction.confidence >= current_app.config.get('FORM_DETERMINISTIC_MIN_CONFIDENCE', 0.8):
+                    current_app.logger.info(
+                        f"Extracted {len(extraction.questions)} questions directly from DOCX structure "
+                        f"(confidence {extraction.confidence:.2f})"
+                    )
+                    return {
+                        "questions": [
+                            {
+                                "id": f"question_{i+1}",
+                                "question_text": question["question"],
+                                "field_type": question["type"],
+                                "options": question["options"],
+                                "required": question["required"]
+                            }
+                            for i, question in enumerate(extraction.questions)
+                        ]
+                    }
                 
                 # If we couldn't extract structured questions directly, try the traditional text-based approach
                 # Extract text from tables
                 table_content = []
-                for table in doc.tables:
-                    for i, row in enumerate(table.rows):
+                for table in doc_tables:
+                    for i, row in enumerate(table):
                         row_texts = []
-                        for cell in row.cells:
-                            if cell.text.strip():
-                                row_texts.append(cell.text.strip())
+                        for cell in row:
+                            if cell.strip():
+                                row_texts.append(cell.strip())
                         
                         if row_texts:
                             # Join the row cells with appropriate separators
@@ -948,7 +801,7 @@ def parse_form_document(file_path):
                                     table_content.append(" - ".join(row_texts))
                 
                 # Extract regular paragraphs
-                paragraphs = [p.text for p in doc.paragraphs if p.text.strip()]
+                paragraphs = [p["text"] for p in doc_paragraphs if p["text"].strip()]
                 
                 # Combine all content with appropriate separation
                 all_content = paragraphs + ["\n\nTABLE CONTENT:\n"] + table_content if table_content else paragraphs
@@ -1006,19 +859,19 @@ def parse_form_document(file_path):
                                     "content": f"Here is text extracted from a DOCX form document. Extract ALL questions/fields:\n\n{file_content}"
                                 }
                             ],
-                            response_format={"type": "json_object"},
+                            response_format=json_schema_response_format("form_fields", FORM_FIELDS_SCHEMA),
                             temperature=0.2
                         )
                         
                         try:
-                            result = json.loads(response.choices[0].message.content)
+                            result = parse_structured_response(response, FORM_FIELDS_SCHEMA)
                             question_count = len(result.get('questions', []))
                             
                             if question_count > 0:
                                 current_app.logger.info(f"Successfully extracted {question_count} form fields from DOCX text using GPT-4o")
                                 return result
-                        except json.JSONDecodeError:
-                            current_app.logger.error("Failed to parse GPT response for DOCX extraction")
+                        except StructuredOutputError as e:
+                            current_app.logger.error(f"Failed to parse GPT response for DOCX extraction: {str(e)}")
                     except Exception as text_extraction_error:
                         current_app.logger.error(f"Text-based DOCX extraction failed: {str(text_extraction_error)}")
                 
@@ -1042,17 +895,17 @@ def parse_form_document(file_path):
                                 "content": f"The file '{os.path.basename(file_path_str)}' appears to be a form, but we couldn't extract its content properly. Please create a basic form structure based on the filename. If it has 'audit' or 'checklist' in the name, assume it's a checklist with Yes/No options."
                             }
                         ],
-                        response_format={"type": "json_object"},
+                        response_format=json_schema_response_format("form_fields", FORM_FIELDS_SCHEMA),
                         temperature=0.7
                     )
                     
-                    result = json.loads(response.choices[0].message.content)
+                    result = parse_structured_response(response, FORM_FIELDS_SCHEMA)
                     return result
                 except Exception as final_error:
                     current_app.logger.error(f"Final DOCX extraction attempt failed: {str(final_error)}")
                     
             except Exception as docx_error:
-                current_app.logger.error(f"Failed to extract DOCX content with python-docx: {str(docx_error)}")
+                current_app.logger.error(f"Failed to extract DOCX content: {str(docx_error)}")
                 # Try to use vision API as a fallback for docx files
                 try:
                     vision_result = extract_form_fields_from_image(file_path_str)
@@ -1078,11 +931,11 @@ def parse_form_document(file_path):
                                     "content": f"The file '{filename}' appears to be a form, but we couldn't extract its content properly. Please create a basic form structure based on the filename. If it has 'audit' or 'checklist' in the name, assume it's a checklist with Yes/No options."
                                 }
                             ],
-                            response_format={"type": "json_object"},
+                            response_format=json_schema_response_format("form_fields", FORM_FIELDS_SCHEMA),
                             temperature=0.7
                         )
                         
-                        result = json.loads(response.choices[0].message.content)
+                        result = parse_structured_response(response, FORM_FIELDS_SCHEMA)
                         question_count = len(result.get('questions', []))
                         current_app.logger.info(f"Generated {question_count} form fields based on filename")
                         return result
@@ -1163,10 +1016,10 @@ def parse_form_document(file_path):
                     "content": f"Parse the following form content and return all the form fields in JSON format. Extract every field EXACTLY as written: \n\n{file_content}"
                 }
             ],
-            response_format={"type": "json_object"}
+            response_format=json_schema_response_format("form_fields", FORM_FIELDS_SCHEMA)
         )
         
-        result = json.loads(response.choices[0].message.content)
+        result = parse_structured_response(response, FORM_FIELDS_SCHEMA)
         return result
     
     except Exception as e:
@@ -1240,6 +1093,7 @@ def generate_form_questions(form_structure):
         logging.error(f"Error generating form questions: {str(e)}")
         raise Exception(f"Failed to generate questions: {str(e)}")
 
+@ai_stage('generate_embeddings')
 def generate_embeddings(text):
     """
     Generate embeddings for a given text using OpenAI's embedding model.
@@ -1258,6 +1112,7 @@ def generate_embeddings(text):
         logging.error(f"Error generating embeddings: {str(e)}")
         raise Exception(f"Failed to generate embeddings: {str(e)}")
 
+@ai_stage('generate_answer_with_context')
 def generate_answer_with_context(question, contexts):
     """
     Generate an answer to a question based on the provided context.
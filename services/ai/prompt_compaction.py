@@ -0,0 +1,158 @@
+"""
+Compaction of document text before it is sent to an extraction model.
+
+MarkItDown and the DOCX reader produce text that is padded for human eyes:
+table cells padded with spaces, long separator rows, fully blank table rows,
+header rows repeated at every page break, blank-line runs and long underscore
+blanks. None of it helps the model find fields, but all of it costs input
+tokens and latency. ``compact_document_text`` removes it without touching the wording
+of any label, so extracted questions still match the source exactly. Every
+cell of a row is kept, empty or not, so a value stays under its column header
+(a mark under "N/A" must not move under "No") and a blank answer row keeps
+its slots.
+
+Every compaction is recorded with its estimated token counts before and
+after, and ``/admin/ai/metrics`` reports the totals per call site.
+"""
+
+import re
+import logging
+import threading
+from typing import Any, Dict, List
+
+from services.form.sectioning import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Blanks longer than this are shortened to it; the model only needs to see that there is a blank
+BLANK_RUN = 3
+
+_BLANK = re.compile(r'(_{%d})_+|(\.{%d})\.+|(-{%d})-+(?=\s|$)' % (BLANK_RUN, BLANK_RUN, BLANK_RUN))
+_INLINE_SPACE = re.compile(r'[ \t\u00a0\u2000-\u200b\u3000]+')
+_SEPARATOR_CELL = re.compile(r'^:?-+:?$')
+
+
+def _split_row(line: str) -> List[str]:
+    return [cell.strip() for cell in line.strip().strip('|').split('|')]
+
+
+def _is_table_row(line: str) -> bool:
+    return line.startswith('|') and line.endswith('|') and len(line) > 1
+
+
+def _is_separator(cells: List[str]) -> bool:
+    return bool(cells) and all(_SEPARATOR_CELL.match(cell) for cell in cells if cell) and any(cells)
+
+
+def _compact_row(cells: List[str]) -> str:
+    """A table row without cell padding, every cell in its column; empty when all its cells are."""
+    if not any(cells):
+        return ''
+    return '|' + '|'.join(f' {cell} ' if cell else ' ' for cell in cells) + '|'
+
+
+def _compact_tables(lines: List[str]) -> List[str]:
+    """Compact pipe tables, dropping blank rows and repeated header rows and shortening separators."""
+    output = []
+    header = None  # header row of the current table, or of the table just closed
+    in_table = False
+    previous_row = None
+    for line in lines:
+        if not _is_table_row(line):
+            if line:
+                header = None
+            in_table = False
+            previous_row = None
+            output.append(line)
+            continue
+
+        cells = _split_row(line)
+        if _is_separator(cells):
+            # Kept (shortened) under the header only, so the table still reads as a markdown table
+            if previous_row is not None and previous_row == header and output and output[-1] == header:
+                output.append('|' + '-|' * len(cells))
+            previous_row = None
+            continue
+        row = _compact_row(cells)
+        previous_row = row
+        if not row:
+            continue
+        if not in_table:
+            # A table that follows another with only blank lines between and repeats its header is
+            # the same table continued across a page break
+            if header is not None and row == header:
+                while output and not output[-1]:
+                    output.pop()
+                in_table = True
+                previous_row = None
+                continue
+            header = row
+            in_table = True
+        elif row == header:
+            continue
+        output.append(row)
+    return output
+
+
+def compact_document_text(text: str) -> str:
+    """Normalise whitespace and table padding in document text without changing any of its wording."""
+    lines = []
+    for line in text.replace('\r\n', '\n').replace('\r', '\n').split('\n'):
+        line = _INLINE_SPACE.sub(' ', line).strip()
+        line = _BLANK.sub(lambda m: next(group for group in m.groups() if group), line)
+        lines.append(line)
+
+    lines = _compact_tables(lines)
+
+    # At most one blank line in a row, none at either end
+    compacted = []
+    for line in lines:
+        if line or (compacted and compacted[-1]):
+            compacted.append(line)
+    while compacted and not compacted[-1]:
+        compacted.pop()
+    return '\n'.join(compacted)
+
+
+class CompactionStats:
+    """Process-wide record of tokens saved by compaction, per call site."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sources = {}
+
+    def record(self, source: str, tokens_before: int, tokens_after: int):
+        with self._lock:
+            stats = self._sources.setdefault(source, {"calls": 0, "tokens_before": 0, "tokens_after": 0})
+            stats["calls"] += 1
+            stats["tokens_before"] += tokens_before
+            stats["tokens_after"] += tokens_after
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                source: {
+                    **stats,
+                    "tokens_saved": stats["tokens_before"] - stats["tokens_after"],
+                    "reduction": round(1 - stats["tokens_after"] / stats["tokens_before"], 3) if stats["tokens_before"] else 0.0,
+                }
+                for source, stats in sorted(self._sources.items())
+            }
+
+
+_stats = CompactionStats()
+
+
+def get_compaction_stats() -> CompactionStats:
+    """Return the process-wide compaction statistics."""
+    return _stats
+
+
+def compact_for_prompt(source: str, text: str) -> str:
+    """Compact ``text`` for the call site ``source``, logging and recording the token counts."""
+    compacted = compact_document_text(text)
+    before, after = estimate_tokens(text), estimate_tokens(compacted)
+    _stats.record(source, before, after)
+    logger.info(f"Compacted {source} input from ~{before} to ~{after} tokens "
+                f"({(1 - after / before) if before else 0:.0%} smaller)")
+    return compacted
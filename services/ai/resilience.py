@@ -0,0 +1,300 @@
+"""
+Rate limiting, retries and circuit breaking for model calls.
+
+All calls made through ``AIClient`` pass through a ``ResilientCaller``:
+
+- ``RateLimiter`` keeps token buckets for requests and tokens per minute, per
+  model. Bucket state lives in a small SQLite file, so the limits are shared
+  by every thread and every worker process on the host.
+- Retryable failures (429, 5xx, timeouts, connection errors) are retried with
+  exponential backoff and full jitter, honouring ``Retry-After`` when the API
+  sends it.
+- ``CircuitBreaker`` opens after a run of consecutive failures and fails fast
+  with ``CircuitOpenError`` until a cool-down has passed, when a single trial
+  call is let through.
+"""
+
+import os
+import json
+import time
+import random
+import sqlite3
+import logging
+import threading
+from services.ai.settings import ai_setting
+
+logger = logging.getLogger(__name__)
+
+# Rough token cost of an attached image at the detail level we send
+IMAGE_TOKEN_ESTIMATE = 1000
+
+
+class CircuitOpenError(Exception):
+    """Raised when the provider is considered degraded and calls are failing fast."""
+    pass
+
+
+def estimate_request_tokens(params):
+    """Approximate prompt plus completion tokens for a request (about four characters per token)."""
+    characters = 0
+    images = 0
+    for message in params.get('messages', []):
+        content = message.get('content')
+        if isinstance(content, str):
+            characters += len(content)
+        elif isinstance(content, list):
+            for part in content:
+                if part.get('type') == 'image_url':
+                    images += 1
+                else:
+                    characters += len(part.get('text', ''))
+    embedding_input = params.get('input')
+    if embedding_input is not None:
+        characters += len(embedding_input) if isinstance(embedding_input, str) else len(json.dumps(embedding_input))
+    completion = params.get('max_tokens') or (0 if embedding_input is not None else 1000)
+    return characters // 4 + images * IMAGE_TOKEN_ESTIMATE + completion
+
+
+def is_retryable(error):
+    """Whether a failed call is worth retrying."""
+    import openai
+    if isinstance(error, (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError,
+                          openai.InternalServerError)):
+        return True
+    status = getattr(error, 'status_code', None)
+    return status is not None and (status == 429 or status >= 500)
+
+
+def is_rate_limited(error):
+    """Whether the API rejected the call for exceeding a rate limit."""
+    return getattr(error, 'status_code', None) == 429
+
+
+def retry_after_seconds(error):
+    """Seconds the API asked us to wait, if it said so."""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000
+        if headers.get('retry-after'):
+            return float(headers['retry-after'])
+    except (TypeError, ValueError):
+        return None
+    return None
+
+
+class RateLimiter:
+    """Token buckets shared across threads and processes through SQLite."""
+
+    def __init__(self, path):
+        self.path = path
+        self._initialized = False
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        if not self._initialized:
+            with self._lock:
+                if not self._initialized:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS buckets ("
+                        " name TEXT PRIMARY KEY,"
+                        " tokens REAL NOT NULL,"
+                        " updated_at REAL NOT NULL)"
+                    )
+                    self._initialized = True
+        return conn
+
+    def _take(self, conn, name, amount, per_minute, now):
+        """Take ``amount`` from a bucket; return 0 on success or the seconds to wait."""
+        capacity = float(per_minute)
+        rate = capacity / 60.0
+        row = conn.execute("SELECT tokens, updated_at FROM buckets WHERE name = ?", (name,)).fetchone()
+        tokens = capacity if row is None else min(capacity, row[0] + (now - row[1]) * rate)
+        # A single request larger than the bucket is allowed once the bucket is full
+        needed = min(amount, capacity)
+        if tokens < needed:
+            return (needed - tokens) / rate, tokens
+        return 0.0, tokens - amount
+
+    def acquire(self, model, tokens, requests_per_minute, tokens_per_minute):
+        """Block until one request and ``tokens`` tokens are available for the model."""
+        while True:
+            now = time.time()
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                request_wait, request_left = self._take(conn, f"{model}:requests", 1, requests_per_minute, now)
+                token_wait, token_left = self._take(conn, f"{model}:tokens", tokens, tokens_per_minute, now)
+                wait = max(request_wait, token_wait)
+                if wait == 0:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO buckets (name, tokens, updated_at) VALUES (?, ?, ?)",
+                        [(f"{model}:requests", request_left, now), (f"{model}:tokens", token_left, now)]
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            finally:
+                conn.close()
+            if wait == 0:
+                return
+            logger.info(f"Rate limit reached for {model}; waiting {wait:.2f}s")
+            time.sleep(min(wait, 5.0))
+
+    def refund(self, model, tokens):
+        """Return over-estimated tokens to the bucket once the real usage is known."""
+        if tokens <= 0:
+            return
+        conn = self._connect()
+        try:
+            conn.execute("UPDATE buckets SET tokens = tokens + ? WHERE name = ?", (tokens, f"{model}:tokens"))
+        finally:
+            conn.close()
+
+
+class CircuitBreaker:
+    """Per-process circuit breaker over consecutive call failures."""
+
+    def __init__(self, failure_threshold=5, reset_seconds=30):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if time.monotonic() - self._opened_at >= self.reset_seconds:
+                return 'half_open'
+            return 'open'
+
+    def before_call(self):
+        """Raise ``CircuitOpenError`` unless a call may go ahead."""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            remaining = self.reset_seconds - (time.monotonic() - self._opened_at)
+            if remaining > 0 or self._trial_in_flight:
+                raise CircuitOpenError(
+                    f"OpenAI calls are failing; circuit open for another {max(remaining, 0):.0f}s"
+                )
+            # Half-open: let a single trial call through
+            self._trial_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("OpenAI circuit breaker closed")
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def release_trial(self):
+        """End a half-open trial call without a verdict (for example when it was rate limited)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                logger.warning(f"OpenAI circuit breaker opened after {self._failures} consecutive failures")
+
+
+class ResilientCaller:
+    """Runs a model call under the rate limiter, retry policy and circuit breaker."""
+
+    def __init__(self, limiter, breaker, requests_per_minute, tokens_per_minute,
+                 max_retries=4, backoff_base=1.0, backoff_max=30.0):
+        self.limiter = limiter
+        self.breaker = breaker
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def _backoff(self, attempt, error):
+        # Full jitter, but never sooner than the server asked for
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        requested = retry_after_seconds(error)
+        if requested is not None:
+            delay = max(delay, min(requested, self.backoff_max))
+        return delay
+
+    def call(self, fn, params):
+        """
+        Call ``fn(**params)``. Returns ``(response, retries)``.
+        Non-retryable errors are raised immediately; retryable ones after the last attempt.
+        """
+        model = params.get('model', 'unknown')
+        estimated = estimate_request_tokens(params)
+        retries = 0
+        while True:
+            self.breaker.before_call()
+            self.limiter.acquire(model, estimated, self.requests_per_minute, self.tokens_per_minute)
+            try:
+                response = fn(**params)
+            except Exception as e:
+                if not is_retryable(e):
+                    # The provider answered; the request itself was bad
+                    self.breaker.record_success()
+                    raise
+                if is_rate_limited(e):
+                    # 429s are handled by backing off; only outages count towards opening the circuit
+                    self.breaker.release_trial()
+                else:
+                    self.breaker.record_failure()
+                if retries >= self.max_retries:
+                    e.ai_retries = retries
+                    raise
+                delay = self._backoff(retries, e)
+                retries += 1
+                logger.warning(f"Retryable error from {model} ({type(e).__name__}); retry {retries} in {delay:.2f}s")
+                time.sleep(delay)
+                continue
+
+            self.breaker.record_success()
+            usage = getattr(response, 'usage', None)
+            if usage is not None and getattr(usage, 'total_tokens', None):
+                self.limiter.refund(model, estimated - usage.total_tokens)
+            return response, retries
+
+
+_caller = None
+_caller_lock = threading.Lock()
+
+
+def get_resilient_caller():
+    """Return the process-wide caller configured from the AI settings."""
+    global _caller
+    if _caller is None:
+        with _caller_lock:
+            if _caller is None:
+                path = ai_setting('AI_RATE_LIMIT_PATH')
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                _caller = ResilientCaller(
+                    RateLimiter(path),
+                    CircuitBreaker(
+                        failure_threshold=ai_setting('AI_CIRCUIT_FAILURE_THRESHOLD', 5),
+                        reset_seconds=ai_setting('AI_CIRCUIT_RESET_SECONDS', 30)
+                    ),
+                    requests_per_minute=ai_setting('AI_REQUESTS_PER_MINUTE', 500),
+                    tokens_per_minute=ai_setting('AI_TOKENS_PER_MINUTE', 300000),
+                    max_retries=ai_setting('AI_MAX_RETRIES', 4),
+                    backoff_base=ai_setting('AI_BACKOFF_BASE_SECONDS', 1.0),
+                    backoff_max=ai_setting('AI_BACKOFF_MAX_SECONDS', 30.0)
+                )
+    return _caller
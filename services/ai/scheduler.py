@@ -0,0 +1,145 @@
+"""
+Priority scheduling for model calls.
+
+Every call that reaches the API takes a slot from the process-wide
+``AIScheduler``. Calls belong to a priority class:
+
+- ``interactive``: policy-assistant questions a support worker is waiting on
+- ``upload``: form extraction for an upload in progress
+- ``batch``: policy ingestion, vector DB rebuilds and other bulk work
+
+Each class has its own queue and concurrency limit, under a shared limit for
+all calls. When a slot frees up, it goes to the oldest waiter of the highest
+class that is under its limit, so interactive calls overtake queued batch
+work. Batch has a lower limit by default, which keeps slots free for
+interactive calls while a bulk job runs.
+
+The class is taken from a context variable, which is set with ``ai_priority``
+(usable as a context manager or a route decorator) and carried into pipeline
+threads along with the rest of the context.
+"""
+
+import time
+import logging
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from services.ai.settings import ai_setting
+
+logger = logging.getLogger(__name__)
+
+# Highest priority first
+PRIORITIES = ('interactive', 'upload', 'batch')
+DEFAULT_PRIORITY = 'upload'
+
+_priority = contextvars.ContextVar('ai_priority', default=DEFAULT_PRIORITY)
+
+# Number of recent waits kept per class for the statistics
+_WAIT_SAMPLES = 200
+
+
+@contextmanager
+def ai_priority(priority):
+    """Run model calls made inside the block (or the decorated view) with the given priority class."""
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown AI priority class: {priority}")
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority():
+    """The priority class for calls made from the current context."""
+    return _priority.get()
+
+
+class AIScheduler:
+    """Per-class queues with bounded concurrency and strict priority between classes."""
+
+    def __init__(self, max_concurrent, class_limits):
+        self.max_concurrent = max_concurrent
+        self.class_limits = {name: min(class_limits.get(name, max_concurrent), max_concurrent) for name in PRIORITIES}
+        self._condition = threading.Condition()
+        self._queues = {name: deque() for name in PRIORITIES}
+        self._running = {name: 0 for name in PRIORITIES}
+        self._completed = {name: 0 for name in PRIORITIES}
+        self._waits = {name: deque(maxlen=_WAIT_SAMPLES) for name in PRIORITIES}
+
+    def _can_start(self, priority, ticket):
+        if sum(self._running.values()) >= self.max_concurrent:
+            return False
+        if self._running[priority] >= self.class_limits[priority] or self._queues[priority][0] is not ticket:
+            return False
+        # A higher class that is waiting and could run takes the slot first
+        for name in PRIORITIES:
+            if name == priority:
+                return True
+            if self._queues[name] and self._running[name] < self.class_limits[name]:
+                return False
+        return True
+
+    @contextmanager
+    def slot(self, priority=None):
+        """Wait for a slot for the given (or current) priority class and hold it for the block."""
+        priority = priority or current_priority()
+        ticket = object()
+        enqueued_at = time.monotonic()
+        with self._condition:
+            self._queues[priority].append(ticket)
+            while not self._can_start(priority, ticket):
+                self._condition.wait()
+            self._queues[priority].popleft()
+            self._running[priority] += 1
+            waited = time.monotonic() - enqueued_at
+            self._waits[priority].append(waited)
+            # The next waiter in this class may now be eligible too
+            self._condition.notify_all()
+        if waited > 1:
+            logger.info(f"AI call ({priority}) waited {waited:.2f}s for a slot")
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._running[priority] -= 1
+                self._completed[priority] += 1
+                self._condition.notify_all()
+
+    def stats(self):
+        """Queue depth, running calls and recent wait times per priority class."""
+        with self._condition:
+            classes = {}
+            for name in PRIORITIES:
+                waits = list(self._waits[name])
+                classes[name] = {
+                    "limit": self.class_limits[name],
+                    "queued": len(self._queues[name]),
+                    "running": self._running[name],
+                    "completed": self._completed[name],
+                    "avg_wait_seconds": round(sum(waits) / len(waits), 3) if waits else 0.0,
+                    "max_wait_seconds": round(max(waits), 3) if waits else 0.0,
+                }
+            return {"max_concurrent": self.max_concurrent, "classes": classes}
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Return the process-wide scheduler."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = AIScheduler(
+                    ai_setting('AI_MAX_CONCURRENT_CALLS', 8),
+                    {
+                        'interactive': ai_setting('AI_INTERACTIVE_CONCURRENCY', 8),
+                        'upload': ai_setting('AI_UPLOAD_CONCURRENCY', 6),
+                        'batch': ai_setting('AI_BATCH_CONCURRENCY', 3),
+                    }
+                )
+    return _scheduler
@@ -0,0 +1,17 @@
+"""
+Configuration lookup for the AI call layer.
+
+AI services are used from request handlers, pipeline threads and stand-alone
+scripts; settings come from the Flask app config when an application context
+is active and from ``Config`` otherwise.
+"""
+
+from flask import current_app, has_app_context
+
+
+def ai_setting(name, default=None):
+    """Return a configuration value for the AI call layer."""
+    if has_app_context():
+        return current_app.config.get(name, default)
+    from config import Config
+    return getattr(Config, name, default)
@@ -0,0 +1,85 @@
+"""
+Strict, schema-constrained structured outputs.
+
+``json_schema_response_format`` turns one of our JSON schemas into a strict
+``response_format``, so the model can only produce output that matches it.
+Strict mode requires every property to be listed in ``required`` and objects
+to forbid additional properties; properties that are optional in our schema
+are made nullable instead, and ``parse_structured_response`` removes the nulls
+again. Parsing and validation are therefore a single ``json.loads``: the only
+failures left are refusals and truncated output, which raise
+``StructuredOutputError``.
+"""
+
+import copy
+import json
+
+
+class StructuredOutputError(Exception):
+    """Raised when a structured response was refused or cut off."""
+    pass
+
+
+def strict_json_schema(schema):
+    """Return a copy of ``schema`` that satisfies the strict structured output rules."""
+    schema = copy.deepcopy(schema)
+
+    def convert(node):
+        if not isinstance(node, dict):
+            return node
+        if node.get("type") == "object" and "properties" in node:
+            required = set(node.get("required", []))
+            for name, prop in node["properties"].items():
+                convert(prop)
+                if name not in required:
+                    prop["type"] = [prop["type"], "null"] if isinstance(prop.get("type"), str) else prop["type"]
+                    if "enum" in prop:
+                        prop["enum"] = list(prop["enum"]) + [None]
+            node["required"] = list(node["properties"].keys())
+            node["additionalProperties"] = False
+        elif node.get("type") == "array" and "items" in node:
+            convert(node["items"])
+        return node
+
+    return convert(schema)
+
+
+def json_schema_response_format(name, schema):
+    """``response_format`` argument constraining a chat completion to ``schema``."""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": name,
+            "strict": True,
+            "schema": strict_json_schema(schema)
+        }
+    }
+
+
+def _drop_optional_nulls(data, schema):
+    if isinstance(data, dict) and schema.get("type") == "object":
+        required = set(schema.get("required", []))
+        properties = schema.get("properties", {})
+        for name in list(data):
+            if data[name] is None and name not in required:
+                del data[name]
+            elif name in properties:
+                _drop_optional_nulls(data[name], properties[name])
+    elif isinstance(data, list) and schema.get("type") == "array":
+        for item in data:
+            _drop_optional_nulls(item, schema.get("items", {}))
+    return data
+
+
+def parse_structured_response(response, schema):
+    """
+    Parse a structured chat completion produced with ``json_schema_response_format(..., schema)``.
+    Optional properties the model left null are removed, so the result matches ``schema`` as written.
+    """
+    choice = response.choices[0]
+    refusal = getattr(choice.message, 'refusal', None)
+    if refusal:
+        raise StructuredOutputError(f"Model refused the request: {refusal}")
+    if choice.finish_reason == 'length':
+        raise StructuredOutputError("Structured output was truncated (max_tokens reached)")
+    return _drop_optional_nulls(json.loads(choice.message.content), schema)
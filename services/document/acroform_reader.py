@@ -0,0 +1,238 @@
+"""
+AcroForm field reader for fillable PDFs.
+
+A fillable PDF declares its fields in the AcroForm dictionary: names,
+tooltips, types, flags and option lists. This reads them straight into the
+question structure used by ``Form.structure``, so fillable forms need no text
+extraction or model call at all.
+
+Fields are read from the widget annotations of each page, which gives document
+order (page by page, top to bottom, then left to right). Radio buttons are
+grouped into one question per field. The question text is the field's tooltip
+(``/TU``) when it has one, otherwise its name made readable, or, for generated
+names such as ``Text1``, the label printed beside the field.
+"""
+
+import re
+from typing import Any, Dict, List
+
+# Field flags (PDF 32000-1, 12.7.3.1 and 12.7.4)
+FF_REQUIRED = 1 << 1
+FF_MULTILINE = 1 << 12
+FF_RADIO = 1 << 15
+FF_PUSHBUTTON = 1 << 16
+FF_COMBO = 1 << 17
+FF_MULTISELECT = 1 << 21
+
+# Annotation flags
+ANNOT_HIDDEN = 1 << 1
+
+# Field names generated by authoring tools, which make poor question text
+_GENERATED_NAME = re.compile(r'^(text|check ?box|checkbox|radio ?button|combo ?box|list ?box|field|button|dropdown)[\s_]*\d*$', re.IGNORECASE)
+
+
+def _resolve(obj):
+    return obj.get_object() if hasattr(obj, 'get_object') else obj
+
+
+def _inherited(field, key):
+    """A field attribute, looked up through the /Parent chain as the spec requires."""
+    node = field
+    while node is not None:
+        node = _resolve(node)
+        if key in node:
+            return _resolve(node[key])
+        node = node.get('/Parent')
+    return None
+
+
+def _field_node(widget):
+    """The terminal field a widget belongs to: the widget itself, or its parent for kid widgets."""
+    if '/T' in widget:
+        return widget
+    parent = widget.get('/Parent')
+    return _resolve(parent) if parent is not None else widget
+
+
+def _full_name(field):
+    parts = []
+    node = field
+    while node is not None:
+        node = _resolve(node)
+        if '/T' in node:
+            parts.append(str(node['/T']))
+        node = node.get('/Parent')
+    return '.'.join(reversed(parts))
+
+
+def _humanise(name: str) -> str:
+    name = name.rsplit('.', 1)[-1]
+    name = re.sub(r'([a-z])([A-Z])', r'\1 \2', name)
+    name = re.sub(r'[_\-]+', ' ', name)
+    name = re.sub(r'\[\d+\]$', '', name)
+    return " ".join(name.split())
+
+
+def _page_text_fragments(page) -> List[tuple]:
+    """Text fragments of a page with their baseline position, as ``(x, y, text)``."""
+    fragments = []
+
+    def visit(text, cm, tm, font, size):
+        text = " ".join(text.split())
+        if text:
+            x = cm[0] * tm[4] + cm[2] * tm[5] + cm[4]
+            y = cm[1] * tm[4] + cm[3] * tm[5] + cm[5]
+            fragments.append((x, y, text))
+
+    page.extract_text(visitor_text=visit)
+    return fragments
+
+
+def _printed_label(fragments: List[tuple], rect: List[float]):
+    """The text printed just left of a widget on the same line, or else just above it."""
+    left, bottom, right, top = min(rect[0], rect[2]), min(rect[1], rect[3]), max(rect[0], rect[2]), max(rect[1], rect[3])
+    height = max(top - bottom, 8)
+    same_line = [f for f in fragments if f[0] < left and bottom - height / 2 <= f[1] <= top + height / 2]
+    if same_line:
+        return max(same_line, key=lambda f: f[0])[2]
+    above = [f for f in fragments if top <= f[1] <= top + 2 * height and f[0] < right]
+    if above:
+        return min(above, key=lambda f: (f[1], abs(f[0] - left)))[2]
+    return None
+
+
+def _label(field, full_name: str, printed_label=None) -> str:
+    tooltip = _inherited(field, '/TU')
+    if tooltip and str(tooltip).strip():
+        return " ".join(str(tooltip).split())
+    name = _humanise(full_name)
+    # Names like "Text1" or "Check Box3" say nothing; the text printed beside the field does
+    if printed_label and _GENERATED_NAME.match(name):
+        return printed_label.rstrip(':').strip()
+    return name
+
+
+def _choice_options(field) -> List[str]:
+    options = []
+    for option in _resolve(_inherited(field, '/Opt')) or []:
+        option = _resolve(option)
+        # Either a display string or an [export value, display string] pair
+        if isinstance(option, list) and option:
+            option = _resolve(option[-1])
+        text = str(option).strip()
+        if text:
+            options.append(text)
+    return options
+
+
+def _widget_states(widget) -> List[str]:
+    """On-state names of a checkbox or radio widget, from its appearance dictionary."""
+    appearance = _resolve(widget.get('/AP'))
+    if not appearance or '/N' not in appearance:
+        return []
+    normal = _resolve(appearance['/N'])
+    if not hasattr(normal, 'keys'):
+        return []
+    return [str(state).lstrip('/') for state in normal.keys() if str(state) != '/Off']
+
+
+def _field_type(label: str) -> str:
+    lowered = label.lower()
+    if 'date' in lowered or lowered in ('dob', 'd.o.b'):
+        return 'date'
+    if 'email' in lowered:
+        return 'email'
+    if 'phone' in lowered or 'mobile' in lowered:
+        return 'phone'
+    return 'text'
+
+
+def _slug(name: str) -> str:
+    return re.sub(r'[^A-Za-z0-9_]+', '_', name).strip('_') or 'field'
+
+
+def read_acroform_questions(file_path: str) -> List[Dict[str, Any]]:
+    """
+    Read the fields of a fillable PDF as questions in document order.
+    Returns an empty list when the PDF has no AcroForm (or no visible fields).
+    """
+    from PyPDF2 import PdfReader
+
+    reader = PdfReader(file_path)
+    root = _resolve(reader.trailer['/Root'])
+    acroform = _resolve(root.get('/AcroForm'))
+    if not acroform or not _resolve(acroform.get('/Fields')):
+        return []
+
+    # Widgets in document order, grouped by the field they belong to
+    fields = {}
+    order = []
+    for page in reader.pages:
+        widgets = []
+        fragments = None
+        for annotation in _resolve(page.get('/Annots')) or []:
+            widget = _resolve(annotation)
+            if widget.get('/Subtype') != '/Widget' or int(widget.get('/F', 0)) & ANNOT_HIDDEN:
+                continue
+            rect = [float(value) for value in _resolve(widget.get('/Rect', [0, 0, 0, 0]))]
+            # Top to bottom (PDF y grows upwards), then left to right
+            widgets.append(((-max(rect[1], rect[3]), min(rect[0], rect[2])), widget))
+        for _, widget in sorted(widgets, key=lambda item: item[0]):
+            field = _field_node(widget)
+            name = _full_name(field)
+            if not name:
+                continue
+            if name not in fields:
+                printed_label = None
+                if not _inherited(field, '/TU') and _GENERATED_NAME.match(_humanise(name)):
+                    if fragments is None:
+                        fragments = _page_text_fragments(page)
+                    printed_label = _printed_label(fragments, [float(v) for v in _resolve(widget.get('/Rect', [0, 0, 0, 0]))])
+                fields[name] = {"field": field, "widgets": [], "printed_label": printed_label}
+                order.append(name)
+            fields[name]["widgets"].append(widget)
+
+    questions = []
+    used_ids = set()
+    for name in order:
+        field = fields[name]["field"]
+        widgets = fields[name]["widgets"]
+        field_type = str(_inherited(field, '/FT') or '')
+        flags = int(_inherited(field, '/Ff') or 0)
+        label = _label(field, name, fields[name]["printed_label"])
+        options = []
+
+        if field_type == '/Tx':
+            question_type = 'textarea' if flags & FF_MULTILINE else _field_type(label)
+        elif field_type == '/Btn':
+            if flags & FF_PUSHBUTTON:
+                continue
+            if flags & FF_RADIO:
+                question_type = 'radio'
+                options = _choice_options(field)
+                if not options:
+                    options = [state for widget in widgets for state in _widget_states(widget)]
+            else:
+                question_type = 'checkbox'
+                options = [label]
+        elif field_type == '/Ch':
+            question_type = 'checkbox' if flags & FF_MULTISELECT and not flags & FF_COMBO else 'select'
+            options = _choice_options(field)
+        elif field_type == '/Sig':
+            question_type = 'signature'
+        else:
+            continue
+
+        question_id = _slug(name)
+        while question_id in used_ids:
+            question_id += '_'
+        used_ids.add(question_id)
+
+        questions.append({
+            "id": question_id,
+            "question": label,
+            "type": question_type,
+            "options": list(dict.fromkeys(options)),
+            "required": bool(flags & FF_REQUIRED)
+        })
+    return questions
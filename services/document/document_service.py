@@ -6,11 +6,10 @@ from flask import current_app
 from app import db
 from models import Document, DocumentChunk
 from services.document.vector_service import add_to_vector_db
-from services.ai.openai_service import get_openai_client, encode_image_to_base64
-from services.document.markdown_converter import MarkdownConverter
-
-# Initialize markdown converter as a singleton
-markdown_converter = MarkdownConverter()
+from services.ai.openai_service import get_openai_client
+from services.ai.metrics import ai_stage
+from services.ai.image_payload import ImagePayload
+from services.document.markdown_converter import get_markdown_converter
 
 def is_image_file(file_path):
     """Check if a file is an image based on its extension or MIME type"""
@@ -25,48 +24,54 @@ def is_image_file(file_path):
     mime_type, _ = mimetypes.guess_type(file_path)
     return mime_type and mime_type.startswith('image/')
 
+@ai_stage('ocr_image')
+def ocr_image_data_url(image_url):
+    """
+    Run OCR on an image given as a URL or base64 data URL.
+    Raises on API errors so callers can decide how to handle failures.
+    """
+    # Get the OpenAI client
+    client = get_openai_client()
+
+    # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
+    # do not change this unless explicitly requested by the user
+    response = client.chat.completions.create(
+        model="gpt-4o",
+        messages=[
+            {
+                "role": "system",
+                "content": "You are an OCR assistant. Extract all visible text from the provided image. Maintain the formatting as much as possible."
+            },
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": "Extract all text content from this image. Preserve paragraph structure and formatting as much as possible."
+                    },
+                    {
+                        "type": "image_url",
+                        "image_url": {
+                            "url": image_url
+                        }
+                    }
+                ]
+            }
+        ]
+    )
+
+    return response.choices[0].message.content or ""
+
 def extract_text_from_image(image_path):
     """
     Extract text content from an image using OCR via OpenAI's multimodal capabilities.
     """
     try:
-        # Get the OpenAI client
-        client = get_openai_client()
-        
-        # Encode the image to base64
-        base64_image = encode_image_to_base64(image_path)
-        
-        # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
-        # do not change this unless explicitly requested by the user
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an OCR assistant. Extract all visible text from the provided image. Maintain the formatting as much as possible."
-                },
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": "Extract all text content from this image. Preserve paragraph structure and formatting as much as possible."
-                        },
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{base64_image}"
-                            }
-                        }
-                    ]
-                }
-            ]
-        )
-        
-        extracted_text = response.choices[0].message.content
+        # Encode the (pre-processed) image once
+        extracted_text = ocr_image_data_url(ImagePayload.from_path(image_path).data_url)
         current_app.logger.info(f"Extracted {len(extracted_text)} characters of text from image")
         return extracted_text
-    
+
     except Exception as e:
         current_app.logger.error(f"Error extracting text from image: {str(e)}")
         return f"Error extracting text from image: {str(e)}"
@@ -86,7 +91,7 @@ def extract_text_from_file(file_path):
         # This should work for most document types and preserve structure
         current_app.logger.info(f"Attempting to convert {file_path} to markdown using MarkItDown")
         
-        markdown_result = markdown_converter.convert_to_markdown(file_path)
+        markdown_result = get_markdown_converter().convert_to_markdown(file_path)
         if markdown_result["success"] and markdown_result["markdown"]:
             markdown_content = markdown_result["markdown"]
             current_app.logger.info(f"Successfully converted {file_path} to markdown (length: {len(markdown_content)} chars)")
@@ -103,53 +108,15 @@ def extract_text_from_file(file_path):
         
         # File type handling
         if file_path.endswith('.pdf'):
-            import PyPDF2
-            
-            text = ""
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                
-                # Check if the PDF contains images that might need OCR
-                has_images = False
-                for page_num in range(len(pdf_reader.pages)):
-                    page = pdf_reader.pages[page_num]
-                    if '/XObject' in page['/Resources']:
-                        has_images = True
-                        break
-                
-                # If PDF has images and little text, it might be a scanned document
-                # Try to use OpenAI Vision
-                if has_images:
-                    try:
-                        # First try to extract text the normal way
-                        for page_num in range(len(pdf_reader.pages)):
-                            page = pdf_reader.pages[page_num]
-                            extracted = page.extract_text()
-                            if extracted:
-                                text += extracted + "\n\n"
-                        
-                        # If we got very little text but have images, try OCR
-                        if len(text.strip()) < 100 and has_images:
-                            current_app.logger.info(f"PDF may be scanned, attempting OCR: {file_path}")
-                            ocr_text = extract_text_from_image(file_path)
-                            if ocr_text and len(ocr_text) > len(text):
-                                return ocr_text
-                    except Exception as e:
-                        current_app.logger.warning(f"Error extracting text from PDF pages: {str(e)}")
-                else:
-                    # Regular PDF text extraction
-                    for page_num in range(len(pdf_reader.pages)):
-                        page = pdf_reader.pages[page_num]
-                        extracted_text = page.extract_text()
-                        if extracted_text:
-                            text += extracted_text + "\n\n"
-            
-            return text
-            
+            # Text pages are read directly; scanned pages are rendered and
+            # sent to OCR individually (concurrently, with a per-page cache)
+            from services.document.pdf_ocr_service import extract_text_from_pdf
+            return extract_text_from_pdf(file_path)
+
         elif file_path.endswith('.docx'):
             try:
-                # Import the existing extract_docx functionality
-                from extract_docx import extract_docx_content
+                # Single-pass streaming read of the document body
+                from services.document.docx_engine import extract_docx_content
                 
                 # Extract structured content from the DOCX
                 structured_content = extract_docx_content(file_path)
@@ -171,19 +138,8 @@ def extract_text_from_file(file_path):
                 return "\n".join(text_content)
             except Exception as docx_error:
                 current_app.logger.error(f"Error extracting text from DOCX: {str(docx_error)}")
-                # Try fallback to simpler method
-                try:
-                    import docx
-                    doc = docx.Document(file_path)
-                    full_text = []
-                    for para in doc.paragraphs:
-                        if para.text.strip():
-                            full_text.append(para.text.strip())
-                    return '\n'.join(full_text)
-                except Exception as simple_error:
-                    current_app.logger.error(f"Error in fallback DOCX extraction: {str(simple_error)}")
-                    # Last resort fallback
-                    return f"Content extracted from {os.path.basename(file_path)}"
+                # Last resort fallback
+                return f"Content extracted from {os.path.basename(file_path)}"
             
         else:
             # Try to read as a text file
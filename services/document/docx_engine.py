@@ -0,0 +1,480 @@
+"""
+Streaming DOCX reader.
+
+Reads ``word/document.xml`` straight out of the DOCX archive with lxml's
+``iterparse`` and walks it once, emitting a stream of blocks in document order:
+
+    {"type": "paragraph", "text", "style", "bold", "font_size", "checkboxes", "controls"}
+    {"type": "table", "rows", "origins", "checkboxes", "controls"}
+    {"type": "content_control", "tag", "alias", "kind", "checked", "options", "text"}
+
+Table rows are laid out on the table grid with merges resolved the same way
+python-docx's ``row.cells`` does it (a cell spanning several columns, or
+continuing a vertical merge, repeats the text of its origin cell), but without
+python-docx's per-row grid recomputation, which is quadratic on tables with
+merged cells. ``origins`` parallels ``rows``: for each grid column, the grid
+column where its cell starts, so a cell spanning several columns can be told
+apart from neighbouring cells that merely have the same text.
+
+Checkboxes are normalised to ``☐``/``☒`` in the text whatever their source
+(glyph, Wingdings symbol or legacy FORMCHECKBOX field) and are also listed
+per paragraph/table with their state. Content controls (``w:sdt``) are
+reported with their tag, alias, kind and options.
+
+Parsed documents are memoised by path, size and modification time, so the
+chain of form-type detectors run on an upload parses the file only once.
+"""
+
+import os
+import zipfile
+import logging
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+W14_NS = 'http://schemas.microsoft.com/office/word/2010/wordml'
+MC_NS = 'http://schemas.openxmlformats.org/markup-compatibility/2006'
+
+W = '{%s}' % W_NS
+W14 = '{%s}' % W14_NS
+MC_FALLBACK = '{%s}Fallback' % MC_NS
+
+UNCHECKED_BOX = '☐'
+CHECKED_BOX = '☒'
+
+UNCHECKED_GLYPHS = {'☐', '□', '❑', '❒', '◻'}
+CHECKED_GLYPHS = {'☒', '☑', '⊠', '⌧'}
+
+# Checkbox characters in the symbol fonts Word uses for hand-made checklists
+SYMBOL_CHECKBOXES = {
+    'wingdings': {'F06F': False, 'F0A8': False, 'F071': False, 'F078': True, 'F0FD': True, 'F0FE': True},
+    'wingdings 2': {'F02A': False, 'F0A3': False, 'F052': True, 'F053': True, 'F054': True},
+}
+
+# Content control kinds, keyed by the sdtPr child element that declares them
+CONTROL_KINDS = {
+    W + 'date': 'date',
+    W + 'dropDownList': 'dropdown',
+    W + 'comboBox': 'combobox',
+    W + 'text': 'text',
+    W + 'richText': 'rich_text',
+    W + 'picture': 'picture',
+    W14 + 'checkbox': 'checkbox',
+}
+
+_FALSE_VALUES = ('0', 'false', 'off')
+
+# Element tags used by the streaming reader
+_B = W + 'b'
+_BODY = W + 'body'
+_BR = W + 'br'
+_CHAR = W + 'char'
+_CHECK_BOX = W + 'checkBox'
+_CHECKED = W + 'checked'
+_CR = W + 'cr'
+_DEFAULT = W + 'default'
+_FF_DATA = W + 'ffData'
+_FONT = W + 'font'
+_GRID_SPAN = W + 'gridSpan'
+_NO_BREAK_HYPHEN = W + 'noBreakHyphen'
+_P = W + 'p'
+_P_STYLE = W + 'pStyle'
+_R = W + 'r'
+_R_PR = W + 'rPr'
+_SDT = W + 'sdt'
+_SDT_CONTENT = W + 'sdtContent'
+_SDT_PR = W + 'sdtPr'
+_SYM = W + 'sym'
+_SZ = W + 'sz'
+_T = W + 't'
+_TAB = W + 'tab'
+_TBL = W + 'tbl'
+_TC = W + 'tc'
+_TR = W + 'tr'
+_V_MERGE = W + 'vMerge'
+_VAL = W + 'val'
+
+# Only these elements produce parse events; everything else is skipped by lxml
+_STREAM_TAGS = [
+    W + name for name in (
+        'p', 'tbl', 'tr', 'tc', 'sdt', 'sdtPr', 'sdtContent', 'ffData', 'checkBox',
+        't', 'tab', 'br', 'cr', 'noBreakHyphen', 'sym', 'b', 'sz', 'pStyle', 'gridSpan', 'vMerge',
+    )
+] + [MC_FALLBACK]
+
+
+def _on_off(element, default=True):
+    """Read a WordprocessingML on/off property (``<w:b/>``, ``<w:b w:val="0"/>``)."""
+    if element is None:
+        return False
+    value = element.get(W + 'val', element.get(W14 + 'val'))
+    if value is None:
+        return default
+    return value.lower() not in _FALSE_VALUES
+
+
+class _Paragraph:
+    __slots__ = ('parts', 'style', 'bold', 'font_size', 'checkboxes', 'controls')
+
+    def __init__(self):
+        self.parts = []
+        self.style = None
+        self.bold = False
+        self.font_size = None
+        self.checkboxes = []
+        self.controls = []
+
+    def add_text(self, text):
+        self.parts.append(text)
+        for char in text:
+            if char in UNCHECKED_GLYPHS:
+                self.checkboxes.append({"checked": False, "source": "glyph"})
+            elif char in CHECKED_GLYPHS:
+                self.checkboxes.append({"checked": True, "source": "glyph"})
+
+    def add_checkbox(self, checked, source):
+        self.parts.append(CHECKED_BOX if checked else UNCHECKED_BOX)
+        self.checkboxes.append({"checked": checked, "source": source})
+
+    def text(self):
+        return ''.join(self.parts)
+
+
+class _Cell:
+    __slots__ = ('paragraphs', 'span', 'vmerge')
+
+    def __init__(self):
+        self.paragraphs = []
+        self.span = 1
+        self.vmerge = None
+
+
+class _Table:
+    __slots__ = ('rows', 'origins', 'row', 'cells', 'vmerge_text', 'checkboxes', 'controls')
+
+    def __init__(self):
+        self.rows = []
+        self.origins = []
+        self.row = None
+        self.cells = []
+        # Text of the cell that started a vertical merge, by grid column
+        self.vmerge_text = {}
+        self.checkboxes = []
+        self.controls = []
+
+    def end_row(self):
+        resolved = []
+        origins = []
+        column = 0
+        for cell in self.row:
+            if cell.vmerge == 'continue':
+                text = self.vmerge_text.get(column, '')
+            else:
+                text = '\n'.join(cell.paragraphs)
+            for offset in range(cell.span):
+                if cell.vmerge != 'continue':
+                    if cell.vmerge == 'restart':
+                        self.vmerge_text[column + offset] = text
+                    else:
+                        self.vmerge_text.pop(column + offset, None)
+                resolved.append(text)
+                origins.append(column)
+            column += cell.span
+        self.rows.append(resolved)
+        self.origins.append(origins)
+        self.row = None
+
+
+class _Control:
+    __slots__ = ('tag', 'alias', 'kind', 'checked', 'options', 'paragraph', 'start', 'texts')
+
+    def __init__(self):
+        self.tag = None
+        self.alias = None
+        self.kind = 'rich_text'
+        self.checked = None
+        self.options = []
+        # Inline controls record where their text starts in the paragraph;
+        # block controls collect the text of the paragraphs they contain
+        self.paragraph = None
+        self.start = 0
+        self.texts = []
+
+    def read_properties(self, sdt_pr):
+        tag = sdt_pr.find(W + 'tag')
+        alias = sdt_pr.find(W + 'alias')
+        self.tag = tag.get(W + 'val') if tag is not None else None
+        self.alias = alias.get(W + 'val') if alias is not None else None
+        for child in sdt_pr:
+            kind = CONTROL_KINDS.get(child.tag)
+            if kind is None:
+                continue
+            self.kind = kind
+            if kind == 'checkbox':
+                self.checked = _on_off(child.find(W14 + 'checked'))
+            elif kind in ('dropdown', 'combobox'):
+                self.options = [
+                    item.get(W + 'displayText') or item.get(W + 'value') or ''
+                    for item in child.iter(W + 'listItem')
+                ]
+            break
+
+    def as_dict(self, text):
+        return {
+            "type": "content_control",
+            "tag": self.tag,
+            "alias": self.alias,
+            "kind": self.kind,
+            "checked": self.checked,
+            "options": self.options,
+            "text": text,
+        }
+
+
+def iter_docx_blocks(file_path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream the body of a DOCX file as paragraph, table and content control blocks.
+    Paragraphs and tables nested inside table cells are folded into the cell text,
+    and text box paragraphs into the paragraph that anchors them.
+    """
+    from lxml import etree
+
+    body_tag = _BODY
+    tables: List[_Table] = []
+    paragraphs: List[_Paragraph] = []
+    paragraph = None
+    controls: List[_Control] = []
+    in_ff_data = False
+    # Depth inside mc:Fallback, which repeats the mc:Choice content for old readers
+    fallback_depth = 0
+
+    with zipfile.ZipFile(file_path) as archive:
+        with archive.open('word/document.xml') as stream:
+            events = etree.iterparse(stream, events=('start', 'end'), tag=_STREAM_TAGS, huge_tree=True)
+            for event, element in events:
+                tag = element.tag
+
+                if tag == MC_FALLBACK:
+                    fallback_depth += 1 if event == 'start' else -1
+                    continue
+                if fallback_depth:
+                    continue
+
+                if event == 'start':
+                    if tag == _P:
+                        paragraph = _Paragraph()
+                        paragraphs.append(paragraph)
+                    elif tag == _TBL:
+                        tables.append(_Table())
+                    elif tag == _TR and tables:
+                        tables[-1].row = []
+                    elif tag == _TC and tables:
+                        tables[-1].cells.append(_Cell())
+                    elif tag == _SDT:
+                        controls.append(_Control())
+                    elif tag == _SDT_CONTENT and controls and paragraph is not None:
+                        controls[-1].paragraph = paragraph
+                        controls[-1].start = len(paragraph.parts)
+                    elif tag == _FF_DATA:
+                        in_ff_data = True
+                    continue
+
+                # --- end events ---
+                if tag == _T:
+                    if paragraph is not None and element.text:
+                        paragraph.add_text(element.text)
+                elif tag == _TAB:
+                    # w:tab inside w:tabs (paragraph properties) is a tab stop, not text
+                    if paragraph is not None and element.getparent().tag == _R:
+                        paragraph.parts.append('\t')
+                elif tag in (_BR, _CR):
+                    if paragraph is not None:
+                        paragraph.parts.append('\n')
+                elif tag == _NO_BREAK_HYPHEN:
+                    if paragraph is not None:
+                        paragraph.parts.append('-')
+                elif tag == _SYM:
+                    if paragraph is not None:
+                        font = (element.get(_FONT) or '').lower()
+                        code = (element.get(_CHAR) or '').upper()
+                        checked = SYMBOL_CHECKBOXES.get(font, {}).get(code)
+                        if checked is not None:
+                            paragraph.add_checkbox(checked, 'symbol')
+                elif tag == _CHECK_BOX and in_ff_data:
+                    if paragraph is not None:
+                        state = element.find(_CHECKED)
+                        if state is None:
+                            state = element.find(_DEFAULT)
+                        paragraph.add_checkbox(_on_off(state), 'form_field')
+                elif tag == _FF_DATA:
+                    in_ff_data = False
+                elif tag == _B and paragraph is not None and element.getparent().tag == _R_PR:
+                    # Run-level bold only (paragraph mark formatting lives under pPr/rPr)
+                    if element.getparent().getparent().tag == _R and _on_off(element):
+                        paragraph.bold = True
+                elif tag == _SZ and paragraph is not None and element.getparent().tag == _R_PR:
+                    if element.getparent().getparent().tag == _R:
+                        try:
+                            size = int(element.get(_VAL)) / 2
+                        except (TypeError, ValueError):
+                            size = None
+                        if size and (paragraph.font_size is None or size > paragraph.font_size):
+                            paragraph.font_size = size
+                elif tag == _P_STYLE and paragraph is not None:
+                    paragraph.style = element.get(_VAL)
+                elif tag == _SDT_PR and controls:
+                    controls[-1].read_properties(element)
+                elif tag == _GRID_SPAN and tables and tables[-1].cells:
+                    try:
+                        tables[-1].cells[-1].span = max(1, int(element.get(_VAL)))
+                    except (TypeError, ValueError):
+                        pass
+                elif tag == _V_MERGE and tables and tables[-1].cells:
+                    tables[-1].cells[-1].vmerge = 'restart' if element.get(_VAL) == 'restart' else 'continue'
+
+                elif tag == _P:
+                    paragraphs.pop()
+                    text = paragraph.text()
+                    for control in controls:
+                        if control.paragraph is None:
+                            control.texts.append(text)
+                    if paragraphs:
+                        # Text box content anchored in an enclosing paragraph
+                        outer = paragraphs[-1]
+                        if text:
+                            outer.parts.append('\n' + text)
+                        outer.checkboxes.extend(paragraph.checkboxes)
+                        outer.controls.extend(paragraph.controls)
+                    elif tables:
+                        table = tables[-1]
+                        if table.cells:
+                            table.cells[-1].paragraphs.append(text)
+                        table.checkboxes.extend(paragraph.checkboxes)
+                        table.controls.extend(paragraph.controls)
+                    else:
+                        yield {
+                            "type": "paragraph",
+                            "text": text,
+                            "style": paragraph.style,
+                            "bold": paragraph.bold,
+                            "font_size": paragraph.font_size,
+                            "checkboxes": paragraph.checkboxes,
+                            "controls": paragraph.controls,
+                        }
+                    paragraph = paragraphs[-1] if paragraphs else None
+                elif tag == _TC and tables:
+                    table = tables[-1]
+                    cell = table.cells.pop()
+                    if table.row is not None:
+                        table.row.append(cell)
+                elif tag == _TR and tables:
+                    if tables[-1].row is not None:
+                        tables[-1].end_row()
+                elif tag == _TBL and tables:
+                    table = tables.pop()
+                    if tables:
+                        # Nested table: keep its text with the enclosing cell
+                        outer = tables[-1]
+                        if outer.cells:
+                            outer.cells[-1].paragraphs.extend(
+                                ' | '.join(cell for cell in row if cell) for row in table.rows
+                            )
+                        outer.checkboxes.extend(table.checkboxes)
+                        outer.controls.extend(table.controls)
+                    else:
+                        yield {
+                            "type": "table",
+                            "rows": table.rows,
+                            "origins": table.origins,
+                            "checkboxes": table.checkboxes,
+                            "controls": table.controls,
+                        }
+                elif tag == _SDT and controls:
+                    control = controls.pop()
+                    if control.paragraph is not None:
+                        block = control.as_dict(''.join(control.paragraph.parts[control.start:]))
+                        control.paragraph.controls.append(block)
+                    else:
+                        block = control.as_dict('\n'.join(control.texts))
+                        if paragraph is not None:
+                            paragraph.controls.append(block)
+                        elif tables:
+                            tables[-1].controls.append(block)
+                        else:
+                            yield block
+
+                # Keep memory flat: drop each top-level body element once it has been handled
+                parent = element.getparent()
+                if parent is not None and parent.tag == body_tag:
+                    element.clear()
+                    while element.getprevious() is not None:
+                        del parent[0]
+
+
+@lru_cache(maxsize=16)
+def _read_blocks(file_path: str, size: int, mtime_ns: int):
+    return tuple(iter_docx_blocks(file_path))
+
+
+def read_docx_blocks(file_path: str):
+    """
+    Return all blocks of a DOCX file as a tuple, parsing it at most once per version of the file.
+    The blocks are shared between callers and must not be modified.
+    """
+    stat = os.stat(file_path)
+    return _read_blocks(os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+
+
+def extract_docx_content(file_path: str) -> Dict[str, Any]:
+    """
+    Extract paragraphs and tables from a DOCX file.
+
+    Returns a dictionary with non-empty paragraph texts, tables as lists of rows
+    of stripped cell texts, and the full ordered block stream.
+    """
+    blocks = read_docx_blocks(file_path)
+    paragraphs = []
+    tables = []
+    for block in blocks:
+        if block["type"] == "paragraph":
+            text = block["text"].strip()
+            if text:
+                paragraphs.append(text)
+        elif block["type"] == "table":
+            tables.append([[cell.strip() for cell in row] for row in block["rows"]])
+
+    return {
+        "paragraphs": paragraphs,
+        "tables": tables,
+        "blocks": list(blocks)
+    }
+
+
+def row_cells(row: List[str], origins: List[int]) -> List[str]:
+    """Return the stripped cells of a table row with a cell spanning several grid columns listed once."""
+    return [cell.strip() for column, (cell, origin) in enumerate(zip(row, origins)) if origin == column]
+
+
+def table_rows(block: Dict[str, Any]) -> Iterator[List[str]]:
+    """The rows of a table block as ``row_cells``, empty cells included."""
+    for row, origins in zip(block["rows"], block["origins"]):
+        yield row_cells(row, origins)
+
+
+def docx_to_text(file_path: str, include_tables: bool = True) -> str:
+    """
+    Return the text of a DOCX file in document order, one paragraph or table cell per line.
+    With ``include_tables=False`` only body paragraphs are returned.
+    """
+    lines = []
+    for block in read_docx_blocks(file_path):
+        if block["type"] == "paragraph":
+            lines.append(block["text"])
+        elif block["type"] == "table" and include_tables:
+            for row in table_rows(block):
+                lines.extend(cell for cell in row if cell)
+        elif block["type"] == "content_control":
+            lines.append(block["text"])
+    return '\n'.join(lines)
@@ -7,11 +7,15 @@ format for improved text extraction and structure preservation.
 import os
 import io
 import logging
+import threading
 from typing import Dict, Any, Optional
-from markitdown import MarkItDown
 
 logger = logging.getLogger(__name__)
 
+# Shared converter, created on first use (markitdown is slow to import)
+_converter = None
+_converter_lock = threading.Lock()
+
 class MarkdownConverter:
     """
     Wrapper for Microsoft's MarkItDown tool to convert documents to markdown.
@@ -21,6 +25,8 @@ class MarkdownConverter:
     
     def __init__(self):
         """Initialize the MarkItDown converter."""
+        from markitdown import MarkItDown
+        
         # Create MarkItDown instance without LLM capabilities
         # We already use OpenAI for further processing
         self.converter = MarkItDown(enable_plugins=False)
@@ -53,7 +59,8 @@ class MarkdownConverter:
             
             # Extract the markdown content and metadata
             markdown = result.text_content
-            metadata = result.metadata
+            # MarkItDown 0.1 dropped the metadata attribute; only the title is still reported
+            metadata = getattr(result, 'metadata', None) or ({"title": result.title} if getattr(result, 'title', None) else {})
             
             logger.info(f"Successfully converted {file_path} to markdown")
             logger.debug(f"Markdown content (excerpt): {markdown[:500]}...")
@@ -91,4 +98,13 @@ class MarkdownConverter:
             return result["markdown"]
         else:
             logger.warning(f"Failed to extract text using markdown. Error: {result['error']}")
-            return ""
\ No newline at end of file
+            return ""
+
+def get_markdown_converter() -> MarkdownConverter:
+    """Return the process-wide MarkdownConverter, creating it on first use."""
+    global _converter
+    if _converter is None:
+        with _converter_lock:
+            if _converter is None:
+                _converter = MarkdownConverter()
+    return _converter
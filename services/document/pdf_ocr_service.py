@@ -0,0 +1,219 @@
+"""
+Per-page OCR pipeline for scanned PDFs.
+
+Pages that already carry a text layer are read directly. Pages without text
+are rasterised, downsampled and sent to the vision model one page at a time,
+with a bounded number of calls in flight. OCR results are cached on disk by
+the hash of the rendered page image, so re-uploading the same scan (or a scan
+sharing pages with an earlier one) does not repeat the model calls.
+"""
+
+import io
+import os
+import base64
+import hashlib
+from flask import current_app
+from utils.concurrency import map_concurrently
+
+# pypdfium2 gives a true page render; without it we fall back to the
+# largest image embedded in the page, which is what scanners produce
+try:
+    import pypdfium2
+    HAS_PDFIUM = True
+except ImportError:
+    HAS_PDFIUM = False
+
+
+def _get_setting(name, default):
+    return current_app.config.get(name, default)
+
+
+def _render_page_with_pdfium(file_path, page_index, dpi):
+    """Render a single page to a PIL image using pypdfium2."""
+    pdf = pypdfium2.PdfDocument(file_path)
+    try:
+        page = pdf[page_index]
+        return page.render(scale=dpi / 72).to_pil()
+    finally:
+        pdf.close()
+
+
+def _decode_image_xobject(xobject):
+    """Decode a PDF image XObject into a PIL image."""
+    from PIL import Image
+
+    filters = xobject.get('/Filter')
+    if not isinstance(filters, list):
+        filters = [filters]
+
+    # Scanners almost always emit JPEG (or JPEG 2000) streams, which Pillow reads as-is
+    if '/DCTDecode' in filters or '/JPXDecode' in filters:
+        return Image.open(io.BytesIO(xobject._data))
+
+    color_space = xobject.get('/ColorSpace')
+    if xobject.get('/BitsPerComponent') == 1:
+        mode = '1'
+    elif color_space == '/DeviceRGB':
+        mode = 'RGB'
+    elif color_space == '/DeviceCMYK':
+        mode = 'CMYK'
+    else:
+        mode = 'L'
+    return Image.frombytes(mode, (xobject['/Width'], xobject['/Height']), xobject.get_data())
+
+
+def _largest_embedded_image(page):
+    """Return the largest embedded image on a page as a PIL image, or None."""
+    resources = page['/Resources'] if '/Resources' in page else {}
+    if '/XObject' not in resources:
+        return None
+    xobjects = resources['/XObject']
+
+    best_image = None
+    best_area = 0
+    for name in xobjects:
+        xobject = xobjects[name].get_object()
+        if xobject.get('/Subtype') != '/Image':
+            continue
+        try:
+            image = _decode_image_xobject(xobject)
+            image.load()
+        except Exception as e:
+            current_app.logger.debug(f"Skipping unreadable embedded image {name}: {str(e)}")
+            continue
+        area = image.width * image.height
+        if area > best_area:
+            best_image, best_area = image, area
+    return best_image
+
+
+def _prepare_page_image(image, max_dimension):
+    """
+    Downsample a rendered page for OCR and encode it as JPEG.
+    Returns the JPEG bytes.
+    """
+    from PIL import Image
+
+    if image.mode not in ('L', 'RGB'):
+        image = image.convert('RGB')
+    # Text recognition does not need colour, and greyscale JPEGs are much smaller
+    image = image.convert('L')
+    image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=80, optimize=True)
+    return buffer.getvalue()
+
+
+def _cache_path(page_hash):
+    return os.path.join(_get_setting('OCR_CACHE_FOLDER', 'uploads/ocr_cache'), f"{page_hash}.txt")
+
+
+def _read_cached_text(page_hash):
+    path = _cache_path(page_hash)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _write_cached_text(page_hash, text):
+    path = _cache_path(page_hash)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first so concurrent readers never see a partial result
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        current_app.logger.warning(f"Could not write OCR cache entry {page_hash}: {str(e)}")
+
+
+def _ocr_page(job):
+    """
+    OCR a single rendered page, consulting the cache first.
+    Failures are logged and produce empty text so one bad page does not
+    discard the rest of the document.
+    """
+    from services.document.document_service import ocr_image_data_url
+
+    page_index, image_bytes = job
+    page_hash = hashlib.sha256(image_bytes).hexdigest()
+
+    cached = _read_cached_text(page_hash)
+    if cached is not None:
+        current_app.logger.debug(f"OCR cache hit for page {page_index + 1}")
+        return cached
+
+    try:
+        data_url = f"data:image/jpeg;base64,{base64.b64encode(image_bytes).decode('utf-8')}"
+        text = ocr_image_data_url(data_url)
+    except Exception as e:
+        current_app.logger.error(f"OCR failed for page {page_index + 1}: {str(e)}")
+        return ""
+
+    _write_cached_text(page_hash, text)
+    return text
+
+
+def extract_text_from_pdf(file_path):
+    """
+    Extract text from a PDF, running OCR only on pages without a text layer.
+    Page order is preserved in the returned text.
+    """
+    import PyPDF2
+
+    min_chars = _get_setting('OCR_TEXT_PAGE_MIN_CHARS', 50)
+    dpi = _get_setting('OCR_RENDER_DPI', 150)
+    max_dimension = _get_setting('OCR_MAX_IMAGE_DIMENSION', 2048)
+    max_workers = _get_setting('OCR_MAX_CONCURRENCY', 4)
+
+    page_texts = []
+    ocr_jobs = []
+
+    with open(file_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+
+        for page_index, page in enumerate(pdf_reader.pages):
+            try:
+                text = page.extract_text() or ""
+            except Exception as e:
+                current_app.logger.warning(f"Error extracting text from PDF page {page_index + 1}: {str(e)}")
+                text = ""
+            page_texts.append(text)
+
+            if len(text.strip()) >= min_chars:
+                continue
+
+            resources = page['/Resources'] if '/Resources' in page else {}
+            if '/XObject' not in resources and not HAS_PDFIUM:
+                # Nothing to render and no renderer available
+                continue
+
+            try:
+                if HAS_PDFIUM:
+                    image = _render_page_with_pdfium(file_path, page_index, dpi)
+                else:
+                    image = _largest_embedded_image(page)
+            except Exception as e:
+                current_app.logger.warning(f"Could not render PDF page {page_index + 1}: {str(e)}")
+                image = None
+
+            if image is not None:
+                ocr_jobs.append((page_index, _prepare_page_image(image, max_dimension)))
+
+    if ocr_jobs:
+        current_app.logger.info(
+            f"PDF has {len(ocr_jobs)} scanned page(s) of {len(page_texts)}, running OCR: {file_path}"
+        )
+        ocr_results = map_concurrently(_ocr_page, ocr_jobs, max_workers=max_workers)
+        for (page_index, _), ocr_text in zip(ocr_jobs, ocr_results):
+            # Keep whichever is more complete: the sparse text layer or the OCR output
+            if len(ocr_text.strip()) > len(page_texts[page_index].strip()):
+                page_texts[page_index] = ocr_text
+
+    return "\n\n".join(text for text in page_texts if text.strip())
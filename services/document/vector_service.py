@@ -1,8 +1,7 @@
 import os
 import json
 import logging
-import numpy as np
-import faiss
+import threading
 from flask import current_app
 from app import db
 from models import DocumentChunk
@@ -13,32 +12,35 @@ VECTOR_DB_PATH = os.environ.get('VECTOR_DB_PATH', 'vector_db')
 VECTOR_INDEX_PATH = os.path.join(VECTOR_DB_PATH, 'index.faiss')
 VECTOR_MAPPING_PATH = os.path.join(VECTOR_DB_PATH, 'id_mapping.json')
 
-# Make sure the vector DB directory exists
-os.makedirs(VECTOR_DB_PATH, exist_ok=True)
-
 # Global variables for index and mapping
+# The index is loaded on first use; faiss and numpy are only imported then
 index = None
 id_mapping = {}
+_index_lock = threading.Lock()
 
 def initialize_vector_db():
     """
     Initialize or load the vector database.
     """
     global index, id_mapping
+    import faiss
     
     try:
+        # Make sure the vector DB directory exists
+        os.makedirs(VECTOR_DB_PATH, exist_ok=True)
+        
         # Check if index exists
         if os.path.exists(VECTOR_INDEX_PATH) and os.path.exists(VECTOR_MAPPING_PATH):
-            # Load existing index
-            index = faiss.read_index(VECTOR_INDEX_PATH)
-            
-            # Load ID mapping
+            # Load ID mapping (before publishing the index, which marks the DB as loaded)
             with open(VECTOR_MAPPING_PATH, 'r') as f:
                 id_mapping = json.load(f)
+            
+            # Load existing index
+            index = faiss.read_index(VECTOR_INDEX_PATH)
         else:
             # Create new index (using 1536 dimensions for OpenAI embeddings)
-            index = faiss.IndexFlatL2(1536)
             id_mapping = {}
+            index = faiss.IndexFlatL2(1536)
             
             # Save the empty index and mapping
             faiss.write_index(index, VECTOR_INDEX_PATH)
@@ -51,6 +53,13 @@ def initialize_vector_db():
         index = faiss.IndexFlatL2(1536)
         id_mapping = {}
 
+def _ensure_index():
+    """Load the vector database on first use."""
+    if index is None:
+        with _index_lock:
+            if index is None:
+                initialize_vector_db()
+
 # Function to rebuild the vector database from scratch
 def rebuild_vector_db():
     """
@@ -58,11 +67,15 @@ def rebuild_vector_db():
     This should be used when there's a mismatch between the vector database and the actual data.
     """
     global index, id_mapping
+    import numpy as np
+    import faiss
     
     try:
         from app import db
         from models import DocumentChunk
         
+        os.makedirs(VECTOR_DB_PATH, exist_ok=True)
+        
         # Create a new index
         index = faiss.IndexFlatL2(1536)
         id_mapping = {}
@@ -125,16 +138,17 @@ def rebuild_vector_db():
             db.session.rollback()
         return False
 
-# Initialize on import
-initialize_vector_db()
-
 def add_to_vector_db(chunk_id, text):
     """
     Generate embedding for text and add to vector database.
     """
     global index, id_mapping
+    import numpy as np
+    import faiss
     
     try:
+        _ensure_index()
+        
         # Generate embedding
         embedding = generate_embeddings(text)
         
@@ -165,8 +179,11 @@ def search_documents(query, top_k=5):
     Search for documents relevant to a query.
     """
     global index, id_mapping
+    import numpy as np
     
     try:
+        _ensure_index()
+        
         # Generate embedding for query
         query_embedding = generate_embeddings(query)
         
@@ -0,0 +1,136 @@
+"""
+Per-question answer rows for form responses.
+
+``FormResponse.answers`` stays the source of truth for the fill page and the
+PDF, but it is an opaque JSON blob. Every write to it also rewrites the
+response's ``FormAnswer`` rows in the same transaction: one row per answered
+question, or per selected option for multiple-choice answers. Blank answers
+have no row. Filtering submissions by an answer ("incidents marked
+reportable") and exporting answers are then plain SQL over an indexed table.
+
+Rows are written with bulk statements rather than through the ORM session, so
+a full save of a long checklist costs one DELETE and one INSERT.
+``backfill_answers`` converts responses saved before the table existed.
+"""
+
+import json
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, exists, insert, select
+
+from app import db
+from models import FormAnswer, FormResponse
+
+logger = logging.getLogger(__name__)
+
+ANSWER_MATCHES = ('equals', 'contains')
+
+# Length of FormAnswer.question_id; longer question ids are stored truncated
+QUESTION_ID_LENGTH = 100
+
+
+def _as_text(value: Any) -> str:
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+def stored_question_id(question_id: Any) -> str:
+    """The question id as stored in ``FormAnswer`` rows; look rows up by this, not the raw id."""
+    return str(question_id)[:QUESTION_ID_LENGTH]
+
+
+def answer_rows(response_id: int, form_id: int, answers: Dict[str, Any],
+                question_ids: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+    """``FormAnswer`` row values for ``answers`` (only ``question_ids`` when given), skipping blanks."""
+    keys = answers.keys() if question_ids is None else [key for key in question_ids if key in answers]
+    rows = []
+    for question_id in keys:
+        value = answers[question_id]
+        values = value if isinstance(value, list) else [value]
+        for position, item in enumerate(v for v in values if v is not None and v != ''):
+            rows.append({"response_id": response_id, "form_id": form_id, "question_id": stored_question_id(question_id),
+                         "position": position, "value": _as_text(item)})
+    return rows
+
+
+def sync_response_answers(response: FormResponse, answers: Dict[str, Any],
+                          question_ids: Optional[Iterable[str]] = None):
+    """
+    Rewrite the answer rows of ``response`` to match ``answers``; with ``question_ids``, only those
+    questions' rows (for an incremental save). Runs in the caller's transaction; the caller commits.
+    """
+    statement = delete(FormAnswer).where(FormAnswer.response_id == response.id)
+    if question_ids is not None:
+        question_ids = [str(question_id) for question_id in question_ids]
+        if not question_ids:
+            return
+        statement = statement.where(
+            FormAnswer.question_id.in_({stored_question_id(question_id) for question_id in question_ids})
+        )
+    db.session.execute(statement)
+    rows = answer_rows(response.id, response.form_id, answers, question_ids)
+    if rows:
+        db.session.execute(insert(FormAnswer), rows)
+
+
+def answer_filter(form_id: int, question_id: str, value: str, match: str = 'equals'):
+    """A condition on ``FormResponse`` selecting responses whose answer to ``question_id`` matches ``value``."""
+    if match == 'contains':
+        condition = FormAnswer.value.icontains(value, autoescape=True)
+    else:
+        condition = FormAnswer.value == value
+    return FormResponse.id.in_(
+        select(FormAnswer.response_id).where(
+            FormAnswer.form_id == form_id,
+            FormAnswer.question_id == stored_question_id(question_id),
+            condition
+        )
+    )
+
+
+def answers_by_response(response_ids: List[int]) -> Dict[int, Dict[str, List[str]]]:
+    """Answer values for the given responses, keyed by response and stored question id, in option order."""
+    answers: Dict[int, Dict[str, List[str]]] = {}
+    for start in range(0, len(response_ids), 500):
+        rows = db.session.execute(
+            select(FormAnswer.response_id, FormAnswer.question_id, FormAnswer.value)
+            .where(FormAnswer.response_id.in_(response_ids[start:start + 500]))
+            .order_by(FormAnswer.response_id, FormAnswer.question_id, FormAnswer.position)
+        )
+        for response_id, question_id, value in rows:
+            answers.setdefault(response_id, {}).setdefault(question_id, []).append(value)
+    return answers
+
+
+def backfill_answers(batch_size: int = 200, rebuild: bool = False) -> int:
+    """
+    Write answer rows for responses that have none (every response with ``rebuild``).
+    Commits per batch, so an interrupted run can simply be started again. Returns the responses converted.
+    """
+    query = FormResponse.query.order_by(FormResponse.id)
+    if not rebuild:
+        query = query.filter(~exists().where(FormAnswer.response_id == FormResponse.id))
+    converted = 0
+    last_id = 0
+    while True:
+        batch = query.filter(FormResponse.id > last_id).limit(batch_size).all()
+        if not batch:
+            break
+        rows = []
+        for response in batch:
+            try:
+                answers = json.loads(response.answers) if response.answers else {}
+            except ValueError:
+                logger.warning(f"Skipping form response {response.id}: answers are not valid JSON")
+                continue
+            if isinstance(answers, dict):
+                rows.extend(answer_rows(response.id, response.form_id, answers))
+        if rebuild:
+            db.session.execute(delete(FormAnswer).where(FormAnswer.response_id.in_([r.id for r in batch])))
+        if rows:
+            db.session.execute(insert(FormAnswer), rows)
+        db.session.commit()
+        converted += len(batch)
+        last_id = batch[-1].id
+        logger.info(f"Backfilled answers for {converted} form responses")
+    return converted
@@ -0,0 +1,243 @@
+"""
+Bulk ingestion of a directory of form documents (``flask ingest-forms``).
+
+Each file goes through the same pipeline as a single upload (template
+detection, then extraction reusing any structurally matching form), with
+several files in flight at once. Model calls run in the ``batch`` priority
+class, so the scheduler's batch limit bounds AI concurrency and interactive
+users keep their slots while a bulk load runs.
+
+Progress is checkpointed to a JSON-lines file, one record per file and step.
+Files are keyed by content hash. An interrupted run, started again with the
+same checkpoint, skips files that were already saved, saves files that were
+extracted but not yet saved, and retries only the rest. ``Form`` rows are
+written in batches once extraction has finished.
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from flask import current_app
+from werkzeug.utils import secure_filename
+
+from app import db
+from models import Form
+from services.ai.scheduler import ai_priority
+from services.form.fingerprint import save_form_fingerprint
+from services.form.form_service import fingerprint_form_file, extract_form_structure_reusing_matches
+from services.form.template_detection import detect_upload_template
+from services.form.upload_pipeline import validate_form_structure
+from utils.concurrency import map_concurrently
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EXTENSIONS = ('docx', 'doc', 'pdf')
+
+# Form rows are committed in batches of this size
+SAVE_BATCH_SIZE = 25
+
+EXTRACTED = 'extracted'
+SAVED = 'saved'
+FAILED = 'failed'
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def find_form_files(directory: str, extensions=DEFAULT_EXTENSIONS, recursive: bool = False) -> List[str]:
+    """Form documents in ``directory`` with one of ``extensions``, sorted by path."""
+    extensions = {ext.lower().lstrip('.') for ext in extensions}
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        if not recursive:
+            dirs[:] = []
+        dirs[:] = [d for d in dirs if not d.startswith('.')]
+        for name in files:
+            if not name.startswith(('.', '~$')) and name.rsplit('.', 1)[-1].lower() in extensions and '.' in name:
+                paths.append(os.path.join(root, name))
+    return sorted(paths)
+
+
+def default_title(path: str) -> str:
+    """Form title from a file name: 'Hazard_Form.docx' -> 'Hazard Form'."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return ' '.join(stem.replace('_', ' ').replace('-', ' ').split())[:100] or 'Untitled Form'
+
+
+class Checkpoint:
+    """Append-only JSON-lines record of per-file results; the last record for a file wins."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.records: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # a line cut short by an interrupted write
+                    self.records[record['sha256']] = record
+
+    def get(self, sha256: str) -> Optional[Dict[str, Any]]:
+        return self.records.get(sha256)
+
+    def write(self, record: Dict[str, Any]):
+        with self._lock:
+            self.records[record['sha256']] = record
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + '\n')
+                f.flush()
+
+
+@dataclass
+class FileResult:
+    path: str
+    status: str
+    seconds: float = 0.0
+    questions: int = 0
+    form_id: Optional[int] = None
+    method: str = ''
+    error: Optional[str] = None
+
+
+@dataclass
+class IngestReport:
+    results: List[FileResult] = field(default_factory=list)
+    seconds: float = 0.0
+
+    def count(self, status: str) -> int:
+        return sum(1 for result in self.results if result.status == status)
+
+    @property
+    def files_per_minute(self) -> float:
+        processed = sum(1 for result in self.results if result.status in (SAVED, FAILED))
+        return processed / self.seconds * 60 if self.seconds else 0.0
+
+    def lines(self) -> List[str]:
+        width = max([len(os.path.basename(r.path)) for r in self.results] + [4])
+        lines = [f"{'File':<{width}}  {'Status':<9} {'Secs':>7} {'Qs':>4}  Form  Detail"]
+        for r in self.results:
+            form_id = str(r.form_id) if r.form_id else '-'
+            detail = r.error or r.method
+            lines.append(f"{os.path.basename(r.path):<{width}}  {r.status:<9} {r.seconds:>7.1f} {r.questions:>4}  "
+                         f"{form_id:>4}  {detail}")
+        lines.append('')
+        lines.append(f"{len(self.results)} files: {self.count(SAVED)} saved, {self.count('skipped')} already ingested, "
+                     f"{self.count('duplicate')} duplicates, {self.count(FAILED)} failed "
+                     f"in {self.seconds:.1f}s ({self.files_per_minute:.1f} files/minute)")
+        return lines
+
+
+def _stored_copy(path: str, sha256: str) -> str:
+    """Copy a source file into the form upload folder, keeping a different file of the same name intact."""
+    folder = current_app.config['FORM_UPLOAD_FOLDER']
+    filename = secure_filename(os.path.basename(path)) or f"{sha256[:12]}.bin"
+    target = os.path.join(folder, filename)
+    if os.path.exists(target) and file_sha256(target) != sha256:
+        stem, ext = os.path.splitext(filename)
+        target = os.path.join(folder, f"{stem}_{sha256[:8]}{ext}")
+    if not os.path.exists(target):
+        shutil.copyfile(path, target)
+    return target
+
+
+def _extract_file(path: str, sha256: str, checkpoint: Checkpoint) -> FileResult:
+    started = time.perf_counter()
+    try:
+        file_path = _stored_copy(path, sha256)
+        filename = os.path.basename(file_path)
+        form_structure = detect_upload_template(file_path, filename)
+        method = 'template'
+        if form_structure is None:
+            form_structure, match = extract_form_structure_reusing_matches(file_path, fingerprint_form_file(file_path))
+            method = ('reused exact match' if match['exact'] else 'reused near match') if match else 'extracted'
+            validate_form_structure(form_structure)
+        form_structure = json.loads(json.dumps(form_structure))  # template views to plain JSON
+    except Exception as e:
+        seconds = time.perf_counter() - started
+        logger.warning(f"Bulk ingest: {path} failed after {seconds:.1f}s: {e}")
+        checkpoint.write({"sha256": sha256, "path": path, "status": FAILED, "seconds": seconds, "error": str(e)})
+        return FileResult(path, FAILED, seconds, error=str(e))
+
+    seconds = time.perf_counter() - started
+    checkpoint.write({"sha256": sha256, "path": path, "status": EXTRACTED, "seconds": seconds, "method": method,
+                      "file_path": file_path, "structure": form_structure})
+    questions = len(form_structure.get('questions', []))
+    logger.info(f"Bulk ingest: {path} {method} with {questions} questions in {seconds:.1f}s")
+    return FileResult(path, EXTRACTED, seconds, questions, method=method)
+
+
+def _save_forms(pending: List[Dict[str, Any]], checkpoint: Checkpoint, user_id: Optional[int],
+                results: Dict[str, FileResult]):
+    """Create the ``Form`` rows for extracted files, committing in batches."""
+    for start in range(0, len(pending), SAVE_BATCH_SIZE):
+        batch = pending[start:start + SAVE_BATCH_SIZE]
+        forms = [Form(
+            title=default_title(record['path']),
+            file_path=record['file_path'],
+            structure=json.dumps(record['structure']),
+            created_at=datetime.utcnow(),
+            user_id=user_id
+        ) for record in batch]
+        db.session.add_all(forms)
+        db.session.flush()
+        for form, record in zip(forms, batch):
+            save_form_fingerprint(form, fingerprint_form_file(record['file_path']))
+        db.session.commit()
+        for form, record in zip(forms, batch):
+            checkpoint.write({**record, "status": SAVED, "form_id": form.id})
+            result = results[record['sha256']]
+            result.status, result.form_id = SAVED, form.id
+
+
+def ingest_directory(directory: str, checkpoint_path: str, extensions=DEFAULT_EXTENSIONS,
+                     recursive: bool = False, workers: int = 4, user_id: Optional[int] = None) -> IngestReport:
+    """Detect or extract every form document in ``directory`` and save each one as a ``Form``."""
+    started = time.perf_counter()
+    checkpoint = Checkpoint(checkpoint_path)
+    results: Dict[str, FileResult] = {}
+    duplicates = []
+    to_extract = []
+    for path in find_form_files(directory, extensions, recursive):
+        sha256 = file_sha256(path)
+        if sha256 in results:
+            first = results[sha256].path if results[sha256] else next(p for p, h in to_extract if h == sha256)
+            duplicates.append(FileResult(path, 'duplicate', error=f"same content as {os.path.basename(first)}"))
+            continue
+        record = checkpoint.get(sha256)
+        if record and record['status'] == SAVED:
+            results[sha256] = FileResult(path, 'skipped', form_id=record.get('form_id'),
+                                         questions=len(record['structure'].get('questions', [])), method=record.get('method', ''))
+        elif record and record['status'] == EXTRACTED:
+            results[sha256] = FileResult(path, EXTRACTED, questions=len(record['structure'].get('questions', [])),
+                                         method=f"{record.get('method', '')} (from checkpoint)")
+        else:
+            results[sha256] = None
+            to_extract.append((path, sha256))
+
+    logger.info(f"Bulk ingest: {len(results)} files in {directory}, {len(to_extract)} to extract")
+    with ai_priority('batch'):
+        extracted = map_concurrently(lambda item: _extract_file(item[0], item[1], checkpoint), to_extract,
+                                     max_workers=workers)
+    for (_, sha256), result in zip(to_extract, extracted):
+        results[sha256] = result
+
+    pending = [checkpoint.get(sha256) for sha256, result in results.items() if result.status == EXTRACTED]
+    _save_forms(pending, checkpoint, user_id, results)
+    return IngestReport(list(results.values()) + duplicates, time.perf_counter() - started)
@@ -0,0 +1,223 @@
+"""
+Local completeness estimate for extracted form questions.
+
+The verification passes (``FormProcessor.validate_questions`` and the
+markdown verification in ``openai_service``) each cost a full model call.
+Before running one, we compare the extracted question texts with the lines of
+the source that look like form fields (labels ending in a colon, blanks,
+checkbox glyphs, questions and table rows) by token-set similarity. Each
+question can match at most one candidate line, and the share of candidate lines
+matched is the coverage score.
+
+When coverage is at or above the threshold the verification pass is skipped.
+Below it, verification runs only on the unmatched regions of the source. Every
+decision is recorded so the threshold can be tuned from ``/admin/ai/metrics``.
+"""
+
+import re
+import logging
+import threading
+from difflib import SequenceMatcher
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Minimum similarity (token-set overlap or character ratio) for a question to match a candidate line
+MATCH_RATIO = 0.75
+
+# Number of neighbouring lines kept around each unmatched line for verification
+REGION_CONTEXT_LINES = 1
+
+_CHECKBOX_GLYPHS = '☐☑☒□■▢✓✔'
+_BLANK = re.compile(r'_{3,}|\.{5,}|\[\s?\]|\(\s?\)')
+_LIST_MARKER = re.compile(r'^\s*(?:[-*+]\s+(?:\[[ xX]\]\s*)?|\d+[.)]\s+|[a-zA-Z][.)]\s+)')
+_TABLE_SEPARATOR = re.compile(r'^[\s|:\-]+$')
+_QUESTION_KEYS = ('question', 'question_text', 'label')
+
+# Upper bounds of the coverage score histogram buckets
+_SCORE_BUCKETS = (0.5, 0.7, 0.8, 0.9, 0.95, 1.0)
+
+
+def _normalise(text: str) -> str:
+    return " ".join("".join(ch for ch in text.lower() if ch.isalnum() or ch.isspace()).split())
+
+
+def _table_labels(line: str) -> List[str]:
+    """Labels in a table row: every cell ending in a colon, or else the first non-empty cell."""
+    cells = [cell.strip() for cell in line.strip().strip('|').split('|') if cell.strip()]
+    labelled = [cell for cell in cells if cell.endswith(':')]
+    return labelled or cells[:1]
+
+
+def candidate_field_lines(text: str) -> List[Tuple[int, str]]:
+    """Lines of the source that look like form fields, as ``(line_index, label)`` pairs."""
+    candidates = []
+    for index, line in enumerate(text.split('\n')):
+        stripped = line.strip()
+        if not stripped or stripped.startswith('#'):
+            continue
+        if '|' in stripped:
+            if _TABLE_SEPARATOR.match(stripped):
+                continue
+            labels = _table_labels(stripped)
+        elif (stripped.endswith(':') or stripped.endswith('?') or _BLANK.search(stripped)
+              or any(glyph in stripped for glyph in _CHECKBOX_GLYPHS) or ': ' in stripped):
+            labels = [stripped]
+        else:
+            continue
+        for label in labels:
+            label = _BLANK.sub(' ', _LIST_MARKER.sub('', label))
+            label = label.strip(' :' + _CHECKBOX_GLYPHS)
+            if len(_normalise(label)) >= 2:
+                candidates.append((index, label))
+    return candidates
+
+
+def _similarity(candidate: str, question: str) -> float:
+    """
+    Token-set overlap of two normalised texts (shared words over the longer one's words), or their
+    character similarity when that is higher, e.g. for typos. A short text contained in a long one
+    scores low, so "Name" does not cover "Name of the participant's support coordinator".
+    """
+    if not candidate or not question:
+        return 0.0
+    if candidate == question:
+        return 1.0
+    candidate_tokens, question_tokens = set(candidate.split()), set(question.split())
+    overlap = len(candidate_tokens & question_tokens) / max(len(candidate_tokens), len(question_tokens))
+    if overlap >= MATCH_RATIO:
+        return overlap
+    matcher = SequenceMatcher(None, candidate, question, autojunk=False)
+    if matcher.real_quick_ratio() < MATCH_RATIO or matcher.quick_ratio() < MATCH_RATIO:
+        return overlap
+    return max(overlap, matcher.ratio())
+
+
+def _match_one_to_one(candidates: List[str], questions: List[str]) -> List[bool]:
+    """
+    Which candidates are matched when each question may match at most one candidate line,
+    assigning the most similar pairs first.
+    """
+    pairs = []
+    for c, candidate in enumerate(candidates):
+        for q, question in enumerate(questions):
+            score = _similarity(candidate, question)
+            if score >= MATCH_RATIO:
+                pairs.append((score, c, q))
+    matched = [False] * len(candidates)
+    used = set()
+    # Ties go to the earlier candidate and question, so repeated labels pair up in document order
+    for score, c, q in sorted(pairs, key=lambda pair: (-pair[0], pair[1], pair[2])):
+        if not matched[c] and q not in used:
+            matched[c] = True
+            used.add(q)
+    return matched
+
+
+@dataclass
+class CoverageReport:
+    """How well the extracted questions cover the field-like lines of the source."""
+    score: float
+    candidates: int
+    matched: int
+    unmatched_lines: List[int] = field(default_factory=list)
+
+    def unmatched_regions(self, text: str, context: int = REGION_CONTEXT_LINES) -> str:
+        """The unmatched lines of ``text`` with a little surrounding context, in document order."""
+        lines = text.split('\n')
+        keep = set()
+        for index in self.unmatched_lines:
+            keep.update(range(max(0, index - context), min(len(lines), index + context + 1)))
+        regions = []
+        previous = None
+        for index in sorted(keep):
+            if previous is not None and index != previous + 1:
+                regions.append('...')
+            regions.append(lines[index])
+            previous = index
+        return '\n'.join(regions)
+
+
+def estimate_coverage(questions: List[Dict[str, Any]], text: str) -> CoverageReport:
+    """Fuzzy-match extracted questions against candidate field lines of ``text``."""
+    candidates = candidate_field_lines(text)
+    if not candidates:
+        # Nothing that looks like a field: there is nothing for verification to find either
+        return CoverageReport(score=1.0, candidates=0, matched=0)
+
+    extracted = []
+    for question in questions:
+        value = next((question.get(key) for key in _QUESTION_KEYS if question.get(key)), "")
+        normalised = _normalise(str(value))
+        if normalised:
+            extracted.append(normalised)
+
+    matches = _match_one_to_one([_normalise(label) for _, label in candidates], extracted)
+    unmatched = [index for (index, _), is_matched in zip(candidates, matches) if not is_matched]
+
+    matched = len(candidates) - len(unmatched)
+    return CoverageReport(
+        score=round(matched / len(candidates), 3),
+        candidates=len(candidates),
+        matched=matched,
+        unmatched_lines=unmatched
+    )
+
+
+class CompletenessStats:
+    """Process-wide record of gate decisions, for tuning the threshold."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sources = {}
+
+    def record(self, source: str, report: CoverageReport, skipped: bool):
+        with self._lock:
+            stats = self._sources.setdefault(source, {
+                "checks": 0, "skipped": 0, "score_total": 0.0,
+                "histogram": [0] * len(_SCORE_BUCKETS)
+            })
+            stats["checks"] += 1
+            stats["skipped"] += int(skipped)
+            stats["score_total"] += report.score
+            bucket = next(i for i, bound in enumerate(_SCORE_BUCKETS) if report.score <= bound)
+            stats["histogram"][bucket] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        labels = [f"<={bound}" for bound in _SCORE_BUCKETS]
+        with self._lock:
+            return {
+                source: {
+                    "checks": stats["checks"],
+                    "skipped": stats["skipped"],
+                    "skip_rate": round(stats["skipped"] / stats["checks"], 3),
+                    "avg_score": round(stats["score_total"] / stats["checks"], 3),
+                    "score_histogram": dict(zip(labels, stats["histogram"])),
+                }
+                for source, stats in sorted(self._sources.items())
+            }
+
+
+_stats = CompletenessStats()
+
+
+def get_completeness_stats() -> CompletenessStats:
+    """Return the process-wide gate statistics."""
+    return _stats
+
+
+def completeness_gate(source: str, questions: List[Dict[str, Any]], text: str, threshold: float) -> Tuple[bool, CoverageReport]:
+    """
+    Decide whether a verification pass is needed.
+    Returns ``(verify, report)``; ``verify`` is False when coverage reaches ``threshold``.
+    """
+    report = estimate_coverage(questions, text)
+    verify = report.score < threshold
+    _stats.record(source, report, skipped=not verify)
+    logger.info(
+        f"Extraction coverage for {source}: {report.score:.2f} "
+        f"({report.matched}/{report.candidates} field lines); "
+        f"{'verifying ' + str(len(report.unmatched_lines)) + ' unmatched lines' if verify else 'skipping verification'}"
+    )
+    return verify, report
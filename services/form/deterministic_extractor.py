@@ -0,0 +1,360 @@
+"""
+Deterministic first-tier form extraction.
+
+Most of the forms we receive are structured DOCX documents whose fields can be
+read straight off the layout: label cells followed by empty answer cells,
+"Label: ____" lines, checkbox glyphs and Yes/No/N/A grids. This module turns
+those patterns into questions without a model call, in document order.
+
+Anything it cannot classify with confidence (short unlabelled lines, table
+rows with no answer slot, grids with unknown columns) is kept as a
+low-confidence region, placed at its position in the question list. The
+confidence score is the share of field-like units that were classified, and
+the form pipeline only calls the model when the score is low, and then only for
+those regions (see ``FormProcessor.process_form``).
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from services.document.docx_engine import read_docx_blocks, table_rows, UNCHECKED_GLYPHS, CHECKED_GLYPHS
+
+_GLYPHS = UNCHECKED_GLYPHS | CHECKED_GLYPHS
+_GLYPH_SPLIT = re.compile('[%s]' % ''.join(sorted(_GLYPHS)))
+_BLANK = re.compile(r'_{3,}|\.{5,}')
+
+# Column headers that make a table a choice grid (each row a radio question)
+OPTION_WORDS = {
+    'yes', 'no', 'n/a', 'na', 'y', 'n', 'unsure', 'unknown', 'satisfactory', 'unsatisfactory',
+    'defect', 'compliant', 'non-compliant', 'not compliant', 'pass', 'fail', 'true', 'false',
+    'agree', 'disagree', 'done', 'not done', 'completed', 'not applicable', 'comments', 'comment'
+}
+
+# Paragraphs ending in a colon with more words than this are instructions, not labels
+MAX_LABEL_WORDS = 8
+
+# Item numbers in the first column of a checklist
+_ITEM_NUMBER = re.compile(r'^(\d+(\.\d+)*|[a-zA-Z])[.)]?$')
+
+# Content controls that are fields in their own right
+_FIELD_CONTROLS = ('dropdown', 'combobox', 'date')
+_GENERATED_TAG = re.compile(r'^(goog_rdk_|id)?\d+$')
+
+# Columns in a choice grid that take free text rather than being an option
+_FREE_TEXT_COLUMNS = {'comments', 'comment'}
+
+
+def _clean(text: str) -> str:
+    return " ".join(text.replace('\t', ' ').split())
+
+
+def _option_key(text: str) -> str:
+    return _clean(text).lower().lstrip('✔✓🗶✗✘ ').strip()
+
+
+def _field_type(label: str) -> str:
+    lowered = label.lower()
+    if 'signature' in lowered or lowered.startswith('signed'):
+        return 'signature'
+    if 'date' in lowered or lowered in ('dob', 'd.o.b'):
+        return 'date'
+    if 'email' in lowered:
+        return 'email'
+    if 'phone' in lowered or 'mobile' in lowered:
+        return 'phone'
+    return 'text'
+
+
+def _is_label(text: str) -> bool:
+    return bool(text) and len(text.split()) <= MAX_LABEL_WORDS * 2
+
+
+def _glyph_options(text: str):
+    """
+    Split checkbox text into a label and option texts.
+    Handles leading glyphs (``"Label ☐ A ☐ B"``) and trailing ones (``"Label: Yes ☐ No ☐"``).
+    """
+    parts = _GLYPH_SPLIT.split(text)
+    if text.rstrip()[-1:] in _GLYPHS:
+        # Each option precedes its box; a label, if any, is separated by a colon
+        label = ""
+        first = parts[0].split('\n')[-1]
+        if ':' in first:
+            label, parts[0] = first.rsplit(':', 1)
+        candidates = [part.split('\n')[-1] for part in parts[:-1]]
+    else:
+        label = parts[0]
+        candidates = [part.split('\n')[0] for part in parts[1:]]
+    options = [_clean(option) for option in candidates if _clean(option)]
+    return _clean(label).rstrip(':').strip(), options
+
+
+@dataclass
+class DeterministicExtraction:
+    """Questions read from the layout, with the regions that still need a model."""
+    questions: List[Dict[str, Any]] = field(default_factory=list)
+    # {"position": questions before the region, "text": source text of the region}
+    regions: List[Dict[str, Any]] = field(default_factory=list)
+    classified: int = 0
+    ambiguous: int = 0
+
+    @property
+    def confidence(self) -> float:
+        units = self.classified + self.ambiguous
+        return round(self.classified / units, 3) if units else 0.0
+
+
+class _Builder:
+    def __init__(self):
+        self.result = DeterministicExtraction()
+        self.pending_label = None
+        # Last instruction-like paragraph, which becomes the question if an answer box follows it
+        self.last_text = None
+
+    def add(self, label: str, field_type: str = None, options: List[str] = None, required: bool = False):
+        label = _clean(label).rstrip(':').strip()
+        if not label:
+            return
+        if options and field_type is None:
+            field_type = 'radio' if len(options) <= 3 and {_option_key(o) for o in options} <= OPTION_WORDS else 'checkbox'
+        self.result.questions.append({
+            "question": label,
+            "type": field_type or _field_type(label),
+            "options": options or [],
+            "required": required or label.endswith('*')
+        })
+        self.result.classified += 1
+        self.last_text = None
+
+    def ambiguous(self, text: str):
+        text = text.strip()
+        if not text:
+            return
+        self.result.ambiguous += 1
+        position = len(self.result.questions)
+        regions = self.result.regions
+        if regions and regions[-1]["position"] == position:
+            regions[-1]["text"] += '\n' + text
+        else:
+            regions.append({"position": position, "text": text})
+
+    def flush_pending(self):
+        if self.pending_label:
+            self.add(self.pending_label)
+            self.pending_label = None
+
+    def line(self, text: str, heading: bool = False):
+        """Classify one paragraph or line of text."""
+        stripped = _clean(text)
+        if not stripped:
+            return
+        if any(glyph in text for glyph in _GLYPHS):
+            label, options = _glyph_options(text)
+            if not label and self.pending_label:
+                label, self.pending_label = self.pending_label, None
+            self.flush_pending()
+            if label and options:
+                self.add(label, options=options)
+            else:
+                self.ambiguous(stripped)
+            return
+        self.flush_pending()
+        if _BLANK.search(stripped):
+            for label in _BLANK.split(stripped):
+                if _clean(label).strip(' :'):
+                    self.add(label)
+            return
+        if stripped.endswith('?'):
+            self.add(stripped)
+            return
+        if stripped.endswith(':'):
+            if len(stripped.split()) <= MAX_LABEL_WORDS:
+                # Usually followed by an answer box or a set of options
+                self.pending_label = stripped
+            return
+        if heading or stripped.isupper():
+            self.last_text = None
+            return
+        if len(stripped.split()) > MAX_LABEL_WORDS:
+            # Instructions, or a long question when an answer box follows
+            self.last_text = stripped
+            return
+        self.ambiguous(stripped)
+
+    def answer_box(self):
+        """An empty one-cell table: the answer area for the preceding label."""
+        if self.pending_label:
+            self.add(self.pending_label, field_type='textarea')
+            self.pending_label = None
+        elif self.last_text:
+            self.add(self.last_text, field_type='textarea')
+        elif self.result.questions and self.result.questions[-1]["type"] == 'text':
+            self.result.questions[-1]["type"] = 'textarea'
+
+
+def _choice_header(segments: List[str]) -> Optional[Dict[int, str]]:
+    """Option columns of a Yes/No/N/A-style header row, by segment index."""
+    options = {}
+    for index, text in enumerate(segments[1:], start=1):
+        if _option_key(text) in OPTION_WORDS:
+            options[index] = _clean(text).lstrip('✔✓🗶✗✘ ').strip()
+    # A header names each option once; a row with repeated marks (Y | Y | N) is an answered row
+    keys = [_option_key(text) for text in options.values()]
+    if len(set(keys)) < len(keys):
+        return None
+    choices = [key for key in keys if key not in _FREE_TEXT_COLUMNS]
+    return options if len(choices) >= 2 else None
+
+
+def _is_mark(text: str) -> bool:
+    """A pre-filled answer in a grid cell: a tick, cross, single character or option word."""
+    return len(text) <= 1 or _option_key(text) in OPTION_WORDS or any(glyph in text for glyph in _GLYPHS)
+
+
+def _table(builder: _Builder, rows: List[List[str]]):
+    """``rows`` are grid rows with merged cells collapsed (``table_rows``); empty cells are answer slots."""
+    cells = [cell for row in rows for cell in row]
+    if not cells:
+        return
+    if len(rows) == 1 and not any(cell.strip() for cell in cells):
+        builder.answer_box()
+        return
+    builder.flush_pending()
+    has_slots = any(not cell.strip() for cell in cells)
+    has_fields = any(cell.strip().endswith(':') or any(g in cell for g in _GLYPHS) for cell in cells)
+    if not has_slots and not has_fields and not any(_choice_header(row) for row in rows):
+        # Reference table: nothing to fill in
+        return
+
+    grid = None
+    for segments in rows:
+        texts = [text for text in segments if text]
+        if not texts:
+            continue
+        if len(segments) == 1:
+            # Full-width row: a section heading (which does not end a choice grid), a label or options
+            builder.line(texts[0], heading=True)
+            continue
+
+        header = _choice_header(segments)
+        if header:
+            grid = header
+            continue
+
+        if grid and segments[0] and all(not segments[i] or _is_mark(segments[i]) for i in grid if i < len(segments)):
+            choices = [text for i, text in grid.items() if _option_key(text) not in _FREE_TEXT_COLUMNS]
+            builder.add(segments[0], options=choices)
+            continue
+
+        # Inline Yes/No cells on the row itself
+        inline = [text for text in segments[1:] if _option_key(text) in OPTION_WORDS]
+        if segments[0] and inline and len(inline) == len(texts) - 1:
+            builder.add(segments[0], options=inline)
+            continue
+
+        _label_row(builder, segments)
+    builder.flush_pending()
+
+
+def _label_row(builder: _Builder, segments: List[str]):
+    """Label/value rows: a label followed by an empty slot, a colon label or a checkbox cell."""
+    index = 0
+    row_options = None
+    while index < len(segments):
+        text = segments[index]
+        following = segments[index + 1] if index + 1 < len(segments) else None
+        if not text or _ITEM_NUMBER.match(text):
+            index += 1
+            continue
+        if any(glyph in text for glyph in _GLYPHS):
+            # The same set of boxes repeated across columns (first, second, third assessment...)
+            if _glyph_options(text)[1] != row_options:
+                builder.line(text)
+        elif following is not None and any(glyph in following for glyph in _GLYPHS):
+            label, row_options = _glyph_options(following)
+            builder.add(text + (' ' + label if label else ''), options=row_options or None)
+            index += 1
+        elif text.endswith(':') or text.endswith('?') or following == '' or (following is None and builder.pending_label is None
+                                                         and _is_label(text) and len(segments) > 1):
+            builder.add(text)
+        elif following is None and len(segments) == 1:
+            builder.line(text)
+        else:
+            builder.ambiguous(text)
+        index += 1
+    builder.flush_pending()
+
+
+def _control(builder: _Builder, control: Dict[str, Any], fallback_label: str = ""):
+    tag = control.get("tag") or ""
+    # Tags generated by the authoring tool (goog_rdk_3, id123...) are not labels
+    label = control.get("alias") or (tag if tag and not _GENERATED_TAG.match(tag) else fallback_label)
+    kind = control.get("kind")
+    if kind == 'checkbox':
+        builder.add(label, field_type='checkbox', options=[label] if label else [])
+    elif kind in ('dropdown', 'combobox'):
+        builder.add(label, field_type='select', options=[o for o in control.get("options", []) if o])
+    elif kind == 'date':
+        builder.add(label, field_type='date')
+    elif label:
+        builder.add(label)
+
+
+def extract_docx_fields(file_path: str) -> DeterministicExtraction:
+    """Read form fields from the layout of a DOCX file."""
+    builder = _Builder()
+    for block in read_docx_blocks(file_path):
+        if block["type"] == "paragraph":
+            # Checkbox controls already appear as glyphs in the text; other controls are fields of their own
+            controls = [c for c in block.get("controls", []) if c.get("kind") in _FIELD_CONTROLS or c.get("alias")]
+            if controls:
+                builder.flush_pending()
+                for control in controls:
+                    _control(builder, control, _clean(block["text"]))
+                continue
+            style = (block.get("style") or "").lower()
+            builder.line(block["text"], heading=block.get("bold") or style.startswith('heading') or style == 'title')
+        elif block["type"] == "table":
+            _table(builder, list(table_rows(block)))
+        elif block["type"] == "content_control":
+            if block.get("kind") in _FIELD_CONTROLS or block.get("alias"):
+                builder.flush_pending()
+                _control(builder, block, _clean(block.get("text", "")))
+            else:
+                builder.line(block.get("text", ""))
+    builder.flush_pending()
+    return builder.result
+
+
+def extract_text_fields(document_text: str) -> DeterministicExtraction:
+    """Read form fields from plain or markdown text, one line at a time."""
+    builder = _Builder()
+    table = []
+
+    def end_table():
+        if table:
+            _table(builder, [[cell.strip() for cell in row.strip().strip('|').split('|')] for row in table])
+            table.clear()
+
+    for line in document_text.split('\n'):
+        stripped = line.strip()
+        if stripped.startswith('|') and stripped.endswith('|'):
+            if not set(stripped) <= set('|-: '):
+                table.append(stripped)
+            continue
+        end_table()
+        if stripped.startswith('#'):
+            builder.flush_pending()
+            continue
+        builder.line(line)
+    end_table()
+    builder.flush_pending()
+    return builder.result
+
+
+def extract_deterministic(file_path: str, document_text: str = "") -> DeterministicExtraction:
+    """First-tier extraction: the DOCX layout when available, otherwise the extracted text."""
+    if file_path.lower().endswith('.docx'):
+        return extract_docx_fields(file_path)
+    return extract_text_fields(document_text)
@@ -0,0 +1,235 @@
+"""
+Structural fingerprints for uploaded forms.
+
+Admins often re-upload a form with small edits, or the same blank form under
+another title. A fingerprint is taken from the form's structure, meaning its
+normalised paragraphs and table-cell labels in document order. It is stored
+in ``form_fingerprint`` next to the ``Form``. It has two parts:
+
+- an exact hash of the unit sequence, for identical layouts
+- a MinHash signature of the unit set, whose agreement estimates the Jaccard
+  similarity between two forms
+
+On upload, the fingerprint is compared with those of the existing forms. An
+exact match reuses the stored structure as is. A near match keeps the
+questions of the unchanged parts of the matched form and re-extracts only the
+sections that differ.
+
+Only layouts that can be read without a model call are fingerprinted: DOCX,
+PDFs with a text layer and plain text. Images and scans are always extracted
+in full.
+"""
+
+import re
+import json
+import hashlib
+from difflib import SequenceMatcher
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+# Number of hash functions in a MinHash signature
+NUM_PERMUTATIONS = 64
+
+# Unchanged units kept on each side of a changed section, as context for its re-extraction
+SECTION_CONTEXT_UNITS = 2
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def _permutations():
+    # Fixed coefficients, so signatures stay comparable across processes and releases
+    coefficients = []
+    for i in range(NUM_PERMUTATIONS):
+        digest = hashlib.blake2b(f"form-fingerprint-{i}".encode(), digest_size=16).digest()
+        a = int.from_bytes(digest[:8], 'big') % (_MERSENNE_PRIME - 1) + 1
+        b = int.from_bytes(digest[8:], 'big') % _MERSENNE_PRIME
+        coefficients.append((a, b))
+    return coefficients
+
+
+_PERMUTATIONS = _permutations()
+
+
+def normalise_unit(text: str) -> str:
+    """Lower-case a paragraph or cell label and drop punctuation, blanks and checkbox glyphs."""
+    text = re.sub(r'_{2,}|\.{3,}', ' ', text.lower())
+    return " ".join("".join(ch if ch.isalnum() or ch.isspace() else ' ' for ch in text).split())
+
+
+def structural_texts(file_path: str) -> List[str]:
+    """Paragraphs and table-cell labels of a form as written, in document order."""
+    lower = file_path.lower()
+    if lower.endswith('.docx'):
+        from services.document.docx_engine import read_docx_blocks, table_rows
+        texts = []
+        for block in read_docx_blocks(file_path):
+            if block["type"] == "table":
+                for row in table_rows(block):
+                    texts.extend(cell for cell in row if cell)
+            else:
+                texts.append(block.get("text", ""))
+    elif lower.endswith('.pdf'):
+        from PyPDF2 import PdfReader
+        texts = []
+        for page in PdfReader(file_path).pages:
+            texts.extend((page.extract_text() or "").split('\n'))
+    elif lower.endswith('.txt'):
+        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            texts = f.read().split('\n')
+    else:
+        return []
+    return [" ".join(text.split()) for text in texts if normalise_unit(text)]
+
+
+def minhash_signature(units: List[str]) -> List[int]:
+    """MinHash signature of the set of units."""
+    hashes = {int.from_bytes(hashlib.blake2b(unit.encode(), digest_size=8).digest(), 'big') for unit in units}
+    if not hashes:
+        return [_MAX_HASH] * NUM_PERMUTATIONS
+    return [min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def estimate_similarity(signature_a: List[int], signature_b: List[int]) -> float:
+    """Estimated Jaccard similarity of the unit sets behind two signatures."""
+    if not signature_a or len(signature_a) != len(signature_b):
+        return 0.0
+    return sum(1 for a, b in zip(signature_a, signature_b) if a == b) / len(signature_a)
+
+
+@dataclass
+class Fingerprint:
+    exact_hash: str
+    signature: List[int]
+    units: List[str]
+    # The units as written, kept for re-extracting changed sections (not stored)
+    texts: List[str]
+
+    @classmethod
+    def from_file(cls, file_path: str) -> Optional['Fingerprint']:
+        """Fingerprint a form file, or None when its layout cannot be read without a model."""
+        texts = structural_texts(file_path)
+        if len(texts) < 3:
+            return None
+        units = [normalise_unit(text) for text in texts]
+        exact_hash = hashlib.sha256('\n'.join(units).encode()).hexdigest()
+        return cls(exact_hash=exact_hash, signature=minhash_signature(units), units=units, texts=texts)
+
+
+@dataclass
+class FingerprintMatch:
+    form: Any
+    similarity: float
+    exact: bool
+    stored: Any
+
+
+def find_matching_form(fingerprint: Fingerprint, min_similarity: float, exclude_form_id: int = None) -> Optional[FingerprintMatch]:
+    """The existing form whose fingerprint is closest to ``fingerprint``, if it is similar enough."""
+    from models import Form, FormFingerprint
+
+    query = FormFingerprint.query.join(Form).filter(Form.is_deleted == False)  # noqa: E712
+    if exclude_form_id is not None:
+        query = query.filter(FormFingerprint.form_id != exclude_form_id)
+
+    exact = query.filter(FormFingerprint.exact_hash == fingerprint.exact_hash).order_by(FormFingerprint.id.desc()).first()
+    if exact is not None:
+        return FingerprintMatch(form=exact.form, similarity=1.0, exact=True, stored=exact)
+
+    best = None
+    for stored in query.all():
+        similarity = estimate_similarity(fingerprint.signature, json.loads(stored.signature))
+        if similarity >= min_similarity and (best is None or similarity > best.similarity):
+            best = FingerprintMatch(form=stored.form, similarity=similarity, exact=False, stored=stored)
+    return best
+
+
+def save_form_fingerprint(form, fingerprint: Optional[Fingerprint]):
+    """Store (or replace) the fingerprint of a form; the caller commits the session."""
+    from app import db
+    from models import FormFingerprint
+
+    existing = FormFingerprint.query.filter_by(form_id=form.id).first()
+    if fingerprint is None:
+        if existing is not None:
+            db.session.delete(existing)
+        return
+    if existing is None:
+        existing = FormFingerprint(form_id=form.id)
+        db.session.add(existing)
+    existing.exact_hash = fingerprint.exact_hash
+    existing.signature = json.dumps(fingerprint.signature)
+    existing.units = json.dumps(fingerprint.units)
+
+
+def _anchor_questions(questions: List[Dict[str, Any]], units: List[str]) -> List[int]:
+    """The unit each question was extracted from (matched in order), or -1 when none matches."""
+    anchors = []
+    position = 0
+    for question in questions:
+        text = normalise_unit(question.get('question_text') or question.get('question') or '')
+        anchor = -1
+        if text:
+            for index in range(position, len(units)):
+                unit = units[index]
+                if text in unit or unit in text or SequenceMatcher(None, text, unit).ratio() >= 0.8:
+                    anchor = index
+                    position = index
+                    break
+        anchors.append(anchor)
+    # Unanchored questions travel with the previous anchored one
+    last = 0
+    for i, anchor in enumerate(anchors):
+        if anchor == -1:
+            anchors[i] = last
+        else:
+            last = anchor
+    return anchors
+
+
+def changed_sections(old_units: List[str], new_units: List[str]) -> List[Dict[str, Any]]:
+    """Opcodes between two unit sequences, as ``{"tag", "old": (i1, i2), "new": (j1, j2)}`` dicts."""
+    matcher = SequenceMatcher(None, old_units, new_units, autojunk=False)
+    return [
+        {"tag": tag, "old": (i1, i2), "new": (j1, j2)}
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+    ]
+
+
+def merge_near_match(old_structure: Dict[str, Any], old_units: List[str], new: Fingerprint,
+                     extract_section) -> Tuple[Dict[str, Any], int]:
+    """
+    Build the structure of a near-identical form: questions from the unchanged parts of the old form are
+    kept, and ``extract_section(text)`` is called with the original text of each changed section of the new one.
+    Returns ``(structure, sections)``, where ``sections`` is the number of sections re-extracted.
+    """
+    old_questions = old_structure.get('questions', [])
+    anchors = _anchor_questions(old_questions, old_units)
+    questions = []
+    sections = 0
+    for opcode in changed_sections(old_units, new.units):
+        i1, i2 = opcode["old"]
+        j1, j2 = opcode["new"]
+        if opcode["tag"] == 'equal':
+            questions.extend(q for q, anchor in zip(old_questions, anchors) if i1 <= anchor < i2)
+        elif opcode["tag"] in ('replace', 'insert'):
+            start = max(0, j1 - SECTION_CONTEXT_UNITS)
+            end = min(len(new.units), j2 + SECTION_CONTEXT_UNITS)
+            found = extract_section('\n'.join(new.texts[start:end]))
+            sections += 1
+            # Context units can bring back questions already kept from the unchanged part
+            kept = {normalise_unit(q.get('question_text', '')) for q in questions[-SECTION_CONTEXT_UNITS * 2:]}
+            questions.extend(q for q in found if normalise_unit(q.get('question_text', '')) not in kept)
+        # 'delete': the questions anchored in removed units are dropped
+
+    used = set()
+    for i, question in enumerate(questions):
+        question_id = question.get('id') or f"q_{i+1}"
+        while question_id in used:
+            question_id = f"{question_id}_{i+1}"
+        question['id'] = question_id
+        used.add(question_id)
+
+    structure = dict(old_structure)
+    structure['questions'] = questions
+    return structure, sections
@@ -13,66 +13,27 @@ class ValidationError(Exception):
     """Custom validation error class for schema validation"""
     pass
 from typing import List, Dict, Any
-import PyPDF2
 import json
 from datetime import datetime
 from flask import current_app
-from openai import OpenAI
 
 # Import our specialized templates for different form types
-from services.form.incident_form_template import get_incident_form_template, is_incident_form
-from services.form.audit_checklist_template import get_access_audit_checklist_template, is_access_audit_checklist
-from services.form.advocate_form_template import get_advocate_form_template, is_advocate_form
+from services.form.incident_form_template import is_incident_form
+from services.form.audit_checklist_template import is_access_audit_checklist
+from services.form.advocate_form_template import is_advocate_form
 from services.form.prn_care_plan_template import extract_prn_care_plan_fields, is_prn_care_plan_form
-
-# JSON Schema for question validation
-FORM_QUESTION_SCHEMA = {
-    "type": "object",
-    "properties": {
-        "questions": {
-            "type": "array",
-            "items": {
-                "type": "object",
-                "required": ["question"],
-                "properties": {
-                    "question": {"type": "string"},
-                    "type": {
-                        "type": "string", 
-                        "enum": ["text", "textarea", "radio", "checkbox", "select", "date", "email", 
-                                "number", "phone", "time", "datetime", "signature"]
-                    },
-                    "options": {
-                        "type": "array",
-                        "items": {"type": "string"}
-                    },
-                    "required": {"type": "boolean"}
-                }
-            }
-        }
-    },
-    "required": ["questions"]
-}
-
-# JSON Schema for validation result
-VALIDATION_SCHEMA = {
-    "type": "object",
-    "properties": {
-        "complete": {"type": "boolean"},
-        "issues": {
-            "type": "array",
-            "items": {"type": "string"}
-        },
-        "suggestions": {
-            "type": "array",
-            "items": {"type": "string"}
-        },
-        "missed_questions": {
-            "type": "array",
-            "items": {"type": "string"}
-        }
-    },
-    "required": ["complete"]
-}
+from services.form.template_library import copy_template
+from utils.pipeline import Pipeline
+from utils.concurrency import map_concurrently
+from services.form.completeness import completeness_gate
+from services.form.deterministic_extractor import extract_deterministic
+from services.document.acroform_reader import read_acroform_questions
+from services.form.sectioning import split_into_sections, merge_section_questions, estimate_tokens
+from services.ai.metrics import ai_stage
+from services.ai.prompts import QUESTION_EXTRACTION_SYSTEM_PROMPT, FORM_FIELD_EXTRACTION_SYSTEM_PROMPT
+from services.ai.prompt_compaction import compact_for_prompt
+from services.ai.structured_output import json_schema_response_format, parse_structured_response, StructuredOutputError
+from services.form.form_schemas import FORM_QUESTION_SCHEMA, VALIDATION_SCHEMA
 
 def validate_json_schema(data, schema):
     """Validate JSON data against a schema"""
@@ -120,7 +81,26 @@ class FormProcessor:
     def __init__(self, openai_api_key=None):
         """Initialize the FormProcessor with OpenAI API key."""
         self.openai_api_key = openai_api_key or os.environ.get('OPENAI_API_KEY')
-        self.client = OpenAI(api_key=self.openai_api_key)
+        self._client = None
+        # Encoded uploads, shared by every vision pass over the same file
+        self._image_payloads = {}
+
+    @property
+    def client(self):
+        """OpenAI client, created on first use so that forms matched by templates never load the SDK."""
+        if self._client is None:
+            from services.ai.client import create_ai_client
+            self._client = create_ai_client(self.openai_api_key)
+        return self._client
+
+    def _get_image_payload(self, file_path: str):
+        """Return the encode-once payload for a file, creating it on first use."""
+        payload = self._image_payloads.get(file_path)
+        if payload is None:
+            from services.ai.image_payload import ImagePayload
+            payload = ImagePayload.from_path(file_path)
+            self._image_payloads[file_path] = payload
+        return payload
         
     def extract_text_from_document(self, file_path: str) -> str:
         """Extract text content from a document (PDF, DOCX, or image)."""
@@ -140,13 +120,10 @@ class FormProcessor:
     def _extract_from_pdf(self, file_path: str) -> str:
         """Extract text from PDF file."""
         current_app.logger.info(f"Extracting text from PDF file: {file_path}")
-        text = ""
         try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page_num in range(len(pdf_reader.pages)):
-                    page = pdf_reader.pages[page_num]
-                    text += page.extract_text() + "\n"
+            # Scanned pages are OCR'd page by page; text pages are read directly
+            from services.document.pdf_ocr_service import extract_text_from_pdf
+            text = extract_text_from_pdf(file_path)
             current_app.logger.info(f"Successfully extracted {len(text)} characters from PDF")
             return text
         except Exception as e:
@@ -154,32 +131,33 @@ class FormProcessor:
             # Use OpenAI as a fallback for problematic PDFs
             return self._extract_from_image(file_path)
     
+    @ai_stage('extract_from_docx')
     def _extract_from_docx(self, file_path: str) -> str:
         """Extract text from DOCX file."""
         current_app.logger.info(f"Extracting text from DOCX file: {file_path}")
         
-        # First, try to use python-docx if it's available
+        # First, read the document body directly (paragraphs and table cells in order)
         try:
-            import docx
-            doc = docx.Document(file_path)
-            text = "\n\n".join([para.text for para in doc.paragraphs if para.text.strip()])
+            from services.document.docx_engine import read_docx_blocks, table_rows
+            lines = []
+            for block in read_docx_blocks(file_path):
+                if block["type"] == "table":
+                    lines.extend(" | ".join(cell for cell in row if cell) for row in table_rows(block))
+                else:
+                    lines.append(block["text"])
+            text = "\n\n".join(line for line in lines if line.strip())
             
             # If successful and we got some content, return it
             if text and len(text) > 100:  # Arbitrary minimum content check
-                current_app.logger.info(f"Successfully extracted {len(text)} characters from DOCX using python-docx")
+                current_app.logger.info(f"Successfully extracted {len(text)} characters from DOCX")
                 return text
         except Exception as docx_error:
-            current_app.logger.warning(f"Could not extract text using python-docx: {str(docx_error)}")
+            current_app.logger.warning(f"Could not extract text from DOCX: {str(docx_error)}")
         
         # As a second try, attempt to extract text as a Word document (binary)
         try:
-            # Try to read directly from file as text
-            with open(file_path, 'rb') as file:
-                file_content = file.read()
-                
-            # Create a specialized prompt for form extraction
-            import base64
-            base64_encoded = base64.b64encode(file_content).decode("utf-8")
+            # Encoded once; the image fallback below reuses the same payload
+            payload = self._get_image_payload(file_path)
             
             # Use the vision model but with specialized form extraction instructions
             response = self.client.chat.completions.create(
@@ -207,7 +185,7 @@ class FormProcessor:
                             },
                             {
                                 "type": "image_url",
-                                "image_url": {"url": f"data:application/vnd.openxmlformats-officedocument.wordprocessingml.document;base64,{base64_encoded}"}
+                                "image_url": {"url": payload.data_url}
                             }
                         ]
                     }
@@ -240,6 +218,7 @@ class FormProcessor:
             with open(file_path, 'r', encoding='latin-1') as file:
                 return file.read()
     
+    @ai_stage('extract_from_image')
     def _extract_from_image(self, file_path: str) -> str:
         """
         Extract text from an image or document using OpenAI's multimodal capabilities.
@@ -250,19 +229,6 @@ class FormProcessor:
         # Check if this is actually a supported image/document format
         file_extension = os.path.splitext(file_path)[1].lower()
         
-        # Determine the correct MIME type based on file extension
-        mime_type_map = {
-            '.jpg': 'image/jpeg',
-            '.jpeg': 'image/jpeg',
-            '.png': 'image/png',
-            '.gif': 'image/gif',
-            '.webp': 'image/webp',
-            '.pdf': 'application/pdf',
-            '.txt': 'text/plain',
-        }
-        
-        mime_type = mime_type_map.get(file_extension, 'application/octet-stream')
-        
         # Explicitly check if this is a supported format for OpenAI's image API
         supported_image_formats = ['.jpg', '.jpeg', '.png', '.gif', '.webp']
         
@@ -311,13 +277,9 @@ class FormProcessor:
                 return extracted_text
         
         try:
-            import base64
-            import mimetypes
-            
-            # Read and encode the file
-            with open(file_path, "rb") as file:
-                file_content = file.read()
-                base64_encoded = base64.b64encode(file_content).decode("utf-8")
+            # Images are shrunk to the model's working resolution before encoding;
+            # other files (PDFs) are sent unchanged
+            payload = self._get_image_payload(file_path)
             
             # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
             # do not change this unless explicitly requested by the user
@@ -337,7 +299,7 @@ class FormProcessor:
                             },
                             {
                                 "type": "image_url",
-                                "image_url": {"url": f"data:{mime_type};base64,{base64_encoded}"}
+                                "image_url": {"url": payload.data_url}
                             }
                         ]
                     }
@@ -361,7 +323,10 @@ class FormProcessor:
                 raise ValueError(f"Failed to extract text from the document: {str(e)}")
     
     def extract_questions(self, document_text: str) -> List[Dict[str, Any]]:
-        """Extract all questions from the document text using OpenAI."""
+        """
+        Extract all questions from the document text using OpenAI.
+        Long documents are split into sections that are extracted concurrently and merged in order.
+        """
         current_app.logger.info("Extracting questions from document text")
         
         # Check if this looks like a form with few or no question marks (like an incident form)
@@ -371,154 +336,57 @@ class FormProcessor:
         # If few question marks but many lines, it might be a form with implicit questions
         if question_mark_count < 5 and line_count > 20:
             current_app.logger.info(f"Detected potential form with few explicit questions ({question_mark_count} question marks, {line_count} lines)")
-            return self._extract_form_fields(document_text)
-        
-        # Standard question extraction for regular forms with enhanced instructions
-        prompt = f"""
-        You are a specialized form analyzer with the critical task of extracting EVERY SINGLE question, field, and input area from the provided form document.
-        Your extraction must be 100% COMPLETE and EXACT. Missing even one field is considered a critical failure.
-        
-        EXTRACTION REQUIREMENTS:
-        1. Extract ALL questions, fields, and input areas in the EXACT order they appear in the document
-        2. Preserve the EXACT original text, including:
-           - All capitalization, punctuation, and formatting
-           - All numbering or lettering systems (e.g., "1.", "a)", "i.")
-           - Any instructions or context preceding or following questions
-        3. Identify the appropriate field type for each question:
-           - text: for short single-line answers
-           - textarea: for longer, multi-line responses
-           - radio: for single-selection options (Yes/No, multiple choice)
-           - checkbox: for multiple-selection options
-           - select: for dropdown selections
-           - date: for date inputs
-           - email: for email addresses
-           - number: for numerical inputs
-           - phone: for phone numbers
-           - time: for time inputs
-        4. For checkbox, radio and select types, include ALL options exactly as written
-        5. Determine whether each field is required based on context
-        
-        CRITICAL EXTRACTION APPROACH:
-        - Carefully examine the ENTIRE document for ALL possible input fields
-        - Look for lines that end with colons, blank spaces, underscores or boxes
-        - Identify any tables with rows that need responses
-        - Check for signature and date fields at the end of the form
-        - Pay special attention to YES/NO questions, checkboxes, and option lists
-        - Consider section headings and instructions that may introduce fields
-        - Look for any numbered or lettered items that may require responses
-        
-        Format the output as a JSON array of questions with this structure:
-        {{
-            "questions": [
-                {{
-                    "question": "The exact question text",
-                    "type": "text|textarea|radio|checkbox|select|date|email|number",
-                    "options": ["Option 1", "Option 2"] (only for radio, checkbox, select types),
-                    "required": true|false
-                }}
-            ]
-        }}
+            extractor = self._extract_form_fields
+        else:
+            extractor = self._extract_questions_from_text
         
-        ABSOLUTE REQUIREMENTS:
-        - DO NOT miss ANY questions, fields, or input areas, no matter how small or seemingly insignificant
-        - DO NOT modify the question text in ANY way - use the EXACT original wording
-        - DO NOT combine or merge questions - each question must be a separate entry
-        - DO NOT reorder questions - maintain the EXACT order from the document
-        - DO NOT omit context or instructions that help understand the question
-        - DO NOT add or modify numbering or lettering that isn't in the original
-        - For forms with checkboxes or multiple selections, include all options
-        - Identify instruction text preceding or around questions, and include it in the question text
-        - Look for blank lines, text followed by colons, and other patterns that indicate form fields
-        - Treat all blank spaces for writing as text input fields
+        # Strip padding, empty cells and repeated table headers before anything is sent to the model
+        document_text = compact_for_prompt('extract_questions', document_text)
         
-        Document text:
-        {document_text}
-        """
+        sections = split_into_sections(document_text, current_app.config.get('FORM_SECTION_MAX_TOKENS', 2500))
+        if len(sections) == 1:
+            return extractor(document_text)
         
+        # Map: extract each section on its own; reduce: merge in document order
+        current_app.logger.info(f"Extracting {len(sections)} sections concurrently (largest ~{max(estimate_tokens(s) for s in sections)} tokens)")
+        section_results = map_concurrently(
+            extractor, sections, max_workers=current_app.config.get('FORM_SECTION_MAX_CONCURRENCY', 4)
+        )
+        questions = merge_section_questions(section_results)
+        current_app.logger.info(f"Merged {sum(len(r) for r in section_results)} section results into {len(questions)} questions")
+        return questions
+    
+    @ai_stage('extract_questions')
+    def _extract_questions_from_text(self, document_text: str) -> List[Dict[str, Any]]:
+        """Extract questions from a document (or one section of it) in a single model call."""
         try:
             # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
             # do not change this unless explicitly requested by the user
             response = self.client.chat.completions.create(
                 model="gpt-4o",
                 messages=[
-                    {
-                        "role": "system", 
-                        "content": """You are an advanced form processing system with perfect attention to detail. Your task is to extract ALL questions and fields from forms with 100% accuracy and completeness.
-
-EXTRACTION PRINCIPLES:
-1. Thoroughness: You must identify and extract EVERY question and field, no matter how minor
-2. Exactness: Preserve the EXACT text, capitalization, punctuation, and formatting
-3. Ordering: Maintain the EXACT order of questions as they appear in the document
-4. Integrity: Never combine, split, rephrase or modify questions in any way
-5. Comprehensiveness: Include all context and instructions surrounding questions
-
-Forms often contain various input mechanisms beyond just explicit questions, you must identify:
-- Standard questions with question marks
-- Implicitly required information (Name:, Address:, etc.)
-- Blank lines or spaces for writing
-- Checkboxes and radio buttons
-- Signature fields and date fields
-- Tables with input cells
-- Any text that implies the need for user input"""
-                    },
-                    {"role": "user", "content": prompt}
+                    {"role": "system", "content": QUESTION_EXTRACTION_SYSTEM_PROMPT},
+                    {"role": "user", "content": f"Document text:\n{document_text}"}
                 ],
-                response_format={"type": "json_object"}
+                response_format=json_schema_response_format("form_questions", FORM_QUESTION_SCHEMA)
             )
             
             try:
-                extracted_data = json.loads(response.choices[0].message.content)
-                
-                # Validate extracted data against our JSON schema
-                is_valid, error = validate_json_schema(extracted_data, FORM_QUESTION_SCHEMA)
-                
-                if not is_valid:
-                    current_app.logger.warning(f"Extracted questions failed schema validation: {error}")
-                    current_app.logger.warning("Will attempt to correct the structure...")
-                    
-                    # If schema validation failed but we have some data, try to fix it
-                    if isinstance(extracted_data, dict) and ("questions" in extracted_data or "fields" in extracted_data):
-                        # Check for alternative keys that might have been used
-                        questions = extracted_data.get("questions", extracted_data.get("fields", []))
-                        
-                        # Ensure every question has the required fields
-                        for q in questions:
-                            if "question" not in q and "text" in q:
-                                q["question"] = q["text"]
-                            if "type" not in q:
-                                q["type"] = "text"
-                            if "required" not in q:
-                                q["required"] = False
-                        
-                        corrected_data = {"questions": questions}
-                        # Validate the corrected data
-                        is_valid, _ = validate_json_schema(corrected_data, FORM_QUESTION_SCHEMA)
-                        
-                        if is_valid:
-                            current_app.logger.info("Successfully corrected the questions structure")
-                            questions = corrected_data["questions"]
-                            current_app.logger.info(f"Successfully extracted {len(questions)} questions")
-                            return questions
-                    
-                    # If correction attempt failed, log and proceed to fallback
-                    current_app.logger.error("Could not correct schema validation issues, trying fallback extraction")
-                    return self._fallback_form_extraction(document_text)
-                
-                # If schema validation passed, extract questions normally
-                questions = extracted_data.get("questions", [])
+                # The output is constrained to FORM_QUESTION_SCHEMA, so no repair pass is needed
+                questions = parse_structured_response(response, FORM_QUESTION_SCHEMA)["questions"]
                 current_app.logger.info(f"Successfully extracted {len(questions)} questions")
                 return questions
                 
-            except json.JSONDecodeError as e:
-                current_app.logger.error(f"JSON decode error: {str(e)}")
-                current_app.logger.error(f"Raw response: {response.choices[0].message.content}")
-                # Try fallback extraction on JSON parse failure
+            except StructuredOutputError as e:
+                current_app.logger.error(f"Structured question extraction failed: {str(e)}")
+                # Fall back to local extraction rather than another model call
                 return self._fallback_form_extraction(document_text)
                 
         except Exception as e:
             current_app.logger.error(f"Error extracting questions: {str(e)}")
             raise ValueError(f"Failed to extract questions: {str(e)}")
     
+    @ai_stage('extract_form_fields')
     def _extract_form_fields(self, document_text: str) -> List[Dict[str, Any]]:
         """
         Extract form fields from documents that may not have explicit questions.
@@ -530,128 +398,22 @@ Forms often contain various input mechanisms beyond just explicit questions, you
         # Special handling for incident forms
         if is_incident_form(document_text):
             current_app.logger.info("Detected an incident form! Using predefined template.")
-            return get_incident_form_template()
-        
-        # Special prompt engineering for structured forms
-        prompt = f"""
-        This is a specialized form with fields that need extraction. It may not have explicit questions, 
-        but instead has labeled fields, spaces for input, checkboxes, etc. Extract ALL form fields.
-        
-        For each field, identify:
-        1. The field label or prompt (EXACTLY as written)
-        2. The field type (text, textarea, radio, checkbox, select, date, signature, etc.)
-        3. Any options for selection fields
-        4. Whether the field is required (assume required if it's a core part of the form)
-        
-        Treat as fields:
-        - Lines ending with a colon (:)
-        - Lines followed by blank space for writing
-        - Blank spaces with underscores or lines for input
-        - Checkbox or radio button options
-        - Date fields
-        - Signature fields
-        - Any other elements that request user input
-        
-        Format as a JSON array of fields with this structure:
-        {{
-            "questions": [
-                {{
-                    "question": "The exact field label/prompt",
-                    "type": "text|textarea|radio|checkbox|select|date|signature",
-                    "options": ["Option 1", "Option 2"] (for radio, checkbox, select types),
-                    "required": true|false
-                }}
-            ]
-        }}
-        
-        CRITICAL GUIDELINES:
-        - DO NOT miss any fields or input areas
-        - Preserve the EXACT label text, don't rephrase or combine fields
-        - Include ALL fields: name fields, dates, incidents, locations, signatures, etc.
-        - For unlabeled input areas, use the closest heading or context as the label
-        - Convert each section that requires input into a proper form field
-        
-        Document text:
-        {document_text}
-        """
+            return copy_template("incident_form")
         
         try:
             # Use GPT-4 with specialized form extraction prompt
             response = self.client.chat.completions.create(
                 model="gpt-4o",
                 messages=[
-                    {
-                        "role": "system", 
-                        "content": """You are an expert form field extractor specialized in extracting input fields from complex, highly structured forms where fields might not appear as traditional questions.
-
-EXTRACTION GOALS:
-1. Identify and extract EVERY possible input field, regardless of how it's presented
-2. Maintain the EXACT wording of each field label without modifications
-3. Preserve the EXACT order of fields as they appear in the document
-4. Determine the most appropriate field type for each input area
-5. Identify all options for multiple-choice or selection fields
-
-FORM FIELD PATTERNS TO IDENTIFY:
-- Standard questions with question marks
-- Lines ending with colons followed by blank space
-- Underlined spaces, boxes, or blank areas for writing
-- Checkboxes and radio buttons with their corresponding options
-- Tables with cells that need to be filled
-- Signature spaces and date fields
-- Numbered or bulleted items requiring responses
-- Yes/No choices and other option pairs
-- Instructions that imply user input is required
-- Fields for personal information (name, address, contact details)
-
-You must be extremely thorough in your extraction, treating ANY text that could require user input as a form field that must be included."""
-                    },
-                    {"role": "user", "content": prompt}
+                    {"role": "system", "content": FORM_FIELD_EXTRACTION_SYSTEM_PROMPT},
+                    {"role": "user", "content": f"Document text:\n{document_text}"}
                 ],
-                response_format={"type": "json_object"}
+                response_format=json_schema_response_format("form_questions", FORM_QUESTION_SCHEMA)
             )
             
             try:
-                extracted_data = json.loads(response.choices[0].message.content)
-                
-                # Validate extracted data against our JSON schema
-                is_valid, error = validate_json_schema(extracted_data, FORM_QUESTION_SCHEMA)
-                
-                if not is_valid:
-                    current_app.logger.warning(f"Specialized extraction failed schema validation: {error}")
-                    current_app.logger.warning("Attempting to correct the structure...")
-                    
-                    # If schema validation failed but we have some data, try to fix it
-                    if isinstance(extracted_data, dict) and ("questions" in extracted_data or "fields" in extracted_data):
-                        # Check for alternative keys that might have been used
-                        questions = extracted_data.get("questions", extracted_data.get("fields", []))
-                        
-                        # Ensure every question has the required fields
-                        for q in questions:
-                            if "question" not in q and "text" in q:
-                                q["question"] = q["text"]
-                            if "type" not in q:
-                                q["type"] = "text"
-                            if "required" not in q:
-                                q["required"] = False
-                            if q.get("type") in ["radio", "checkbox", "select"] and "options" not in q:
-                                q["options"] = []
-                        
-                        corrected_data = {"questions": questions}
-                        # Validate the corrected data
-                        is_valid, _ = validate_json_schema(corrected_data, FORM_QUESTION_SCHEMA)
-                        
-                        if is_valid:
-                            current_app.logger.info("Successfully corrected the specialized extraction structure")
-                            questions = corrected_data["questions"]
-                            current_app.logger.info(f"Successfully extracted {len(questions)} form fields")
-                            return questions
-                    
-                    # If correction attempt failed, log and proceed to fallback
-                    current_app.logger.error("Could not correct schema validation issues, using fallback extraction")
-                    return self._fallback_form_extraction(document_text)
-                
-                # If schema validation passed, extract questions normally
-                questions = extracted_data.get("questions", [])
+                # The output is constrained to FORM_QUESTION_SCHEMA, so no repair pass is needed
+                questions = parse_structured_response(response, FORM_QUESTION_SCHEMA)["questions"]
                 current_app.logger.info(f"Successfully extracted {len(questions)} form fields using specialized extractor")
                 
                 # If no questions were found, try one more time with a different approach
@@ -660,9 +422,8 @@ You must be extremely thorough in your extraction, treating ANY text that could
                     
                 return questions
                 
-            except json.JSONDecodeError as e:
-                current_app.logger.error(f"JSON decode error in form field extraction: {str(e)}")
-                current_app.logger.error(f"Raw response: {response.choices[0].message.content}")
+            except StructuredOutputError as e:
+                current_app.logger.error(f"Structured form field extraction failed: {str(e)}")
                 return self._fallback_form_extraction(document_text)
                 
         except Exception as e:
@@ -758,6 +519,7 @@ You must be extremely thorough in your extraction, treating ANY text that could
         
         return basic_fields
             
+    @ai_stage('validate_questions')
     def validate_questions(self, questions: List[Dict[str, Any]], document_text: str = None) -> Dict[str, Any]:
         """
         Validate the extracted questions for completeness and consistency.
@@ -864,12 +626,12 @@ Your validation must be exhaustive, identifying ANY field that exists in the ori
                     },
                     {"role": "user", "content": prompt}
                 ],
-                response_format={"type": "json_object"},
+                response_format=json_schema_response_format("question_validation", VALIDATION_SCHEMA),
                 temperature=0.2  # Lower temperature for more precise analysis
             )
             
             try:
-                validation_result = json.loads(response.choices[0].message.content)
+                validation_result = parse_structured_response(response, VALIDATION_SCHEMA)
                 
                 # Log validation issues
                 is_complete = validation_result.get('complete', True)
@@ -894,9 +656,8 @@ Your validation must be exhaustive, identifying ANY field that exists in the ori
                     
                 return validation_result
                     
-            except json.JSONDecodeError as e:
-                current_app.logger.error(f"JSON decode error during validation: {str(e)}")
-                current_app.logger.error(f"Raw response: {response.choices[0].message.content}")
+            except StructuredOutputError as e:
+                current_app.logger.error(f"Structured validation failed: {str(e)}")
                 return {
                     "complete": False,
                     "issues": [f"Validation parsing error: {str(e)}"],
@@ -914,6 +675,246 @@ Your validation must be exhaustive, identifying ANY field that exists in the ori
                 "missed_questions": []
             }
     
+    def _extract_acroform_fields(self, file_path: str) -> List[Dict[str, Any]]:
+        """Questions declared by a fillable PDF's AcroForm, or an empty list for anything else."""
+        if not file_path.lower().endswith('.pdf'):
+            return []
+        try:
+            questions = read_acroform_questions(file_path)
+        except Exception as e:
+            current_app.logger.warning(f"Could not read AcroForm fields: {str(e)}")
+            return []
+        if questions:
+            current_app.logger.info(f"Read {len(questions)} fields from the PDF AcroForm; no model call needed")
+        return questions
+    
+    def _extract_deterministic(self, file_path: str, document_text: str):
+        """First-tier extraction from the document layout; None if the layout could not be read."""
+        try:
+            extraction = extract_deterministic(file_path, document_text)
+        except Exception as e:
+            current_app.logger.warning(f"Deterministic extraction failed: {str(e)}")
+            return None
+        current_app.logger.info(
+            f"Deterministic extraction found {len(extraction.questions)} questions "
+            f"(confidence {extraction.confidence:.2f}, {len(extraction.regions)} low-confidence regions)"
+        )
+        return extraction
+    
+    def _extract_questions_tiered(self, document_text: str, extraction) -> List[Dict[str, Any]]:
+        """
+        Use the deterministic questions when their confidence is high, sending only the low-confidence
+        regions to the model; otherwise extract the whole document with the model.
+        """
+        min_confidence = current_app.config.get('FORM_DETERMINISTIC_MIN_CONFIDENCE', 0.8)
+        if extraction is None or len(extraction.questions) < 3 or extraction.confidence < min_confidence:
+            return self.extract_questions(document_text)
+        
+        if not extraction.regions:
+            current_app.logger.info("All fields read from the document layout; no model call needed")
+            return list(extraction.questions)
+        
+        current_app.logger.info(f"Extracting {len(extraction.regions)} low-confidence regions with the model")
+        region_results = map_concurrently(
+            lambda region: self.extract_questions(region["text"]),
+            extraction.regions,
+            max_workers=current_app.config.get('FORM_SECTION_MAX_CONCURRENCY', 4)
+        )
+        
+        # Interleave layout questions and region results in document order
+        chunks = []
+        start = 0
+        for region, found in zip(extraction.regions, region_results):
+            chunks.append(extraction.questions[start:region["position"]])
+            chunks.append(found)
+            start = region["position"]
+        chunks.append(extraction.questions[start:])
+        return merge_section_questions(chunks)
+    
+    def _verify_questions(self, questions: List[Dict[str, Any]], document_text: str) -> Dict[str, Any]:
+        """
+        Run validate_questions only when the local coverage estimate says extraction may be incomplete,
+        and then only on the source regions no question matched.
+        """
+        threshold = current_app.config.get('COMPLETENESS_GATE_THRESHOLD', 0.9)
+        verify, report = completeness_gate('validate_questions', questions, document_text, threshold)
+        if not verify:
+            return {
+                "complete": True,
+                "issues": [],
+                "suggestions": [],
+                "missed_questions": [],
+                "coverage": report.score
+            }
+        
+        regions = report.unmatched_regions(document_text) if report.unmatched_lines else document_text
+        validation_result = self.validate_questions(questions, regions)
+        validation_result["coverage"] = report.score
+        return validation_result
+    
+    def _is_image_file(self, file_path: str) -> bool:
+        """Whether the upload is an image that the vision model can read directly."""
+        return os.path.splitext(file_path)[1].lower() in ['.jpg', '.jpeg', '.png', '.gif', '.webp']
+    
+    def _match_text_template(self, file_path: str, document_text: str, form_name: str, description: str):
+        """Return template-based form data if the extracted text matches a known form, otherwise None."""
+        # Check if this looks like an incident form based on extracted text
+        if is_incident_form(document_text):
+            current_app.logger.info("Detected Incident Form pattern, using specialized template")
+            questions = copy_template("incident_form")
+            
+            # Create the form structure with the specialized template
+            form_structure = {
+                "title": form_name,
+                "description": description or "Incident Form",
+                "questions": questions
+            }
+            
+            return {
+                "structure": form_structure,
+                "validation": {
+                    "complete": True,
+                    "issues": []
+                }
+            }
+        
+        # Check if this looks like a PRN Care Plan form based on extracted text
+        if is_prn_care_plan_form(file_path, document_text):
+            current_app.logger.info("Detected PRN Care Plan form, using specialized template")
+            questions_structure = extract_prn_care_plan_fields(document_text)
+            
+            # Create the form structure with the specialized template
+            form_structure = {
+                "title": form_name,
+                "description": description or "PRN Care Plan",
+                "questions": questions_structure["questions"]
+            }
+            
+            return {
+                "structure": form_structure,
+                "validation": {
+                    "complete": True,
+                    "issues": []
+                }
+            }
+        
+        return None
+    
+    def _extract_vision_fields(self, file_path: str) -> List[Dict[str, Any]]:
+        """Structured field extraction straight from the image, reusing the encoded upload."""
+        from services.ai.openai_service import extract_form_fields_from_image
+        result = extract_form_fields_from_image(file_path, image_payload=self._get_image_payload(file_path))
+        return result.get('questions', [])
+    
+    def _reconcile_questions(self, questions: List[Dict[str, Any]], vision_fields: List[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Merge the text-based questions with fields found by the vision pass.
+        The text-based order is kept; vision fields whose wording is not already present are appended.
+        """
+        if not vision_fields:
+            return questions
+        
+        def normalise(text):
+            return " ".join("".join(ch for ch in text.lower() if ch.isalnum() or ch.isspace()).split())
+        
+        seen = {normalise(q.get("question", "")) for q in questions}
+        merged = list(questions)
+        added = 0
+        for field in vision_fields:
+            text = field.get("question_text", "")
+            key = normalise(text)
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            added += 1
+            merged.append({
+                "id": f"vision_{added}",
+                "question": text,
+                "type": field.get("field_type", "text"),
+                "options": field.get("options", []),
+                "required": field.get("required", False)
+            })
+        
+        current_app.logger.info(f"Reconciled {len(questions)} text-based questions with {len(vision_fields)} vision fields ({added} added)")
+        return merged
+    
+    def _build_form_data(self, initial_questions: List[Dict[str, Any]], form_name: str, description: str,
+                         validation_result: Dict[str, Any]) -> Dict[str, Any]:
+        """Normalise extracted questions into the form structure and wrap it with its metadata."""
+        # Process the questions to ensure all have correct structure
+        current_app.logger.info("Processing questions while preserving EXACT text and order...")
+        processed_questions = []
+        
+        for i, question in enumerate(initial_questions):
+            # Ensure every question has the required fields
+            processed_question = {
+                "id": question.get("id") or f"q_{i+1}",
+                "question_text": question.get("question", ""),
+                "field_type": question.get("type", "text").lower(),
+                "options": question.get("options", []),
+                "required": question.get("required", False)
+            }
+            
+            # Map alternative field type names to standardized types
+            field_type_mapping = {
+                "multiple_choice": "radio",
+                "multi_select": "checkbox",
+                "dropdown": "select",
+                "textarea": "textarea",
+                "yes_no": "radio",
+                "yes/no": "radio",
+                "long_text": "textarea",
+                "short_text": "text",
+                "single_line": "text",
+                "multi_line": "textarea",
+                "number": "number",
+                "email": "email",
+                "date": "date",
+                "time": "time",
+                "datetime": "datetime",
+            }
+            
+            # Standardize field types
+            if processed_question["field_type"] in field_type_mapping:
+                processed_question["field_type"] = field_type_mapping[processed_question["field_type"]]
+            
+            # Special case for yes/no questions
+            if processed_question["field_type"] == "radio" and (
+                "yes" in processed_question["question_text"].lower() or 
+                "no" in processed_question["question_text"].lower()
+            ) and len(processed_question["options"]) == 0:
+                processed_question["options"] = ["Yes", "No"]
+            
+            # Ensure radio/checkbox/select types have options
+            if processed_question["field_type"] in ["radio", "checkbox", "select"] and not processed_question["options"]:
+                # If the field needs options but none were detected, default to appropriate options
+                if "yes" in processed_question["question_text"].lower() or "no" in processed_question["question_text"].lower():
+                    processed_question["options"] = ["Yes", "No"]
+                elif any(word in processed_question["question_text"].lower() for word in ["agree", "disagree", "consent", "accept"]):
+                    processed_question["options"] = ["Agree", "Disagree"]
+                elif any(word in processed_question["question_text"].lower() for word in ["rate", "scale", "score", "level"]):
+                    processed_question["options"] = ["1", "2", "3", "4", "5"]
+            
+            processed_questions.append(processed_question)
+        
+        # Create form structure
+        form_structure = {
+            "questions": processed_questions
+        }
+        
+        current_app.logger.info(f"Final structured form has {len(processed_questions)} questions")
+        
+        # Create the full form data object
+        form_data = {
+            "title": form_name,
+            "description": description,
+            "structure": form_structure,
+            "created_at": datetime.now().isoformat(),
+            "validation": validation_result
+        }
+        
+        return form_data
+    
     def process_form(self, file_path: str, form_name: str, description: str = "") -> Dict[str, Any]:
         """Process a form file and return structured form data."""
         current_app.logger.info(f"Processing form: {form_name} from {file_path}")
@@ -921,7 +922,7 @@ Your validation must be exhaustive, identifying ANY field that exists in the ori
         # Check for special templates first based on filename
         if is_access_audit_checklist(file_path):
             current_app.logger.info("Detected Access Audit Checklist, using specialized template")
-            questions = get_access_audit_checklist_template()
+            questions = copy_template("audit_checklist")
             
             # Create the form structure with the specialized template
             form_structure = {
@@ -959,7 +960,7 @@ Your validation must be exhaustive, identifying ANY field that exists in the ori
             
         if is_advocate_form(file_path):
             current_app.logger.info("Detected Act as an Advocate Form, using specialized template")
-            questions = get_advocate_form_template()
+            questions = copy_template("advocate_form")
             
             # Create the form structure with the specialized template
             form_structure = {
@@ -977,55 +978,92 @@ Your validation must be exhaustive, identifying ANY field that exists in the ori
             }
         
         try:
+            # Fillable PDFs declare their fields; read them directly instead of asking the model
+            acroform_questions = self._extract_acroform_fields(file_path)
+            if acroform_questions:
+                return self._build_form_data(acroform_questions, form_name, description, {
+                    "complete": True,
+                    "issues": [],
+                    "suggestions": [],
+                    "missed_questions": []
+                })
+            
+            # Independent passes run concurrently:
+            #   text -> template -> deterministic -> questions -> reconcile -> validate
+            #                    \-> vision_fields (images) -/
+            pipeline = Pipeline(
+                "process_form",
+                budget_seconds=current_app.config.get('FORM_PIPELINE_BUDGET_SECONDS'),
+                max_workers=current_app.config.get('FORM_PIPELINE_MAX_WORKERS', 4)
+            )
+            
             # 1. Extract text from document
-            document_text = self.extract_text_from_document(file_path)
+            pipeline.add_stage("text", lambda r: self.extract_text_from_document(file_path))
             
-            # Check if this looks like an incident form based on extracted text
-            if is_incident_form(document_text):
-                current_app.logger.info("Detected Incident Form pattern, using specialized template")
-                questions = get_incident_form_template()
-                
-                # Create the form structure with the specialized template
-                form_structure = {
-                    "title": form_name,
-                    "description": description or "Incident Form",
-                    "questions": questions
-                }
-                
-                return {
-                    "structure": form_structure,
-                    "validation": {
-                        "complete": True,
-                        "issues": []
-                    }
-                }
+            # Check for templates recognisable from the extracted text
+            pipeline.add_stage(
+                "template",
+                lambda r: self._match_text_template(file_path, r["text"], form_name, description),
+                requires=("text",)
+            )
             
-            # Check if this looks like a PRN Care Plan form based on extracted text
-            if is_prn_care_plan_form(file_path, document_text):
-                current_app.logger.info("Detected PRN Care Plan form, using specialized template")
-                questions_structure = extract_prn_care_plan_fields(document_text)
-                
-                # Create the form structure with the specialized template
-                form_structure = {
-                    "title": form_name,
-                    "description": description or "PRN Care Plan",
-                    "questions": questions_structure["questions"]
-                }
-                
-                return {
-                    "structure": form_structure,
-                    "validation": {
-                        "complete": True,
-                        "issues": []
-                    }
-                }
+            # 2. Read fields off the layout without a model call
+            pipeline.add_stage(
+                "deterministic",
+                lambda r: None if r["template"] else self._extract_deterministic(file_path, r["text"]),
+                requires=("text", "template")
+            )
             
-            # 2. Extract questions from text
-            initial_questions = self.extract_questions(document_text)
-            current_app.logger.info(f"Initial parsing found {len(initial_questions)} questions/fields")
+            # 2.1 Extract questions, calling the model only where the layout was not conclusive
+            pipeline.add_stage(
+                "questions",
+                lambda r: None if r["template"] else self._extract_questions_tiered(r["text"], r["deterministic"]),
+                requires=("text", "template", "deterministic")
+            )
+            
+            # 2.5 For images, a structured vision pass runs alongside the text-based pass
+            if self._is_image_file(file_path):
+                pipeline.add_stage(
+                    "vision_fields",
+                    lambda r: None if r["template"] else self._extract_vision_fields(file_path),
+                    requires=("template",),
+                    optional=True
+                )
+                reconcile_requires = ("questions", "vision_fields")
+            else:
+                reconcile_requires = ("questions",)
+            
+            pipeline.add_stage(
+                "reconcile",
+                lambda r: None if r["template"] else self._reconcile_questions(r["questions"], r.get("vision_fields")),
+                requires=reconcile_requires
+            )
             
             # 3. Validate questions for completeness with original document text for better verification
-            validation_result = self.validate_questions(initial_questions, document_text)
+            pipeline.add_stage(
+                "validate",
+                lambda r: None if r["template"] else self._verify_questions(r["reconcile"], r["text"]),
+                requires=("reconcile", "text"),
+                optional=True
+            )
+            
+            run = pipeline.run()
+            
+            if run.results["template"]:
+                return run.results["template"]
+            
+            initial_questions = run.results["reconcile"]
+            current_app.logger.info(f"Initial parsing found {len(initial_questions)} questions/fields")
+            
+            validation_result = run.results["validate"]
+            if validation_result is None:
+                reason = "extraction time budget exceeded" if "validate" in run.skipped else run.errors.get("validate", "unknown error")
+                validation_result = {
+                    "complete": False,
+                    "issues": [f"Validation skipped: {reason}"],
+                    "suggestions": ["Manual review recommended"],
+                    "missed_questions": []
+                }
             
             # 3.5 Check if validation found missing questions and incorporate them
             missed_questions = validation_result.get('missed_questions', [])
@@ -1044,79 +1082,8 @@ Your validation must be exhaustive, identifying ANY field that exists in the ori
                 
                 current_app.logger.info(f"Updated question count after incorporating missed questions: {len(initial_questions)}")
             
-            # 4. Process the questions to ensure all have correct structure
-            current_app.logger.info("Processing questions while preserving EXACT text and order...")
-            processed_questions = []
-            
-            for i, question in enumerate(initial_questions):
-                # Ensure every question has the required fields
-                processed_question = {
-                    "id": question.get("id") or f"q_{i+1}",
-                    "question_text": question.get("question", ""),
-                    "field_type": question.get("type", "text").lower(),
-                    "options": question.get("options", []),
-                    "required": question.get("required", False)
-                }
-                
-                # Map alternative field type names to standardized types
-                field_type_mapping = {
-                    "multiple_choice": "radio",
-                    "multi_select": "checkbox",
-                    "dropdown": "select",
-                    "textarea": "textarea",
-                    "yes_no": "radio",
-                    "yes/no": "radio",
-                    "long_text": "textarea",
-                    "short_text": "text",
-                    "single_line": "text",
-                    "multi_line": "textarea",
-                    "number": "number",
-                    "email": "email",
-                    "date": "date",
-                    "time": "time",
-                    "datetime": "datetime",
-                }
-                
-                # Standardize field types
-                if processed_question["field_type"] in field_type_mapping:
-                    processed_question["field_type"] = field_type_mapping[processed_question["field_type"]]
-                
-                # Special case for yes/no questions
-                if processed_question["field_type"] == "radio" and (
-                    "yes" in processed_question["question_text"].lower() or 
-                    "no" in processed_question["question_text"].lower()
-                ) and len(processed_question["options"]) == 0:
-                    processed_question["options"] = ["Yes", "No"]
-                
-                # Ensure radio/checkbox/select types have options
-                if processed_question["field_type"] in ["radio", "checkbox", "select"] and not processed_question["options"]:
-                    # If the field needs options but none were detected, default to appropriate options
-                    if "yes" in processed_question["question_text"].lower() or "no" in processed_question["question_text"].lower():
-                        processed_question["options"] = ["Yes", "No"]
-                    elif any(word in processed_question["question_text"].lower() for word in ["agree", "disagree", "consent", "accept"]):
-                        processed_question["options"] = ["Agree", "Disagree"]
-                    elif any(word in processed_question["question_text"].lower() for word in ["rate", "scale", "score", "level"]):
-                        processed_question["options"] = ["1", "2", "3", "4", "5"]
-                
-                processed_questions.append(processed_question)
-            
-            # 5. Create form structure
-            form_structure = {
-                "questions": processed_questions
-            }
-            
-            current_app.logger.info(f"Final structured form has {len(processed_questions)} questions")
-            
-            # 6. Create the full form data object
-            form_data = {
-                "title": form_name,
-                "description": description,
-                "structure": form_structure,
-                "created_at": datetime.now().isoformat(),
-                "validation": validation_result
-            }
-            
-            return form_data
+            # 4. Normalise the questions and build the form data
+            return self._build_form_data(initial_questions, form_name, description, validation_result)
             
         except Exception as e:
             current_app.logger.error(f"Error processing form: {str(e)}")
@@ -0,0 +1,100 @@
+"""
+JSON schemas for model outputs in the form pipeline.
+
+The same schemas drive strict structured outputs (see
+``services.ai.structured_output``) and ``validate_json_schema`` checks, so the
+shape the model is constrained to and the shape we validate are one definition.
+"""
+
+# JSON Schema for question validation
+FORM_QUESTION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "questions": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["question"],
+                "properties": {
+                    "question": {"type": "string"},
+                    "type": {
+                        "type": "string", 
+                        "enum": ["text", "textarea", "radio", "checkbox", "select", "date", "email", 
+                                "number", "phone", "time", "datetime", "signature"]
+                    },
+                    "options": {
+                        "type": "array",
+                        "items": {"type": "string"}
+                    },
+                    "required": {"type": "boolean"}
+                }
+            }
+        }
+    },
+    "required": ["questions"]
+}
+
+# JSON Schema for validation result
+VALIDATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "complete": {"type": "boolean"},
+        "issues": {
+            "type": "array",
+            "items": {"type": "string"}
+        },
+        "suggestions": {
+            "type": "array",
+            "items": {"type": "string"}
+        },
+        "missed_questions": {
+            "type": "array",
+            "items": {"type": "string"}
+        }
+    },
+    "required": ["complete"]
+}
+
+FORM_FIELD_TYPES = ["text", "textarea", "radio", "checkbox", "select", "date", "email", "number", "signature"]
+
+
+def _form_fields_schema(field_types):
+    return {
+        "type": "object",
+        "properties": {
+            "questions": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "id": {"type": "string"},
+                        "question_text": {"type": "string"},
+                        "field_type": {"type": "string", "enum": field_types},
+                        "options": {
+                            "type": "array",
+                            "items": {"type": "string"}
+                        },
+                        "required": {"type": "boolean"}
+                    },
+                    "required": ["id", "question_text", "field_type"]
+                }
+            }
+        },
+        "required": ["questions"]
+    }
+
+# JSON Schema for fields extracted from images and parsed documents
+FORM_FIELDS_SCHEMA = _form_fields_schema(FORM_FIELD_TYPES)
+
+# Markdown extraction also reports section headings as fields
+MARKDOWN_FIELDS_SCHEMA = _form_fields_schema(FORM_FIELD_TYPES + ["header"])
+
+# JSON Schema for the markdown verification pass
+MARKDOWN_VERIFICATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "missed_fields": MARKDOWN_FIELDS_SCHEMA["properties"]["questions"],
+        "completeness_assessment": {"type": "string"}
+    },
+    "required": ["missed_fields", "completeness_assessment"]
+}
@@ -1,4 +1,5 @@
 import json
+import hashlib
 import logging
 import os
 from datetime import datetime
@@ -125,64 +126,96 @@ def extract_form_structure(file_path):
 
 def validate_form_submission(form_structure, answers):
     """
-    Validate that all required fields have been completed.
+    Validate that all required fields have been completed and that choice, number, date and
+    email answers are valid. Endpoints serving a stored form use its cached ``CompiledForm``.
     """
-    questions = form_structure.get('questions', [])
-    missing_fields = []
-    
-    for question in questions:
-        question_id = question.get('id')
-        # Handle different field name variations in the structure
-        is_required = question.get('required', False)
-        # Get the question text from various possible field names
-        question_text = question.get('question_text') or question.get('question') or question.get('label') or f"Question {question_id}"
-        
-        if is_required and (question_id not in answers or not answers[question_id]):
-            missing_fields.append({
-                'id': question_id,
-                'question': question_text
-            })
-    
-    return {
-        'valid': len(missing_fields) == 0,
-        'missing_fields': missing_fields
-    }
+    from services.form.structure_cache import CompiledForm
+    return CompiledForm(form_structure).validate(answers)
 
 def get_next_question(form_structure, current_question_id, answers):
     """
     Determine the next question to display based on current answers.
     Allows for conditional logic in forms.
     """
-    questions = form_structure.get('questions', [])
-    
-    # If there's no current question, return the first one
-    if not current_question_id:
-        return questions[0] if questions else None
-    
-    # Find the current question's index
-    current_index = next((i for i, q in enumerate(questions) if q.get('id') == current_question_id), -1)
-    
-    if current_index == -1 or current_index >= len(questions) - 1:
-        return None  # No more questions
-    
-    next_question = questions[current_index + 1]
-    
-    # Check if there's conditional logic to skip questions
-    # This is a simple implementation - could be expanded for more complex logic
-    condition = next_question.get('condition')
-    if condition:
-        condition_field = condition.get('field')
-        condition_value = condition.get('value')
-        condition_operator = condition.get('operator', 'equals')
-        
-        if condition_field in answers:
-            user_value = answers[condition_field]
-            
-            if condition_operator == 'equals' and user_value != condition_value:
-                # Skip this question and get the next one
-                return get_next_question(form_structure, next_question.get('id'), answers)
-            elif condition_operator == 'not_equals' and user_value == condition_value:
-                # Skip this question and get the next one
-                return get_next_question(form_structure, next_question.get('id'), answers)
-    
-    return next_question
+    from services.form.structure_cache import CompiledForm
+    return CompiledForm(form_structure).next_question(current_question_id, answers)
+
+def answers_etag(answers_text):
+    """Version tag of a response's stored answers, used for If-Match on incremental saves."""
+    return hashlib.sha256((answers_text or '').encode('utf-8')).hexdigest()[:32]
+
+def apply_merge_patch(target, patch):
+    """
+    Apply a JSON merge-patch (RFC 7386) to ``target`` and return the result.
+    A null value removes the key; objects are merged recursively; any other value replaces the old one.
+    """
+    if not isinstance(patch, dict):
+        return patch
+    result = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = apply_merge_patch(result.get(key), value)
+    return result
+
+def fingerprint_form_file(file_path):
+    """Structural fingerprint of a form file, or None when the layout cannot be read locally."""
+    from services.form.fingerprint import Fingerprint
+    try:
+        return Fingerprint.from_file(file_path)
+    except Exception as e:
+        current_app.logger.warning(f"Could not fingerprint {os.path.basename(file_path)}: {str(e)}")
+        return None
+
+def extract_form_structure_reusing_matches(file_path, fingerprint, exclude_form_id=None):
+    """
+    Extract a form structure, reusing the extraction of an existing form with the same structure.
+    An exact structural match reuses the matched form's questions as they are; a near match keeps the
+    questions of its unchanged sections and re-extracts only the sections that differ.
+    Returns ``(form_structure, match_info)``; ``match_info`` is None when the form was extracted in full.
+    """
+    from services.form.fingerprint import find_matching_form, merge_near_match
+
+    match = None
+    if fingerprint is not None:
+        min_similarity = current_app.config.get('FORM_FINGERPRINT_MIN_SIMILARITY', 0.8)
+        match = find_matching_form(fingerprint, min_similarity, exclude_form_id=exclude_form_id)
+    if match is None:
+        return extract_form_structure(file_path), None
+
+    old_structure = json.loads(match.form.structure or '{}')
+    match_info = {
+        "form_id": match.form.id,
+        "title": match.form.title,
+        "similarity": round(match.similarity, 3),
+        "exact": match.exact,
+        "reextracted_sections": 0
+    }
+    if match.exact and old_structure.get('questions'):
+        current_app.logger.info(f"Structure of {file_path} matches form {match.form.id} exactly; reusing its questions")
+        return old_structure, match_info
+
+    current_app.logger.info(
+        f"Structure of {file_path} is {match.similarity:.0%} similar to form {match.form.id}; "
+        f"re-extracting only the changed sections"
+    )
+    form_processor = get_form_processor()
+
+    def extract_section(text):
+        questions = form_processor.extract_questions(text)
+        return form_processor._build_form_data(questions, os.path.basename(file_path), "", {})["structure"]["questions"]
+
+    form_structure, sections = merge_near_match(old_structure, json.loads(match.stored.units), fingerprint, extract_section)
+    if not form_structure.get('questions'):
+        # Nothing usable survived the merge; fall back to a full extraction
+        return extract_form_structure(file_path), None
+    match_info["reextracted_sections"] = sections
+    return form_structure, match_info
+
+def describe_form_match(match_info):
+    """Admin-facing summary of how a matched form's extraction was reused."""
+    if match_info["exact"]:
+        return f'Structure matches "{match_info["title"]}" exactly; its questions were reused without re-extraction.'
+    return (f'Structure is {match_info["similarity"]:.0%} similar to "{match_info["title"]}"; '
+            f'{match_info["reextracted_sections"]} changed section(s) were re-extracted.')
@@ -414,17 +414,8 @@ def is_home_safety_checklist(file_path: str) -> bool:
         # If it's a file path, read content
         if isinstance(file_path, str) and os.path.exists(file_path):
             try:
-                import docx
-                doc = docx.Document(file_path)
-                content = ""
-                for para in doc.paragraphs:
-                    content += para.text + "\n"
-                for table in doc.tables:
-                    for row in table.rows:
-                        for cell in row.cells:
-                            for paragraph in cell.paragraphs:
-                                content += paragraph.text + "\n"
-                file_path = content
+                from services.document.docx_engine import docx_to_text
+                file_path = docx_to_text(file_path)
             except:
                 # If we can't read as a docx, try to read as text
                 with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
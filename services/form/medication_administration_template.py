@@ -552,10 +552,9 @@ def is_medication_administration_form(file_path_or_content: str) -> bool:
             # Check if it's a docx file
             if file_path_or_content.lower().endswith('.docx'):
                 try:
-                    # Try to use docx module to extract content
-                    import docx
-                    doc = docx.Document(file_path_or_content)
-                    content = '\n'.join([para.text for para in doc.paragraphs])
+                    # Read the document body paragraphs
+                    from services.document.docx_engine import docx_to_text
+                    content = docx_to_text(file_path_or_content, include_tables=False)
                 except Exception as e:
                     print(f"Error extracting docx content: {e}")
                     # Fallback to raw content
@@ -7,7 +7,7 @@ to ensure consistent extraction even when AI-based extraction fails.
 from typing import List, Dict, Any
 import re
 import os
-import docx
+from services.document.docx_engine import docx_to_text
 
 def get_nutrition_swallowing_risk_template() -> List[Dict[str, Any]]:
     """
@@ -325,8 +325,7 @@ def is_nutrition_swallowing_risk(file_path_or_content: str) -> bool:
         if os.path.exists(file_path_or_content):
             # Extract text based on file type
             if file_path_or_content.lower().endswith('.docx'):
-                doc = docx.Document(file_path_or_content)
-                content = '\n'.join([para.text for para in doc.paragraphs])
+                content = docx_to_text(file_path_or_content, include_tables=False)
             else:
                 # Assume it's a text file or already content
                 with open(file_path_or_content, 'r', encoding='utf-8', errors='ignore') as f:
@@ -780,9 +780,8 @@ def is_plant_asset_hazard_checklist(file_path_or_content: str) -> bool:
             # For DOCX files
             if file_path.lower().endswith('.docx'):
                 try:
-                    import docx
-                    doc = docx.Document(file_path)
-                    content = " ".join([para.text for para in doc.paragraphs])
+                    from services.document.docx_engine import docx_to_text
+                    content = docx_to_text(file_path, include_tables=False)
                 except:
                     # If python-docx fails, we can't determine from content
                     return False
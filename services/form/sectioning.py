@@ -0,0 +1,149 @@
+"""
+Sectioning for map-reduce extraction of long forms.
+
+Long checklists (plant/asset hazard, vehicle safety, ...) are split into
+sections of bounded size so each section can be extracted by its own model
+call, concurrently. Splits happen at headings and table boundaries; a table
+or section that is larger than the limit on its own is split between rows,
+with its heading repeated so every piece keeps its context. Sections are
+returned in document order and their results are merged back in that order.
+"""
+
+import re
+from typing import Any, Dict, List
+
+# Rough characters-per-token ratio for English form text
+CHARS_PER_TOKEN = 4
+
+_MARKDOWN_HEADING = re.compile(r'^#{1,6}\s+\S')
+_NUMBERED_HEADING = re.compile(r'^(section|part)\s+[\dA-Z]+\b', re.IGNORECASE)
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of a piece of text."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _is_heading(line: str) -> bool:
+    stripped = line.strip()
+    if not stripped:
+        return False
+    if _MARKDOWN_HEADING.match(stripped) or _NUMBERED_HEADING.match(stripped):
+        return True
+    # Short all-caps lines are section titles in most of our forms
+    letters = [ch for ch in stripped if ch.isalpha()]
+    return 3 <= len(letters) and len(stripped) <= 80 and stripped.upper() == stripped and not stripped.endswith(':')
+
+
+def _is_table_row(line: str) -> bool:
+    stripped = line.strip()
+    return stripped.startswith('|') or ' | ' in stripped
+
+
+def _split_blocks(text: str) -> List[Dict[str, Any]]:
+    """Split text into heading-led blocks, with each run of table rows as its own block."""
+    blocks = []
+    current = {"heading": None, "lines": [], "table": False}
+
+    def flush():
+        if any(line.strip() for line in current["lines"]):
+            blocks.append(current)
+
+    for line in text.split('\n'):
+        if _is_heading(line) and not _is_table_row(line):
+            flush()
+            current = {"heading": line.strip(), "lines": [line], "table": False}
+            continue
+        is_row = _is_table_row(line)
+        if is_row != current["table"] and line.strip():
+            # Table boundary: start a new block under the same heading
+            flush()
+            current = {"heading": current["heading"], "lines": [], "table": is_row}
+        current["lines"].append(line)
+    flush()
+    return blocks
+
+
+def _split_oversized(block: Dict[str, Any], max_chars: int) -> List[str]:
+    """Split a block that exceeds the limit on its own between lines, repeating its heading."""
+    heading = block["heading"]
+    lines = block["lines"]
+    if heading and lines and lines[0].strip() == heading:
+        lines = lines[1:]
+    # Keep a markdown table's header row with every piece
+    header_rows = []
+    if block["table"] and len(lines) > 2 and set(lines[1].replace('|', '').strip()) <= set('-: '):
+        header_rows, lines = lines[:2], lines[2:]
+    prefix = ([heading] if heading else []) + header_rows
+
+    pieces = []
+    current = list(prefix)
+    size = sum(len(line) + 1 for line in current)
+    for line in lines:
+        if size + len(line) + 1 > max_chars and len(current) > len(prefix):
+            pieces.append('\n'.join(current))
+            current = list(prefix)
+            size = sum(len(item) + 1 for item in current)
+        current.append(line)
+        size += len(line) + 1
+    if len(current) > len(prefix):
+        pieces.append('\n'.join(current))
+    return pieces
+
+
+def split_into_sections(text: str, max_tokens: int = 2500) -> List[str]:
+    """
+    Split document text into sections of at most about ``max_tokens`` tokens, in document order.
+    Text that already fits is returned as a single section.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return [text]
+
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    sections = []
+    current = []
+    size = 0
+    for block in _split_blocks(text):
+        block_text = '\n'.join(block["lines"])
+        if len(block_text) > max_chars:
+            pieces = _split_oversized(block, max_chars)
+        else:
+            pieces = [block_text]
+        for piece in pieces:
+            if current and size + len(piece) + 1 > max_chars:
+                sections.append('\n'.join(current))
+                current, size = [], 0
+            current.append(piece)
+            size += len(piece) + 1
+    if current:
+        sections.append('\n'.join(current))
+    return sections
+
+
+def _normalise(text: str) -> str:
+    return " ".join("".join(ch for ch in text.lower() if ch.isalnum() or ch.isspace()).split())
+
+
+def merge_section_questions(section_results: List[List[Dict[str, Any]]], text_key: str = "question",
+                            boundary_window: int = 3) -> List[Dict[str, Any]]:
+    """
+    Concatenate per-section questions in order.
+    A question among the first few of a section that repeats one of the last few questions of the
+    previous section is dropped: it is the same field seen from both sides of a split (usually a
+    repeated heading or table header). Repeats further into a section are kept, since forms
+    legitimately repeat labels such as "Date:" per section.
+    """
+    merged = []
+    previous_tail = []
+    for questions in section_results:
+        kept = []
+        for position, question in enumerate(questions or []):
+            key = _normalise(str(question.get(text_key, "")))
+            if position < boundary_window and key and key in previous_tail:
+                # Each field at the end of the previous section accounts for one repeat only
+                previous_tail.remove(key)
+                continue
+            kept.append(question)
+        merged.extend(kept)
+        previous_tail = [_normalise(str(q.get(text_key, ""))) for q in kept[-boundary_window:]]
+    return merged
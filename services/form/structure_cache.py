@@ -0,0 +1,234 @@
+"""
+Per-process cache of parsed form structures.
+
+The fill, save and submit endpoints used to run ``json.loads(form.structure)``
+on every request. Validation then walked every question on each submit, and
+navigation scanned the question list to find the current one. A
+``CompiledForm`` does that work once per structure. It holds the parsed
+structure, an id index, a compiled validator (required fields, option sets and
+type checks) and a next/previous navigation table. The HTML-safe JSON that the
+fill page embeds is also built once.
+
+Entries are keyed by form id and a hash of the stored structure, so editing a
+form (or re-extracting it) is picked up on the next request without explicit
+invalidation. The cache is a bounded LRU. Compiled forms are shared between
+requests and must be treated as read-only.
+"""
+
+import re
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional
+
+from flask import current_app, json
+from jinja2.utils import htmlsafe_json_dumps
+
+logger = logging.getLogger(__name__)
+
+_EMAIL = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+
+
+def _is_number(value) -> bool:
+    try:
+        float(value)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+def _is_date(value) -> bool:
+    try:
+        date.fromisoformat(str(value))
+        return True
+    except ValueError:
+        return False
+
+
+# Field type -> (check for a non-empty answer, message when it fails); mirrors the inputs the fill page renders
+TYPE_CHECKS: Dict[str, tuple] = {
+    "number": (_is_number, "must be a number"),
+    "date": (_is_date, "must be a date (YYYY-MM-DD)"),
+    "email": (lambda value: bool(_EMAIL.match(str(value))), "must be an email address"),
+}
+
+_CHOICE_TYPES = {"radio", "select", "checkbox"}
+
+
+def question_text(question: Dict[str, Any]) -> str:
+    return (question.get('question_text') or question.get('question') or question.get('label')
+            or f"Question {question.get('id')}")
+
+
+def question_type(question: Dict[str, Any]) -> str:
+    # The same fallback the fill page uses to choose the input it renders
+    return question.get('field_type') or question.get('type') or 'text'
+
+
+class CompiledForm:
+    """A parsed form structure with its lookups, validator and navigation precomputed."""
+
+    def __init__(self, structure: Dict[str, Any]):
+        self.structure = structure
+        self.questions: List[Dict[str, Any]] = structure.get('questions', [])
+        self.index: Dict[Any, int] = {}
+        for position, question in enumerate(self.questions):
+            self.index.setdefault(question.get('id'), position)
+
+        # Validator: required questions, allowed options and type checks, in question order
+        self.required = [(q.get('id'), question_text(q)) for q in self.questions if q.get('required', False)]
+        self.checks: List[tuple] = []
+        for question in self.questions:
+            field_type = question_type(question)
+            if field_type in _CHOICE_TYPES and question.get('options'):
+                options = frozenset(str(option) for option in question['options'])
+                self.checks.append((question.get('id'), question_text(question), field_type, options))
+            elif field_type in TYPE_CHECKS:
+                self.checks.append((question.get('id'), question_text(question), field_type, None))
+
+        # Navigation: the static neighbours of every position, and the skip condition of every question
+        count = len(self.questions)
+        self.next_position = [position + 1 if position + 1 < count else None for position in range(count)]
+        self.previous_position = [position - 1 if position > 0 else None for position in range(count)]
+        self.conditions: List[Optional[Callable[[Dict[str, Any]], bool]]] = [
+            self._compile_condition(question.get('condition')) for question in self.questions
+        ]
+        self._html_json = None
+
+    @classmethod
+    def from_json(cls, structure_json: Optional[str]) -> 'CompiledForm':
+        return cls(json.loads(structure_json) if structure_json else {})
+
+    @staticmethod
+    def _compile_condition(condition) -> Optional[Callable[[Dict[str, Any]], bool]]:
+        """A predicate that is True when the question should be skipped for the given answers."""
+        if not condition:
+            return None
+        field = condition.get('field')
+        value = condition.get('value')
+        operator = condition.get('operator', 'equals')
+        if operator == 'equals':
+            return lambda answers: field in answers and answers[field] != value
+        if operator == 'not_equals':
+            return lambda answers: field in answers and answers[field] == value
+        return None
+
+    def question(self, question_id) -> Optional[Dict[str, Any]]:
+        position = self.index.get(question_id)
+        return self.questions[position] if position is not None else None
+
+    def validate(self, answers: Dict[str, Any]) -> Dict[str, Any]:
+        """Required fields that are unanswered, and answers that are not a valid option or value."""
+        missing_fields = [
+            {'id': question_id, 'question': text}
+            for question_id, text in self.required
+            if question_id not in answers or not answers[question_id]
+        ]
+        invalid_fields = []
+        for question_id, text, field_type, options in self.checks:
+            value = answers.get(question_id)
+            if not value:
+                continue
+            if options is not None:
+                values = value if isinstance(value, list) else [value]
+                single_choice_list = field_type != 'checkbox' and isinstance(value, list)
+                if single_choice_list or any(str(v) not in options for v in values):
+                    invalid_fields.append({'id': question_id, 'question': text,
+                                           'reason': 'is not one of the listed options'})
+            else:
+                check, reason = TYPE_CHECKS[field_type]
+                if not check(value):
+                    invalid_fields.append({'id': question_id, 'question': text, 'reason': reason})
+        return {
+            'valid': not missing_fields and not invalid_fields,
+            'missing_fields': missing_fields,
+            'invalid_fields': invalid_fields
+        }
+
+    def _step(self, table: List[Optional[int]], question_id, answers: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        position = self.index.get(question_id)
+        if position is None:
+            return None
+        position = table[position]
+        # Skip questions whose condition does not hold for the current answers
+        while position is not None and self.conditions[position] and self.conditions[position](answers):
+            position = table[position]
+        return self.questions[position] if position is not None else None
+
+    def next_question(self, current_question_id, answers: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """The question after ``current_question_id`` (the first one when it is empty), or None at the end."""
+        if not current_question_id:
+            return self.questions[0] if self.questions else None
+        return self._step(self.next_position, current_question_id, answers)
+
+    def previous_question(self, current_question_id, answers: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """The question before ``current_question_id``, or None at the start."""
+        return self._step(self.previous_position, current_question_id, answers)
+
+    @property
+    def html_json(self):
+        """The structure as HTML-safe JSON for embedding in the fill page, serialised once."""
+        if self._html_json is None:
+            self._html_json = htmlsafe_json_dumps(self.structure, dumps=current_app.json.dumps)
+        return self._html_json
+
+
+class FormStructureCache:
+    """Bounded LRU of compiled forms keyed by (form id, structure hash)."""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[tuple, CompiledForm]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, form_id, structure_json: Optional[str]) -> CompiledForm:
+        key = (form_id, hashlib.sha256((structure_json or '').encode('utf-8')).hexdigest())
+        with self._lock:
+            compiled = self._entries.get(key)
+            if compiled is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return compiled
+            self.misses += 1
+        # Compiled outside the lock; two requests racing on a new structure both compile it, harmlessly
+        compiled = CompiledForm.from_json(structure_json)
+        with self._lock:
+            # Older versions of this form's structure will not be requested again
+            for stale in [k for k in self._entries if k[0] == form_id and k != key]:
+                del self._entries[stale]
+            self._entries[key] = compiled
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return compiled
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "max_entries": self.max_entries,
+                    "hits": self.hits, "misses": self.misses}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_structure_cache() -> FormStructureCache:
+    """Return the process-wide structure cache."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = FormStructureCache(current_app.config.get('FORM_STRUCTURE_CACHE_SIZE', 256))
+    return _cache
+
+
+def get_compiled_form(form) -> CompiledForm:
+    """The compiled structure of a ``Form``, parsed on first use and shared until the structure changes."""
+    return get_structure_cache().get(form.id, form.structure)
@@ -0,0 +1,108 @@
+"""
+Background processing of a submitted form.
+
+``submit_form`` only validates the answers and marks the response complete,
+then queues a ``form_submission`` job, so the request costs a single commit.
+This handler renders the PDF and sends it by email on the job queue's pool.
+Until the PDF exists the response shows as processing. If the PDF cannot be
+rendered on the last attempt, the response is reopened (as it was before
+submission moved off the request), so the user can submit it again.
+
+The PDF path is committed as soon as the PDF is rendered, so a retry after an
+SMTP failure sends the same file instead of rendering it again. A failed
+delivery is retried while the job has attempts left. After the last attempt
+the job still succeeds, because the PDF and a local copy of the submission
+are kept, and ``email_sent`` in its result is False.
+"""
+
+import os
+import json
+from datetime import datetime
+from typing import Any, Dict
+
+from flask import current_app
+from werkzeug.utils import secure_filename
+
+from app import db
+from models import Form, FormResponse, User
+from services.form.structure_cache import get_compiled_form
+
+
+class EmailDeliveryError(Exception):
+    """Sending the submission email failed and the job has attempts left to retry it."""
+
+
+def run_form_submission(context, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Job handler: render the PDF of a submitted response and email it to the user and Minto."""
+    response = db.session.get(FormResponse, payload['response_id'])
+    if response is None or not response.is_complete:
+        raise ValueError(f"Form response {payload['response_id']} is not a submitted form")
+    try:
+        return _deliver(context, response)
+    except Exception:
+        db.session.rollback()
+        if context.attempt >= context.max_attempts and not response.pdf_path:
+            # Last attempt and still no PDF: reopen the response so it can be submitted again
+            response.is_complete = False
+            response.submitted_at = None
+            db.session.commit()
+            current_app.logger.error(f"Submission of form response {response.id} failed; response reopened")
+        raise
+
+
+def _deliver(context, response: FormResponse) -> Dict[str, Any]:
+    form = db.session.get(Form, response.form_id)
+    user = db.session.get(User, response.user_id)
+    answers = json.loads(response.answers) if response.answers else {}
+    form_structure = get_compiled_form(form).structure
+
+    pdf_path = response.pdf_path
+    if not pdf_path or not os.path.exists(pdf_path):
+        context.progress('pdf', 10, 'Generating the PDF')
+        os.makedirs(current_app.config['PDF_OUTPUT_FOLDER'], exist_ok=True)
+        timestamp = (response.submitted_at or datetime.utcnow()).strftime('%Y%m%d%H%M%S')
+        pdf_filename = f"{secure_filename(form.title)}_form{form.id}_user{user.id}_{timestamp}.pdf"
+        pdf_path = os.path.join(current_app.config['PDF_OUTPUT_FOLDER'], pdf_filename)
+
+        # fpdf is only loaded when a form is submitted
+        from services.form.pdf_service import generate_pdf_from_form
+        generate_pdf_from_form(form.title, form_structure, answers, pdf_path)
+        response.pdf_path = pdf_path
+        db.session.commit()
+        current_app.logger.info(f"PDF generated for form response {response.id}: {pdf_path}")
+
+    context.progress('email', 60, 'Sending the completed form by email')
+    form_data = {
+        'form_id': form.id,
+        'form_title': form.title,
+        'user_id': user.id,
+        'user_email': user.email,
+        'user_name': user.username,
+        'submitted_at': (response.submitted_at or datetime.utcnow()).isoformat(),
+        'question_count': len(form_structure.get('questions', [])),
+        'answered_count': len(answers)
+    }
+    from services.email_service import send_form_email
+    email_result = send_form_email(
+        recipient_email=user.email,
+        form_title=form.title,
+        pdf_path=pdf_path,
+        form_data=form_data
+    )
+
+    email_sent = bool(email_result.get('success'))
+    if email_sent:
+        current_app.logger.info(f"Form '{form.title}' (response {response.id}) emailed")
+    elif email_result.get('error') and context.attempt < context.max_attempts:
+        # SMTP or message errors may be transient; missing credentials are not, so those are not retried
+        raise EmailDeliveryError(email_result['message'] + f": {email_result['error']}")
+    else:
+        current_app.logger.warning(f"Form '{form.title}' (response {response.id}) could not be emailed: "
+                                   f"{email_result.get('message')}")
+
+    return {
+        "response_id": response.id,
+        "form_title": form.title,
+        "email_sent": email_sent,
+        "email_details": email_result
+    }
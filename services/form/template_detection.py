@@ -0,0 +1,377 @@
+"""
+Predefined-template detection for uploaded forms.
+
+Known forms (incident reports, advocate forms, hazard checklists, ...) are
+recognised by file name and, for non-DOCX files, by their text content. A
+recognised form gets its predefined template from the template library
+instead of a model extraction.
+"""
+
+from typing import Any, Dict, Optional
+from flask import current_app
+from services.form.template_library import get_template
+
+
+def detect_upload_template(file_path: str, filename: str) -> Optional[Dict[str, Any]]:
+    """
+    The form structure of a predefined template matching the uploaded file, or None when no
+    template applies and the form has to be extracted.
+    """
+    file_extension = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+    form_structure = None
+    
+    # Flag to track if we should use OpenAI extraction
+    use_openai_extraction = True
+    current_app.logger.info("Starting form type detection to determine extraction method...")
+
+    # Special case for the Incident Form
+    if "incident" in filename.lower() or (file_extension.lower() in ["docx"] and filename.lower().find("incident") != -1):
+        current_app.logger.info("Detected an incident form upload, checking if we should use specialized template")
+        # Import directly here to avoid circular imports
+        from services.form.incident_form_template import is_incident_form
+
+        # For docx files, we immediately use the template
+        if filename.lower().endswith(".docx"):
+            current_app.logger.info("Using incident form template for .docx file")
+            form_structure = {
+                "questions": get_template("incident_form")
+            }
+            questions_count = len(form_structure.get('questions', []))
+            current_app.logger.info(f"Using incident form template with {questions_count} fields")
+            use_openai_extraction = False
+        # For other file types, we try to extract content and check if it looks like an incident form
+        else:
+            try:
+                # Try to extract text content if applicable
+                from services.document.document_service import extract_text_from_file
+                content = extract_text_from_file(file_path)
+                if content and is_incident_form(content):
+                    current_app.logger.info("Detected incident form content, using specialized template")
+                    form_structure = {
+                        "questions": get_template("incident_form")
+                    }
+                    questions_count = len(form_structure.get('questions', []))
+                    current_app.logger.info(f"Using incident form template with {questions_count} fields")
+                    use_openai_extraction = False
+                else:
+                    # Not an incident form or couldn't extract content, proceed to normal extraction
+                    current_app.logger.info("Content doesn't appear to be an incident form, proceeding with normal extraction")
+            except Exception as e:
+                current_app.logger.info(f"Error checking if file is an incident form: {str(e)}")
+
+    # Special case for the Act as an Advocate Form
+    elif "advocate" in filename.lower() or "act as an advocate" in filename.lower():
+        current_app.logger.info("Detected an Act as an Advocate form upload, using specialized template")
+        # Import directly here to avoid circular imports
+        from services.form.advocate_form_template import is_advocate_form
+
+        # For docx files, we immediately use the template
+        if filename.lower().endswith(".docx"):
+            current_app.logger.info("Using advocate form template for .docx file")
+            form_structure = {
+                "questions": get_template("advocate_form")
+            }
+            questions_count = len(form_structure.get('questions', []))
+            current_app.logger.info(f"Using advocate form template with {questions_count} fields")
+            use_openai_extraction = False
+        # For other file types, we try to extract content and check if it looks like an advocate form
+        else:
+            try:
+                # Try to extract text content if applicable
+                from services.document.document_service import extract_text_from_file
+                content = extract_text_from_file(file_path)
+                if content and is_advocate_form(content):
+                    current_app.logger.info("Detected advocate form content, using specialized template")
+                    form_structure = {
+                        "questions": get_template("advocate_form")
+                    }
+                    questions_count = len(form_structure.get('questions', []))
+                    current_app.logger.info(f"Using advocate form template with {questions_count} fields")
+                    use_openai_extraction = False
+                else:
+                    # Not an advocate form or couldn't extract content, proceed to normal extraction
+                    current_app.logger.info("Content doesn't appear to be an advocate form, proceeding with normal extraction")
+            except Exception as e:
+                current_app.logger.info(f"Error checking if file is an advocate form: {str(e)}")
+
+    # Special case for the Complaints Form
+    elif "complaint" in filename.lower() or "complaints form" in filename.lower():
+        current_app.logger.info("Detected a Complaints Form upload, using specialized template")
+        # Import directly here to avoid circular imports
+        from services.form.complaints_form_template import is_complaints_form
+
+        # For docx files, we immediately use the template
+        if filename.lower().endswith(".docx"):
+            current_app.logger.info("Using complaints form template for .docx file")
+            form_structure = {
+                "questions": get_template("complaints_form")
+            }
+            questions_count = len(form_structure.get('questions', []))
+            current_app.logger.info(f"Using complaints form template with {questions_count} fields")
+            use_openai_extraction = False
+        # For other file types, we try to extract content and check if it looks like a complaints form
+        else:
+            try:
+                # Try to extract text content if applicable
+                from services.document.document_service import extract_text_from_file
+                content = extract_text_from_file(file_path)
+                if content and is_complaints_form(content):
+                    current_app.logger.info("Detected complaints form content, using specialized template")
+                    form_structure = {
+                        "questions": get_template("complaints_form")
+                    }
+                    questions_count = len(form_structure.get('questions', []))
+                    current_app.logger.info(f"Using complaints form template with {questions_count} fields")
+                    use_openai_extraction = False
+                else:
+                    # Not a complaints form or couldn't extract content, proceed to normal extraction
+                    current_app.logger.info("Content doesn't appear to be a complaints form, proceeding with normal extraction")
+            except Exception as e:
+                current_app.logger.info(f"Error checking if file is a complaints form: {str(e)}")
+
+    # Special case for the Conflict of Interest Form
+    elif "conflict" in filename.lower() or "conflict of interest" in filename.lower():
+        current_app.logger.info("Detected a Conflict of Interest Form upload, using specialized template")
+        # Import directly here to avoid circular imports
+        from services.form.conflict_form_template import is_conflict_form
+
+        # For docx files, we immediately use the template
+        if filename.lower().endswith(".docx"):
+            current_app.logger.info("Using conflict form template for .docx file")
+            form_structure = {
+                "questions": get_template("conflict_form")
+            }
+            questions_count = len(form_structure.get('questions', []))
+            current_app.logger.info(f"Using conflict form template with {questions_count} fields")
+            use_openai_extraction = False
+        # For other file types, we try to extract content and check if it looks like a conflict form
+        else:
+            try:
+                # Try to extract text content if applicable
+                from services.document.document_service import extract_text_from_file
+                content = extract_text_from_file(file_path)
+                if content and is_conflict_form(content):
+                    current_app.logger.info("Detected conflict form content, using specialized template")
+                    form_structure = {
+                        "questions": get_template("conflict_form")
+                    }
+                    questions_count = len(form_structure.get('questions', []))
+                    current_app.logger.info(f"Using conflict form template with {questions_count} fields")
+                    use_openai_extraction = False
+                else:
+                    # Not a conflict form or couldn't extract content, proceed to normal extraction
+                    current_app.logger.info("Content doesn't appear to be a conflict form, proceeding with normal extraction")
+            except Exception as e:
+                current_app.logger.info(f"Error checking if file is a conflict form: {str(e)}")
+
+    # Special case for the Feedback Form
+    elif "feedback" in filename.lower() or "feedback form" in filename.lower():
+        current_app.logger.info("Detected a Feedback Form upload, using specialized template")
+        # Import directly here to avoid circular imports
+        from services.form.feedback_form_template import is_feedback_form
+
+        # For docx files, we immediately use the template
+        if filename.lower().endswith(".docx"):
+            current_app.logger.info("Using feedback form template for .docx file")
+            form_structure = {
+                "questions": get_template("feedback_form")
+            }
+            questions_count = len(form_structure.get('questions', []))
+            current_app.logger.info(f"Using feedback form template with {questions_count} fields")
+            use_openai_extraction = False
+        # For other file types, we try to extract content and check if it looks like a feedback form
+        else:
+            try:
+                # Try to extract text content if applicable
+                from services.document.document_service import extract_text_from_file
+                content = extract_text_from_file(file_path)
+                if content and is_feedback_form(content):
+                    current_app.logger.info("Detected feedback form content, using specialized template")
+                    form_structure = {
+                        "questions": get_template("feedback_form")
+                    }
+                    questions_count = len(form_structure.get('questions', []))
+                    current_app.logger.info(f"Using feedback form template with {questions_count} fields")
+                    use_openai_extraction = False
+                else:
+                    # Not a feedback form or couldn't extract content, proceed to normal extraction
+                    current_app.logger.info("Content doesn't appear to be a feedback form, proceeding with normal extraction")
+            except Exception as e:
+                current_app.logger.info(f"Error checking if file is a feedback form: {str(e)}")
+
+    # Check for Meeting Minutes
+    elif "meeting minutes" in filename.lower() or "meeting_minutes" in filename.lower():
+        current_app.logger.info("Detected a Meeting Minutes upload, using specialized template")
+        # Import directly here to avoid circular imports
+        from services.form.meeting_minutes_template import is_meeting_minutes
+
+        # For docx files, we immediately use the template
+        if filename.lower().endswith(".docx"):
+            current_app.logger.info("Using meeting minutes template for .docx file")
+            form_structure = {
+                "questions": get_template("meeting_minutes")
+            }
+            questions_count = len(form_structure.get('questions', []))
+            current_app.logger.info(f"Using meeting minutes template with {questions_count} fields")
+            use_openai_extraction = False
+        # For other file types, we try to extract content and check if it looks like meeting minutes
+        else:
+            try:
+                # Try to extract text content if applicable
+                from services.document.document_service import extract_text_from_file
+                content = extract_text_from_file(file_path)
+                if content and is_meeting_minutes(content):
+                    current_app.logger.info("Detected meeting minutes content, using specialized template")
+                    form_structure = {
+                        "questions": get_template("meeting_minutes")
+                    }
+                    questions_count = len(form_structure.get('questions', []))
+                    current_app.logger.info(f"Using meeting minutes template with {questions_count} fields")
+                    use_openai_extraction = False
+                else:
+                    # Not meeting minutes or couldn't extract content, proceed to check for next form type
+                    current_app.logger.info("Content doesn't appear to be meeting minutes, checking for other form types")
+            except Exception as e:
+                current_app.logger.info(f"Error checking if file is meeting minutes: {str(e)}")
+
+    # Check for Home Safety Checklist
+    elif "home safety" in filename.lower() or "home_safety_checklist" in filename.lower():
+        current_app.logger.info("Detected a Home Safety Checklist upload, using specialized template")
+        # Import directly here to avoid circular imports
+        from services.form.home_safety_checklist_template import is_home_safety_checklist
+
+        # For docx files, we immediately use the template
+        if filename.lower().endswith(".docx"):
+            current_app.logger.info("Using home safety checklist template for .docx file")
+            form_structure = {
+                "questions": get_template("home_safety_checklist")
+            }
+            questions_count = len(form_structure.get('questions', []))
+            current_app.logger.info(f"Using home safety checklist template with {questions_count} fields")
+            use_openai_extraction = False
+        # For other file types, we try to extract content and check if it looks like a home safety checklist
+        else:
+            try:
+                # Try to extract text content if applicable
+                from services.document.document_service import extract_text_from_file
+                content = extract_text_from_file(file_path)
+                if content and is_home_safety_checklist(content):
+                    current_app.logger.info("Detected home safety checklist content, using specialized template")
+                    form_structure = {
+                        "questions": get_template("home_safety_checklist")
+                    }
+                    questions_count = len(form_structure.get('questions', []))
+                    current_app.logger.info(f"Using home safety checklist template with {questions_count} fields")
+                    use_openai_extraction = False
+                else:
+                    # Not a home safety checklist or couldn't extract content, proceed to check for next form type
+                    current_app.logger.info("Content doesn't appear to be a home safety checklist, checking for other form types")
+            except Exception as e:
+                current_app.logger.info(f"Error checking if file is a home safety checklist: {str(e)}")
+
+    # Check for Hazardous Substances Checklist
+    elif "hazardous substances" in filename.lower() or "hazardous_substances_checklist" in filename.lower():
+        current_app.logger.info("Detected a Hazardous Substances Checklist upload, using specialized template")
+        # Import directly here to avoid circular imports
+        from services.form.hazardous_substances_checklist_template import is_hazardous_substances_checklist
+
+        # For docx files, we immediately use the template
+        if filename.lower().endswith(".docx"):
+            current_app.logger.info("Using hazardous substances checklist template for .docx file")
+            form_structure = {
+                "questions": get_template("hazardous_substances_checklist")
+            }
+            questions_count = len(form_structure.get('questions', []))
+            current_app.logger.info(f"Using hazardous substances checklist template with {questions_count} fields")
+            use_openai_extraction = False
+        # For other file types, we try to extract content and check if it looks like a hazardous substances checklist
+        else:
+            try:
+                # Try to extract text content if applicable
+                from services.document.document_service import extract_text_from_file
+                content = extract_text_from_file(file_path)
+                if content and is_hazardous_substances_checklist(content):
+                    current_app.logger.info("Detected hazardous substances checklist content, using specialized template")
+                    form_structure = {
+                        "questions": get_template("hazardous_substances_checklist")
+                    }
+                    questions_count = len(form_structure.get('questions', []))
+                    current_app.logger.info(f"Using hazardous substances checklist template with {questions_count} fields")
+                    use_openai_extraction = False
+                else:
+                    # Not a hazardous substances checklist or couldn't extract content, proceed to check for general hazard form
+                    current_app.logger.info("Content doesn't appear to be a hazardous substances checklist, checking for general hazard form")
+            except Exception as e:
+                current_app.logger.info(f"Error checking if file is a hazardous substances checklist: {str(e)}")
+
+    # Check for Plant-Asset Hazard Checklist (more specific than general hazard form)
+    elif "plant-asset" in filename.lower() or "plant_asset" in filename.lower() or "new plant" in filename.lower():
+        current_app.logger.info("Detected a Plant-Asset Hazard Checklist upload, using specialized template")
+        # Import directly here to avoid circular imports
+        from services.form.plant_asset_hazard_checklist_template import is_plant_asset_hazard_checklist
+
+        # For docx files, we immediately use the template
+        if filename.lower().endswith(".docx"):
+            current_app.logger.info("Using plant-asset hazard checklist template for .docx file")
+            form_structure = {
+                "questions": get_template("plant_asset_hazard_checklist")
+            }
+            questions_count = len(form_structure.get('questions', []))
+            current_app.logger.info(f"Using plant-asset hazard checklist template with {questions_count} fields")
+            use_openai_extraction = False
+        # For other file types, we try to extract content and check if it looks like a plant-asset hazard checklist
+        else:
+            try:
+                # Try to extract text content if applicable
+                from services.document.document_service import extract_text_from_file
+                content = extract_text_from_file(file_path)
+                if content and is_plant_asset_hazard_checklist(content):
+                    current_app.logger.info("Detected plant-asset hazard checklist content, using specialized template")
+                    form_structure = {
+                        "questions": get_template("plant_asset_hazard_checklist")
+                    }
+                    questions_count = len(form_structure.get('questions', []))
+                    current_app.logger.info(f"Using plant-asset hazard checklist template with {questions_count} fields")
+                    use_openai_extraction = False
+                else:
+                    # Not a plant-asset hazard checklist or couldn't extract content, proceed to check for general hazard form
+                    current_app.logger.info("Content doesn't appear to be a plant-asset hazard checklist, checking for general hazard form")
+            except Exception as e:
+                current_app.logger.info(f"Error checking if file is a plant-asset hazard checklist: {str(e)}")
+
+    # Check for general Hazard Form
+    elif "hazard" in filename.lower() or "hazard form" in filename.lower():
+        current_app.logger.info("Detected a Hazard Form upload, using specialized template")
+        # Import directly here to avoid circular imports
+        from services.form.hazard_form_template import is_hazard_form
+
+        # For docx files, we immediately use the template
+        if filename.lower().endswith(".docx"):
+            current_app.logger.info("Using hazard form template for .docx file")
+            form_structure = {
+                "questions": get_template("hazard_form")
+            }
+            questions_count = len(form_structure.get('questions', []))
+            current_app.logger.info(f"Using hazard form template with {questions_count} fields")
+            use_openai_extraction = False
+        # For other file types, we try to extract content and check if it looks like a hazard form
+        else:
+            try:
+                # Try to extract text content if applicable
+                from services.document.document_service import extract_text_from_file
+                content = extract_text_from_file(file_path)
+                if content and is_hazard_form(content):
+                    current_app.logger.info("Detected hazard form content, using specialized template")
+                    form_structure = {
+                        "questions": get_template("hazard_form")
+                    }
+                    questions_count = len(form_structure.get('questions', []))
+                    current_app.logger.info(f"Using hazard form template with {questions_count} fields")
+                    use_openai_extraction = False
+                else:
+                    # Not a hazard form or couldn't extract content, proceed to normal extraction
+                    current_app.logger.info("Content doesn't appear to be a hazard form, proceeding with normal extraction")
+            except Exception as e:
+                current_app.logger.info(f"Error checking if file is a hazard form: {str(e)}")
+    
+    return None if use_openai_extraction else form_structure
@@ -0,0 +1,207 @@
+"""
+Compiled library of the predefined form templates.
+
+Each ``*_template.py`` module builds its template as a nested list of dicts on
+every call; some run to hundreds of lines. The library compiles them all once
+into ``compiled_templates.json`` (``python tools/compile_templates.py``). The
+artefact is validated when it is compiled and loaded once per worker process.
+
+Lookups are by template key (the module name without ``_template``). They
+return a shared read-only view (a tuple of read-only dicts), so reading a
+template or serialising it into ``Form.structure`` copies nothing.
+``copy_template`` gives a fresh mutable copy for callers that modify the
+questions. The artefact records a hash of every template module. If a
+module has changed since the last compile, the library logs a warning and
+compiles in memory, so a stale artefact is never served.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import importlib
+import threading
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'compiled_templates.json')
+
+# Template key -> (module, function) it is compiled from
+TEMPLATE_SOURCES = {
+    "advocate_form": ("services.form.advocate_form_template", "get_advocate_form_template"),
+    "audit_checklist": ("services.form.audit_checklist_template", "get_access_audit_checklist_template"),
+    "complaints_form": ("services.form.complaints_form_template", "get_complaints_form_template"),
+    "conflict_form": ("services.form.conflict_form_template", "get_conflict_form_template"),
+    "feedback_form": ("services.form.feedback_form_template", "get_feedback_form_template"),
+    "food_diary": ("services.form.food_diary_template", "get_food_diary_template"),
+    "hazard_form": ("services.form.hazard_form_template", "get_hazard_form_template"),
+    "hazardous_substances_checklist": ("services.form.hazardous_substances_checklist_template",
+                                       "get_hazardous_substances_checklist_template"),
+    "home_safety_checklist": ("services.form.home_safety_checklist_template", "get_home_safety_checklist_template"),
+    "incident_form": ("services.form.incident_form_template", "get_incident_form_template"),
+    "mealtime_safety_audit": ("services.form.mealtime_safety_audit_template", "get_mealtime_safety_audit_template"),
+    "medication_administration": ("services.form.medication_administration_template",
+                                  "get_medication_administration_template"),
+    "medication_evaluation": ("services.form.medication_evaluation_template", "get_medication_evaluation_template"),
+    "meeting_minutes": ("services.form.meeting_minutes_template", "get_meeting_minutes_template"),
+    "nutrition_assessment": ("services.form.nutrition_assessment_template", "get_nutrition_assessment_template"),
+    "nutrition_swallowing_risk": ("services.form.nutrition_swallowing_risk_template",
+                                  "get_nutrition_swallowing_risk_template"),
+    "plant_asset_hazard_checklist": ("services.form.plant_asset_hazard_checklist_template",
+                                     "get_plant_asset_hazard_checklist_template"),
+    "root_cause_analysis": ("services.form.root_cause_analysis_template", "get_root_cause_analysis_template"),
+    "vehicle_safety_check": ("services.form.vehicle_safety_check_template", "get_vehicle_safety_check_template"),
+    "waste_risk_assessment": ("services.form.waste_risk_assessment_template", "get_waste_risk_assessment_template"),
+}
+
+
+class TemplateError(ValueError):
+    """A template failed validation while compiling the library."""
+
+
+def _module_path(module_name: str) -> str:
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return os.path.join(root, *module_name.split('.')) + '.py'
+
+
+def source_hashes() -> Dict[str, str]:
+    """SHA-256 of every template module, keyed by module name."""
+    hashes = {}
+    for module_name, _ in sorted(set(TEMPLATE_SOURCES.values())):
+        with open(_module_path(module_name), 'rb') as f:
+            hashes[module_name] = hashlib.sha256(f.read()).hexdigest()
+    return hashes
+
+
+def validate_template(key: str, questions: Any):
+    """Raise TemplateError unless ``questions`` is a well-formed, JSON-serialisable question list."""
+    if not isinstance(questions, list) or not questions:
+        raise TemplateError(f"{key}: template must be a non-empty list of questions")
+    seen = set()
+    for index, question in enumerate(questions):
+        where = f"{key}[{index}]"
+        if not isinstance(question, dict):
+            raise TemplateError(f"{where}: question must be a dict")
+        question_id = question.get('id')
+        if not isinstance(question_id, str) or not question_id:
+            raise TemplateError(f"{where}: missing id")
+        if question_id in seen:
+            raise TemplateError(f"{where}: duplicate id {question_id!r}")
+        seen.add(question_id)
+        if not isinstance(question.get('question_text'), str):
+            raise TemplateError(f"{where}: missing question_text")
+        if not (question.get('field_type') or question.get('question_type')):
+            raise TemplateError(f"{where}: missing field_type")
+        if 'options' in question and not isinstance(question['options'], list):
+            raise TemplateError(f"{where}: options must be a list")
+    try:
+        json.dumps(questions)
+    except (TypeError, ValueError) as e:
+        raise TemplateError(f"{key}: not JSON-serialisable: {e}")
+
+
+def compile_library() -> Dict[str, Any]:
+    """Build every template from its module and validate it. Returns the artefact contents."""
+    templates = {}
+    for key, (module_name, function_name) in TEMPLATE_SOURCES.items():
+        questions = getattr(importlib.import_module(module_name), function_name)()
+        validate_template(key, questions)
+        templates[key] = questions
+    return {"sources": source_hashes(), "templates": templates}
+
+
+def write_artifact(library: Dict[str, Any], path: str = ARTIFACT_PATH):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(library, f, indent=1, ensure_ascii=False)
+        f.write('\n')
+
+
+class FrozenDict(dict):
+    """A dict that refuses modification. Still a dict, so ``json.dumps`` and ``.get`` work on it as usual."""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("template questions are read-only; use copy_template() for a mutable copy")
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = __ior__ = _readonly
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return _thaw(self)
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return FrozenDict((k, _freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _thaw(value):
+    if isinstance(value, dict):
+        return {k: _thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(v) for v in value]
+    return value
+
+
+class TemplateLibrary:
+    """Read-only templates with O(1) lookup by key."""
+
+    def __init__(self, templates: Dict[str, List[Dict[str, Any]]]):
+        self._frozen = {key: _freeze(questions) for key, questions in templates.items()}
+
+    def keys(self):
+        return self._frozen.keys()
+
+    def get(self, key: str):
+        """Shared read-only view of a template (a tuple of read-only dicts). Raises KeyError for unknown keys."""
+        return self._frozen[key]
+
+    def copy(self, key: str) -> List[Dict[str, Any]]:
+        """A fresh, mutable copy of a template's questions."""
+        return _thaw(self._frozen[key])
+
+
+def _load() -> TemplateLibrary:
+    library = None
+    try:
+        with open(ARTIFACT_PATH, 'r', encoding='utf-8') as f:
+            library = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Compiled template library unavailable ({e}); compiling in memory")
+    if library is not None and (library.get("sources") != source_hashes()
+                                or set(library.get("templates", {})) != set(TEMPLATE_SOURCES)):
+        logger.warning("Compiled template library is stale; compiling in memory "
+                       "(run python tools/compile_templates.py to regenerate it)")
+        library = None
+    if library is None:
+        library = compile_library()
+    return TemplateLibrary(library["templates"])
+
+
+_library = None
+_library_lock = threading.Lock()
+
+
+def get_template_library() -> TemplateLibrary:
+    """Return the process-wide template library, loading it on first use."""
+    global _library
+    if _library is None:
+        with _library_lock:
+            if _library is None:
+                _library = _load()
+    return _library
+
+
+def get_template(key: str):
+    """Read-only view of the template ``key``, for reading or serialising into a form structure."""
+    return get_template_library().get(key)
+
+
+def copy_template(key: str) -> List[Dict[str, Any]]:
+    """Mutable copy of the template ``key``, for callers that modify the questions."""
+    return get_template_library().copy(key)
@@ -0,0 +1,92 @@
+"""
+Background processing of an uploaded form.
+
+``upload_form`` only validates and saves the file, then queues a
+``form_upload`` job. This handler does the slow part on the job queue's pool.
+It reports each stage (convert, detect, extract, validate) through the job
+context so the upload page can show live progress.
+
+The ``Form`` row is only created at the end, so a form goes live once it is
+fully extracted. If the job fails, the uploaded file stays on disk so the job
+can be retried without uploading it again.
+"""
+
+import os
+import json
+from datetime import datetime
+from typing import Any, Dict
+
+from flask import current_app
+
+from app import db
+from models import Form
+from services.form.fingerprint import save_form_fingerprint
+from services.form.form_service import fingerprint_form_file, extract_form_structure_reusing_matches, describe_form_match
+from services.form.template_detection import detect_upload_template
+
+
+def validate_form_structure(form_structure: Dict[str, Any]):
+    """Raise ValueError unless the extracted structure has questions that all have text and an id."""
+    questions = form_structure.get('questions', [])
+    if not questions:
+        raise ValueError("No questions could be extracted from the form document. Please try a different file or format.")
+
+    missing_fields = []
+    for i, question in enumerate(questions):
+        if not question.get('question_text') and not question.get('question') and not question.get('label'):
+            missing_fields.append(f"Question #{i+1} is missing required text field")
+        if not question.get('id'):
+            missing_fields.append(f"Question #{i+1} is missing a required ID")
+    if missing_fields:
+        raise ValueError(f"Form structure validation failed: {'. '.join(missing_fields)}")
+
+
+def run_form_upload(context, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Job handler: detect or extract the structure of an uploaded form and create the ``Form``."""
+    file_path = payload['file_path']
+    filename = payload['filename']
+
+    context.progress('convert', 5, 'Reading the document')
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"The uploaded file {filename} is no longer available. Please upload it again.")
+    # Structural fingerprint, used to reuse the extraction of a matching existing form
+    fingerprint = fingerprint_form_file(file_path)
+
+    context.progress('detect', 20, 'Checking for a predefined template')
+    form_structure = detect_upload_template(file_path, filename)
+    messages = []
+    if form_structure is not None:
+        messages.append('A predefined template was used for this form.')
+    else:
+        current_app.logger.info(f"No template match for {filename}; extracting with the AI pipeline")
+        context.progress('extract', 35, 'Extracting questions')
+        form_structure, form_match = extract_form_structure_reusing_matches(file_path, fingerprint)
+        if form_match:
+            messages.append(describe_form_match(form_match))
+
+        context.progress('validate', 85, 'Validating the extracted questions')
+        current_app.logger.debug(f"Extracted form structure: {json.dumps(form_structure)[:500]}...")
+        validate_form_structure(form_structure)
+
+    questions_count = len(form_structure.get('questions', []))
+    context.progress('save', 95, f'Saving {questions_count} questions')
+    new_form = Form(
+        title=payload['title'],
+        description=payload.get('description'),
+        file_path=file_path,
+        structure=json.dumps(form_structure),
+        created_at=datetime.utcnow(),
+        user_id=payload.get('user_id')  # Track which admin uploaded the form
+    )
+    db.session.add(new_form)
+    db.session.flush()
+    save_form_fingerprint(new_form, fingerprint)
+    db.session.commit()
+    current_app.logger.info(f"Form ID {new_form.id} saved to database with {questions_count} questions")
+
+    return {
+        "form_id": new_form.id,
+        "title": new_form.title,
+        "questions_count": questions_count,
+        "messages": messages
+    }
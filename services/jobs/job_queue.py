@@ -0,0 +1,344 @@
+"""
+Local background job queue.
+
+Slow work (form extraction, submission PDFs and email, and anything else that should not hold a request
+open) is recorded as a ``BackgroundJob`` row and run by a small thread pool in
+the worker process. The row is the source of truth: it carries the handler's
+payload, the current stage and progress for clients that poll, the result or
+error, and the attempt count.
+
+Every run first claims its job with a conditional UPDATE (``queued`` to
+``running``), so a job is never run twice, even when several gunicorn workers
+recover the same queued jobs after a restart. A failed job is retried with
+exponential backoff until ``max_attempts`` is reached, and can then be
+requeued by hand with ``retry``.
+
+While a job runs, a monitor thread in its process refreshes the row's
+``updated_at`` every heartbeat interval. The same thread in every process
+requeues running jobs whose heartbeat has stopped (their worker was killed by
+a timeout, a max-requests recycle or a deploy) and picks up queued jobs that
+are due, so an orphaned job is resumed without waiting for a worker restart.
+
+Handlers are looked up by job kind in ``JOB_HANDLERS`` and imported on first
+use. A handler is called as ``handler(context, payload)`` inside an
+application context. It reports progress through ``context.progress`` and
+returns a JSON-serialisable result. ``context.progress`` commits the session.
+"""
+
+import json
+import time
+import random
+import logging
+import importlib
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from flask import current_app
+from sqlalchemy import or_
+
+from app import db
+from models import BackgroundJob
+from services.ai.metrics import ai_route
+from services.ai.scheduler import ai_priority
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+# Job kind -> ("module:function" of its handler, AI priority class of its model calls)
+JOB_HANDLERS = {
+    "form_upload": ("services.form.upload_pipeline:run_form_upload", "upload"),
+    "form_submission": ("services.form.submission_pipeline:run_form_submission", "interactive"),
+}
+
+_handler_cache = {}
+
+
+def _handler(kind: str):
+    if kind not in _handler_cache:
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"No handler registered for job kind {kind!r}")
+        module_name, function_name = JOB_HANDLERS[kind][0].split(':')
+        _handler_cache[kind] = getattr(importlib.import_module(module_name), function_name)
+    return _handler_cache[kind]
+
+
+class JobContext:
+    """Handle passed to a job handler for reporting progress."""
+
+    def __init__(self, job: BackgroundJob):
+        self.job_id = job.id
+        self.attempt = job.attempts
+        self.max_attempts = job.max_attempts or 1
+        self.user_id = job.user_id
+
+    def progress(self, stage: str, percent: int, message: Optional[str] = None):
+        """Record the current stage and progress (0-100). Commits the session."""
+        BackgroundJob.query.filter_by(id=self.job_id).update({
+            "stage": stage,
+            "progress": max(0, min(100, int(percent))),
+            "message": (message or '')[:255] or None,
+            "updated_at": datetime.utcnow()
+        }, synchronize_session=False)
+        db.session.commit()
+
+
+def job_to_dict(job: BackgroundJob) -> Dict[str, Any]:
+    """Client-facing view of a job, as returned by the status endpoint."""
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "stage": job.stage,
+        "progress": job.progress or 0,
+        "message": job.message,
+        "error": job.error,
+        "attempts": job.attempts or 0,
+        "max_attempts": job.max_attempts or 1,
+        "result": json.loads(job.result) if job.result else None,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+class JobQueue:
+    """Thread pool that runs queued ``BackgroundJob`` rows."""
+
+    def __init__(self, app, max_workers: int = 2, retry_backoff: float = 30, stale_seconds: float = 120,
+                 heartbeat_seconds: float = 15):
+        self._app = app
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._retry_backoff = retry_backoff
+        self._stale_seconds = stale_seconds
+        self._heartbeat_seconds = heartbeat_seconds
+        # Jobs running in this process, whose heartbeat the monitor keeps fresh
+        self._running = set()
+        self._running_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._monitor_thread = None
+
+    def enqueue(self, kind: str, payload: Dict[str, Any], user_id: int = None, max_attempts: int = 1) -> BackgroundJob:
+        """
+        Record a job and hand it to the pool. The job row is committed before this returns, together with
+        any pending changes in the session.
+        """
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"No handler registered for job kind {kind!r}")
+        job = BackgroundJob(
+            kind=kind,
+            status=QUEUED,
+            stage='queued',
+            payload=json.dumps(payload),
+            user_id=user_id,
+            max_attempts=max(1, max_attempts)
+        )
+        db.session.add(job)
+        db.session.commit()
+        self.submit(job.id)
+        return job
+
+    def submit(self, job_id: int, delay: float = 0):
+        """Run a queued job on the pool, after ``delay`` seconds."""
+        if delay > 0:
+            timer = threading.Timer(delay, self.submit, args=(job_id,))
+            timer.daemon = True
+            timer.start()
+            return
+        self._executor.submit(self._run, job_id)
+
+    def retry(self, job_id: int) -> bool:
+        """Requeue a failed job with a fresh set of attempts. Returns False if the job is not failed."""
+        requeued = BackgroundJob.query.filter_by(id=job_id, status=FAILED).update({
+            "status": QUEUED,
+            "stage": 'queued',
+            "progress": 0,
+            "message": None,
+            "error": None,
+            "attempts": 0,
+            "run_after": None,
+            "finished_at": None,
+            "updated_at": datetime.utcnow()
+        }, synchronize_session=False)
+        db.session.commit()
+        if requeued:
+            self.submit(job_id)
+        return bool(requeued)
+
+    def _requeue_stale(self, now: datetime) -> List[int]:
+        """Requeue running jobs whose heartbeat stopped, other than those running in this process."""
+        with self._running_lock:
+            own = list(self._running)
+        condition = [
+            BackgroundJob.status == RUNNING,
+            BackgroundJob.updated_at < now - timedelta(seconds=self._stale_seconds)
+        ]
+        if own:
+            condition.append(BackgroundJob.id.notin_(own))
+        stale = [job_id for (job_id,) in BackgroundJob.query.filter(*condition).with_entities(BackgroundJob.id)]
+        requeued = []
+        for job_id in stale:
+            # Conditional, so a job whose heartbeat resumed or that another process requeued is left alone
+            if BackgroundJob.query.filter(BackgroundJob.id == job_id, *condition).update(
+                    {"status": QUEUED, "message": "Requeued after an interrupted run"}, synchronize_session=False):
+                requeued.append(job_id)
+        db.session.commit()
+        if requeued:
+            logger.warning(f"Requeued {len(requeued)} interrupted background job(s): {requeued}")
+        return requeued
+
+    def recover(self):
+        """Requeue jobs orphaned by a dead process and resubmit every queued job."""
+        now = datetime.utcnow()
+        self._requeue_stale(now)
+        for job in BackgroundJob.query.filter_by(status=QUEUED).all():
+            delay = (job.run_after - now).total_seconds() if job.run_after else 0
+            self.submit(job.id, delay)
+
+    def sweep(self):
+        """
+        Requeue jobs orphaned by a dead process and run queued jobs that are due. Jobs queued within the
+        last heartbeat interval are left to the process that queued them.
+        """
+        now = datetime.utcnow()
+        for job_id in self._requeue_stale(now):
+            self.submit(job_id)
+        due = BackgroundJob.query.filter(
+            BackgroundJob.status == QUEUED,
+            or_(BackgroundJob.run_after.is_(None), BackgroundJob.run_after <= now),
+            BackgroundJob.updated_at < now - timedelta(seconds=self._heartbeat_seconds)
+        ).with_entities(BackgroundJob.id).all()
+        for (job_id,) in due:
+            self.submit(job_id)
+
+    def _heartbeat(self):
+        with self._running_lock:
+            own = list(self._running)
+        if own:
+            BackgroundJob.query.filter(BackgroundJob.id.in_(own), BackgroundJob.status == RUNNING).update(
+                {"updated_at": datetime.utcnow()}, synchronize_session=False)
+            db.session.commit()
+
+    def start_monitor(self):
+        """Start the thread that sends heartbeats for this process's jobs and sweeps for orphaned ones."""
+        if self._monitor_thread is None:
+            self._monitor_thread = threading.Thread(target=self._monitor, name='job-monitor', daemon=True)
+            self._monitor_thread.start()
+
+    def stop_monitor(self):
+        self._stopped.set()
+
+    def _monitor(self):
+        # Sweeps run at the stale interval, staggered so worker processes do not all sweep at once
+        next_sweep = time.monotonic() + self._stale_seconds * random.uniform(0.5, 1.0)
+        while not self._stopped.wait(self._heartbeat_seconds):
+            with self._app.app_context():
+                try:
+                    self._heartbeat()
+                    if time.monotonic() >= next_sweep:
+                        next_sweep = time.monotonic() + self._stale_seconds
+                        self.sweep()
+                except Exception:
+                    db.session.rollback()
+                    logger.exception("Background job monitor failed")
+                finally:
+                    db.session.remove()
+
+    def _run(self, job_id: int):
+        with self._app.app_context():
+            try:
+                self._execute(job_id)
+            except Exception:
+                logger.exception(f"Background job {job_id} could not be run")
+            finally:
+                db.session.remove()
+
+    def _execute(self, job_id: int):
+        now = datetime.utcnow()
+        # Claim the job; if another thread or process got there first, there is nothing to do
+        claimed = BackgroundJob.query.filter(
+            BackgroundJob.id == job_id,
+            BackgroundJob.status == QUEUED,
+            or_(BackgroundJob.run_after.is_(None), BackgroundJob.run_after <= now)
+        ).update({
+            "status": RUNNING,
+            "attempts": BackgroundJob.attempts + 1,
+            "started_at": now,
+            "updated_at": now
+        }, synchronize_session=False)
+        db.session.commit()
+        if not claimed:
+            return
+        with self._running_lock:
+            self._running.add(job_id)
+        try:
+            self._execute_claimed(job_id)
+        finally:
+            with self._running_lock:
+                self._running.discard(job_id)
+
+    def _execute_claimed(self, job_id: int):
+        job = db.session.get(BackgroundJob, job_id)
+        priority = JOB_HANDLERS[job.kind][1] if job.kind in JOB_HANDLERS else 'batch'
+        logger.info(f"Running background job {job.id} ({job.kind}), attempt {job.attempts}/{job.max_attempts}")
+        try:
+            handler = _handler(job.kind)
+            with ai_route(f"job:{job.kind}"), ai_priority(priority):
+                result = handler(JobContext(job), json.loads(job.payload or '{}'))
+        except Exception as e:
+            db.session.rollback()
+            job = db.session.get(BackgroundJob, job_id)
+            job.error = str(e)[:2000]
+            job.updated_at = datetime.utcnow()
+            if job.attempts < job.max_attempts:
+                delay = self._retry_backoff * 2 ** (job.attempts - 1)
+                job.status = QUEUED
+                job.run_after = datetime.utcnow() + timedelta(seconds=delay)
+                job.message = f"Attempt {job.attempts} failed; retrying in {delay:.0f}s"
+                db.session.commit()
+                logger.warning(f"Background job {job.id} ({job.kind}) failed, retrying in {delay:.0f}s: {e}")
+                self.submit(job.id, delay)
+            else:
+                job.status = FAILED
+                job.finished_at = datetime.utcnow()
+                db.session.commit()
+                logger.error(f"Background job {job.id} ({job.kind}) failed: {e}")
+            return
+
+        job = db.session.get(BackgroundJob, job_id)
+        job.status = SUCCEEDED
+        job.stage = 'done'
+        job.progress = 100
+        job.result = json.dumps(result) if result is not None else None
+        job.error = None
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+        logger.info(f"Background job {job.id} ({job.kind}) succeeded")
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Return the process-wide job queue, creating it (and recovering queued jobs) on first use."""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                app = current_app._get_current_object()
+                queue = JobQueue(
+                    app,
+                    max_workers=app.config.get('JOB_WORKERS', 2),
+                    retry_backoff=app.config.get('JOB_RETRY_BACKOFF_SECONDS', 30),
+                    stale_seconds=app.config.get('JOB_STALE_SECONDS', 120),
+                    heartbeat_seconds=app.config.get('JOB_HEARTBEAT_SECONDS', 15)
+                )
+                queue.recover()
+                queue.start_monitor()
+                _queue = queue
+    return _queue
@@ -0,0 +1,106 @@
+// Incremental saving of form answers
+//
+// Tracks which answers changed since the last successful save and sends only those,
+// as a JSON merge-patch with the ETag of the answers it was based on. Saves with no
+// changes are skipped. If the answers were changed elsewhere (HTTP 412), the unsaved
+// edits are reapplied on top of the server's answers, in the page's answers object too,
+// and only those edits are sent again.
+
+function createAnswerSync(responseId, initialAnswers, initialEtag) {
+    const url = `/forms/response/${responseId}/answers`;
+    let saved = JSON.parse(JSON.stringify(initialAnswers || {}));
+    // Entity tags are quoted on the wire
+    let etag = initialEtag && !initialEtag.startsWith('"') ? `"${initialEtag}"` : initialEtag;
+    let inFlight = null;
+
+    // Changed answers since the last save; removed answers are sent as null
+    function diff(answers) {
+        const patch = {};
+        Object.keys(answers).forEach(key => {
+            if (JSON.stringify(answers[key]) !== JSON.stringify(saved[key])) {
+                patch[key] = answers[key];
+            }
+        });
+        Object.keys(saved).forEach(key => {
+            if (!(key in answers)) {
+                patch[key] = null;
+            }
+        });
+        return patch;
+    }
+
+    // Make the page's answers the server's answers plus our edits, keeping the same object
+    function rebase(answers, edits) {
+        Object.keys(answers).forEach(key => {
+            delete answers[key];
+        });
+        Object.keys(saved).forEach(key => {
+            answers[key] = JSON.parse(JSON.stringify(saved[key]));
+        });
+        Object.keys(edits).forEach(key => {
+            if (edits[key] === null) {
+                delete answers[key];
+            } else {
+                answers[key] = edits[key];
+            }
+        });
+    }
+
+    function send(answers, patch, keepalive, retried) {
+        return fetch(url, {
+            method: 'PATCH',
+            headers: {
+                'Content-Type': 'application/merge-patch+json',
+                'If-Match': etag
+            },
+            body: JSON.stringify(patch),
+            keepalive: keepalive
+        })
+        .then(response => {
+            if (response.status === 412 && !retried) {
+                // Rebase: take our edits since the last save, apply them on top of the server's
+                // answers, and send only those edits again
+                return response.json().then(data => {
+                    const edits = diff(answers);
+                    etag = response.headers.get('ETag');
+                    saved = data.answers || {};
+                    rebase(answers, edits);
+                    return send(answers, edits, keepalive, true);
+                });
+            }
+            if (!response.ok) {
+                throw new Error(`Save failed with status ${response.status}`);
+            }
+            etag = response.headers.get('ETag') || etag;
+            // Only the values that were sent are known to be saved
+            Object.keys(patch).forEach(key => {
+                if (patch[key] === null) {
+                    delete saved[key];
+                } else {
+                    saved[key] = JSON.parse(JSON.stringify(patch[key]));
+                }
+            });
+            return true;
+        });
+    }
+
+    return {
+        isDirty(answers) {
+            return Object.keys(diff(answers)).length > 0;
+        },
+
+        // Resolves to true when changes were saved and false when there was nothing to save
+        save(answers, options = {}) {
+            if (inFlight) {
+                return inFlight.then(() => this.save(answers, options));
+            }
+            const patch = diff(answers);
+            if (Object.keys(patch).length === 0) {
+                return Promise.resolve(false);
+            }
+            inFlight = send(answers, patch, !!options.keepalive, false)
+                .finally(() => { inFlight = null; });
+            return inFlight;
+        }
+    };
+}
@@ -377,32 +377,34 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
     
+    // Answers are saved incrementally: only changed answers are sent, and unchanged forms are not saved at all
+    const answerSync = createAnswerSync(responseId, initialAnswers, formContainer.dataset.etag);
+    
     // Save form progress
-    function saveProgress() {
+    function saveProgress(options = {}) {
         const saveIndicator = document.getElementById('save-indicator');
-        saveIndicator.innerHTML = '<span class="loading-spinner"></span> Saving...';
         
-        fetch(`/forms/response/${responseId}/save`, {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({
-                answers: answers
-            }),
-        })
-        .then(response => response.json())
-        .then(data => {
-            if (data.success) {
+        if (!answerSync.isDirty(answers)) {
+            // Nothing changed since the last save; only confirm when the user asked to save
+            if (!options.auto) {
                 saveIndicator.innerHTML = '<i class="bi bi-check-circle"></i> Saved';
-                
-                // Clear the indicator after 3 seconds
                 setTimeout(() => {
                     saveIndicator.innerHTML = '';
                 }, 3000);
-            } else {
-                saveIndicator.innerHTML = '<i class="bi bi-exclamation-triangle"></i> Save failed';
             }
+            return;
+        }
+        
+        saveIndicator.innerHTML = '<span class="loading-spinner"></span> Saving...';
+        
+        answerSync.save(answers)
+        .then(() => {
+            saveIndicator.innerHTML = '<i class="bi bi-check-circle"></i> Saved';
+            
+            // Clear the indicator after 3 seconds
+            setTimeout(() => {
+                saveIndicator.innerHTML = '';
+            }, 3000);
         })
         .catch(error => {
             console.error('Error saving form:', error);
@@ -428,19 +430,34 @@ document.addEventListener('DOMContentLoaded', function() {
         .then(response => response.json())
         .then(data => {
             if (data.success) {
-                // Show success message
+                // Show success message; the PDF and email are prepared by a background job
                 formContainer.innerHTML = `
                     <div class="alert alert-success">
                         <h4>Form Submitted Successfully!</h4>
                         <p>Thank you for completing this form.</p>
-                        ${data.email_sent ? 
-                            '<p>A copy of your completed form has been emailed to you and Minto Disability Services.</p>' : 
-                            '<p>Note: We were unable to email a copy of your form.</p>'}
+                        <p id="submission-delivery">
+                            <span class="spinner-border spinner-border-sm" role="status" aria-hidden="true"></span>
+                            Preparing your PDF and sending it to Minto Disability Services...
+                        </p>
                         <div class="mt-4">
                             <a href="/forms" class="btn btn-primary">Return to Forms</a>
                         </div>
                     </div>
                 `;
+                const delivery = document.getElementById('submission-delivery');
+                waitForJob(data.status_url)
+                    .then(job => {
+                        if (job.status === 'succeeded' && job.result && job.result.email_sent) {
+                            delivery.textContent = 'A copy of your completed form has been emailed to you and Minto Disability Services.';
+                        } else if (job.status === 'succeeded') {
+                            delivery.textContent = 'Note: We were unable to email a copy of your form. Your completed form PDF is stored on the server.';
+                        } else {
+                            delivery.textContent = 'Your answers were saved, but the PDF could not be prepared. Please open the form from your forms list and submit it again.';
+                        }
+                    })
+                    .catch(() => {
+                        delivery.textContent = 'Your answers were saved. The PDF is still being prepared.';
+                    });
             } else {
                 // Show error message
                 let errorMessage = data.message || 'An error occurred during submission.';
@@ -495,16 +512,17 @@ document.addEventListener('DOMContentLoaded', function() {
         saveProgress();
     });
     
-    saveButton.addEventListener('click', saveProgress);
+    saveButton.addEventListener('click', () => saveProgress());
     
     submitButton.addEventListener('click', submitForm);
     
-    // Auto-save every 30 seconds
-    const autoSaveInterval = setInterval(saveProgress, 30000);
+    // Auto-save every 30 seconds (skipped when nothing changed)
+    const autoSaveInterval = setInterval(() => saveProgress({auto: true}), 30000);
     
-    // Clean up interval when leaving the page
+    // Clean up interval when leaving the page, sending any unsaved changes
     window.addEventListener('beforeunload', function() {
         clearInterval(autoSaveInterval);
+        answerSync.save(answers, {keepalive: true}).catch(() => {});
     });
     
     // Initialize form
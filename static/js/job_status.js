@@ -0,0 +1,27 @@
+// Polling of background jobs
+//
+// Resolves with the job once it has succeeded or failed. onUpdate is called with every
+// status seen while waiting. Network errors back off and retry instead of giving up.
+
+function waitForJob(statusUrl, onUpdate, interval = 1500) {
+    return new Promise((resolve, reject) => {
+        function poll() {
+            fetch(statusUrl, {headers: {'Accept': 'application/json'}})
+                .then(response => response.json())
+                .then(data => {
+                    if (!data.success) {
+                        reject(new Error(data.message));
+                        return;
+                    }
+                    if (onUpdate) onUpdate(data.job);
+                    if (data.job.status === 'succeeded' || data.job.status === 'failed') {
+                        resolve(data.job);
+                    } else {
+                        setTimeout(poll, interval);
+                    }
+                })
+                .catch(() => setTimeout(poll, interval * 3));
+        }
+        poll();
+    });
+}
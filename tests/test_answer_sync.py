@@ -0,0 +1,71 @@
+"""Incremental answer saving in static/js/answer_sync.js, run under Node against an in-memory server."""
+
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCRIPT = r"""
+const fs = require('fs');
+const vm = require('vm');
+vm.runInThisContext(fs.readFileSync(process.argv[2], 'utf8'));
+
+// The PATCH endpoint: If-Match against the current version, 412 with the current answers, else merge
+const server = {answers: {q1: 'a', q2: 'b'}, version: 1};
+const etagOf = () => `"v${server.version}"`;
+global.fetch = (url, request) => {
+    const reply = (status, body) => Promise.resolve({
+        status: status,
+        ok: status < 300,
+        headers: {get: name => name === 'ETag' ? etagOf() : null},
+        json: () => Promise.resolve(body)
+    });
+    if (request.headers['If-Match'] !== etagOf()) {
+        return reply(412, {success: false, answers: JSON.parse(JSON.stringify(server.answers))});
+    }
+    const patch = JSON.parse(request.body);
+    Object.keys(patch).forEach(key => {
+        if (patch[key] === null) {
+            delete server.answers[key];
+        } else {
+            server.answers[key] = patch[key];
+        }
+    });
+    server.version += 1;
+    return reply(200, {success: true});
+};
+
+const first = {q1: 'a', q2: 'b'};
+const second = {q1: 'a', q2: 'b'};
+const firstSync = createAnswerSync(1, first, 'v1');
+const secondSync = createAnswerSync(1, second, 'v1');
+
+first.q1 = 'changed in the first session';
+first.q3 = 'added in the first session';
+second.q2 = 'changed in the second session';
+
+firstSync.save(first)
+    .then(() => secondSync.save(second))
+    .then(() => console.log(JSON.stringify({server: server.answers, second: second,
+                                            dirty: secondSync.isDirty(second)})));
+"""
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason='Node.js is not installed')
+def test_conflicting_sessions_keep_each_others_answers(tmp_path):
+    script = tmp_path / 'sync.js'
+    script.write_text(SCRIPT)
+
+    output = subprocess.run(['node', str(script), os.path.join(ROOT, 'static', 'js', 'answer_sync.js')],
+                            capture_output=True, text=True, check=True, timeout=30).stdout
+    result = json.loads(output)
+
+    expected = {'q1': 'changed in the first session', 'q2': 'changed in the second session',
+                'q3': 'added in the first session'}
+    assert result['server'] == expected
+    assert result['second'] == expected
+    assert result['dirty'] is False
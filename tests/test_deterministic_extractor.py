@@ -0,0 +1,36 @@
+"""Layout-based extraction of DOCX form fields."""
+
+import docx
+
+from services.form.deterministic_extractor import extract_docx_fields, extract_text_fields
+
+
+def _grid(path, rows):
+    document = docx.Document()
+    table = document.add_table(rows=len(rows), cols=len(rows[0]))
+    for row, texts in zip(table.rows, rows):
+        for cell, text in zip(row.cells, texts):
+            cell.text = text
+    document.save(path)
+    return path
+
+
+def test_choice_grid_rows_keep_their_columns(tmp_path):
+    path = _grid(str(tmp_path / 'grid.docx'), [['Item', 'Yes', 'No', 'N/A'],
+                                               ['Lights', 'X', 'X', '1'],
+                                               ['Brakes', '', '', ''],
+                                               ['Tyres', '', '', '']])
+
+    extraction = extract_docx_fields(path)
+
+    assert [question["question"] for question in extraction.questions] == ['Lights', 'Brakes', 'Tyres']
+    assert all(question["options"] == ['Yes', 'No', 'N/A'] for question in extraction.questions)
+    assert extraction.regions == []
+
+
+def test_markdown_table_cells_are_read_without_padding():
+    extraction = extract_text_fields("Personal details\n\n| Name: | |\n| Date of birth | |\n")
+
+    assert [question["question"] for question in extraction.questions] == ['Name', 'Date of birth']
+    assert [question["type"] for question in extraction.questions] == ['text', 'date']
+    assert [region["text"] for region in extraction.regions] == ['Personal details']
@@ -0,0 +1,39 @@
+"""Table layout of the streaming DOCX reader."""
+
+import docx
+
+from services.document.docx_engine import docx_to_text, read_docx_blocks, table_rows
+
+
+def _checklist(path):
+    document = docx.Document()
+    table = document.add_table(rows=4, cols=4)
+    for row, texts in zip(table.rows, [['Item', 'Yes', 'No', 'Qty'],
+                                       ['Lights', 'X', 'X', '1'],
+                                       ['Brakes', '', '', ''],
+                                       ['Notes', '', '', '']]):
+        for cell, text in zip(row.cells, texts):
+            cell.text = text
+    # A cell spanning the three answer columns of the last row
+    table.cell(3, 1).merge(table.cell(3, 3)).text = 'See attached'
+    document.save(path)
+    return path
+
+
+def test_adjacent_cells_with_equal_text_are_not_merged(tmp_path):
+    path = _checklist(str(tmp_path / 'checklist.docx'))
+    table = next(block for block in read_docx_blocks(path) if block["type"] == "table")
+
+    rows = list(table_rows(table))
+
+    assert rows[1] == ['Lights', 'X', 'X', '1']
+    assert rows[2] == ['Brakes', '', '', '']
+
+
+def test_spanning_cell_is_listed_once(tmp_path):
+    path = _checklist(str(tmp_path / 'checklist.docx'))
+    table = next(block for block in read_docx_blocks(path) if block["type"] == "table")
+
+    assert table["rows"][3] == ['Notes', 'See attached', 'See attached', 'See attached']
+    assert list(table_rows(table))[3] == ['Notes', 'See attached']
+    assert docx_to_text(path).split('\n')[-2:] == ['Notes', 'See attached']
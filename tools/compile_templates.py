@@ -0,0 +1,84 @@
+"""
+Regenerate the compiled form template library from the template modules.
+
+Usage:
+    python tools/compile_templates.py            # rewrite services/form/compiled_templates.json
+    python tools/compile_templates.py --check    # exit 1 if the artefact is out of date
+
+Every template is built and validated; the differences from the current
+artefact (templates added or removed, questions added, removed or changed)
+are printed before it is written.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.form.template_library import ARTIFACT_PATH, TemplateError, compile_library, write_artifact
+
+
+def diff_libraries(old, new):
+    """Human-readable differences between two compiled libraries."""
+    lines = []
+    old_templates = old.get("templates", {})
+    new_templates = new["templates"]
+    for key in sorted(set(old_templates) | set(new_templates)):
+        if key not in new_templates:
+            lines.append(f"- {key}: removed")
+            continue
+        if key not in old_templates:
+            lines.append(f"+ {key}: added ({len(new_templates[key])} questions)")
+            continue
+        before = {q["id"]: q for q in old_templates[key]}
+        after = {q["id"]: q for q in new_templates[key]}
+        changes = [f"    + {qid}" for qid in after if qid not in before]
+        changes += [f"    - {qid}" for qid in before if qid not in after]
+        changes += [f"    ~ {qid}" for qid in after if qid in before and before[qid] != after[qid]]
+        if not changes and [q["id"] for q in old_templates[key]] != [q["id"] for q in new_templates[key]]:
+            changes.append("    questions reordered")
+        if changes:
+            lines.append(f"~ {key}: {len(before)} -> {len(after)} questions")
+            lines.extend(changes)
+    if not lines and old.get("sources") != new["sources"]:
+        lines.append("  template modules changed without changing any template")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--check', action='store_true', help="only report whether the artefact is up to date")
+    parser.add_argument('--output', default=ARTIFACT_PATH)
+    args = parser.parse_args()
+
+    try:
+        library = compile_library()
+    except TemplateError as e:
+        print(f"Template validation failed: {e}", file=sys.stderr)
+        return 2
+
+    try:
+        with open(args.output, 'r', encoding='utf-8') as f:
+            current = json.load(f)
+    except (OSError, ValueError):
+        current = {}
+
+    differences = diff_libraries(current, library)
+    total = sum(len(questions) for questions in library["templates"].values())
+    if not differences:
+        print(f"{args.output} is up to date ({len(library['templates'])} templates, {total} questions)")
+        return 0
+
+    print('\n'.join(differences))
+    if args.check:
+        print(f"{args.output} is out of date; run python tools/compile_templates.py", file=sys.stderr)
+        return 1
+    write_artifact(library, args.output)
+    print(f"Wrote {args.output} ({len(library['templates'])} templates, {total} questions)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
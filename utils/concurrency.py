@@ -0,0 +1,47 @@
+"""
+Helpers for running work on background threads.
+
+Flask's application context lives in a context variable, so threads started
+from a request do not see ``current_app`` unless it is pushed again. These
+helpers copy the caller's context and push the application context in the
+worker thread so services can keep using ``current_app`` as usual.
+"""
+
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app, has_app_context
+
+
+def submit_with_app_context(executor, fn, *args, **kwargs):
+    """
+    Submit a callable to an executor so that it runs with the caller's
+    context variables and Flask application context.
+    """
+    app = current_app._get_current_object() if has_app_context() else None
+    ctx = contextvars.copy_context()
+
+    def run():
+        if app is None:
+            return fn(*args, **kwargs)
+        with app.app_context():
+            return fn(*args, **kwargs)
+
+    return executor.submit(ctx.run, run)
+
+
+def map_concurrently(fn, items, max_workers=4):
+    """
+    Apply ``fn`` to every item using a bounded thread pool.
+    Results are returned in the same order as the input items.
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    # Nothing to gain from a pool for a single item or a concurrency limit of one
+    if max_workers <= 1 or len(items) == 1:
+        return [fn(item) for item in items]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        futures = [submit_with_app_context(executor, fn, item) for item in items]
+        return [future.result() for future in futures]
@@ -0,0 +1,155 @@
+"""
+A small DAG runner for multi-pass extraction work.
+
+Stages are plain callables that receive a dict of the results produced so far
+and return their own result. Each stage declares the stages it depends on; a
+stage starts as soon as its dependencies have finished, so independent passes
+(for example two model calls over the same document) run concurrently on a
+thread pool. Stages run with the caller's Flask application context.
+
+A run can be given a wall-clock budget. Once the budget is spent, optional
+stages that have not started are skipped and optional stages still running are
+abandoned (their result is ``None``); required stages are always awaited.
+Per-stage timings are logged when the run finishes.
+"""
+
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from utils.concurrency import submit_with_app_context
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Stage:
+    """A single node in the pipeline."""
+
+    name: str
+    fn: Callable[[Dict[str, Any]], Any]
+    requires: Tuple[str, ...] = ()
+    optional: bool = False
+
+
+@dataclass
+class PipelineRun:
+    """Outcome of a pipeline run."""
+
+    results: Dict[str, Any] = field(default_factory=dict)
+    timings: Dict[str, float] = field(default_factory=dict)
+    skipped: List[str] = field(default_factory=list)
+    errors: Dict[str, str] = field(default_factory=dict)
+    elapsed: float = 0.0
+    over_budget: bool = False
+
+    def summary(self) -> str:
+        """One-line description of stage timings for logging."""
+        parts = [f"{name}={seconds:.2f}s" for name, seconds in self.timings.items()]
+        parts.extend(f"{name}=skipped" for name in self.skipped)
+        parts.extend(f"{name}=failed" for name in self.errors)
+        return ", ".join(parts)
+
+
+class Pipeline:
+    """Dependency-ordered, concurrent execution of extraction stages."""
+
+    def __init__(self, name: str, budget_seconds: Optional[float] = None, max_workers: int = 4):
+        self.name = name
+        self.budget_seconds = budget_seconds
+        self.max_workers = max(1, max_workers)
+        self._stages: Dict[str, Stage] = {}
+
+    def add_stage(self, name: str, fn: Callable[[Dict[str, Any]], Any],
+                  requires: Tuple[str, ...] = (), optional: bool = False) -> 'Pipeline':
+        """Register a stage. Dependencies must be registered before the stages that use them."""
+        if name in self._stages:
+            raise ValueError(f"Duplicate pipeline stage: {name}")
+        for dependency in requires:
+            if dependency not in self._stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dependency}'")
+        self._stages[name] = Stage(name, fn, tuple(requires), optional)
+        return self
+
+    def run(self) -> PipelineRun:
+        """
+        Execute all stages and return their results.
+        The first failure of a required stage is re-raised after the run is stopped.
+        """
+        run = PipelineRun()
+        start = time.perf_counter()
+        deadline = start + self.budget_seconds if self.budget_seconds else None
+
+        pending = dict(self._stages)
+        running = {}
+        started_at = {}
+        finished = set()
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"pipeline-{self.name}")
+        try:
+            while pending or running:
+                budget_spent = deadline is not None and time.perf_counter() >= deadline
+                if budget_spent and not run.over_budget:
+                    run.over_budget = True
+                    logger.warning(f"Pipeline {self.name} exceeded its {self.budget_seconds}s budget")
+
+                # Start every stage whose dependencies are done
+                for name in list(pending):
+                    stage = pending[name]
+                    if not all(dependency in finished for dependency in stage.requires):
+                        continue
+                    del pending[name]
+                    if stage.optional and budget_spent:
+                        self._finish(run, finished, name, None, skipped=True)
+                        continue
+                    started_at[name] = time.perf_counter()
+                    snapshot = dict(run.results)
+                    running[submit_with_app_context(executor, stage.fn, snapshot)] = name
+
+                if not running:
+                    continue
+
+                # Only optional stages are subject to the budget
+                timeout = None
+                if deadline is not None and all(self._stages[name].optional for name in running.values()):
+                    timeout = max(0.0, deadline - time.perf_counter())
+
+                done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+
+                if not done:
+                    # Budget spent while only optional stages were in flight: abandon them
+                    for future, name in list(running.items()):
+                        future.cancel()
+                        del running[future]
+                        self._finish(run, finished, name, None, skipped=True)
+                    continue
+
+                for future in done:
+                    name = running.pop(future)
+                    run.timings[name] = time.perf_counter() - started_at[name]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        if not self._stages[name].optional:
+                            logger.error(f"Pipeline {self.name} stage '{name}' failed: {str(e)}")
+                            raise
+                        logger.warning(f"Optional pipeline stage '{name}' failed: {str(e)}")
+                        run.errors[name] = str(e)
+                        del run.timings[name]
+                        result = None
+                    self._finish(run, finished, name, result)
+        finally:
+            # Do not block on abandoned stages; their results are discarded
+            executor.shutdown(wait=False, cancel_futures=True)
+            run.elapsed = time.perf_counter() - start
+            logger.info(f"Pipeline {self.name} finished in {run.elapsed:.2f}s ({run.summary()})")
+
+        return run
+
+    @staticmethod
+    def _finish(run: PipelineRun, finished: set, name: str, result: Any, skipped: bool = False):
+        run.results[name] = result
+        if skipped:
+            run.skipped.append(name)
+        finished.add(name)